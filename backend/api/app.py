@@ -113,6 +113,23 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning("[AutoComplete] could not start loop: %s", e)
 
+    app.state.ingestion_worker = None
+    if str(getattr(s, "ingestion_worker_mode", "embedded")).lower() == "embedded":
+        job_repo = getattr(app.state, "ingestion_job_repository", None)
+        rag_ingestor = getattr(app.state, "rag_ingestor", None)
+        if job_repo is not None and rag_ingestor is not None:
+            from api.routes.rag.corpus_state import refresh_rag_corpus_state
+            from rag.ingestion.worker import build_ingestion_worker
+
+            app.state.ingestion_worker = build_ingestion_worker(
+                s,
+                job_repository=job_repo,
+                rag_ingestor=rag_ingestor,
+                status_repository=getattr(app.state, "document_ingestion_status_repository", None),
+                on_ingested=lambda: refresh_rag_corpus_state(app.state),
+            )
+            app.state.ingestion_worker.start()
+
     yield
 
     logger.info("Cerrando aplicacion y liberando recursos...")
@@ -124,6 +141,17 @@ async def lifespan(app: FastAPI):
             except (asyncio.CancelledError, Exception):
                 pass
 
+        ingestion_worker = getattr(app.state, "ingestion_worker", None)
+        if ingestion_worker is not None:
+            await ingestion_worker.stop()
+            logger.info("Worker de ingesta embebido detenido.")
+
+        try:
+            from rag.ingestion.chunking_pool import shutdown_chunking_pool
+            shutdown_chunking_pool()
+        except Exception as e:
+            logger.warning("No se pudo detener el pool de chunking: %s", e)
+
         if hasattr(app.state, "chat_manager"):
             if hasattr(app.state.chat_manager, "close"):
                 await app.state.chat_manager.close()
@@ -139,6 +167,18 @@ async def lifespan(app: FastAPI):
                 await app.state.embedding_manager.close()
             logger.info("EmbeddingManager cerrado.")
 
+        try:
+            from database.retrieval_log_repository import close_retrieval_log_writer
+            await close_retrieval_log_writer()
+        except Exception as e:
+            logger.warning("No se pudieron vaciar los retrieval logs pendientes: %s", e)
+
+        try:
+            from cache.manager import cache
+            await cache.aclose()
+        except Exception as e:
+            logger.warning("No se pudo cerrar el cliente Redis async: %s", e)
+
         if hasattr(app.state, "mongodb_client") and app.state.mongodb_client:
             logger.info("Closing persistent MongoDB client...")
             try:
@@ -20,9 +20,8 @@ from database.bot_state_repo import (
 )
 from database.whatsapp_session_repository import WhatsAppSessionRepository
 from rag.embeddings.embedding_manager import EmbeddingManager
-from rag.ingestion.hierarchical_chunker import HierarchicalChunker
-from rag.ingestion.hierarchical_ingestion_service import HierarchicalIngestionService
-from rag.retrieval import HierarchicalRetriever
+from rag.ingestion.worker import build_rag_ingestor
+from rag.retrieval import HierarchicalRetriever, InMemoryLexicalIndex
 from rag.retrieval.reranker import build_parent_reranker
 from rag.vector_store.vector_store import VectorStore
 from storage.documents import PDFManager
@@ -138,6 +137,11 @@ async def _init_cache(app: FastAPI, s) -> None:
     except Exception as e:
         logger.warning("No se pudo determinar el estado del cache en arranque: %s", e)
 
+    try:
+        cache.start_l1_bus()
+    except Exception as e:
+        logger.warning("No se pudo arrancar el bus de invalidación L1: %s", e)
+
     try:
         cache_health = cache.get_health_status()
     except Exception as cache_error:
@@ -262,6 +266,15 @@ async def _init_mongodb(app: FastAPI, s) -> None:
             await rl_repo.ensure_indexes()
         except Exception as e_idx:
             logger.warning("No se pudieron aplicar indices de retrieval_logs al arranque: %s", e_idx)
+        try:
+            from database import DocumentIngestionStatusRepository
+            from database.ingestion_job_repository import IngestionJobRepository
+            app.state.document_ingestion_status_repository = DocumentIngestionStatusRepository(app.state.mongodb_client)
+            app.state.ingestion_job_repository = IngestionJobRepository(app.state.mongodb_client)
+            await app.state.document_ingestion_status_repository.ensure_indexes()
+            await app.state.ingestion_job_repository.ensure_indexes()
+        except Exception as e_idx:
+            logger.warning("No se pudieron aplicar indices de ingestion_jobs al arranque: %s", e_idx)
         try:
             app.state.rag_parent_repository = RAGParentDocumentRepository(
                 mongodb_client=app.state.mongodb_client,
@@ -284,19 +297,22 @@ async def _init_mongodb(app: FastAPI, s) -> None:
         except Exception as e_idx:
             logger.warning("No se pudieron aplicar indices RAG al arranque: %s", e_idx)
         try:
-            app.state.hierarchical_chunker = HierarchicalChunker()
-            app.state.rag_ingestor = HierarchicalIngestionService(
-                chunker=app.state.hierarchical_chunker,
+            app.state.rag_ingestor = build_rag_ingestor(
+                s,
                 parent_repository=app.state.rag_parent_repository,
                 embedding_manager=app.state.embedding_manager,
                 vector_store=app.state.vector_store,
                 lexical_repository=app.state.rag_child_lexical_repository,
             )
+            app.state.hierarchical_chunker = app.state.rag_ingestor.chunker
+            retrieval_lexical_repository = app.state.rag_child_lexical_repository
+            if retrieval_lexical_repository is not None and getattr(s, "enable_lexical_memory_index", True):
+                retrieval_lexical_repository = InMemoryLexicalIndex(retrieval_lexical_repository)
             app.state.rag_retriever = HierarchicalRetriever(
                 child_vector_store=app.state.vector_store,
                 parent_repository=app.state.rag_parent_repository,
                 embedding_manager=app.state.embedding_manager,
-                lexical_repository=app.state.rag_child_lexical_repository,
+                lexical_repository=retrieval_lexical_repository,
                 reranker=build_parent_reranker(),
                 child_fetch_multiplier=getattr(s, "retrieval_k_multiplier", 3),
                 cache_enabled=s.enable_cache,
@@ -4,7 +4,6 @@ Pure business logic -- no HTTP/FastAPI concerns.
 Imported by api/app.py, api/app_startup.py, and api/routes/bot/config_routes.py.
 """
 import logging
-import time
 
 from cache.manager import cache
 from database.bot_state_repo import (
@@ -18,7 +17,6 @@ logger = logging.getLogger(__name__)
 BOT_CONFIG_CACHE_KEY = "bot:config"
 BOT_PUBLIC_CONFIG_CACHE_KEY = "bot:config:public"
 BOT_PUBLIC_CONFIG_CACHE_TTL_SECONDS = 3600
-RUNTIME_CONFIG_LOCAL_TTL_SECONDS = 5.0
 
 BOT_PUBLIC_CONFIG_FIELDS = (
     "bot_name",
@@ -34,46 +32,23 @@ SAFE_PUBLIC_BOT_CONFIG: dict = {
     "input_placeholder": "Escribe aqui...",
 }
 
-_runtime_config_local_cache: dict | None = None
-_runtime_config_local_expires_at: float = 0.0
-
-
-def _invalidate_runtime_config_local_cache() -> None:
-    global _runtime_config_local_cache, _runtime_config_local_expires_at
-    _runtime_config_local_cache = None
-    _runtime_config_local_expires_at = 0.0
+# Read on every request to /chat, /bot, /whatsapp: served from the worker's
+# L1 tier and invalidated over Redis pub/sub on write (cache/l1.py).
+cache.register_hot_keys(BOT_CONFIG_CACHE_KEY)
 
 
 def read_runtime_config_from_cache() -> dict | None:
-    """Read runtime config with a short-TTL local cache to avoid hitting Redis
-    on every request to /chat, /bot, /whatsapp.
-
-    Trade-off: a config change on another worker is visible after at most
-    RUNTIME_CONFIG_LOCAL_TTL_SECONDS. Acceptable for runtime tuning knobs.
-    """
-    global _runtime_config_local_cache, _runtime_config_local_expires_at
-
-    now = time.monotonic()
-    if _runtime_config_local_cache is not None and now < _runtime_config_local_expires_at:
-        return _runtime_config_local_cache
-
     if not redis_coordination_available():
-        _invalidate_runtime_config_local_cache()
         return None
 
     try:
-        normalized = normalize_runtime_config_payload(cache.get(BOT_CONFIG_CACHE_KEY))
+        return normalize_runtime_config_payload(cache.get(BOT_CONFIG_CACHE_KEY))
     except Exception:
         return None
 
-    _runtime_config_local_cache = normalized
-    _runtime_config_local_expires_at = now + RUNTIME_CONFIG_LOCAL_TTL_SECONDS
-    return normalized
-
 
 def write_runtime_config_to_cache(config_obj: object) -> None:
     if not redis_coordination_available():
-        _invalidate_runtime_config_local_cache()
         return
 
     payload = config_obj if isinstance(config_obj, dict) else build_runtime_config_payload(config_obj)
@@ -86,8 +61,6 @@ def write_runtime_config_to_cache(config_obj: object) -> None:
     except Exception as exc:
         logger.warning("No se pudo escribir la configuracion de runtime en Redis: %s", exc, exc_info=True)
 
-    _invalidate_runtime_config_local_cache()
-
 
 def normalize_public_config_payload(payload: object) -> dict | None:
     normalized = normalize_runtime_config_payload(payload)
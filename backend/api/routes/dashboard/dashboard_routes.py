@@ -10,7 +10,7 @@ from pydantic import BaseModel
 from auth.dependencies import require_admin
 from cache.manager import cache
 from database.mongodb import get_mongodb_client
-from database.retrieval_log_repository import GAP_REASONS, REASON_META
+from database.retrieval_log_repository import GAP_REASONS, REASON_META, get_retrieval_log_writer
 from infra.logging_utils import get_logger
 from infra.metrics_collector import get_metrics_collector
 
@@ -27,9 +27,12 @@ _GAP_WINDOWS_DAYS = {"24h": 1, "7d": 7, "30d": 30}
 _GAP_MAX_LIMIT = 500
 
 
+def _get_mongodb_client(request: Request):
+    return getattr(request.app.state, "mongodb_client", None) or get_mongodb_client()
+
+
 def _get_db(request: Request):
-    mongodb_client = getattr(request.app.state, "mongodb_client", None) or get_mongodb_client()
-    return mongodb_client.db
+    return _get_mongodb_client(request).db
 
 
 class OverviewResponse(BaseModel):
@@ -98,145 +101,148 @@ class GapReasonsResponse(BaseModel):
 
 @router.get("/overview", response_model=OverviewResponse)
 async def get_overview(request: Request, _=Depends(require_admin)):
-    cached = await cache.aget("dashboard:overview")
-    if cached is not None:
-        return OverviewResponse.model_validate(cached)
-
     try:
-        db = _get_db(request)
-        now_lima = datetime.now(_TZ)
-        today_start_utc = datetime.combine(now_lima.date(), time.min, _TZ).astimezone(timezone.utc)
-        week_ago_utc = datetime.now(timezone.utc) - timedelta(days=7)
-
-        has_lead = {"lead_email": {"$exists": True, "$ne": None, "$nin": ["", None]}}
-
-        def _count_distinct(pipeline_match: dict):
-            return db.messages.aggregate([
-                {"$match": pipeline_match},
-                {"$group": {"_id": "$conversation_id"}},
-                {"$count": "n"},
-            ]).to_list(length=1)
-
-        (
-            today_messages,
-            total_messages,
-            today_conv_res,
-            total_conv_res,
-            leads_total,
-            leads_this_week,
-            pdfs_ready,
-        ) = await asyncio.gather(
-            db.messages.count_documents({"timestamp": {"$gte": today_start_utc}}),
-            db.messages.count_documents({}),
-            _count_distinct({"timestamp": {"$gte": today_start_utc}}),
-            _count_distinct({}),
-            db.conversations.count_documents(has_lead),
-            db.conversations.count_documents({**has_lead, "lead_captured_at": {"$gte": week_ago_utc}}),
-            db.document_ingestion_status.count_documents({"status": "ready"}),
+        cached = await cache.aget_or_compute(
+            "dashboard:overview", lambda: _compute_overview(request), ttl=_TTL_OVERVIEW,
         )
-
-        result = OverviewResponse(
-            today_messages=today_messages,
-            total_messages=total_messages,
-            today_conversations=today_conv_res[0]["n"] if today_conv_res else 0,
-            total_conversations=total_conv_res[0]["n"] if total_conv_res else 0,
-            leads_total=leads_total,
-            leads_this_week=leads_this_week,
-            pdfs_ready=pdfs_ready,
-        )
-        await cache.aset("dashboard:overview", result.model_dump(), ttl=_TTL_OVERVIEW)
-        return result
-
+        return OverviewResponse.model_validate(cached)
     except Exception:
         logger.exception("Error in dashboard overview")
         raise HTTPException(status_code=500, detail="Error al obtener resumen del dashboard")
 
 
+async def _compute_overview(request: Request) -> dict:
+    db = _get_db(request)
+    now_lima = datetime.now(_TZ)
+    today_start_utc = datetime.combine(now_lima.date(), time.min, _TZ).astimezone(timezone.utc)
+    week_ago_utc = datetime.now(timezone.utc) - timedelta(days=7)
+
+    has_lead = {"lead_email": {"$exists": True, "$ne": None, "$nin": ["", None]}}
+
+    def _count_distinct(pipeline_match: dict):
+        return db.messages.aggregate([
+            {"$match": pipeline_match},
+            {"$group": {"_id": "$conversation_id"}},
+            {"$count": "n"},
+        ]).to_list(length=1)
+
+    (
+        today_messages,
+        total_messages,
+        today_conv_res,
+        total_conv_res,
+        leads_total,
+        leads_this_week,
+        pdfs_ready,
+    ) = await asyncio.gather(
+        db.messages.count_documents({"timestamp": {"$gte": today_start_utc}}),
+        db.messages.count_documents({}),
+        _count_distinct({"timestamp": {"$gte": today_start_utc}}),
+        _count_distinct({}),
+        db.conversations.count_documents(has_lead),
+        db.conversations.count_documents({**has_lead, "lead_captured_at": {"$gte": week_ago_utc}}),
+        db.document_ingestion_status.count_documents({"status": "ready"}),
+    )
+
+    result = OverviewResponse(
+        today_messages=today_messages,
+        total_messages=total_messages,
+        today_conversations=today_conv_res[0]["n"] if today_conv_res else 0,
+        total_conversations=total_conv_res[0]["n"] if total_conv_res else 0,
+        leads_total=leads_total,
+        leads_this_week=leads_this_week,
+        pdfs_ready=pdfs_ready,
+    )
+    return result.model_dump()
+
+
 @router.get("/leads", response_model=LeadsResponse)
 async def get_leads(request: Request, _=Depends(require_admin)):
-    cached = await cache.aget("dashboard:leads")
-    if cached is not None:
-        return LeadsResponse.model_validate(cached)
-
     try:
-        db = _get_db(request)
-        week_ago_utc = datetime.now(timezone.utc) - timedelta(days=7)
-        has_lead = {"lead_email": {"$exists": True, "$ne": None, "$nin": ["", None]}}
-
-        cursor = db.conversations.find(
-            has_lead,
-            {"conversation_id": 1, "lead_name": 1, "lead_email": 1, "lead_captured_at": 1},
-        ).sort("lead_captured_at", -1).limit(20)
-
-        docs, total, this_week = await asyncio.gather(
-            cursor.to_list(length=20),
-            db.conversations.count_documents(has_lead),
-            db.conversations.count_documents({
-                **has_lead,
-                "lead_captured_at": {"$gte": week_ago_utc},
-            }),
+        cached = await cache.aget_or_compute(
+            "dashboard:leads", lambda: _compute_leads(request), ttl=_TTL_LEADS,
         )
-
-        items = [
-            LeadItem(
-                conversation_id=d.get("conversation_id", ""),
-                lead_name=d.get("lead_name"),
-                lead_email=d.get("lead_email", ""),
-                captured_at=d.get("lead_captured_at"),
-            )
-            for d in docs
-        ]
-
-        result = LeadsResponse(total=total, this_week=this_week, items=items)
-        await cache.aset("dashboard:leads", result.model_dump(), ttl=_TTL_LEADS)
-        return result
-
+        return LeadsResponse.model_validate(cached)
     except Exception:
         logger.exception("Error in dashboard leads")
         raise HTTPException(status_code=500, detail="Error al obtener leads del dashboard")
 
 
-@router.get("/peak-hours", response_model=PeakHoursResponse)
-async def get_peak_hours(request: Request, _=Depends(require_admin)):
-    cached = await cache.aget("dashboard:peak_hours")
-    if cached is not None:
-        return PeakHoursResponse.model_validate(cached)
+async def _compute_leads(request: Request) -> dict:
+    db = _get_db(request)
+    week_ago_utc = datetime.now(timezone.utc) - timedelta(days=7)
+    has_lead = {"lead_email": {"$exists": True, "$ne": None, "$nin": ["", None]}}
 
-    try:
-        db = _get_db(request)
-        since_30d = datetime.now(timezone.utc) - timedelta(days=30)
+    cursor = db.conversations.find(
+        has_lead,
+        {"conversation_id": 1, "lead_name": 1, "lead_email": 1, "lead_captured_at": 1},
+    ).sort("lead_captured_at", -1).limit(20)
 
-        # UTC-5 (Lima): (utc_hour - 5 + 24) % 24 avoids negative mod
-        pipeline = [
-            {"$match": {"timestamp": {"$gte": since_30d}}},
-            {
-                "$group": {
-                    "_id": {
-                        "$mod": [
-                            {"$add": [{"$subtract": [{"$hour": "$timestamp"}, 5]}, 24]},
-                            24,
-                        ]
-                    },
-                    "count": {"$sum": 1},
-                }
-            },
-            {"$sort": {"_id": 1}},
-        ]
+    docs, total, this_week = await asyncio.gather(
+        cursor.to_list(length=20),
+        db.conversations.count_documents(has_lead),
+        db.conversations.count_documents({
+            **has_lead,
+            "lead_captured_at": {"$gte": week_ago_utc},
+        }),
+    )
 
-        cursor = db.messages.aggregate(pipeline)
-        raw = await cursor.to_list(length=None)
-        by_hour = {r["_id"]: r["count"] for r in raw}
-        items = [HourBucket(hour=h, count=by_hour.get(h, 0)) for h in range(24)]
+    items = [
+        LeadItem(
+            conversation_id=d.get("conversation_id", ""),
+            lead_name=d.get("lead_name"),
+            lead_email=d.get("lead_email", ""),
+            captured_at=d.get("lead_captured_at"),
+        )
+        for d in docs
+    ]
 
-        result = PeakHoursResponse(items=items)
-        await cache.aset("dashboard:peak_hours", result.model_dump(), ttl=_TTL_PEAK_HOURS)
-        return result
+    result = LeadsResponse(total=total, this_week=this_week, items=items)
+    return result.model_dump()
 
+
+@router.get("/peak-hours", response_model=PeakHoursResponse)
+async def get_peak_hours(request: Request, _=Depends(require_admin)):
+    try:
+        cached = await cache.aget_or_compute(
+            "dashboard:peak_hours", lambda: _compute_peak_hours(request), ttl=_TTL_PEAK_HOURS,
+        )
+        return PeakHoursResponse.model_validate(cached)
     except Exception:
         logger.exception("Error in dashboard peak-hours")
         raise HTTPException(status_code=500, detail="Error al obtener distribucion horaria")
 
 
+async def _compute_peak_hours(request: Request) -> dict:
+    db = _get_db(request)
+    since_30d = datetime.now(timezone.utc) - timedelta(days=30)
+
+    # UTC-5 (Lima): (utc_hour - 5 + 24) % 24 avoids negative mod
+    pipeline = [
+        {"$match": {"timestamp": {"$gte": since_30d}}},
+        {
+            "$group": {
+                "_id": {
+                    "$mod": [
+                        {"$add": [{"$subtract": [{"$hour": "$timestamp"}, 5]}, 24]},
+                        24,
+                    ]
+                },
+                "count": {"$sum": 1},
+            }
+        },
+        {"$sort": {"_id": 1}},
+    ]
+
+    cursor = db.messages.aggregate(pipeline)
+    raw = await cursor.to_list(length=None)
+    by_hour = {r["_id"]: r["count"] for r in raw}
+    items = [HourBucket(hour=h, count=by_hour.get(h, 0)) for h in range(24)]
+
+    result = PeakHoursResponse(items=items)
+    return result.model_dump()
+
+
 @router.get("/gap-reasons", response_model=GapReasonsResponse)
 async def get_gap_reasons(_=Depends(require_admin)):
     """Reason metadata (label + severity) for knowledge-gaps UI.
@@ -343,16 +349,30 @@ async def get_knowledge_gaps(
 
 
 @router.get("/observability")
-async def get_observability(_=Depends(require_admin)):
+async def get_observability(request: Request, _=Depends(require_admin)):
     """Métricas operativas in-memory: latencias por etapa, throughput, gating.
 
     Las muestras viven en sliding window 1h dentro del proceso (1 worker recomendado).
     Para historiales largos, persistir snapshots periódicamente a Mongo (futuro).
     El campo `worker_pid` permite detectar si la respuesta provino de un worker
     distinto cuando WORKERS>1.
+
+    El bloque `cache` desglosa hits/misses, latencias get/set, tamaños de
+    payload y desalojos por familia de claves (cache/metrics.py), más los
+    contadores globales de Redis. `retrieval_logs` reporta el writer por
+    lotes de retrieval_logs: escritos, descartados por buffer lleno, fallos
+    y tasa de escritura. `chat_messages` hace lo mismo con el write-behind de
+    mensajes (None si CHAT_MESSAGE_WRITE_BEHIND está apagado): pendientes,
+    reintentados, descartados y fallbacks a escritura en línea.
     """
     try:
-        return get_metrics_collector().snapshot()
+        snapshot = get_metrics_collector().snapshot()
+        cache_block = cache.metrics_snapshot()
+        cache_block["redis"] = await asyncio.to_thread(cache.redis_server_stats)
+        snapshot["cache"] = cache_block
+        snapshot["retrieval_logs"] = get_retrieval_log_writer().stats()
+        snapshot["chat_messages"] = _get_mongodb_client(request).message_writer_stats()
+        return snapshot
     except Exception:
         logger.exception("Error in dashboard observability")
         raise HTTPException(status_code=500, detail="Error al obtener métricas operativas")
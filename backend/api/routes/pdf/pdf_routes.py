@@ -8,6 +8,7 @@ from starlette.responses import FileResponse
 
 from api.routes.rag.corpus_state import refresh_rag_corpus_state
 from api.schemas import (
+    IngestionJobResponse,
     PDFDeleteResponse,
     PDFIngestionStatusResponse,
     PDFListItem,
@@ -34,49 +35,14 @@ def _require_rag_ingestor(request: Request):
     return rag_ingestor
 
 
-async def _run_pdf_ingestion(app_state, file_path: Path) -> None:
-    filename = file_path.name
-    ingestion_repo = getattr(app_state, "document_ingestion_status_repository", None)
-    pdf_file_manager = getattr(app_state, "pdf_file_manager", None)
-
-    try:
-        if ingestion_repo is not None:
-            await ingestion_repo.mark_processing(filename)
-
-        rag_ingestor = getattr(app_state, "rag_ingestor", None)
-        if rag_ingestor is None:
-            raise RuntimeError("El pipeline RAG no esta disponible actualmente.")
-
-        ingest_result = await rag_ingestor.ingest_single_pdf(file_path)
-        ingest_status = str(ingest_result.get("status", "error")).lower()
-
-        if ingest_status == "skipped":
-            logger.info("PDF con contenido duplicado; ya existe en vector store: %s", filename)
-            if ingestion_repo is not None:
-                await ingestion_repo.mark_ready(
-                    filename=filename,
-                    doc_id=ingest_result.get("doc_id"),
-                    parent_count=int(ingest_result.get("parent_count", 0) or 0),
-                    child_count=int(ingest_result.get("child_count", 0) or 0),
-                )
-            return
-
-        if ingest_status != "success":
-            detail = ingest_result.get("error") or "La ingesta del PDF fallo"
-            raise RuntimeError(str(detail))
-
-        if ingestion_repo is not None:
-            await ingestion_repo.mark_ready(
-                filename=filename,
-                doc_id=ingest_result.get("doc_id"),
-                parent_count=int(ingest_result.get("parent_count", 0) or 0),
-                child_count=int(ingest_result.get("child_count", 0) or 0),
-            )
-        refresh_rag_corpus_state(app_state)
-    except Exception as exc:
-        logger.error("Ingesta asincrona fallo para %s: %s", filename, exc, exc_info=True)
-        if ingestion_repo is not None:
-            await ingestion_repo.mark_failed(filename=filename, error=str(exc))
+def _require_ingestion_queue(request: Request):
+    job_repo = getattr(request.app.state, "ingestion_job_repository", None)
+    if job_repo is None:
+        raise HTTPException(
+            status_code=503,
+            detail="La cola de ingesta no esta disponible actualmente.",
+        )
+    return job_repo
 
 
 @router.post("/upload", response_model=PDFUploadResponse)
@@ -84,15 +50,15 @@ async def _run_pdf_ingestion(app_state, file_path: Path) -> None:
 async def upload_pdf(
     request: Request,
     response: Response,
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_user: User = Depends(require_manage_documents),
 ):
-    """Sube el PDF y agenda su ingesta asincronica."""
+    """Sube el PDF y encola su ingesta; responde con el `job_id` sin esperar al worker."""
     _uploader_id = str(current_user.id)
     del response, current_user
     pdf_file_manager = request.app.state.pdf_file_manager
     _require_rag_ingestor(request)
+    job_repo = _require_ingestion_queue(request)
     ingestion_repo = getattr(request.app.state, "document_ingestion_status_repository", None)
 
     try:
@@ -120,7 +86,15 @@ async def upload_pdf(
                 size=file_size,
             )
 
-        background_tasks.add_task(_run_pdf_ingestion, request.app.state, file_path)
+        job = await job_repo.enqueue(
+            filename=file_path.name,
+            file_path=str(file_path),
+            size=file_size,
+            max_attempts=int(getattr(settings, "ingestion_job_max_attempts", 3)),
+        )
+        ingestion_worker = getattr(request.app.state, "ingestion_worker", None)
+        if ingestion_worker is not None:
+            ingestion_worker.notify()
         pdfs = await pdf_file_manager.list_pdfs()
 
         return PDFUploadResponse(
@@ -128,6 +102,7 @@ async def upload_pdf(
             file_path=str(file_path),
             filename=file_path.name,
             ingestion_status="queued",
+            job_id=job["job_id"],
             pdfs_in_directory=[p["filename"] for p in pdfs],
         )
 
@@ -205,6 +180,19 @@ async def get_pdf_ingestion_status(
     )
 
 
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+async def get_ingestion_job(
+    request: Request,
+    job_id: str,
+    _: User = Depends(require_manage_documents),
+):
+    job_repo = _require_ingestion_queue(request)
+    job = await job_repo.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job de ingesta no encontrado.")
+    return IngestionJobResponse(**job)
+
+
 @router.delete("/{filename}", response_model=PDFDeleteResponse)
 async def delete_pdf(
     request: Request,
@@ -20,6 +20,7 @@ from api.schemas import (
 )
 from auth.permissions import require_manage_documents, require_view_debug
 from domain.user import User
+from rag.corpus_centroid import reset_centroid_stats
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -97,6 +98,7 @@ async def clear_rag(
         total_pdfs = len(await pdf_processor.list_pdfs())
 
         await rag_retriever.vector_store.delete_collection()
+        await reset_centroid_stats()
         logger.info("Vector store limpiado y reinicializado")
         if rag_parent_repository is not None:
             await rag_parent_repository.clear()
@@ -6,6 +6,7 @@ Los esquemas están organizados por dominio funcional.
 
 from .base import BaseResponse
 from .pdf import (
+    IngestionJobResponse,
     PDFIngestionStatusResponse,
     PDFListItem,
     PDFListResponse,
@@ -44,6 +45,7 @@ __all__ = [
     "PDFListResponse",
     "PDFUploadResponse",
     "PDFIngestionStatusResponse",
+    "IngestionJobResponse",
     "PDFDeleteResponse",
     
     # Chat
@@ -28,6 +28,7 @@ class PDFUploadResponse(BaseResponse):
     filename: str
     ingestion_status: DocumentIngestionStatus
     pdfs_in_directory: List[str]
+    job_id: str | None = None
 
 
 class PDFIngestionStatusResponse(BaseModel):
@@ -40,6 +41,19 @@ class PDFIngestionStatusResponse(BaseModel):
     child_count: int = 0
     updated_at: datetime | None = None
 
+class IngestionJobResponse(BaseModel):
+    """State of one job in the durable ingestion queue."""
+    job_id: str
+    filename: str
+    status: DocumentIngestionStatus
+    attempts: int = 0
+    max_attempts: int = 1
+    error: str | None = None
+    result: dict | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    finished_at: datetime | None = None
+
 class PDFDeleteResponse(BaseResponse):
     """Response model for PDF delete endpoint."""
     pass
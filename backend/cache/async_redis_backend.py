@@ -0,0 +1,202 @@
+"""Backend Redis nativo asyncio para la API async de `CacheManager`.
+
+`CacheManager.aget/aset/...` antes saltaban a un hilo (`asyncio.to_thread`)
+para usar el cliente síncrono. Con cientos de streams SSE concurrentes el
+pool de hilos por defecto (min(32, cpu+4)) se satura y las lecturas de caché
+quedan encoladas detrás de I/O bloqueante. Este backend usa `redis.asyncio`
+con su propio `ConnectionPool`, así que las operaciones async no ocupan
+hilos.
+
+- Mismo formato en el cable que `RedisCache` (`JSON:` / `VEC1` / `ZLB1`,
+  mismo `PayloadCodec`): ambos backends leen y escriben las mismas claves.
+- Los clientes `redis.asyncio` quedan ligados al event loop que los crea;
+  se mantiene un cliente (y pool) por loop para que tests y scripts que
+  levantan loops propios no compartan conexiones entre loops.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import weakref
+from typing import Any, Callable, Dict, List, Optional
+
+from cache.redis_backend import PayloadCodec, decode_list_member, decode_payload, default_codec
+
+logger = logging.getLogger(__name__)
+
+# Claves por UNLINK en invalidate_prefix (evita un round trip por clave).
+_UNLINK_BATCH_SIZE = 500
+
+
+class AsyncRedisCache:
+    """Capa de caché Redis con la misma API que `RedisCache`, pero `async`."""
+
+    # Callback (key, bytes, bytes_sin_comprimir) por payload; lo fija CacheManager.
+    payload_observer: Optional[Callable[[str, int, int], None]] = None
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        *,
+        max_connections: int = 200,
+        client: Any = None,
+        client_factory: Optional[Callable[[], Any]] = None,
+        codec: Optional[PayloadCodec] = None,
+    ) -> None:
+        if client is None and client_factory is None and not url:
+            raise ValueError("AsyncRedisCache requiere url, client o client_factory")
+        self._url = url
+        self.codec = codec or default_codec()
+        self._max_connections = int(max_connections)
+        self._fixed_client = client
+        self._client_factory = client_factory or self._default_client
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _default_client(self) -> Any:
+        import redis.asyncio as aioredis  # type: ignore
+
+        pool = aioredis.ConnectionPool.from_url(
+            self._url,
+            max_connections=self._max_connections,
+            decode_responses=False,
+        )
+        return aioredis.Redis(connection_pool=pool)
+
+    @property
+    def client(self) -> Any:
+        """Cliente del event loop actual (se crea en el primer uso)."""
+        if self._fixed_client is not None:
+            return self._fixed_client
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._client_factory()
+            self._clients[loop] = client
+        return client
+
+    async def _decode(self, key: str, raw: Any) -> Optional[Any]:
+        value, corrupt = decode_payload(raw)
+        if corrupt:
+            await self.delete(key)
+        return value
+
+    async def get(self, key: str) -> Optional[Any]:
+        if key is None:
+            return None
+        return await self._decode(key, await self.client.get(key))
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Lee varias claves en un solo round trip (MGET). Solo devuelve hits."""
+        keys = [key for key in keys if key is not None]
+        if not keys:
+            return {}
+        raws = await self.client.mget(keys)
+        results: Dict[str, Any] = {}
+        for key, raw in zip(keys, raws):
+            value = await self._decode(key, raw)
+            if value is not None:
+                results[key] = value
+        return results
+
+    def _encode(self, key: str, value: Any) -> Optional[bytes]:
+        encoded = self.codec.encode(key, value)
+        if encoded is None:
+            return None
+        payload, raw_size = encoded
+        if self.payload_observer is not None:
+            self.payload_observer(key, len(payload), raw_size)
+        return payload
+
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        if key is None:
+            return
+        payload = self._encode(key, value)
+        if payload is None:
+            return
+        ttl_seconds = int(ttl) if ttl is not None else 0
+        if ttl_seconds > 0:
+            await self.client.set(name=key, value=payload, ex=ttl_seconds)
+        else:
+            await self.client.set(name=key, value=payload)
+
+    async def set_many(self, items: Dict[str, Any], ttl: int) -> None:
+        """Escribe varias claves en un solo round trip (pipeline sin MULTI)."""
+        ttl_seconds = int(ttl) if ttl is not None else 0
+        pipe = self.client.pipeline(transaction=False)
+        queued = 0
+        for key, value in items.items():
+            if key is None:
+                continue
+            payload = self._encode(key, value)
+            if payload is None:
+                continue
+            if ttl_seconds > 0:
+                pipe.set(name=key, value=payload, ex=ttl_seconds)
+            else:
+                pipe.set(name=key, value=payload)
+            queued += 1
+        if queued:
+            await pipe.execute()
+
+    async def delete(self, key: str) -> None:
+        if key is None:
+            return
+        try:
+            await self.client.unlink(key)
+        except Exception as e:
+            logger.warning("AsyncRedisCache.delete failed | key=%s | err=%s", key, e)
+
+    async def invalidate_prefix(self, prefix: str) -> None:
+        if not prefix:
+            return
+        try:
+            batch: List[Any] = []
+            async for key in self.client.scan_iter(match=f"{prefix}*"):
+                batch.append(key)
+                if len(batch) >= _UNLINK_BATCH_SIZE:
+                    await self.client.unlink(*batch)
+                    batch = []
+            if batch:
+                await self.client.unlink(*batch)
+        except Exception as e:
+            logger.warning("AsyncRedisCache.invalidate_prefix failed | prefix=%s | err=%s", prefix, e)
+
+    async def push_capped(self, key: str, member: str, max_len: int, ttl: int) -> None:
+        if key is None:
+            return
+        pipe = self.client.pipeline(transaction=True)
+        pipe.lrem(key, 0, member)
+        pipe.rpush(key, member)
+        pipe.ltrim(key, -max(1, int(max_len)), -1)
+        if ttl is not None and int(ttl) > 0:
+            pipe.expire(key, int(ttl))
+        await pipe.execute()
+
+    async def get_list(self, key: str) -> List[str]:
+        if key is None:
+            return []
+        return [decode_list_member(raw) for raw in await self.client.lrange(key, 0, -1)]
+
+    async def increment(self, key: str, delta: int = 1, initial: int = 0) -> int:
+        if key is None:
+            return int(initial)
+        await self.client.setnx(key, int(initial))
+        return int(await self.client.incrby(key, int(delta)))
+
+    async def aclose(self) -> None:
+        """Cierra el cliente del loop actual (shutdown de la app)."""
+        clients = [self._fixed_client] if self._fixed_client is not None else []
+        try:
+            loop = asyncio.get_running_loop()
+            owned = self._clients.pop(loop, None)
+            if owned is not None:
+                clients.append(owned)
+        except RuntimeError:
+            pass
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.debug("AsyncRedisCache.aclose failed: %s", e)
@@ -0,0 +1,216 @@
+"""Tier L1 en proceso para claves calientes, con invalidación por Redis pub/sub.
+
+Algunos valores pequeños se leen en cada request y casi nunca cambian
+(`meta:rag:corpus_version`, `bot:config`, `bot:is_active`). Leerlos de Redis
+cada vez es un round trip por request; cachearlos con un TTL corto obliga a
+elegir entre latencia y frescura. Aquí se guardan en memoria del worker y
+cada escritura a través de `CacheManager` publica la clave en el canal
+`cache:l1:invalidate`; todos los workers la descartan al recibir el mensaje.
+La publicación usa el cliente Redis del backend, así que también invalidan
+los procesos que escriben sin suscriptor propio (worker de ingesta, scripts).
+
+Solo pasan por L1 las claves registradas con `register()`. Con backend
+Redis, L1 solo sirve valores mientras el suscriptor está conectado: si el
+bus cae (o aún no arrancó) las lecturas van directo a Redis, y al
+reconectar se vacía L1 porque pudieron perderse mensajes. Con
+InMemoryCache el caché ya es local al proceso y L1 sirve siempre.
+`cache_l1_max_age_seconds` acota cuánto puede vivir un valor si una
+escritura se hace fuera de `CacheManager` (p. ej. redis-cli).
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from infra.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+INVALIDATION_CHANNEL = "cache:l1:invalidate"
+_RECONNECT_DELAY_MAX_S = 30.0
+
+
+class L1Tier:
+    """Mapa LRU acotado delante de `CacheManager` para claves registradas."""
+
+    def __init__(
+        self,
+        *,
+        requires_bus: bool,
+        max_entries: int = 256,
+        max_age_seconds: float = 300.0,
+        channel: str = INVALIDATION_CHANNEL,
+    ) -> None:
+        self.requires_bus = requires_bus
+        self.max_entries = max(1, int(max_entries))
+        self.max_age_seconds = max(0.0, float(max_age_seconds))
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self._keys: set = set()
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Se incrementa en cada invalidación: una lectura de Redis solo se
+        # guarda si no llegó ninguna invalidación mientras estaba en vuelo.
+        self._epoch = 0
+        self._client = None
+        self._bus_ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"hits": 0, "misses": 0, "invalidations_sent": 0, "invalidations_received": 0, "publish_errors": 0}
+
+    # ─── Registro y lectura ─────────────────────────────────────────────────
+
+    def register(self, *keys: str) -> None:
+        self._keys.update(key for key in keys if key)
+
+    def tracks(self, key: Optional[str]) -> bool:
+        return key in self._keys
+
+    @property
+    def serving(self) -> bool:
+        return not self.requires_bus or self._bus_ready.is_set()
+
+    @property
+    def epoch(self) -> int:
+        return self._epoch
+
+    def lookup(self, key: str) -> Tuple[bool, Any]:
+        if not self.serving:
+            return False, None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return True, entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self._stats["misses"] += 1
+        return False, None
+
+    def remember(self, key: str, value: Any, epoch: int) -> None:
+        """Guarda `value` leído de Redis si no hubo invalidaciones desde `epoch`."""
+        if not self.serving:
+            return
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            self._entries[key] = (value, time.monotonic() + self.max_age_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # ─── Invalidación ───────────────────────────────────────────────────────
+
+    def tracked_keys(self, keys: Iterable[Optional[str]]) -> List[str]:
+        return [key for key in dict.fromkeys(keys) if key in self._keys]
+
+    def tracked_with_prefix(self, prefix: str) -> List[str]:
+        return [key for key in self._keys if key.startswith(prefix)]
+
+    def discard(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            self._epoch += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    def publish(self, keys: List[str], client: Any = None) -> None:
+        """Descarta `keys` localmente y avisa al resto de workers.
+
+        `client` permite publicar sin haber arrancado el suscriptor; por
+        defecto se usa el del suscriptor.
+        """
+        if not keys:
+            return
+        self.discard(keys)
+        client = client if client is not None else self._client
+        if client is None:
+            return
+        try:
+            client.publish(self.channel, json.dumps({"origin": self.origin, "keys": keys}))
+            self._stats["invalidations_sent"] += 1
+        except Exception as exc:
+            # Los demás workers conservarán el valor hasta max_age_seconds.
+            self._stats["publish_errors"] += 1
+            logger.warning("L1 invalidation publish failed | keys=%s | err=%s", keys, exc)
+
+    def _handle_message(self, message: Any) -> None:
+        if not isinstance(message, dict) or message.get("type") != "message":
+            return
+        try:
+            data = message.get("data")
+            payload = json.loads(data.decode("utf-8") if isinstance(data, bytes) else data)
+            keys = [str(key) for key in payload.get("keys") or []]
+        except Exception as exc:
+            logger.warning("L1 invalidation message malformed; clearing L1: %s", exc)
+            self.clear()
+            return
+        if payload.get("origin") == self.origin:
+            return
+        self._stats["invalidations_received"] += 1
+        self.discard(keys)
+
+    # ─── Suscriptor ─────────────────────────────────────────────────────────
+
+    def start(self, client) -> None:
+        """Arranca el suscriptor (hilo daemon) sobre el cliente Redis síncrono."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._client = client
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name="cache-l1-bus", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=timeout)
+        self._thread = None
+        self._bus_ready.clear()
+        self.clear()
+
+    def _listen(self) -> None:
+        delay = 0.5
+        while not self._stop.is_set():
+            pubsub = None
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Mensajes perdidos mientras no estábamos suscritos: empezar de cero.
+                self.clear()
+                self._bus_ready.set()
+                delay = 0.5
+                while not self._stop.is_set():
+                    self._handle_message(pubsub.get_message(timeout=1.0))
+            except Exception as exc:
+                logger.warning("L1 invalidation bus disconnected; L1 bypassed until reconnect: %s", exc)
+            finally:
+                self._bus_ready.clear()
+                self.clear()
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            self._stop.wait(delay)
+            delay = min(delay * 2, _RECONNECT_DELAY_MAX_S)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = len(self._entries)
+        return {
+            **self._stats,
+            "entries": entries,
+            "tracked_keys": len(self._keys),
+            "serving": self.serving,
+        }
@@ -1,8 +1,16 @@
 import asyncio
-from typing import Any, Optional
+import math
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
 
 from config import settings
 from infra.logging_utils import get_logger
+from infra.redis_lock import RedisAdvisoryLock
+
+from .l1 import L1Tier
+from .metrics import CacheMetrics
+from .namespaces import NamespaceGenerations, generation_key
 
 _logger = get_logger(__name__)
 
@@ -24,8 +32,16 @@ class CacheManager:
         # Estado de degradación
         self.is_degraded: bool = False
         self.backend_type: str = "Unknown"
+        # Backend redis.asyncio para la API async; None => to_thread sobre `backend`.
+        self.async_backend = None
         
         self.backend = self._init_backend()
+        # Tier en proceso para claves calientes registradas (ver cache/l1.py).
+        self.l1: Optional[L1Tier] = self._init_l1()
+        # Métricas por familia de claves (ver cache/metrics.py).
+        self.metrics: Optional[CacheMetrics] = None
+        if bool(getattr(settings, "enable_cache_metrics", True)):
+            self.attach_metrics(CacheMetrics())
 
     def _init_backend(self):
         """Inicializa el backend de caché con retry logic y graceful degradation."""
@@ -66,6 +82,7 @@ class CacheManager:
 
                     self.is_degraded = False
                     self.backend_type = "RedisCache"
+                    self.async_backend = self._init_async_backend(url, max_connections)
                     return RedisCache(client=client)
                     
                 except Exception as e:
@@ -96,12 +113,130 @@ class CacheManager:
         from .memory_backend import InMemoryCache
         self.is_degraded = True
         self.backend_type = "InMemoryCache"
-        return InMemoryCache(max_size=self.max_size)
+        try:
+            max_bytes = int(getattr(settings, "memory_cache_max_bytes", 0))
+        except Exception:
+            max_bytes = 0
+        return InMemoryCache(max_size=self.max_size, max_bytes=max_bytes)
     
+    @staticmethod
+    def _init_async_backend(url: str, max_connections: int):
+        """Crea el backend redis.asyncio (conexión perezosa, por event loop)."""
+        if not bool(getattr(settings, "enable_async_redis", True)):
+            return None
+        try:
+            import redis.asyncio  # type: ignore  # noqa: F401
+
+            from .async_redis_backend import AsyncRedisCache
+
+            return AsyncRedisCache(url, max_connections=max_connections)
+        except Exception as e:
+            _logger.warning("CacheManager: redis.asyncio no disponible, API async usará hilos: %s", e)
+            return None
+
+    def _init_l1(self) -> Optional[L1Tier]:
+        if not bool(getattr(settings, "enable_cache_l1", True)):
+            return None
+        try:
+            return L1Tier(
+                requires_bus=self.backend_type == "RedisCache",
+                max_entries=int(getattr(settings, "cache_l1_max_entries", 256)),
+                max_age_seconds=float(getattr(settings, "cache_l1_max_age_seconds", 300.0)),
+            )
+        except Exception as e:
+            _logger.warning("CacheManager: L1 deshabilitado: %s", e)
+            return None
+
+    def attach_metrics(self, metrics: CacheMetrics) -> None:
+        """Registra tamaños de payload y desalojos de los backends en `metrics`."""
+        self.metrics = metrics
+        for backend in (self.backend, getattr(self, "async_backend", None)):
+            if backend is None:
+                continue
+            if hasattr(type(backend), "payload_observer"):
+                backend.payload_observer = metrics.record_payload
+            if hasattr(type(backend), "eviction_observer"):
+                backend.eviction_observer = metrics.record_eviction
+
+    def _record_get(self, keys, found, started: float) -> None:
+        metrics = getattr(self, "metrics", None)
+        if metrics is not None:
+            metrics.record_get(keys, found, time.perf_counter() - started)
+
+    def _record_set(self, keys, started: float) -> None:
+        metrics = getattr(self, "metrics", None)
+        if metrics is not None:
+            metrics.record_set(list(keys), time.perf_counter() - started)
+
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        """Métricas por familia + estado de L1 y del backend, para el dashboard."""
+        metrics = getattr(self, "metrics", None)
+        l1 = getattr(self, "l1", None)
+        snapshot: Dict[str, Any] = {
+            "backend_type": self.backend_type,
+            "families": metrics.snapshot() if metrics is not None else {},
+            "l1": l1.stats() if l1 is not None else None,
+        }
+        if hasattr(self.backend, "stats"):
+            snapshot["memory_cache"] = self.backend.stats()
+        return snapshot
+
+    def redis_server_stats(self) -> Optional[Dict[str, Any]]:
+        """Contadores globales de Redis (INFO). Los desalojos de Redis no se
+        pueden atribuir a una familia: se reportan a nivel servidor."""
+        if self.backend_type != "RedisCache":
+            return None
+        try:
+            info = {**self.backend.client.info("stats"), **self.backend.client.info("memory")}
+        except Exception as e:
+            _logger.warning("Cache redis INFO failed | err=%s", e)
+            return None
+        fields = ("keyspace_hits", "keyspace_misses", "evicted_keys", "expired_keys", "used_memory", "maxmemory")
+        return {field: info.get(field) for field in fields}
+
+    def register_hot_keys(self, *keys: str) -> None:
+        """Sirve `keys` desde memoria del worker; las escrituras se propagan por pub/sub."""
+        l1 = getattr(self, "l1", None)
+        if l1 is not None:
+            l1.register(*keys)
+
+    def start_l1_bus(self) -> None:
+        l1 = getattr(self, "l1", None)
+        if l1 is not None and l1.requires_bus:
+            l1.start(self.backend.client)
+
+    def stop_l1_bus(self) -> None:
+        l1 = getattr(self, "l1", None)
+        if l1 is not None:
+            l1.stop()
+
+    def _l1_for(self, key: Optional[str]) -> Optional[L1Tier]:
+        l1 = getattr(self, "l1", None)
+        return l1 if l1 is not None and l1.tracks(key) else None
+
+    def _l1_publisher(self, l1: L1Tier):
+        # El cliente del backend, aunque este proceso no tenga el suscriptor
+        # arrancado (p. ej. el worker de ingesta standalone): sus escrituras
+        # deben invalidar igualmente el L1 de los workers de la API.
+        return getattr(self.backend, "client", None) if l1.requires_bus else None
+
+    def _l1_invalidate(self, keys: Iterable[Optional[str]]) -> None:
+        l1 = getattr(self, "l1", None)
+        if l1 is not None:
+            l1.publish(l1.tracked_keys(keys), self._l1_publisher(l1))
+
+    async def _al1_invalidate(self, keys: Iterable[Optional[str]]) -> None:
+        l1 = getattr(self, "l1", None)
+        if l1 is None:
+            return
+        tracked = l1.tracked_keys(keys)
+        if tracked:
+            await self._run_sync(l1.publish, tracked, self._l1_publisher(l1))
+
     def get_health_status(self) -> dict:
         """Retorna el estado de salud del caché para monitoreo."""
         is_redis = self.backend_type == "RedisCache"
-        return {
+        status = {
             "backend_type": self.backend_type,
             "is_degraded": self.is_degraded,
             "redis_connected": is_redis,
@@ -110,42 +245,206 @@ class CacheManager:
                 else "Cache running in degraded mode (InMemoryCache)"
             )
         }
+        if not is_redis and hasattr(self.backend, "stats"):
+            status["memory_cache"] = self.backend.stats()
+        return status
+
+    # Namespaces versionados (ver cache/namespaces.py)
+    _namespaces: Optional[NamespaceGenerations] = None
+
+    def _namespace_state(self) -> NamespaceGenerations:
+        if self._namespaces is None:
+            try:
+                refresh = float(getattr(settings, "cache_namespace_generation_refresh_seconds", 1.0))
+            except Exception:
+                refresh = 1.0
+            self._namespaces = NamespaceGenerations(refresh_seconds=refresh)
+        return self._namespaces
+
+    def _needs_generations(self, keys: Iterable[Optional[str]]) -> bool:
+        state = self._namespace_state()
+        return state.is_stale() and any(state.namespace_of(key) for key in keys)
+
+    def _refresh_generations(self) -> None:
+        state = self._namespace_state()
+        try:
+            state.load(self.backend.get_many(state.generation_keys()))
+        except Exception as e:
+            _logger.warning("Cache namespace generations read failed | err=%s", e)
+            state.load(None)
+
+    async def _arefresh_generations(self) -> None:
+        state = self._namespace_state()
+        try:
+            backend = getattr(self, "async_backend", None)
+            if backend is not None:
+                raw = await backend.get_many(state.generation_keys())
+            else:
+                raw = await self._run_sync(self.backend.get_many, state.generation_keys())
+            state.load(raw)
+        except Exception as e:
+            _logger.warning("Cache namespace generations read failed | err=%s", e)
+            state.load(None)
+
+    def _physical(self, key: str) -> str:
+        return self._namespace_state().physical_key(key) if key is not None else key
+
+    def _effective_ttl(self, key: str, ttl: Optional[int]) -> int:
+        effective_ttl = int(ttl) if ttl is not None else self.ttl
+        # Las claves versionadas dependen del TTL para liberarse tras un bump.
+        if effective_ttl <= 0 and self._namespace_state().namespace_of(key) is not None:
+            return self.ttl
+        return effective_ttl
 
     # API pública unificada
     def get(self, key: str) -> Optional[Any]:
+        l1 = self._l1_for(key)
+        if l1 is None:
+            return self._backend_get(key)[1]
+        hit, value = l1.lookup(key)
+        if hit:
+            return value
+        epoch = l1.epoch
+        ok, value = self._backend_get(key)
+        if ok:
+            l1.remember(key, value, epoch)
+        return value
+
+    def _backend_get(self, key: str) -> Tuple[bool, Optional[Any]]:
+        started = time.perf_counter()
         try:
-            return self.backend.get(key)
+            if self._needs_generations([key]):
+                self._refresh_generations()
+            value = self.backend.get(self._physical(key))
+            self._record_get([key], [key] if value is not None else [], started)
+            return True, value
         except Exception as e:
             _logger.warning("Cache get failed | key=%s | err=%s", key, e)
             if not self.is_degraded:
                 self.is_degraded = True
-            return None
+            return False, None
 
     def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
-        effective_ttl = int(ttl) if ttl is not None else self.ttl
+        started = time.perf_counter()
         try:
-            self.backend.set(key, value, effective_ttl)
+            if self._needs_generations([key]):
+                self._refresh_generations()
+            self.backend.set(self._physical(key), value, self._effective_ttl(key, ttl))
+            self._record_set([key], started)
         except Exception as e:
             _logger.warning("Cache set failed | key=%s | err=%s", key, e)
             if not self.is_degraded:
                 self.is_degraded = True
+        self._l1_invalidate([key])
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Lee varias claves en un round trip. Devuelve solo los hits (key -> valor)."""
+        unique_keys = list(dict.fromkeys(key for key in keys if key is not None))
+        if not unique_keys:
+            return {}
+        started = time.perf_counter()
+        try:
+            if self._needs_generations(unique_keys):
+                self._refresh_generations()
+            physical = {self._physical(key): key for key in unique_keys}
+            found = self.backend.get_many(list(physical))
+            results = {physical[key]: value for key, value in found.items()}
+            self._record_get(unique_keys, results, started)
+            return results
+        except Exception as e:
+            _logger.warning("Cache get_many failed | keys=%d | err=%s", len(unique_keys), e)
+            if not self.is_degraded:
+                self.is_degraded = True
+            return {}
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        if not items:
+            return
+        started = time.perf_counter()
+        try:
+            if self._needs_generations(items):
+                self._refresh_generations()
+            self._set_many_grouped(items, ttl, self.backend.set_many)
+            self._record_set(items, started)
+        except Exception as e:
+            _logger.warning("Cache set_many failed | keys=%d | err=%s", len(items), e)
+            if not self.is_degraded:
+                self.is_degraded = True
+        self._l1_invalidate(items)
+
+    def _group_by_ttl(self, items: Dict[str, Any], ttl: Optional[int]) -> Dict[int, Dict[str, Any]]:
+        groups: Dict[int, Dict[str, Any]] = {}
+        for key, value in items.items():
+            if key is None:
+                continue
+            groups.setdefault(self._effective_ttl(key, ttl), {})[self._physical(key)] = value
+        return groups
+
+    def _set_many_grouped(self, items: Dict[str, Any], ttl: Optional[int], write) -> None:
+        for effective_ttl, group in self._group_by_ttl(items, ttl).items():
+            write(group, effective_ttl)
 
     def delete(self, key: str) -> None:
         try:
-            self.backend.delete(key)
+            if self._needs_generations([key]):
+                self._refresh_generations()
+            self.backend.delete(self._physical(key))
         except Exception as e:
             _logger.warning("Cache delete failed | key=%s | err=%s", key, e)
+        self._l1_invalidate([key])
 
     def invalidate_prefix(self, prefix: str) -> None:
+        """Invalida por prefijo. Los namespaces versionados son O(1) (bump de generación)."""
+        if prefix in self._namespace_state().namespaces:
+            self.bump_namespace(prefix)
+            return
         try:
             self.backend.invalidate_prefix(prefix)
         except Exception as e:
             _logger.warning("Cache invalidate_prefix failed | prefix=%s | err=%s", prefix, e)
+        l1 = getattr(self, "l1", None)
+        if l1 is not None:
+            l1.publish(l1.tracked_with_prefix(prefix), self._l1_publisher(l1))
+
+    def bump_namespace(self, namespace: str) -> int:
+        """Deja inalcanzables todas las claves de `namespace` (INCR de su generación)."""
+        generation = self.increment(generation_key(namespace), delta=1, initial=0)
+        self._namespace_state().set_generation(namespace, generation)
+        _logger.debug("Cache namespace bumped | namespace=%s | generation=%s", namespace, generation)
+        return generation
+
+    def push_capped(self, key: str, member: str, max_len: int, ttl: Optional[int] = None) -> None:
+        """Lista acotada atómica: mueve `member` al final de `key`, conserva los
+        últimos `max_len` y renueva el TTL (sin el GET+SET que pierde escrituras
+        concurrentes)."""
+        started = time.perf_counter()
+        try:
+            if self._needs_generations([key]):
+                self._refresh_generations()
+            self.backend.push_capped(self._physical(key), member, max_len, self._effective_ttl(key, ttl))
+            self._record_set([key], started)
+        except Exception as e:
+            _logger.warning("Cache push_capped failed | key=%s | err=%s", key, e)
+        self._l1_invalidate([key])
+
+    def get_list(self, key: str) -> List[str]:
+        started = time.perf_counter()
+        try:
+            if self._needs_generations([key]):
+                self._refresh_generations()
+            members = self.backend.get_list(self._physical(key))
+            self._record_get([key], [key] if members else [], started)
+            return members
+        except Exception as e:
+            _logger.warning("Cache get_list failed | key=%s | err=%s", key, e)
+            return []
 
     def increment(self, key: str, delta: int = 1, initial: int = 0) -> int:
         try:
             if hasattr(self.backend, "increment"):
-                return int(self.backend.increment(key, delta=delta, initial=initial))
+                value = int(self.backend.increment(key, delta=delta, initial=initial))
+                self._l1_invalidate([key])
+                return value
         except Exception as exc:
             _logger.warning("Cache native increment failed, using non-atomic fallback | key=%s | err=%s", key, exc)
 
@@ -159,21 +458,323 @@ class CacheManager:
         self.set(key, new_value, ttl=0)
         return new_value
 
-    # API async — usa to_thread para no bloquear event loop con redis-py sync.
+    # API async — redis.asyncio nativo si está disponible. Sin él, el backend
+    # síncrono de Redis va por to_thread (no bloquear el event loop) y el
+    # InMemoryCache se llama directo: no hace I/O, un hilo solo añade latencia.
+    async def _run_sync(self, fn, *args):
+        if self.backend_type == "InMemoryCache":
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    def _async_failed(self, op: str, detail: str, err: Exception) -> None:
+        _logger.warning("Cache %s failed | %s | err=%s", op, detail, err)
+        if not self.is_degraded:
+            self.is_degraded = True
+
     async def aget(self, key: str) -> Optional[Any]:
-        return await asyncio.to_thread(self.get, key)
+        l1 = self._l1_for(key)
+        if l1 is None:
+            return (await self._abackend_get(key))[1]
+        hit, value = l1.lookup(key)
+        if hit:
+            return value
+        epoch = l1.epoch
+        ok, value = await self._abackend_get(key)
+        if ok:
+            l1.remember(key, value, epoch)
+        return value
+
+    async def _abackend_get(self, key: str) -> Tuple[bool, Optional[Any]]:
+        backend = getattr(self, "async_backend", None)
+        if backend is None:
+            return await self._run_sync(self._backend_get, key)
+        started = time.perf_counter()
+        try:
+            if self._needs_generations([key]):
+                await self._arefresh_generations()
+            value = await backend.get(self._physical(key))
+            self._record_get([key], [key] if value is not None else [], started)
+            return True, value
+        except Exception as e:
+            self._async_failed("aget", f"key={key}", e)
+            return False, None
 
     async def aset(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
-        await asyncio.to_thread(self.set, key, value, ttl)
+        backend = getattr(self, "async_backend", None)
+        if backend is None:
+            await self._run_sync(self.set, key, value, ttl)
+            return
+        started = time.perf_counter()
+        try:
+            if self._needs_generations([key]):
+                await self._arefresh_generations()
+            await backend.set(self._physical(key), value, self._effective_ttl(key, ttl))
+            self._record_set([key], started)
+        except Exception as e:
+            self._async_failed("aset", f"key={key}", e)
+        await self._al1_invalidate([key])
+
+    async def aget_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        backend = getattr(self, "async_backend", None)
+        if backend is None:
+            return await self._run_sync(self.get_many, list(keys))
+        unique_keys = list(dict.fromkeys(key for key in keys if key is not None))
+        if not unique_keys:
+            return {}
+        started = time.perf_counter()
+        try:
+            if self._needs_generations(unique_keys):
+                await self._arefresh_generations()
+            physical = {self._physical(key): key for key in unique_keys}
+            found = await backend.get_many(list(physical))
+            results = {physical[key]: value for key, value in found.items()}
+            self._record_get(unique_keys, results, started)
+            return results
+        except Exception as e:
+            self._async_failed("aget_many", f"keys={len(unique_keys)}", e)
+            return {}
+
+    async def aset_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        backend = getattr(self, "async_backend", None)
+        if backend is None:
+            await self._run_sync(self.set_many, items, ttl)
+            return
+        if not items:
+            return
+        started = time.perf_counter()
+        try:
+            if self._needs_generations(items):
+                await self._arefresh_generations()
+            for effective_ttl, group in self._group_by_ttl(items, ttl).items():
+                await backend.set_many(group, effective_ttl)
+            self._record_set(items, started)
+        except Exception as e:
+            self._async_failed("aset_many", f"keys={len(items)}", e)
+        await self._al1_invalidate(items)
 
     async def adelete(self, key: str) -> None:
-        await asyncio.to_thread(self.delete, key)
+        backend = getattr(self, "async_backend", None)
+        if backend is None:
+            await self._run_sync(self.delete, key)
+            return
+        try:
+            if self._needs_generations([key]):
+                await self._arefresh_generations()
+            await backend.delete(self._physical(key))
+        except Exception as e:
+            _logger.warning("Cache adelete failed | key=%s | err=%s", key, e)
+        await self._al1_invalidate([key])
 
     async def ainvalidate_prefix(self, prefix: str) -> None:
-        await asyncio.to_thread(self.invalidate_prefix, prefix)
+        if prefix in self._namespace_state().namespaces:
+            await self.abump_namespace(prefix)
+            return
+        backend = getattr(self, "async_backend", None)
+        if backend is None:
+            await self._run_sync(self.invalidate_prefix, prefix)
+            return
+        try:
+            await backend.invalidate_prefix(prefix)
+        except Exception as e:
+            _logger.warning("Cache ainvalidate_prefix failed | prefix=%s | err=%s", prefix, e)
+        l1 = getattr(self, "l1", None)
+        if l1 is not None:
+            await self._al1_invalidate(l1.tracked_with_prefix(prefix))
+
+    async def abump_namespace(self, namespace: str) -> int:
+        generation = await self.aincrement(generation_key(namespace), delta=1, initial=0)
+        self._namespace_state().set_generation(namespace, generation)
+        _logger.debug("Cache namespace bumped | namespace=%s | generation=%s", namespace, generation)
+        return generation
+
+    async def apush_capped(self, key: str, member: str, max_len: int, ttl: Optional[int] = None) -> None:
+        backend = getattr(self, "async_backend", None)
+        if backend is None:
+            await self._run_sync(self.push_capped, key, member, max_len, ttl)
+            return
+        started = time.perf_counter()
+        try:
+            if self._needs_generations([key]):
+                await self._arefresh_generations()
+            await backend.push_capped(self._physical(key), member, max_len, self._effective_ttl(key, ttl))
+            self._record_set([key], started)
+        except Exception as e:
+            _logger.warning("Cache apush_capped failed | key=%s | err=%s", key, e)
+        await self._al1_invalidate([key])
+
+    async def aget_list(self, key: str) -> List[str]:
+        backend = getattr(self, "async_backend", None)
+        if backend is None:
+            return await self._run_sync(self.get_list, key)
+        started = time.perf_counter()
+        try:
+            if self._needs_generations([key]):
+                await self._arefresh_generations()
+            members = await backend.get_list(self._physical(key))
+            self._record_get([key], [key] if members else [], started)
+            return members
+        except Exception as e:
+            self._async_failed("aget_list", f"key={key}", e)
+            return []
 
     async def aincrement(self, key: str, delta: int = 1, initial: int = 0) -> int:
-        return await asyncio.to_thread(self.increment, key, delta, initial)
+        backend = getattr(self, "async_backend", None)
+        if backend is not None:
+            try:
+                value = await backend.increment(key, delta=delta, initial=initial)
+                await self._al1_invalidate([key])
+                return value
+            except Exception as exc:
+                _logger.warning("Cache async increment failed, using sync path | key=%s | err=%s", key, exc)
+        return await self._run_sync(self.increment, key, delta, initial)
+
+    # ─── get_or_compute: single-flight + refresco temprano probabilístico ───
+    #
+    # Al expirar una entrada cara (agregaciones del dashboard, HyDE, centroide)
+    # todas las requests concurrentes la recalculaban a la vez. Aquí:
+    #   - en el proceso, un solo cálculo por clave (las demás esperan su Future);
+    #   - entre workers, un lock Redis SET NX: quien no lo obtiene espera a que
+    #     aparezca el valor (hasta `wait_timeout`) y si no, calcula igualmente;
+    #   - XFetch: antes de expirar, cada lectura decide refrescar con
+    #     probabilidad creciente (`now - delta*beta*ln(U) >= expira`, delta =
+    #     lo que tardó el cálculo), en segundo plano y sirviendo el valor actual,
+    #     así la entrada casi nunca llega a expirar bajo carga.
+    # El valor se guarda en un sobre {"__goc__", "v", "d", "x"}; entradas sin
+    # sobre se tratan como miss. Un `compute` que devuelve None no se cachea.
+
+    _GOC_MARKER = "__goc__"
+    _goc_inflight: Optional[Dict[Tuple[int, str], "asyncio.Future[Any]"]] = None
+    _goc_background: Optional[set] = None
+
+    def _goc_unwrap(self, raw: Any) -> Optional[Dict[str, Any]]:
+        if isinstance(raw, dict) and raw.get(self._GOC_MARKER) == 1 and "v" in raw:
+            return raw
+        return None
+
+    @staticmethod
+    def _goc_should_refresh(entry: Dict[str, Any], beta: float) -> bool:
+        try:
+            expires_at = float(entry.get("x") or 0.0)
+            delta = max(float(entry.get("d") or 0.0), 0.0)
+        except (TypeError, ValueError):
+            return True
+        if expires_at <= 0 or beta <= 0 or delta <= 0:
+            return False
+        return time.time() - delta * beta * math.log(max(random.random(), 1e-12)) >= expires_at
+
+    async def aget_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+        *,
+        beta: float = 1.0,
+        lock_ttl: int = 30,
+        wait_timeout: float = 5.0,
+    ) -> Any:
+        """Devuelve el valor cacheado de `key` o lo calcula una sola vez con `compute()`."""
+        entry = self._goc_unwrap(await self.aget(key))
+        if entry is not None:
+            if self._goc_should_refresh(entry, beta):
+                self._goc_refresh_in_background(key, compute, ttl, lock_ttl)
+            return entry["v"]
+        return await self._goc_single_flight(key, compute, ttl, lock_ttl, wait_timeout, recheck=True)
+
+    def _goc_refresh_in_background(self, key, compute, ttl, lock_ttl) -> None:
+        if self._goc_inflight_future(key) is not None:
+            return
+        if self._goc_background is None:
+            self._goc_background = set()
+        task = asyncio.get_running_loop().create_task(
+            self._goc_single_flight(key, compute, ttl, lock_ttl, wait_timeout=0.0, recheck=False)
+        )
+        self._goc_background.add(task)
+
+        def _done(t: "asyncio.Task[Any]") -> None:
+            self._goc_background.discard(t)
+            if not t.cancelled() and t.exception() is not None:
+                _logger.warning("Cache early refresh failed | key=%s | err=%s", key, t.exception())
+
+        task.add_done_callback(_done)
+
+    def _goc_inflight_future(self, key: str) -> Optional["asyncio.Future[Any]"]:
+        if self._goc_inflight is None:
+            return None
+        return self._goc_inflight.get((id(asyncio.get_running_loop()), key))
+
+    async def _goc_single_flight(self, key, compute, ttl, lock_ttl, wait_timeout, *, recheck: bool) -> Any:
+        pending = self._goc_inflight_future(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        if self._goc_inflight is None:
+            self._goc_inflight = {}
+        loop = asyncio.get_running_loop()
+        slot = (id(loop), key)
+        future: "asyncio.Future[Any]" = loop.create_future()
+        self._goc_inflight[slot] = future
+        try:
+            value = await self._goc_compute_locked(key, compute, ttl, lock_ttl, wait_timeout, recheck)
+        except BaseException as exc:
+            if not future.done():
+                future.set_exception(exc)
+                # Evita "exception was never retrieved" si nadie más esperaba.
+                future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._goc_inflight.pop(slot, None)
+
+    async def _goc_compute_locked(self, key, compute, ttl, lock_ttl, wait_timeout, recheck) -> Any:
+        lock = None
+        if self.backend_type == "RedisCache":
+            lock = RedisAdvisoryLock(self.backend.client, f"lock:compute:{key}", ttl_seconds=lock_ttl)
+            try:
+                acquired = await lock.try_acquire()
+            except Exception as exc:
+                _logger.warning("Cache compute lock failed, computing anyway | key=%s | err=%s", key, exc)
+                acquired, lock = False, None
+            if lock is not None and not acquired:
+                # Otro worker está calculando: esperar su resultado.
+                lock = None
+                deadline = time.monotonic() + wait_timeout
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(RedisAdvisoryLock.POLL_INTERVAL)
+                    entry = self._goc_unwrap(await self.aget(key))
+                    if entry is not None:
+                        return entry["v"]
+                if wait_timeout <= 0:
+                    # Refresco temprano: el otro worker ya lo está haciendo.
+                    entry = self._goc_unwrap(await self.aget(key))
+                    return entry["v"] if entry is not None else None
+        try:
+            if recheck and lock is not None:
+                entry = self._goc_unwrap(await self.aget(key))
+                if entry is not None:
+                    return entry["v"]
+            started = time.perf_counter()
+            value = await compute()
+            elapsed = time.perf_counter() - started
+            if value is not None:
+                effective_ttl = int(ttl) if ttl is not None else self.ttl
+                envelope = {
+                    self._GOC_MARKER: 1,
+                    "v": value,
+                    "d": round(elapsed, 4),
+                    "x": time.time() + effective_ttl if effective_ttl > 0 else 0,
+                }
+                await self.aset(key, envelope, effective_ttl)
+            return value
+        finally:
+            if lock is not None:
+                await lock.release()
+
+    async def aclose(self) -> None:
+        self.stop_l1_bus()
+        backend = getattr(self, "async_backend", None)
+        if backend is not None:
+            await backend.aclose()
 
 
 # Instancia global accesible
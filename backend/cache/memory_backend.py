@@ -1,38 +1,128 @@
+"""Caché en memoria (fallback cuando Redis no está disponible).
+
+LRU real: cada hit mueve la clave al final y se desaloja por el principio,
+acotado por número de entradas (`max_size`) y por bytes estimados
+(`max_bytes`, 0 = sin límite de bytes). Las claves se indexan además en
+buckets por prefijo (`rag:`, `rag:retrieval:`, ...) para que
+`invalidate_prefix` solo recorra las claves de su familia.
+"""
+import json
 import time
 import collections
-from typing import Any, Optional
-from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Set
+from threading import RLock
+
+import numpy as np
+
+# Segmentos `xxx:` indexados por clave: "rag:retrieval:abc" -> "rag:", "rag:retrieval:".
+_BUCKET_DEPTH = 2
+# Overhead aproximado por entrada (dict de entrada, clave, nodo del OrderedDict).
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+def _bucket_names(key: str) -> List[str]:
+    names: List[str] = []
+    end = 0
+    for _ in range(_BUCKET_DEPTH):
+        end = key.find(":", end) + 1
+        if end <= 0:
+            break
+        names.append(key[:end])
+    return names
+
+
+def _estimate_size(key: str, value: Any) -> int:
+    """Tamaño aproximado en bytes; barato para los tipos que guarda la app."""
+    if isinstance(value, np.ndarray):
+        size = value.nbytes
+    elif isinstance(value, (bytes, bytearray)):
+        size = len(value)
+    elif isinstance(value, str):
+        size = len(value)
+    elif isinstance(value, (int, float, bool)) or value is None:
+        size = 8
+    else:
+        try:
+            size = len(json.dumps(value, default=str))
+        except Exception:
+            size = 1024
+    return size + len(key) + _ENTRY_OVERHEAD_BYTES
 
 
 class InMemoryCache:
-    """Caché en memoria con TTL y control de tamaño máximo."""
+    """Caché en memoria con TTL, LRU por entradas y presupuesto de bytes."""
 
-    def __init__(self, max_size: int = 1000):
+    # Callbacks opcionales para métricas por familia (los fija CacheManager).
+    payload_observer: Optional[Callable[[str, int], None]] = None
+    eviction_observer: Optional[Callable[[str], None]] = None
+
+    def __init__(self, max_size: int = 1000, max_bytes: Optional[int] = None):
         self._store = collections.OrderedDict()
         self.max_size = int(max_size) if max_size is not None else 1000
-        self._lock = Lock()
+        self.max_bytes = max(0, int(max_bytes or 0))
+        self._bytes = 0
+        self._buckets: Dict[str, Set[str]] = {}
+        self._lock = RLock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    # ─── Índice interno (llamar con el lock tomado) ─────────────────────────
+
+    def _remove(self, key: str) -> None:
+        entry = self._store.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry["size"]
+        for name in _bucket_names(key):
+            bucket = self._buckets.get(name)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[name]
 
     def _evict_if_needed(self) -> None:
-        try:
-            if len(self._store) > self.max_size:
-                self._store.popitem(last=False)
-        except Exception:
-            pass
+        while self._store and (
+            len(self._store) > self.max_size
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._store))
+            self._remove(oldest)
+            self._evictions += 1
+            if self.eviction_observer is not None:
+                self.eviction_observer(oldest)
+
+    def _prefix_candidates(self, prefix: str) -> List[str]:
+        # Bucket más profundo que contiene el prefijo; sin bucket, todo el store.
+        names = _bucket_names(prefix)
+        for name in reversed(names):
+            if name in self._buckets:
+                return list(self._buckets[name])
+        if names:
+            return []
+        return list(self._store.keys())
+
+    # ─── API del backend ────────────────────────────────────────────────────
 
     def get(self, key: str) -> Optional[Any]:
         if key is None:
             return None
-        entry = self._store.get(str(key))
-        if not entry:
-            return None
-        # Verificar expiración en tiempo de lectura
-        if entry.get("expires_at", 0) <= time.time():
-            try:
-                del self._store[str(key)]
-            except Exception:
-                pass
-            return None
-        return entry.get("value")
+        k = str(key)
+        with self._lock:
+            entry = self._store.get(k)
+            if entry is None:
+                self._misses += 1
+                return None
+            # Verificar expiración en tiempo de lectura
+            if entry["expires_at"] <= time.time():
+                self._remove(k)
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._store.move_to_end(k)
+            self._hits += 1
+            return entry["value"]
 
     def set(self, key: str, value: Any, ttl: int) -> None:
         if key is None:
@@ -41,40 +131,60 @@ class InMemoryCache:
         ttl_seconds = int(ttl) if ttl is not None else 0
         expires_at = now + ttl_seconds if ttl_seconds > 0 else float("inf")
         k = str(key)
-        existing = self._store.get(k)
-        if existing is not None:
-            existing["value"] = value
-            existing["expires_at"] = expires_at
-            self._store.move_to_end(k)
-        else:
-            self._store[k] = {
-                "value": value,
-                "expires_at": expires_at,
-            }
-        self._evict_if_needed()
+        size = _estimate_size(k, value)
+        if self.payload_observer is not None:
+            self.payload_observer(k, size)
+        with self._lock:
+            self._remove(k)
+            if self.max_bytes and size > self.max_bytes:
+                # Nunca cabría: no vaciar todo el caché por una sola entrada.
+                self._evictions += 1
+                return
+            self._store[k] = {"value": value, "expires_at": expires_at, "size": size}
+            self._bytes += size
+            for name in _bucket_names(k):
+                self._buckets.setdefault(name, set()).add(k)
+            self._evict_if_needed()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        results: Dict[str, Any] = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                results[key] = value
+        return results
+
+    def set_many(self, items: Dict[str, Any], ttl: int) -> None:
+        for key, value in items.items():
+            self.set(key, value, ttl)
 
     def delete(self, key: str) -> None:
         if key is None:
             return
-        try:
-            if str(key) in self._store:
-                del self._store[str(key)]
-        except Exception:
-            pass
+        with self._lock:
+            self._remove(str(key))
 
     def invalidate_prefix(self, prefix: str) -> None:
         if not prefix:
             return
-        try:
-            keys = list(self._store.keys())
-            for k in keys:
-                if str(k).startswith(prefix):
-                    try:
-                        del self._store[k]
-                    except Exception:
-                        pass
-        except Exception:
-            pass
+        with self._lock:
+            for k in self._prefix_candidates(prefix):
+                if k.startswith(prefix):
+                    self._remove(k)
+
+    def push_capped(self, key: str, member: str, max_len: int, ttl: int) -> None:
+        if key is None:
+            return
+        k = str(key)
+        with self._lock:
+            current = self.get(k)
+            members = [m for m in (current if isinstance(current, list) else []) if m != member]
+            members.append(member)
+            self.set(k, members[-max(1, int(max_len)):], ttl)
+
+    def get_list(self, key: str) -> List[str]:
+        value = self.get(key)
+        return list(value) if isinstance(value, list) else []
 
     def increment(self, key: str, delta: int = 1, initial: int = 0) -> int:
         if key is None:
@@ -93,3 +203,18 @@ class InMemoryCache:
 
             self.set(k, new_value, ttl=0)
             return new_value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._store),
+                "bytes": self._bytes,
+                "max_entries": self.max_size,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else None,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
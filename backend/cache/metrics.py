@@ -0,0 +1,184 @@
+"""Métricas de caché por familia de claves (prefijo).
+
+Para decidir TTLs y memoria hace falta saber qué familias se pagan solas:
+hits/misses, latencia de get/set (histograma), tamaño serializado de los
+payloads (y lo que ahorra la compresión del codec), desalojos, todo desglosado por prefijo. `CacheManager` registra
+cada operación contra el backend (los hits de L1 se cuentan aparte en
+`cache/l1.py`); el snapshot se expone en `/dashboard/observability`.
+
+Histogramas de buckets fijos (no acumulativos: cada bucket cuenta solo su
+rango) para que registrar cueste O(log buckets) y la memoria sea
+constante. Contadores por proceso, igual que `infra.metrics_collector`.
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Orden importa: gana el prefijo más largo (se ordena al construir).
+CACHE_FAMILIES: Tuple[Tuple[str, str], ...] = (
+    ("emb:query:", "emb:query"),
+    ("emb:doc:", "emb:doc"),
+    ("rag:retrieval:", "rag:retrieval"),
+    ("rag:ts:", "rag:ts"),
+    ("rag:corpus_centroid:", "rag:corpus_centroid"),
+    ("rag:", "rag:other"),
+    ("vs:", "vs"),
+    ("retrieval_tool:v2:", "retrieval_tool:v2"),
+    ("resp:sem:", "response:semantic"),
+    ("resp:", "response"),
+    ("bot:config", "bot:config"),
+    ("bot:", "bot:other"),
+    ("meta:", "meta"),
+)
+OTHER_FAMILY = "other"
+
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0)
+SIZE_BUCKETS_BYTES: Tuple[int, ...] = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class _Histogram:
+    __slots__ = ("bounds", "counts", "total", "count", "max")
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def _quantile(self, q: float) -> Optional[float]:
+        """Cota superior del bucket que contiene el cuantil `q`."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return float(self.bounds[i]) if i < len(self.bounds) else float(self.max)
+        return float(self.max)
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"le_{bound:g}" for bound in self.bounds] + ["inf"]
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 3) if self.count else None,
+            "p50": self._quantile(0.50),
+            "p95": self._quantile(0.95),
+            "max": round(self.max, 3) if self.count else None,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class _FamilyStats:
+    __slots__ = (
+        "hits", "misses", "sets", "evictions", "compressed", "bytes_saved",
+        "get_ms", "set_ms", "payload_bytes",
+    )
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+        self.compressed = 0
+        self.bytes_saved = 0
+        self.get_ms = _Histogram(LATENCY_BUCKETS_MS)
+        self.set_ms = _Histogram(LATENCY_BUCKETS_MS)
+        self.payload_bytes = _Histogram(SIZE_BUCKETS_BYTES)
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "sets": self.sets,
+            "evictions": self.evictions,
+            "compressed_payloads": self.compressed,
+            "compression_saved_bytes": self.bytes_saved,
+            "get_latency_ms": self.get_ms.snapshot(),
+            "set_latency_ms": self.set_ms.snapshot(),
+            "payload_bytes": self.payload_bytes.snapshot(),
+        }
+
+
+class CacheMetrics:
+    """Contadores e histogramas por familia. Thread-safe, ~1µs por registro."""
+
+    def __init__(self, families: Sequence[Tuple[str, str]] = CACHE_FAMILIES) -> None:
+        self._families: List[Tuple[str, str]] = sorted(families, key=lambda item: len(item[0]), reverse=True)
+        self._stats: Dict[str, _FamilyStats] = {}
+        self._lock = threading.Lock()
+
+    def family_of(self, key: Optional[str]) -> str:
+        if key:
+            for prefix, name in self._families:
+                if key.startswith(prefix):
+                    return name
+        return OTHER_FAMILY
+
+    def _family(self, name: str) -> _FamilyStats:
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = _FamilyStats()
+        return stats
+
+    def record_get(self, keys: Sequence[str], hit_keys: Sequence[str], elapsed_s: float) -> None:
+        """Una llamada get/get_many: latencia una vez por familia, hits/misses por clave."""
+        hit_set = set(hit_keys)
+        elapsed_ms = elapsed_s * 1000.0
+        with self._lock:
+            seen: set = set()
+            for key in keys:
+                name = self.family_of(key)
+                stats = self._family(name)
+                if key in hit_set:
+                    stats.hits += 1
+                else:
+                    stats.misses += 1
+                if name not in seen:
+                    seen.add(name)
+                    stats.get_ms.observe(elapsed_ms)
+
+    def record_set(self, keys: Sequence[str], elapsed_s: float) -> None:
+        elapsed_ms = elapsed_s * 1000.0
+        with self._lock:
+            seen: set = set()
+            for key in keys:
+                name = self.family_of(key)
+                stats = self._family(name)
+                stats.sets += 1
+                if name not in seen:
+                    seen.add(name)
+                    stats.set_ms.observe(elapsed_ms)
+
+    def record_payload(self, key: str, size_bytes: int, uncompressed_bytes: Optional[int] = None) -> None:
+        """`size_bytes` es lo que se guarda; `uncompressed_bytes`, el tamaño antes del codec."""
+        with self._lock:
+            stats = self._family(self.family_of(key))
+            stats.payload_bytes.observe(float(size_bytes))
+            if uncompressed_bytes is not None and uncompressed_bytes > size_bytes:
+                stats.compressed += 1
+                stats.bytes_saved += uncompressed_bytes - size_bytes
+
+    def record_eviction(self, key: str) -> None:
+        with self._lock:
+            self._family(self.family_of(key)).evictions += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {name: stats.snapshot() for name, stats in sorted(self._stats.items())}
@@ -0,0 +1,106 @@
+"""Invalidación O(1) por generación de namespace.
+
+`invalidate_prefix` sobre Redis recorre todo el keyspace con SCAN; con
+millones de claves tarda segundos y dispara la latencia de todos. Para las
+familias de caché derivadas del corpus se usa en su lugar un contador de
+generación por namespace:
+
+    clave lógica   rag:retrieval:abc
+    generación 0   rag:retrieval:abc          (sin cambios: entradas previas siguen válidas)
+    generación 3   rag:retrieval:g3:abc
+
+Invalidar = INCR de `meta:cache:gen:<namespace>`. Las claves de la
+generación anterior quedan inalcanzables y el TTL las elimina (por eso
+`CacheManager` fuerza TTL en estas familias). Cada worker cachea las
+generaciones `cache_namespace_generation_refresh_seconds` (1 s por
+defecto): tras un bump en otro worker puede servirse la generación previa
+durante esa ventana; en el worker que hace el bump el cambio es inmediato.
+
+Solo se versionan cachés: `rag:ts:*` (timestamps de documentos) y
+`rag:corpus_centroid:*` (estadísticas del centroide) son estado y no deben
+desaparecer con un bump, así que la familia `rag:` se versiona como
+`rag:retrieval:`.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+GENERATION_KEY_PREFIX = "meta:cache:gen:"
+
+VERSIONED_NAMESPACES: Tuple[str, ...] = (
+    "rag:retrieval:",
+    "vs:",
+    "emb:",
+    "retrieval_tool:",
+)
+
+
+def generation_key(namespace: str) -> str:
+    return f"{GENERATION_KEY_PREFIX}{namespace}"
+
+
+class NamespaceGenerations:
+    """Generación vigente por namespace, con refresco periódico desde el backend."""
+
+    def __init__(
+        self,
+        namespaces: Iterable[str] = VERSIONED_NAMESPACES,
+        *,
+        refresh_seconds: float = 1.0,
+    ) -> None:
+        # Más largo primero: el prefijo más específico gana.
+        self.namespaces: Tuple[str, ...] = tuple(sorted(set(namespaces), key=len, reverse=True))
+        self.refresh_seconds = max(0.0, float(refresh_seconds))
+        self._generations: Dict[str, int] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def namespace_of(self, key: Optional[str]) -> Optional[str]:
+        if not key:
+            return None
+        for namespace in self.namespaces:
+            if key.startswith(namespace):
+                return namespace
+        return None
+
+    def generation_keys(self) -> List[str]:
+        return [generation_key(namespace) for namespace in self.namespaces]
+
+    def is_stale(self) -> bool:
+        loaded_at = self._loaded_at
+        return loaded_at is None or (time.monotonic() - loaded_at) >= self.refresh_seconds
+
+    def load(self, raw: Optional[Dict[str, Any]]) -> None:
+        """Aplica un MGET de las claves de generación. `None` = lectura fallida.
+
+        En fallo se conservan las generaciones conocidas: volver a 0 podría
+        resucitar entradas ya invalidadas.
+        """
+        with self._lock:
+            if raw is not None:
+                generations: Dict[str, int] = {}
+                for namespace in self.namespaces:
+                    try:
+                        generations[namespace] = int(raw.get(generation_key(namespace)) or 0)
+                    except (TypeError, ValueError):
+                        generations[namespace] = self._generations.get(namespace, 0)
+                self._generations = generations
+            self._loaded_at = time.monotonic()
+
+    def set_generation(self, namespace: str, generation: int) -> None:
+        with self._lock:
+            self._generations = {**self._generations, namespace: int(generation)}
+
+    def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    def physical_key(self, key: str) -> str:
+        namespace = self.namespace_of(key)
+        if namespace is None:
+            return key
+        generation = self._generations.get(namespace, 0)
+        if generation <= 0:
+            return key
+        return f"{namespace}g{generation}:{key[len(namespace):]}"
@@ -0,0 +1,68 @@
+"""Codec binario para vectores de embedding cacheados en Redis.
+
+Un embedding de 1536 dims serializado como `JSON:[...]` ocupa ~30 KB y
+parsearlo cuesta CPU en cada hit. Este codec guarda los bytes crudos con una
+cabecera mínima:
+
+    b"VEC1" | dtype (1 byte: b"f" float32, b"h" float16) | dim (uint32 LE) | data
+
+Cabecera de 9 bytes; float32 = 4 bytes/dim (6 KB para 1536), float16 =
+2 bytes/dim (3 KB) con error relativo ~1e-3, despreciable para similitud
+coseno. La decodificación es un `np.frombuffer` sin copia (float16 se
+promueve a float32).
+
+Las entradas JSON existentes siguen leyéndose por el camino JSON de
+`RedisCache`; solo las escrituras nuevas usan este formato.
+"""
+from __future__ import annotations
+
+import struct
+from typing import Optional
+
+import numpy as np
+
+VECTOR_MAGIC = b"VEC1"
+_HEADER = struct.Struct("<4scI")
+_DTYPE_CODES = {np.dtype(np.float32): b"f", np.dtype(np.float16): b"h"}
+_CODE_DTYPES = {code: dtype for dtype, code in _DTYPE_CODES.items()}
+
+SUPPORTED_VECTOR_DTYPES = ("float32", "float16")
+
+
+def is_encodable_vector(value: object) -> bool:
+    return (
+        isinstance(value, np.ndarray)
+        and value.ndim == 1
+        and value.dtype in _DTYPE_CODES
+    )
+
+
+def encode_vector(vector: np.ndarray) -> bytes:
+    """Serializa un vector 1-D float32/float16 con cabecera `VEC1`."""
+    if not is_encodable_vector(vector):
+        raise ValueError(f"Vector no soportado: dtype={getattr(vector, 'dtype', None)}")
+    data = np.ascontiguousarray(vector, dtype=vector.dtype.newbyteorder("<"))
+    return _HEADER.pack(VECTOR_MAGIC, _DTYPE_CODES[vector.dtype], data.size) + data.tobytes()
+
+
+def decode_vector(raw: bytes) -> Optional[np.ndarray]:
+    """Devuelve un ndarray float32 (read-only) o None si el payload es inválido."""
+    if len(raw) < _HEADER.size or not raw.startswith(VECTOR_MAGIC):
+        return None
+    _, code, dim = _HEADER.unpack_from(raw)
+    dtype = _CODE_DTYPES.get(code)
+    if dtype is None:
+        return None
+    if len(raw) - _HEADER.size != dim * dtype.itemsize:
+        return None
+    vector = np.frombuffer(raw, dtype=dtype.newbyteorder("<"), count=dim, offset=_HEADER.size)
+    if vector.dtype != np.float32:
+        vector = vector.astype(np.float32)
+    return vector
+
+
+def to_cache_vector(embedding, dtype: str = "float32") -> np.ndarray:
+    """Convierte un embedding (lista/ndarray) al dtype configurado para caché."""
+    if dtype not in SUPPORTED_VECTOR_DTYPES:
+        dtype = "float32"
+    return np.asarray(embedding, dtype=dtype).reshape(-1)
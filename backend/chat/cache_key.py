@@ -57,21 +57,37 @@ def _build_response_cache_config_payload(settings_obj: object | None) -> dict[st
     }
 
 
-def build_response_cache_key(bot, conversation_id: str, input_text: str) -> str:
-    """Construye la clave de caché para una respuesta LLM.
+def build_response_config_hash(bot) -> str:
+    """Hash de los settings runtime del bot que afectan a la respuesta.
 
     Usa el `chain_manager` del bot si disponible, con fallback a `bot.settings`,
     de modo que cambios de prompt/temperature invaliden la entrada.
     """
-    corpus_version = get_corpus_cache_version()
     chain_settings = getattr(getattr(bot, "chain_manager", None), "settings", None)
     bot_settings = getattr(bot, "settings", None)
     effective = chain_settings or bot_settings
 
     config_payload = _build_response_cache_config_payload(effective)
-    config_hash = hash_for_cache_key(
+    return hash_for_cache_key(
         json.dumps(config_payload, ensure_ascii=True, sort_keys=True, separators=(",", ":"))
     )
+
+
+def build_response_cache_key(
+    bot,
+    conversation_id: str,
+    input_text: str,
+    *,
+    corpus_version: Optional[str] = None,
+) -> str:
+    """Construye la clave de caché para una respuesta LLM (ver `build_response_config_hash`).
+
+    Los llamadores async pasan `corpus_version` ya leída con
+    `aget_corpus_cache_version` para no hacer un GET bloqueante en el loop.
+    """
+    if corpus_version is None:
+        corpus_version = get_corpus_cache_version()
+    config_hash = build_response_config_hash(bot)
     input_hash = hash_for_cache_key(input_text)
     return f"resp:v={corpus_version}:{conversation_id}:{config_hash}:{input_hash}"
 
@@ -127,14 +127,14 @@ def maybe_log_phantom_gap(
     # which candidates "looked" relevant but didn't actually answer.
     candidate_docs = list(getattr(req_ctx, "retrieved_docs", None) or []) if req_ctx else []
 
-    task = schedule_log_retrieval(
+    scheduled = schedule_log_retrieval(
         conversation_id=conversation_id,
         query=user_query,
         docs=candidate_docs,
         latency_ms=0.0,
         gating_reason="answer_not_grounded",
     )
-    if task is not None:
+    if scheduled:
         logger.debug(
             "[grounding] phantom gap logged conv=%s docs=%d",
             conversation_id, len(candidate_docs),
@@ -22,8 +22,9 @@ from .agentic_utils import (
     _search_tool_choice,
     _bot_has_search_tool,
     _messages_total_chars,
-    _messages_total_tokens,
+    _MessageTokenCounter,
     _collect_prior_user_msgs,
+    _run_forced_search,
     _stream_with_idle_timeout,
 )
 
@@ -69,6 +70,7 @@ async def stream_with_tools(
     req_ctx = None
     tool_calls_count = 0
     tokens_in_accum = 0
+    token_counter = _MessageTokenCounter()
     try:
         conversation_lock, lock_acquired = await locks.acquire(conversation_id)
         if not lock_acquired:
@@ -105,6 +107,36 @@ async def stream_with_tools(
             )
 
         force_search_first = _should_force_search(input_text) and _bot_has_search_tool(bot)
+        first_iteration = 0
+        if force_search_first and not forced_final and bool(
+            getattr(settings, "agentic_forced_search_fast_path", True)
+        ):
+            # Fast path: the first model call would only emit the forced
+            # search_documents call, so run retrieval now and start directly
+            # at the answer-generating iteration (counts toward the iter cap).
+            forced_call = await _run_forced_search(ctx, input_text)
+            if forced_call is not None:
+                tool_call = {key: forced_call[key] for key in ("name", "args", "id")}
+                messages.append(AIMessage(content="", tool_calls=[tool_call]))
+                messages.append(
+                    ToolMessage(content=forced_call["content"], tool_call_id=tool_call["id"])
+                )
+                tool_calls_count += 1
+                first_iteration = 1
+                force_search_first = False
+                logger.info(
+                    "[ReAct] iter=1 tool=%s conv=%s docs_chars=%s (forced fast path)",
+                    tool_call["name"],
+                    conversation_id,
+                    len(forced_call["content"]),
+                )
+                total_chars = _messages_total_chars(messages)
+                if total_chars > _MAX_TURN_CHARS:
+                    forced_final = True
+                    forced_final_reason = (
+                        f"budget_exceeded chars={total_chars} cap={_MAX_TURN_CHARS}"
+                    )
+
         if force_search_first:
             logger.debug(
                 "[Agentic] forcing search_documents tool_choice for first iter conv=%s",
@@ -112,9 +144,9 @@ async def stream_with_tools(
             )
 
         if not forced_final:
-            for iteration in range(MAX_TOOL_ITERS):
+            for iteration in range(first_iteration, MAX_TOOL_ITERS):
                 try:
-                    tokens_in_accum += _messages_total_tokens(messages)
+                    tokens_in_accum += token_counter.total(messages)
                 except Exception as exc:
                     logger.debug("token estimation failed (loop iter): %s", exc)
                 # Force tool_choice only on first iter. Subsequent iters have
@@ -202,7 +234,7 @@ async def stream_with_tools(
                 forced_final_reason,
             )
             try:
-                tokens_in_accum += _messages_total_tokens(messages)
+                tokens_in_accum += token_counter.total(messages)
             except Exception as exc:
                 logger.debug("token estimation failed (forced_final): %s", exc)
             final_stream = bot.astream_messages_no_tools(messages)
@@ -231,10 +263,7 @@ async def stream_with_tools(
 
         if tool_fired:
             try:
-                await db.add_message(conversation_id, USER_ROLE, input_text, source)
-                if text_accum:
-                    from domain.constants import ASSISTANT_ROLE
-                    await db.add_message(conversation_id, ASSISTANT_ROLE, text_accum, source)
+                await db.add_turn(conversation_id, input_text, text_accum or None, source)
             except Exception as exc:
                 logger.error(
                     "Could not persist messages on tool_terminal conv=%s: %s",
@@ -242,9 +271,7 @@ async def stream_with_tools(
                 )
         elif text_accum:
             try:
-                from domain.constants import ASSISTANT_ROLE
-                await db.add_message(conversation_id, USER_ROLE, input_text, source)
-                await db.add_message(conversation_id, ASSISTANT_ROLE, text_accum, source)
+                await db.add_turn(conversation_id, input_text, text_accum, source)
             except Exception as exc:
                 logger.error(
                     "No se pudo persistir la conversaciÃ³n en Mongo para conv=%s: %s",
@@ -7,6 +7,8 @@ from dataclasses import dataclass
 from typing import Optional
 
 from infra.logging_utils import get_logger
+from chat.turn_context import load_turn_history
+from core.tools import ToolContext, registry as default_registry
 from core.tools.retrieval_tool import SEARCH_TOOL_NAME
 
 logger = get_logger(__name__)
@@ -65,6 +67,32 @@ def _bot_has_search_tool(bot) -> bool:
         return False
 
 
+async def _run_forced_search(ctx: ToolContext, input_text: str) -> Optional[dict]:
+    """Run `search_documents` locally for a turn whose search is already forced.
+
+    Skips the LLM round trip whose only output would be the forced tool call.
+    The handler applies the history-aware query expansion on its own
+    (`prior_user_msgs` in ctx.extra). Returns the synthetic tool call plus its
+    content, or None if the tool is unavailable or fails (caller falls back to
+    the model-driven path).
+    """
+    tool = default_registry.get(SEARCH_TOOL_NAME)
+    if tool is None:
+        return None
+    args = {"query": input_text.strip()}
+    try:
+        result = await tool.handler(args, ctx)
+    except Exception as exc:
+        logger.warning("forced search fast path failed conv=%s: %s", ctx.conversation_id, exc)
+        return None
+    return {
+        "name": SEARCH_TOOL_NAME,
+        "args": args,
+        "id": "call_forced_search",
+        "content": result.content or "",
+    }
+
+
 @dataclass
 class AgenticResponseResult:
     text: str
@@ -91,34 +119,59 @@ def _messages_total_chars(messages) -> int:
     return total
 
 
-def _messages_total_tokens(messages) -> int:
-    """Estimación tiktoken cl100k_base sobre `messages` list."""
+def _message_tokens(m) -> int:
+    """Estimación tiktoken cl100k_base de un mensaje (contenido + tool_calls)."""
     from chat.debug import get_token_count
     total = 0
-    for m in messages:
-        c = getattr(m, "content", None)
-        if isinstance(c, str):
-            total += get_token_count(c)
-        elif isinstance(c, list):
-            for part in c:
-                total += get_token_count(part if isinstance(part, str) else str(part))
-        elif c is not None:
-            total += get_token_count(str(c))
-        tool_calls = getattr(m, "tool_calls", None) or []
-        for tc in tool_calls:
-            try:
-                total += get_token_count(str(tc))
-            except Exception:
-                pass
+    c = getattr(m, "content", None)
+    if isinstance(c, str):
+        total += get_token_count(c)
+    elif isinstance(c, list):
+        for part in c:
+            total += get_token_count(part if isinstance(part, str) else str(part))
+    elif c is not None:
+        total += get_token_count(str(c))
+    tool_calls = getattr(m, "tool_calls", None) or []
+    for tc in tool_calls:
+        try:
+            total += get_token_count(str(tc))
+        except Exception:
+            pass
     return total
 
 
+class _MessageTokenCounter:
+    """Memoized per-message token counts for one ReAct turn.
+
+    The loop re-sums the prompt before every model call while only appending
+    AIMessage/ToolMessage pairs, so each message is encoded once and later
+    iterations only pay for the new tool results. Entries keep a reference
+    to the message so `id()` cannot be reused within the turn.
+    """
+
+    def __init__(self) -> None:
+        self._counts: dict[int, tuple[object, int]] = {}
+        self.encoded = 0
+
+    def message_tokens(self, m) -> int:
+        entry = self._counts.get(id(m))
+        if entry is not None and entry[0] is m:
+            return entry[1]
+        count = _message_tokens(m)
+        self._counts[id(m)] = (m, count)
+        self.encoded += 1
+        return count
+
+    def total(self, messages) -> int:
+        return sum(self.message_tokens(m) for m in messages)
+
+
 async def _collect_prior_user_msgs(memory, conversation_id: str, limit: int = 2) -> list[str]:
     """Best-effort fetch of the last N user messages for query expansion."""
     if memory is None:
         return []
     try:
-        hist = await memory.get_history(conversation_id)
+        hist = await load_turn_history(memory, conversation_id)
     except Exception as exc:
         logger.warning("_collect_prior_user_msgs failed for conv=%s: %s", conversation_id, exc)
         return []
@@ -7,12 +7,12 @@ from fastapi import HTTPException
 from infra.logging_utils import get_logger
 from cache.manager import cache
 from config import settings
-from domain.constants import USER_ROLE, ASSISTANT_ROLE
 from domain.objects import Message as BotMessage
 from chat.turn_context import new_request_context
 from rag.retrieval.retriever import RetrievalBackendUnavailableError
 
 from chat.cache_key import build_response_cache_key
+from rag.corpus_state import aget_corpus_cache_version
 from chat.debug import DebugInfoBuilder, log_stream_timing_summary
 from chat.locks import ConversationLockManager
 
@@ -46,7 +46,9 @@ async def generate_response(
         else:
             logger.debug("ENABLE_RAG_LCEL desactivado: la recuperaciÃ³n contextual no se aplicarÃ¡.")
 
-        cache_key = build_response_cache_key(bot, conversation_id, input_text)
+        cache_key = build_response_cache_key(
+            bot, conversation_id, input_text, corpus_version=await aget_corpus_cache_version()
+        )
         cached_response = None
         try:
             if bool(getattr(settings, "enable_cache", True)):
@@ -100,8 +102,7 @@ async def generate_response(
 
         if not debug_mode:
             try:
-                await db.add_message(conversation_id, USER_ROLE, input_text, source)
-                await db.add_message(conversation_id, ASSISTANT_ROLE, response_content, source)
+                await db.add_turn(conversation_id, input_text, response_content, source)
             except Exception as exc:
                 logger.error(
                     "No se pudo persistir la conversaciÃ³n en Mongo para conv=%s: %s",
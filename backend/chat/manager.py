@@ -18,13 +18,14 @@ from infra.logging_utils import get_logger
 from cache.manager import cache
 from config import settings
 from database.mongodb import get_mongodb_client
-from domain.constants import USER_ROLE, ASSISTANT_ROLE
 from domain.objects import Message as BotMessage
 from core.bot import Bot
-from chat.turn_context import new_request_context
+from chat.turn_context import load_turn_history, new_request_context
 from rag.retrieval.retriever import RetrievalBackendUnavailableError
 
 from chat.cache_key import build_response_cache_key
+from rag.corpus_state import aget_corpus_cache_version
+from chat.semantic_cache import get_semantic_response_cache
 from chat.debug import DebugInfoBuilder, log_stream_timing_summary
 from chat.locks import ConversationLockManager
 from chat.tool_dispatch import DispatchEvent, consume_stream
@@ -58,8 +59,44 @@ class ChatManager:
 
         logger.debug(f"[DB] ChatManager inicializado | client_id={id(self.db)}")
 
-    def _build_response_cache_key(self, conversation_id: str, input_text: str) -> str:
-        return build_response_cache_key(self.bot, conversation_id, input_text)
+    async def _build_response_cache_key(self, conversation_id: str, input_text: str) -> str:
+        return build_response_cache_key(
+            self.bot,
+            conversation_id,
+            input_text,
+            corpus_version=await aget_corpus_cache_version(),
+        )
+
+    async def _semantic_cache_context(self, conversation_id: str, input_text: str, semantic_cache):
+        """(is_first_turn, embedding) para la caché semántica, o None si no aplica.
+
+        Solo se embebe si el turno es elegible; si no, el embedding es None y
+        `lookup`/`store` lo cuentan como no elegible sin pagar la llamada.
+        """
+        embedding_manager = getattr(getattr(self.bot, "rag_retriever", None), "embedding_manager", None)
+        if embedding_manager is None:
+            return None
+        try:
+            history = await load_turn_history(self.bot.memory, conversation_id)
+            is_first_turn = not any(msg.get("role") != "system" for msg in history or [])
+            if not semantic_cache.can_lookup(input_text, is_first_turn=is_first_turn):
+                return is_first_turn, None
+            embedding = await embedding_manager.embed_text(input_text)
+        except Exception as exc:
+            logger.warning("Semantic cache context failed for conv=%s: %s", conversation_id, exc)
+            return None
+        return is_first_turn, embedding
+
+    def _is_semantically_shareable(self, input_text: str) -> bool:
+        # Preguntas con datos personales ("me llamo...") producen respuestas
+        # personalizadas que no deben servirse a otros visitantes.
+        extract_profile = getattr(self.bot.memory, "_extract_profile", None)
+        if extract_profile is None:
+            return True
+        try:
+            return not extract_profile(input_text)
+        except Exception:
+            return False
 
     async def _persist_messages_safely(
         self,
@@ -69,8 +106,7 @@ class ChatManager:
         source: str | None,
     ) -> None:
         try:
-            await self.db.add_message(conversation_id, USER_ROLE, input_text, source)
-            await self.db.add_message(conversation_id, ASSISTANT_ROLE, response_content, source)
+            await self.db.add_turn(conversation_id, input_text, response_content, source)
         except Exception as exc:
             logger.error(
                 "No se pudo persistir la conversaciÃ³n en Mongo para conv=%s: %s",
@@ -171,7 +207,7 @@ class ChatManager:
             logger.debug(f"[CHAT] Streaming start | conv={conversation_id}")
             req_ctx = new_request_context()
             stream_started_at = time.perf_counter()
-            cache_key = self._build_response_cache_key(conversation_id, input_text)
+            cache_key = await self._build_response_cache_key(conversation_id, input_text)
             cached_response = None
             try:
                 if bool(getattr(settings, "enable_cache", True)):
@@ -180,6 +216,26 @@ class ChatManager:
                 logger.warning("Cache get failed for conv=%s: %s", conversation_id, exc)
                 cached_response = None
 
+            semantic_cache = None
+            semantic_ctx = None
+            if (
+                cached_response is None
+                and bool(getattr(settings, "enable_cache", True))
+                and bool(getattr(settings, "enable_semantic_response_cache", False))
+            ):
+                semantic_cache = get_semantic_response_cache(settings)
+                semantic_ctx = await self._semantic_cache_context(conversation_id, input_text, semantic_cache)
+                if semantic_ctx is not None:
+                    is_first_turn, query_embedding = semantic_ctx
+                    hit = await semantic_cache.lookup(
+                        self.bot, input_text, query_embedding, is_first_turn=is_first_turn
+                    )
+                    if hit is not None:
+                        logger.debug(
+                            "[CHAT] Semantic cache hit | conv=%s sim=%.4f", conversation_id, hit.similarity
+                        )
+                        cached_response = hit.answer
+
             if cached_response is not None:
                 final_text = cached_response
                 req_ctx.set_stage_timing_ms(
@@ -253,6 +309,11 @@ class ChatManager:
                     await cache.aset(cache_key, final_text, cache.ttl)
             except Exception as exc:
                 logger.warning("Cache set failed for conv=%s: %s", conversation_id, exc)
+            if semantic_cache is not None and semantic_ctx is not None and self._is_semantically_shareable(input_text):
+                is_first_turn, query_embedding = semantic_ctx
+                await semantic_cache.store(
+                    self.bot, input_text, final_text, query_embedding, is_first_turn=is_first_turn
+                )
             if debug_mode:
                 t_llm_end = time.perf_counter()
                 req_ctx.set_stage_timing_ms("llm_ms", (t_llm_end - t_llm_start) * 1000)
@@ -0,0 +1,320 @@
+"""Caché semántica de respuestas compartida entre conversaciones (opt-in).
+
+La caché exacta de `cache_key.py` incluye el conversation_id, así que dos
+visitantes que hacen la misma pregunta frecuente pagan retrieval + LLM cada
+uno. Esta capa reutiliza una respuesta previa cuando la pregunta nueva es
+semánticamente casi idéntica (coseno >= umbral) a una ya respondida.
+
+Garantías:
+- Namespace = versión del corpus + hash de config del bot
+  (`build_response_config_hash`): re-ingestar o cambiar prompt/modelo deja
+  las entradas anteriores inalcanzables; nunca se sirve entre configs.
+- Solo preguntas autocontenidas: se consulta en el primer turno o cuando la
+  pregunta no parece un follow-up (`looks_like_followup`), y solo se
+  almacenan respuestas generadas en un primer turno sin referencias.
+- Acotada: como mucho `max_entries` por namespace (FIFO) y TTL en Redis.
+
+Layout en caché:
+  resp:sem:ids:{ns}       -> lista Redis de entry ids (orden de inserción),
+                             escrita con `apush_capped` (LREM+RPUSH+LTRIM+EXPIRE
+                             atómico: dos workers que guardan a la vez no se
+                             pisan el índice)
+  resp:sem:e:{ns}:{id}    -> {"q": str, "a": str, "e": base64 float32}
+
+Cada worker mantiene una matriz local normalizada por namespace y la
+resincroniza con el índice compartido cada `sync_interval_s` segundos
+(un LRANGE del índice + un MGET de las entradas nuevas).
+"""
+from __future__ import annotations
+
+import base64
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from cache.manager import cache as _cache
+from chat.cache_key import build_response_config_hash
+from core.tools.retrieval_tool import looks_like_followup
+from infra.hashing import hash_for_cache_key
+from infra.logging_utils import get_logger
+from infra.metrics_collector import get_metrics_collector
+from rag.corpus_state import aget_corpus_cache_version
+
+logger = get_logger(__name__)
+
+_INDEX_PREFIX = "resp:sem:ids:"
+_ENTRY_PREFIX = "resp:sem:e:"
+# Namespaces locales retenidos por worker (versiones de corpus/config viejas).
+_MAX_LOCAL_NAMESPACES = 4
+# Contadores locales -> outcome de `MetricsCollector.record_semantic_cache`.
+_COLLECTOR_OUTCOMES = {"hits": "hit", "misses": "miss", "ineligible": "ineligible", "stores": "store"}
+
+
+@dataclass
+class SemanticHit:
+    answer: str
+    matched_question: str
+    similarity: float
+
+
+@dataclass
+class _Namespace:
+    ids: List[str] = field(default_factory=list)
+    questions: List[str] = field(default_factory=list)
+    answers: List[str] = field(default_factory=list)
+    matrix: Optional[np.ndarray] = None
+    synced_at: float = 0.0
+
+    def append(self, entry_id: str, question: str, answer: str, vector: np.ndarray) -> None:
+        self.ids.append(entry_id)
+        self.questions.append(question)
+        self.answers.append(answer)
+        row = vector.reshape(1, -1)
+        if self.matrix is None or self.matrix.shape[1] != row.shape[1]:
+            self.matrix = row
+        else:
+            self.matrix = np.vstack([self.matrix, row])
+
+    def truncate(self, max_entries: int) -> None:
+        overflow = len(self.ids) - max_entries
+        if overflow <= 0:
+            return
+        del self.ids[:overflow]
+        del self.questions[:overflow]
+        del self.answers[:overflow]
+        if self.matrix is not None:
+            self.matrix = self.matrix[overflow:]
+
+
+def _normalize(vector: Any) -> Optional[np.ndarray]:
+    try:
+        arr = np.asarray(vector, dtype=np.float32).reshape(-1)
+    except (TypeError, ValueError):
+        return None
+    if arr.size == 0 or not np.all(np.isfinite(arr)):
+        return None
+    norm = float(np.linalg.norm(arr))
+    if norm == 0.0:
+        return None
+    return arr / norm
+
+
+def _encode_vector(vector: np.ndarray) -> str:
+    return base64.b64encode(vector.astype(np.float32).tobytes()).decode("ascii")
+
+
+def _decode_vector(payload: str) -> Optional[np.ndarray]:
+    try:
+        return _normalize(np.frombuffer(base64.b64decode(payload), dtype=np.float32))
+    except (TypeError, ValueError):
+        return None
+
+
+def _normalize_question(text: str) -> str:
+    return " ".join((text or "").lower().strip().split())
+
+
+class SemanticResponseCache:
+    """Lookup/store por similitud de embedding, con contadores de hit-rate."""
+
+    def __init__(
+        self,
+        *,
+        threshold: float = 0.95,
+        max_entries: int = 256,
+        ttl_seconds: int = 86400,
+        sync_interval_s: float = 30.0,
+        cache_backend: Any = None,
+    ) -> None:
+        self.threshold = float(threshold)
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = int(ttl_seconds)
+        self.sync_interval_s = float(sync_interval_s)
+        self._cache = cache_backend if cache_backend is not None else _cache
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._lock = threading.Lock()
+        self._counters = {"lookups": 0, "hits": 0, "misses": 0, "ineligible": 0, "stores": 0, "errors": 0}
+
+    # ------------------------------------------------------------------
+    # Elegibilidad
+    # ------------------------------------------------------------------
+    @staticmethod
+    def is_context_free(question: str) -> bool:
+        return bool((question or "").strip()) and not looks_like_followup(question)
+
+    def can_lookup(self, question: str, *, is_first_turn: bool) -> bool:
+        if not (question or "").strip():
+            return False
+        return is_first_turn or self.is_context_free(question)
+
+    def can_store(self, question: str, *, is_first_turn: bool) -> bool:
+        # Una respuesta generada a mitad de conversación puede depender del
+        # historial aunque la pregunta parezca autocontenida.
+        return is_first_turn and self.is_context_free(question)
+
+    # ------------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------------
+    async def namespace_for(self, bot) -> str:
+        return f"{await aget_corpus_cache_version()}:{build_response_config_hash(bot)}"
+
+    async def lookup(self, bot, question: str, embedding: Any, *, is_first_turn: bool) -> Optional[SemanticHit]:
+        if not self.can_lookup(question, is_first_turn=is_first_turn):
+            self._incr("ineligible")
+            return None
+        query_vec = _normalize(embedding)
+        if query_vec is None:
+            self._incr("ineligible")
+            return None
+
+        self._incr("lookups")
+        try:
+            state = await self._sync(await self.namespace_for(bot))
+        except Exception as exc:
+            logger.warning("Semantic cache sync failed: %s", exc)
+            self._incr("errors")
+            self._incr("misses")
+            return None
+
+        matrix = state.matrix
+        if matrix is None or matrix.shape[1] != query_vec.shape[0]:
+            self._incr("misses")
+            return None
+        similarities = matrix @ query_vec
+        best = int(np.argmax(similarities))
+        score = float(similarities[best])
+        if score < self.threshold:
+            self._incr("misses")
+            return None
+        self._incr("hits")
+        return SemanticHit(
+            answer=state.answers[best],
+            matched_question=state.questions[best],
+            similarity=score,
+        )
+
+    async def store(self, bot, question: str, answer: str, embedding: Any, *, is_first_turn: bool) -> bool:
+        if not answer or not self.can_store(question, is_first_turn=is_first_turn):
+            return False
+        vector = _normalize(embedding)
+        if vector is None:
+            return False
+
+        namespace = await self.namespace_for(bot)
+        entry_id = hash_for_cache_key(_normalize_question(question))
+        try:
+            await self._cache.aset(
+                f"{_ENTRY_PREFIX}{namespace}:{entry_id}",
+                {"q": question, "a": answer, "e": _encode_vector(vector)},
+                self.ttl_seconds,
+            )
+            await self._cache.apush_capped(
+                f"{_INDEX_PREFIX}{namespace}",
+                entry_id,
+                self.max_entries,
+                self.ttl_seconds,
+            )
+        except Exception as exc:
+            logger.warning("Semantic cache store failed: %s", exc)
+            self._incr("errors")
+            return False
+
+        with self._lock:
+            state = self._namespaces.get(namespace)
+            if state is not None and entry_id not in state.ids:
+                state.append(entry_id, question, answer, vector)
+                state.truncate(self.max_entries)
+        self._incr("stores")
+        return True
+
+    async def _sync(self, namespace: str) -> _Namespace:
+        now = time.monotonic()
+        with self._lock:
+            state = self._namespaces.get(namespace)
+            if state is not None and now - state.synced_at < self.sync_interval_s:
+                return state
+
+        ids = await self._cache.aget_list(f"{_INDEX_PREFIX}{namespace}")
+        with self._lock:
+            known = set(self._namespaces[namespace].ids) if namespace in self._namespaces else set()
+        missing = [entry_id for entry_id in ids if entry_id not in known]
+        fetched = await self._cache.aget_many([f"{_ENTRY_PREFIX}{namespace}:{entry_id}" for entry_id in missing])
+
+        with self._lock:
+            previous = self._namespaces.get(namespace) or _Namespace()
+            by_id = {
+                entry_id: (previous.questions[pos], previous.answers[pos], previous.matrix[pos])
+                for pos, entry_id in enumerate(previous.ids)
+                if previous.matrix is not None
+            }
+            for entry_id in missing:
+                payload = fetched.get(f"{_ENTRY_PREFIX}{namespace}:{entry_id}")
+                if not isinstance(payload, dict):
+                    continue
+                vector = _decode_vector(payload.get("e") or "")
+                if vector is None:
+                    continue
+                by_id[entry_id] = (str(payload.get("q", "")), str(payload.get("a", "")), vector)
+
+            state = _Namespace()
+            for entry_id in ids[-self.max_entries:]:
+                item = by_id.get(entry_id)
+                if item is not None:
+                    state.append(entry_id, *item)
+            state.synced_at = now
+            self._namespaces[namespace] = state
+            while len(self._namespaces) > _MAX_LOCAL_NAMESPACES:
+                self._namespaces.pop(next(iter(self._namespaces)))
+            return state
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+    def _incr(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+        outcome = _COLLECTOR_OUTCOMES.get(name)
+        if outcome is not None:
+            try:
+                get_metrics_collector().record_semantic_cache(outcome)
+            except Exception as exc:
+                logger.debug("metrics record failed (semantic cache): %s", exc)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            local_entries = sum(len(state.ids) for state in self._namespaces.values())
+        lookups = counters["lookups"]
+        counters["hit_rate"] = round(counters["hits"] / lookups, 4) if lookups else 0.0
+        counters["local_entries"] = local_entries
+        counters["threshold"] = self.threshold
+        return counters
+
+    def reset(self) -> None:
+        with self._lock:
+            self._namespaces.clear()
+            for name in self._counters:
+                self._counters[name] = 0
+
+
+_semantic_cache: Optional[SemanticResponseCache] = None
+_singleton_lock = threading.Lock()
+
+
+def get_semantic_response_cache(settings_obj: Any = None) -> SemanticResponseCache:
+    global _semantic_cache
+    if _semantic_cache is None:
+        with _singleton_lock:
+            if _semantic_cache is None:
+                if settings_obj is None:
+                    from config import settings as settings_obj
+                _semantic_cache = SemanticResponseCache(
+                    threshold=getattr(settings_obj, "semantic_response_cache_threshold", 0.95),
+                    max_entries=getattr(settings_obj, "semantic_response_cache_max_entries", 256),
+                    ttl_seconds=getattr(settings_obj, "semantic_response_cache_ttl", 86400),
+                    sync_interval_s=getattr(settings_obj, "semantic_response_cache_sync_seconds", 30.0),
+                )
+    return _semantic_cache
@@ -12,7 +12,7 @@ Solución:
 """
 
 from dataclasses import dataclass, field
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Tuple
 from contextvars import ContextVar
 
 
@@ -30,6 +30,9 @@ class RequestContext:
     # Acumulativo a lo largo del turno (incluye iters ReAct).
     tokens_in: int = 0
     tokens_out: int = 0
+    # Historial leído de memoria en este turno: (conversation_id, mensajes).
+    # Lo comparten todos los consumidores del turno (ver `load_turn_history`).
+    history_snapshot: Optional[Tuple[str, List[dict]]] = None
 
     def set_stage_timing_ms(self, name: str, value: float | None) -> None:
         if not name or value is None:
@@ -70,3 +73,21 @@ def get_request_context() -> RequestContext:
         ctx = RequestContext()
         _current_request_ctx.set(ctx)
     return ctx
+
+
+async def load_turn_history(memory, conversation_id: str) -> List[dict]:
+    """Historial de `conversation_id`, leído de `memory` una sola vez por turno.
+
+    El primer consumidor del turno hace el `get_history` (perfil + últimos N
+    mensajes en Mongo) y guarda el resultado en el RequestContext; los
+    siguientes (expansión de query, pipeline del prompt, caché semántica)
+    reciben una copia del mismo snapshot. Los errores se propagan sin cachear.
+    """
+    ctx = get_request_context()
+    snapshot = ctx.history_snapshot
+    if snapshot is not None and snapshot[0] == conversation_id:
+        return list(snapshot[1])
+    hist = await memory.get_history(conversation_id)
+    hist = list(hist) if isinstance(hist, list) else []
+    ctx.history_snapshot = (conversation_id, hist)
+    return list(hist)
@@ -88,6 +88,9 @@ class BotUIFields(BaseSettings):
     human_prefix: str = Field(default="user", env="HUMAN_PREFIX")
     enable_agentic_handoff: bool = Field(default=False, env="ENABLE_AGENTIC_HANDOFF")
     enable_agentic_rag: bool = Field(default=False, env="ENABLE_AGENTIC_RAG")
+    # Cuando la heurística fuerza la búsqueda, ejecutar search_documents
+    # localmente con el mensaje del usuario en vez de pedirle al LLM la tool call.
+    agentic_forced_search_fast_path: bool = Field(default=True, env="AGENTIC_FORCED_SEARCH_FAST_PATH")
 
 
 class MongoFields(BaseSettings):
@@ -97,11 +100,34 @@ class MongoFields(BaseSettings):
     mongo_max_pool_size: int = Field(default=100, env="MONGO_MAX_POOL_SIZE")
     mongo_timeout_ms: int = Field(default=5000, env="MONGO_TIMEOUT_MS")
     mongo_wait_queue_timeout_ms: int = Field(default=5000, env="MONGO_WAIT_QUEUE_TIMEOUT_MS")
+    # retrieval_logs se escriben por lotes (insert_many) por tamaño o tiempo;
+    # con el buffer lleno se descartan y se cuentan (ver /dashboard/observability).
+    retrieval_log_batch_size: int = Field(default=100, env="RETRIEVAL_LOG_BATCH_SIZE")
+    retrieval_log_flush_interval_seconds: float = Field(default=1.0, env="RETRIEVAL_LOG_FLUSH_INTERVAL_SECONDS")
+    retrieval_log_max_buffer: int = Field(default=5000, env="RETRIEVAL_LOG_MAX_BUFFER")
+    # Write-behind de mensajes de chat: el turno se encola y se escribe por lotes
+    # cada CHAT_MESSAGE_FLUSH_INTERVAL_MS; se vacía en el shutdown ordenado.
+    chat_message_write_behind: bool = Field(default=False, env="CHAT_MESSAGE_WRITE_BEHIND")
+    chat_message_flush_interval_ms: float = Field(default=50.0, env="CHAT_MESSAGE_FLUSH_INTERVAL_MS")
+    chat_message_max_pending: int = Field(default=10000, env="CHAT_MESSAGE_MAX_PENDING")
+    # Reintentos (con backoff) de un lote fallido antes de descartarlo.
+    chat_message_flush_max_retries: int = Field(default=3, env="CHAT_MESSAGE_FLUSH_MAX_RETRIES")
 
 
 class RedisFields(BaseSettings):
     redis_url: Optional[SecretStr] = Field(default=None, env="REDIS_URL")
     redis_max_connections: int = Field(default=200, env="REDIS_MAX_CONNECTIONS")
+    # Backend redis.asyncio para la API async de CacheManager (aget/aset/...);
+    # con False vuelve al cliente síncrono vía asyncio.to_thread.
+    enable_async_redis: bool = Field(default=True, env="ENABLE_ASYNC_REDIS")
+    # Cada cuánto se releen las generaciones de namespaces versionados
+    # (cache/namespaces.py); un bump en otro proceso se ve tras este plazo.
+    cache_namespace_generation_refresh_seconds: float = Field(default=1.0, env="CACHE_NAMESPACE_GENERATION_REFRESH_SECONDS")
+    # Tier L1 en proceso para claves calientes (cache/l1.py); se invalida por
+    # pub/sub en cada escritura. max_age acota escrituras hechas fuera de la app.
+    enable_cache_l1: bool = Field(default=True, env="ENABLE_CACHE_L1")
+    cache_l1_max_entries: int = Field(default=256, env="CACHE_L1_MAX_ENTRIES")
+    cache_l1_max_age_seconds: float = Field(default=300.0, env="CACHE_L1_MAX_AGE_SECONDS")
     cache_retry_attempts: int = Field(default=3, env="CACHE_RETRY_ATTEMPTS")
     cache_retry_delay_base: float = Field(default=0.5, env="CACHE_RETRY_DELAY_BASE")
 
@@ -123,8 +149,26 @@ class RAGChunkingFields(BaseSettings):
     enable_semantic_chunking: bool = Field(default=False, env="ENABLE_SEMANTIC_CHUNKING")
     semantic_chunk_threshold: float = Field(default=0.5, env="SEMANTIC_CHUNK_THRESHOLD")
     semantic_chunk_model: str = Field(default="all-MiniLM-L6-v2", env="SEMANTIC_CHUNK_MODEL")
+    # Los bloques se codifican una vez por documento, en lotes de este tamaño.
+    semantic_chunk_batch_size: int = Field(default=64, env="SEMANTIC_CHUNK_BATCH_SIZE")
     batch_size: int = Field(default=100, env="BATCH_SIZE")
     deduplication_threshold: float = Field(default=0.95, validation_alias="DEDUP_THRESHOLD")
+    # Cola durable de ingesta (coleccion ingestion_jobs). "embedded": la API consume
+    # la cola en su propio proceso; "external": solo `python -m rag.ingestion.worker`.
+    ingestion_worker_mode: str = Field(default="embedded", env="INGESTION_WORKER_MODE")
+    ingestion_worker_concurrency: int = Field(default=1, env="INGESTION_WORKER_CONCURRENCY")
+    ingestion_worker_poll_interval_seconds: float = Field(default=2.0, env="INGESTION_WORKER_POLL_INTERVAL_SECONDS")
+    ingestion_job_max_attempts: int = Field(default=3, env="INGESTION_JOB_MAX_ATTEMPTS")
+    ingestion_job_lease_seconds: float = Field(default=120.0, env="INGESTION_JOB_LEASE_SECONDS")
+    # Backoff exponencial entre reintentos: base * 2^(intento-1), max 300s.
+    ingestion_job_retry_delay_seconds: float = Field(default=10.0, env="INGESTION_JOB_RETRY_DELAY_SECONDS")
+    # Parseo y chunking de PDFs en un pool de procesos (0 = en el proceso actual);
+    # los PDFs se parsean en shards de INGESTION_SHARD_PAGES paginas en paralelo.
+    ingestion_process_pool_workers: int = Field(default=2, env="INGESTION_PROCESS_POOL_WORKERS")
+    ingestion_shard_pages: int = Field(default=64, env="INGESTION_SHARD_PAGES")
+    # Chunking en streaming: los parents salen a medida que se parsea cada ventana
+    # de paginas y se embeben/persisten en lotes de ~N children (0 = sin streaming).
+    ingestion_stream_batch_children: int = Field(default=128, env="INGESTION_STREAM_BATCH_CHILDREN")
 
 
 class RAGRetrievalFields(BaseSettings):
@@ -134,6 +178,9 @@ class RAGRetrievalFields(BaseSettings):
     similarity_threshold: float = Field(default=0.3, env="SIMILARITY_THRESHOLD")
     rag_gating_similarity_threshold: float = Field(default=0.20, env="RAG_GATING_SIMILARITY_THRESHOLD")
     enable_hybrid_search: bool = Field(default=True, env="ENABLE_HYBRID_SEARCH")
+    # Serve the BM25 leg from an in-process inverted index rebuilt per corpus
+    # version instead of querying the Mongo postings collection per request.
+    enable_lexical_memory_index: bool = Field(default=True, env="ENABLE_LEXICAL_MEMORY_INDEX")
     enable_llm_reranker: bool = Field(default=False, env="ENABLE_LLM_RERANKER")
     hybrid_rrf_k: int = Field(default=60, env="HYBRID_RRF_K")
     hybrid_child_candidate_limit: int = Field(default=12, env="HYBRID_CHILD_CANDIDATE_LIMIT")
@@ -177,13 +224,38 @@ class RAGEmbeddingFields(BaseSettings):
     embedding_model: str = Field(default="openai:text-embedding-3-small", env="EMBEDDING_MODEL")
     embedding_batch_size: int = Field(default=32, env="EMBEDDING_BATCH_SIZE")
     default_embedding_dimension: int = Field(default=1536, env="DEFAULT_EMBEDDING_DIMENSION")
+    # Coalescing de embeddings de consulta async: single-flight por texto y
+    # micro-batch de consultas distintas que llegan dentro de la ventana.
+    enable_embedding_coalescing: bool = Field(default=True, env="ENABLE_EMBEDDING_COALESCING")
+    embedding_coalesce_window_ms: float = Field(default=5.0, env="EMBEDDING_COALESCE_WINDOW_MS")
+    embedding_coalesce_max_batch: int = Field(default=32, env="EMBEDDING_COALESCE_MAX_BATCH")
+    # dtype del codec binario de embeddings en caché: float32 (exacto) o float16 (mitad de memoria).
+    embedding_cache_dtype: str = Field(default="float32", env="EMBEDDING_CACHE_DTYPE")
 
 
 class CacheFields(BaseSettings):
     max_cache_size: int = Field(default=1024, env="MAX_CACHE_SIZE")
+    # Presupuesto de bytes del InMemoryCache de fallback (0 = solo MAX_CACHE_SIZE).
+    memory_cache_max_bytes: int = Field(default=64 * 1024 * 1024, env="MEMORY_CACHE_MAX_BYTES")
     cache_store_embeddings: bool = Field(default=True, env="CACHE_STORE_EMBEDDINGS")
+    # Codec de payloads Redis: "orjson" (rápido; sigue siendo `JSON:` legible por
+    # workers anteriores) o "json". Se leen ambos formatos siempre.
+    cache_payload_codec: str = Field(default="orjson", env="CACHE_PAYLOAD_CODEC")
+    # Comprime con zlib los payloads >= umbral (0 = nunca). Workers previos a
+    # la compresión tratan `ZLB1` como corrupto: usar 0 durante un rollout mixto.
+    cache_compression_threshold_bytes: int = Field(default=8192, env="CACHE_COMPRESSION_THRESHOLD_BYTES")
+    cache_compression_level: int = Field(default=1, env="CACHE_COMPRESSION_LEVEL")
     enable_cache: bool = Field(default=True, env="ENABLE_CACHE")
+    # Hits/misses, latencias y tamaños por familia de claves (cache/metrics.py).
+    enable_cache_metrics: bool = Field(default=True, env="ENABLE_CACHE_METRICS")
     cache_ttl: int = Field(default=3600, env="CACHE_TTL")
+    # Caché semántica de respuestas entre conversaciones (solo preguntas de
+    # primer turno / autocontenidas). Opt-in: ver chat/semantic_cache.py.
+    enable_semantic_response_cache: bool = Field(default=False, env="ENABLE_SEMANTIC_RESPONSE_CACHE")
+    semantic_response_cache_threshold: float = Field(default=0.95, env="SEMANTIC_RESPONSE_CACHE_THRESHOLD")
+    semantic_response_cache_max_entries: int = Field(default=256, env="SEMANTIC_RESPONSE_CACHE_MAX_ENTRIES")
+    semantic_response_cache_ttl: int = Field(default=86400, env="SEMANTIC_RESPONSE_CACHE_TTL")
+    semantic_response_cache_sync_seconds: float = Field(default=30.0, env="SEMANTIC_RESPONSE_CACHE_SYNC_SECONDS")
 
 
 class StorageFields(BaseSettings):
@@ -19,7 +19,7 @@ from config import Settings, settings as app_settings
 from infra.chunk_utils import extract_text_from_chunk
 from .chain import ChainManager
 from .tools import ToolDefinition
-from chat.turn_context import get_request_context
+from chat.turn_context import get_request_context, load_turn_history
 from rag.retrieval import RAGRetriever, RetrievalBackendUnavailableError
 from database.retrieval_log_repository import GAP_REASONS, schedule_log_retrieval
 
@@ -109,7 +109,7 @@ class Bot:
         async def get_history_async(x):
             conversation_id = x.get("conversation_id")
             try:
-                hist = await self.memory.get_history(conversation_id)
+                hist = await load_turn_history(self.memory, conversation_id)
             except Exception as exc:
                 self.logger.error(
                     "[HISTORY] Error cargando historial para conv=%s. Continuando sin historial: %s",
@@ -15,7 +15,7 @@ from typing import Any, Optional
 from cache.manager import cache as _cache
 from chat.turn_context import get_request_context
 from database.retrieval_log_repository import GAP_REASONS, schedule_log_retrieval
-from rag.corpus_state import get_corpus_cache_version
+from rag.corpus_state import aget_corpus_cache_version
 from .base import ToolContext, ToolDefinition, ToolResult
 
 logger = logging.getLogger(__name__)
@@ -123,14 +123,22 @@ def _maybe_expand_query(query: str, prior_user_msgs: list[str]) -> str:
     q = (query or "").strip()
     if not q:
         return query
-    q_lower = q.lower()
+    if not looks_like_followup(q):
+        return query
+    return f"{last_prior} | {query}"
+
+
+def looks_like_followup(text: str) -> bool:
+    """True when `text` is short, referential or starts like a follow-up.
+
+    Such queries depend on earlier turns and cannot be answered on their own.
+    """
+    q_lower = (text or "").strip().lower()
     word_tokens = q_lower.split()
     short = len(word_tokens) < _MIN_QUERY_WORDS
     has_reference = any(tok in _REFERENCE_TOKENS for tok in word_tokens)
     is_followup = q_lower.startswith(_FOLLOWUP_PREFIXES)
-    if not (short or has_reference or is_followup):
-        return query
-    return f"{last_prior} | {query}"
+    return short or has_reference or is_followup
 
 
 def _build_cache_key(query: str, k: int) -> str:
@@ -191,9 +199,9 @@ def _build_retriever_scope(retriever: Any, ctx: ToolContext) -> str:
     return f"{type(retriever).__name__}:{id(retriever)}"
 
 
-def _build_cross_turn_key(query: str, k: int, retriever: Any, ctx: ToolContext) -> str:
+def _build_cross_turn_key(query: str, k: int, retriever: Any, ctx: ToolContext, corpus_version: str) -> str:
     payload = {
-        "corpus_version": get_corpus_cache_version(),
+        "corpus_version": corpus_version,
         "scope": _build_retriever_scope(retriever, ctx),
         "q": query.lower().strip(),
         "k": int(k),
@@ -232,7 +240,7 @@ async def _handler(args: dict, ctx: ToolContext) -> ToolResult:
 
     # Cross-turn cache: keyed on original query (pre-expansion) so the same
     # user question hits regardless of conversation history changing the expansion.
-    cross_key = _build_cross_turn_key(query, k, retriever, ctx)
+    cross_key = _build_cross_turn_key(query, k, retriever, ctx, await aget_corpus_cache_version())
     cross_cached = await _cache.aget(cross_key)
     if cross_cached is not None:
         logger.info(
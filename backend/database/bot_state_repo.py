@@ -76,6 +76,10 @@ def redis_coordination_available() -> bool:
         return False
 
 
+# Leída en cada request de /chat, /bot y /whatsapp (ver cache/l1.py).
+cache.register_hot_keys(BOT_IS_ACTIVE_CACHE_KEY)
+
+
 def normalize_is_active(value: object) -> Optional[bool]:
     if isinstance(value, bool):
         return value
@@ -91,7 +95,7 @@ def normalize_is_active(value: object) -> Optional[bool]:
 
 
 def read_is_active_from_redis() -> Optional[bool]:
-    """Lectura directa Redis sin caché local. None si Redis no disponible o ausente."""
+    """Lectura vía L1 (invalidada por pub/sub en cada escritura). None si Redis no disponible o ausente."""
     if not redis_coordination_available():
         return None
     try:
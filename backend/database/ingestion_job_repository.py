@@ -0,0 +1,199 @@
+"""Cola durable de ingesta de PDFs sobre Mongo (`ingestion_jobs`).
+
+Cada upload inserta un job `queued` y responde con su `job_id`; los workers
+(`rag/ingestion/worker.py`) lo reclaman con un `find_one_and_update` atómico
+que le pone un lease (`lease_expires_at`). Mientras procesa, el worker
+renueva el lease; si el proceso muere, el lease vence y otro worker vuelve a
+reclamar el job. Los fallos se reintentan con backoff hasta `max_attempts`.
+
+Las transiciones de un job reclamado van filtradas por `worker_id`: un
+worker que perdió su lease no puede pisar el estado que escribe el nuevo
+dueño.
+"""
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from pymongo import ASCENDING, ReturnDocument
+
+from database.mongodb import MongodbClient
+
+
+INGESTION_JOB_STATUSES = ("queued", "processing", "ready", "failed")
+
+
+class IngestionJobRepository:
+    def __init__(
+        self,
+        mongodb_client: MongodbClient,
+        collection_name: str = "ingestion_jobs",
+    ) -> None:
+        self.mongodb_client = mongodb_client
+        self.collection_name = collection_name
+        self.collection = mongodb_client.db[collection_name]
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index("job_id", unique=True, name="job_id_unique")
+        await self.collection.create_index(
+            [("status", ASCENDING), ("available_at", ASCENDING)],
+            name="status_available_at_idx",
+        )
+        await self.collection.create_index(
+            [("status", ASCENDING), ("lease_expires_at", ASCENDING)],
+            name="status_lease_idx",
+        )
+        await self.collection.create_index("filename", name="filename_idx")
+
+    async def enqueue(
+        self,
+        *,
+        filename: str,
+        file_path: str,
+        size: int | None = None,
+        max_attempts: int = 3,
+    ) -> dict[str, Any]:
+        now = datetime.now(timezone.utc)
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "filename": filename,
+            "file_path": file_path,
+            "size": size,
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": max(1, int(max_attempts)),
+            "available_at": now,
+            "lease_expires_at": None,
+            "worker_id": None,
+            "error": None,
+            "result": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        await self.collection.insert_one(dict(job))
+        return job
+
+    async def claim(self, *, worker_id: str, lease_seconds: float) -> dict[str, Any] | None:
+        """Reclama el job disponible más antiguo (o uno con lease vencido)."""
+        now = datetime.now(timezone.utc)
+        return await self.collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": "queued", "available_at": {"$lte": now}},
+                    {
+                        "status": "processing",
+                        "lease_expires_at": {"$lt": now},
+                        "$expr": {"$lt": ["$attempts", "$max_attempts"]},
+                    },
+                ]
+            },
+            {
+                "$set": {
+                    "status": "processing",
+                    "worker_id": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                    "started_at": now,
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("available_at", ASCENDING)],
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def extend_lease(self, job_id: str, *, worker_id: str, lease_seconds: float) -> bool:
+        """Renueva el lease. False si el job ya no pertenece a este worker."""
+        now = datetime.now(timezone.utc)
+        result = await self.collection.update_one(
+            {"job_id": job_id, "worker_id": worker_id, "status": "processing"},
+            {"$set": {"lease_expires_at": now + timedelta(seconds=lease_seconds), "updated_at": now}},
+        )
+        return bool(result.matched_count)
+
+    async def mark_ready(self, job_id: str, *, worker_id: str, result: dict[str, Any]) -> bool:
+        return await self._finish(job_id, worker_id, "ready", error=None, result=result)
+
+    async def mark_failed(
+        self,
+        job: dict[str, Any],
+        *,
+        worker_id: str,
+        error: str,
+        retry_delay_seconds: float | None = None,
+    ) -> str:
+        """Devuelve el estado resultante: `queued` (se reintenta) o `failed`."""
+        error = str(error or "Ingestion failed")[:2000]
+        attempts = int(job.get("attempts", 0) or 0)
+        max_attempts = int(job.get("max_attempts", 1) or 1)
+        if retry_delay_seconds is None or attempts >= max_attempts:
+            await self._finish(job["job_id"], worker_id, "failed", error=error)
+            return "failed"
+        now = datetime.now(timezone.utc)
+        await self.collection.update_one(
+            {"job_id": job["job_id"], "worker_id": worker_id, "status": "processing"},
+            {
+                "$set": {
+                    "status": "queued",
+                    "available_at": now + timedelta(seconds=retry_delay_seconds),
+                    "lease_expires_at": None,
+                    "worker_id": None,
+                    "error": error,
+                    "updated_at": now,
+                }
+            },
+        )
+        return "queued"
+
+    async def fail_expired(self) -> list[dict[str, Any]]:
+        """Marca `failed` los jobs cuyo último intento murió con el lease vencido."""
+        now = datetime.now(timezone.utc)
+        query = {
+            "status": "processing",
+            "lease_expires_at": {"$lt": now},
+            "$expr": {"$gte": ["$attempts", "$max_attempts"]},
+        }
+        expired = await self.collection.find(query, {"_id": 0, "job_id": 1, "filename": 1}).to_list(length=None)
+        if expired:
+            await self.collection.update_many(
+                {**query, "job_id": {"$in": [job["job_id"] for job in expired]}},
+                {
+                    "$set": {
+                        "status": "failed",
+                        "error": "El worker no termino la ingesta antes de vencer el lease",
+                        "lease_expires_at": None,
+                        "finished_at": now,
+                        "updated_at": now,
+                    }
+                },
+            )
+        return expired
+
+    async def get(self, job_id: str) -> dict[str, Any] | None:
+        return await self.collection.find_one({"job_id": job_id}, {"_id": 0})
+
+    async def count_by_status(self) -> dict[str, int]:
+        counts = {status: 0 for status in INGESTION_JOB_STATUSES}
+        async for row in self.collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            if row.get("_id") in counts:
+                counts[row["_id"]] = int(row.get("count", 0))
+        return counts
+
+    async def _finish(self, job_id: str, worker_id: str, status: str, **fields: Any) -> bool:
+        if status not in INGESTION_JOB_STATUSES:
+            raise ValueError(f"Invalid ingestion job status: {status}")
+        now = datetime.now(timezone.utc)
+        result = await self.collection.update_one(
+            {"job_id": job_id, "worker_id": worker_id, "status": "processing"},
+            {
+                "$set": {
+                    "status": status,
+                    "lease_expires_at": None,
+                    "finished_at": now,
+                    "updated_at": now,
+                    **fields,
+                }
+            },
+        )
+        return bool(result.matched_count)
@@ -0,0 +1,177 @@
+"""Write-behind de mensajes de chat: el stream termina sin esperar a Mongo.
+
+`MongodbClient.add_turn` ya escribe usuario + asistente con un solo
+`insert_many`; con `CHAT_MESSAGE_WRITE_BEHIND=true` además encola el turno
+aquí y devuelve de inmediato. Un flusher por event loop agrupa los turnos
+de todas las conversaciones que llegan dentro de `flush_interval_ms` en un
+único `insert_many`.
+
+A diferencia de los retrieval logs, los mensajes no se descartan: con la
+cola llena `submit` devuelve False y el llamador escribe en línea
+(backpressure sin pérdida). Un lote que falla tras los reintentos de
+`_insert_messages` vuelve al frente de la cola y se reintenta con backoff
+exponencial hasta `max_flush_retries` veces; mientras Mongo no responde la
+cola crece hasta el límite y los turnos nuevos pasan a la escritura en
+línea, que sí propaga el error al llamador. Solo tras agotar los reintentos
+el lote se da por perdido (contador `failed`, log de error con las
+conversaciones afectadas). `aclose()` vacía la cola en el shutdown, antes
+de cerrar el cliente Mongo. Lo que sí se pierde es lo encolado si el
+proceso muere sin shutdown ordenado (SIGKILL, OOM): como mucho
+`flush_interval_ms` de mensajes.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MessageWriteBehind:
+    """Cola acotada de documentos de `messages` que se escriben por lotes."""
+
+    def __init__(
+        self,
+        write: Callable[[List[Dict[str, Any]]], Awaitable[None]],
+        *,
+        flush_interval_ms: float = 50.0,
+        max_batch_messages: int = 500,
+        max_pending_messages: int = 10000,
+        max_flush_retries: int = 3,
+        retry_backoff_ms: float = 500.0,
+    ) -> None:
+        self._write = write
+        self.flush_interval_s = max(0.001, float(flush_interval_ms) / 1000.0)
+        self.max_batch_messages = max(1, int(max_batch_messages))
+        self.max_pending_messages = max(self.max_batch_messages, int(max_pending_messages))
+        self.max_flush_retries = max(0, int(max_flush_retries))
+        self.retry_backoff_s = max(0.0, float(retry_backoff_ms) / 1000.0)
+        # Fallos consecutivos del lote a la cabeza de la cola.
+        self._failures = 0
+        self._pending: List[Dict[str, Any]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._stats = {"turns": 0, "written": 0, "batches": 0, "retried": 0, "failed": 0, "inline_fallbacks": 0}
+        self._last_flush_ms: Optional[float] = None
+
+    def submit(self, documents: List[Dict[str, Any]]) -> bool:
+        """Encola los mensajes de un turno. False = escribir en línea (sin loop o cola llena)."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        if self._closing or len(self._pending) + len(documents) > self.max_pending_messages:
+            self._stats["inline_fallbacks"] += 1
+            return False
+        self._pending.extend(documents)
+        self._stats["turns"] += 1
+        self._ensure_flusher(loop)
+        if len(self._pending) >= self.max_batch_messages:
+            self._wakeup.set()
+        return True
+
+    def _ensure_flusher(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run(self._wakeup))
+
+    def _retry_delay_s(self) -> float:
+        if not self._failures:
+            return 0.0
+        return self.retry_backoff_s * (2 ** (self._failures - 1))
+
+    async def _run(self, wakeup: asyncio.Event) -> None:
+        while True:
+            delay = self._retry_delay_s()
+            if delay:
+                # Backoff tras un lote fallido: no reintentar en cada submit.
+                await asyncio.sleep(delay)
+            else:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=self.flush_interval_s)
+                except asyncio.TimeoutError:
+                    pass
+            wakeup.clear()
+            await self.flush()
+            if self._closing:
+                return
+
+    async def flush(self) -> int:
+        """Escribe lo encolado en lotes de `max_batch_messages`.
+
+        Si un lote falla se re-encola al frente y la pasada termina; el
+        flusher lo reintenta tras el backoff. Con los reintentos agotados el
+        lote se descarta y se sigue con el resto.
+        """
+        written = 0
+        while self._pending:
+            batch = self._pending[: self.max_batch_messages]
+            del self._pending[: self.max_batch_messages]
+            started = time.perf_counter()
+            try:
+                await self._write(batch)
+            except Exception as exc:
+                self._failures += 1
+                conversations = sorted({doc.get("conversation_id") for doc in batch})
+                if self._failures <= self.max_flush_retries:
+                    self._pending[:0] = batch
+                    self._stats["retried"] += len(batch)
+                    logger.warning(
+                        "Write-behind de mensajes falló, se reintenta (%d/%d) en %.1fs | mensajes=%d convs=%s | err=%s",
+                        self._failures,
+                        self.max_flush_retries,
+                        self._retry_delay_s(),
+                        len(batch),
+                        conversations[:20],
+                        exc,
+                    )
+                    break
+                self._failures = 0
+                self._stats["failed"] += len(batch)
+                logger.error(
+                    "Write-behind de mensajes descartó un lote tras %d reintentos | mensajes=%d convs=%s | err=%s",
+                    self.max_flush_retries,
+                    len(batch),
+                    conversations[:20],
+                    exc,
+                    exc_info=True,
+                )
+                continue
+            self._failures = 0
+            self._last_flush_ms = (time.perf_counter() - started) * 1000.0
+            self._stats["written"] += len(batch)
+            self._stats["batches"] += 1
+            written += len(batch)
+        return written
+
+    async def aclose(self, timeout_s: float = 10.0) -> None:
+        """Vacía la cola y detiene el flusher (shutdown)."""
+        self._closing = True
+        task = self._task
+        if task is not None and not task.done():
+            self._wakeup.set()
+            try:
+                await asyncio.wait_for(task, timeout=timeout_s)
+            except asyncio.TimeoutError:
+                logger.error("Write-behind de mensajes: flush de shutdown excedió %.1fs", timeout_s)
+            except Exception as exc:
+                logger.error("Write-behind de mensajes: flusher falló en shutdown: %s", exc)
+        # Cada pasada fallida consume un reintento: el bucle termina cuando la
+        # cola queda vacía o los lotes se descartan.
+        await self.flush()
+        while self._pending and self._failures:
+            await asyncio.sleep(self._retry_delay_s())
+            await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "pending": len(self._pending),
+            "last_flush_ms": round(self._last_flush_ms, 2) if self._last_flush_ms is not None else None,
+        }
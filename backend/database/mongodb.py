@@ -1,13 +1,17 @@
 """MongoDB client for chat history."""
 import asyncio
 import uuid
-from typing import Optional
-from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta, timezone
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError
 import logging
 import threading
 
 from config import settings as app_settings
+from domain.constants import ASSISTANT_ROLE, USER_ROLE
+
+from .message_write_behind import MessageWriteBehind
 
 logger = logging.getLogger(__name__)
 
@@ -70,23 +74,44 @@ class MongodbClient:
             )
             self.db = self.client[database_name]
             self.messages = self.db.messages
+            self._turn_writer = self._init_turn_writer()
             logger.debug(f"MongoDB connection to db '{database_name}' established successfully.")
         except Exception as e:
             logger.error(f"Error connecting to MongoDB: {str(e)}", exc_info=True)
             raise
 
 
-    async def add_message(self, conversation_id: str, role: str, content: str, source: Optional[str] = None) -> str:
-        """Add a message to the conversation history. Returns message_id."""
-        message_id = str(uuid.uuid4())
-        doc = {
-            "message_id": message_id,
+    def _init_turn_writer(self) -> Optional[MessageWriteBehind]:
+        if not bool(getattr(app_settings, "chat_message_write_behind", False)):
+            return None
+        return MessageWriteBehind(
+            self._insert_messages,
+            flush_interval_ms=float(getattr(app_settings, "chat_message_flush_interval_ms", 50.0)),
+            max_pending_messages=int(getattr(app_settings, "chat_message_max_pending", 10000)),
+            max_flush_retries=int(getattr(app_settings, "chat_message_flush_max_retries", 3)),
+        )
+
+    @staticmethod
+    def _message_doc(
+        conversation_id: str,
+        role: str,
+        content: str,
+        source: Optional[str],
+        timestamp: datetime,
+    ) -> Dict[str, Any]:
+        return {
+            "message_id": str(uuid.uuid4()),
             "conversation_id": conversation_id,
             "role": role,
             "content": content,
             "source": source or "embed-default",
-            "timestamp": datetime.now(timezone.utc),
+            "timestamp": timestamp,
         }
+
+    async def add_message(self, conversation_id: str, role: str, content: str, source: Optional[str] = None) -> str:
+        """Add a message to the conversation history. Returns message_id."""
+        doc = self._message_doc(conversation_id, role, content, source, datetime.now(timezone.utc))
+        message_id = doc["message_id"]
         for attempt in range(1, 3):
             try:
                 await self.messages.insert_one(doc)
@@ -103,6 +128,64 @@ class MongodbClient:
                 await asyncio.sleep(0.5)
         return message_id
 
+    async def add_turn(
+        self,
+        conversation_id: str,
+        user_content: str,
+        assistant_content: Optional[str],
+        source: Optional[str] = None,
+    ) -> List[str]:
+        """Persiste un turno (usuario + asistente) con un solo `insert_many`.
+
+        Con write-behind activo el turno se encola y se escribe junto a los
+        de otras conversaciones (ver database/message_write_behind.py).
+        Sin `assistant_content` solo se guarda el mensaje del usuario.
+        Returns the message_ids in order.
+        """
+        now = datetime.now(timezone.utc)
+        docs = [self._message_doc(conversation_id, USER_ROLE, user_content, source, now)]
+        if assistant_content:
+            # Mongo guarda milisegundos: +1 ms mantiene el orden usuario → asistente
+            # en el historial (ordenado por timestamp).
+            docs.append(
+                self._message_doc(conversation_id, ASSISTANT_ROLE, assistant_content, source, now + timedelta(milliseconds=1))
+            )
+        message_ids = [doc["message_id"] for doc in docs]
+        writer = getattr(self, "_turn_writer", None)
+        if writer is not None and writer.submit(docs):
+            return message_ids
+        await self._insert_messages(docs)
+        return message_ids
+
+    async def _insert_messages(self, docs: List[Dict[str, Any]]) -> None:
+        """`insert_many` con un reintento; los duplicados de `message_id` cuentan como escritos."""
+        for attempt in range(1, 3):
+            try:
+                await self.messages.insert_many(docs, ordered=False)
+                return
+            except BulkWriteError as e:
+                # Un reintento tras un fallo parcial choca con el índice único
+                # de message_id: esos documentos ya estaban guardados.
+                errors = (e.details or {}).get("writeErrors") or []
+                if errors and all(err.get("code") == 11000 for err in errors):
+                    return
+                if attempt == 2:
+                    logger.error("Error al agregar mensajes (attempt %d): %s", attempt, e)
+                    raise
+            except Exception as e:
+                if attempt == 2:
+                    logger.error("Error al agregar mensajes (attempt %d): %s", attempt, e)
+                    raise
+            logger.warning(
+                "insert_many de mensajes attempt %d/2 failed (docs=%d) — retrying",
+                attempt, len(docs),
+            )
+            await asyncio.sleep(0.5)
+
+    def message_writer_stats(self) -> Optional[Dict[str, Any]]:
+        writer = getattr(self, "_turn_writer", None)
+        return writer.stats() if writer is not None else None
+
     async def ensure_indexes(self) -> None:
         """Ensure MongoDB indexes are created for optimal performance."""
         try:
@@ -243,7 +326,13 @@ class MongodbClient:
             raise
 
     async def close(self) -> None:
-        """Close the MongoDB connection."""
+        """Close the MongoDB connection (after flushing write-behind messages)."""
+        writer = getattr(self, "_turn_writer", None)
+        if writer is not None:
+            try:
+                await writer.aclose()
+            except Exception as e:
+                logger.error(f"Error flushing pending chat messages: {str(e)}", exc_info=True)
         try:
             if self.client:
                 self.client.close()
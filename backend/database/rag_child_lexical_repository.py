@@ -8,7 +8,7 @@ from collections import Counter, defaultdict
 from dataclasses import dataclass
 from typing import Iterable, Sequence
 
-from pymongo import ReplaceOne
+from pymongo import ReplaceOne, UpdateMany, UpdateOne
 
 from config import settings
 from database.mongodb import MongodbClient
@@ -143,6 +143,45 @@ class RAGChildLexicalRepository:
         await self.postings_collection.delete_many({"source": source})
         return int(getattr(docs_result, "deleted_count", 0) or 0)
 
+    async def delete_by_child_ids(self, child_ids: Sequence[str]) -> int:
+        if not child_ids:
+            return 0
+        query = {"child_id": {"$in": list(child_ids)}}
+        docs_result = await self.documents_collection.delete_many(query)
+        await self.postings_collection.delete_many(query)
+        return int(getattr(docs_result, "deleted_count", 0) or 0)
+
+    async def set_doc_id_by_source(self, source: str, doc_id: str) -> int:
+        query = {"source": source, "doc_id": {"$ne": doc_id}}
+        update = {"$set": {"doc_id": doc_id}}
+        docs_result = await self.documents_collection.update_many(query, update)
+        await self.postings_collection.update_many(query, update)
+        return int(getattr(docs_result, "modified_count", 0) or 0)
+
+    async def restore_child_placements(self, placements: dict[str, dict]) -> int:
+        """child_id -> {doc_id, page_start, page_end} previos (rollback de una ingesta fallida)."""
+        if not placements:
+            return 0
+        docs_operations = [
+            UpdateOne(
+                {"child_id": child_id},
+                {"$set": {key: placement[key] for key in ("doc_id", "page_start", "page_end") if key in placement}},
+            )
+            for child_id, placement in placements.items()
+        ]
+        posting_operations = [
+            UpdateMany({"child_id": child_id}, {"$set": {"doc_id": placement["doc_id"]}})
+            for child_id, placement in placements.items()
+            if placement.get("doc_id")
+        ]
+        result = await self.documents_collection.bulk_write(docs_operations, ordered=False)
+        if posting_operations:
+            await self.postings_collection.bulk_write(posting_operations, ordered=False)
+        return int(getattr(result, "modified_count", 0) or 0)
+
+    async def get_child_ids_by_source(self, source: str) -> set[str]:
+        return set(await self.documents_collection.distinct("child_id", {"source": source}))
+
     async def count_by_doc_id(self, doc_id: str) -> int:
         return int(await self.documents_collection.count_documents({"doc_id": doc_id}))
 
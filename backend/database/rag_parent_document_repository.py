@@ -3,7 +3,7 @@ from __future__ import annotations
 import logging
 from typing import Sequence
 
-from pymongo import ReplaceOne
+from pymongo import ReplaceOne, UpdateOne
 
 from config import settings
 from database.mongodb import MongodbClient
@@ -59,6 +59,44 @@ class RAGParentDocumentRepository:
         result = await self.collection.delete_many({"source": source})
         return int(getattr(result, "deleted_count", 0) or 0)
 
+    async def delete_by_parent_ids(self, parent_ids: Sequence[str]) -> int:
+        if not parent_ids:
+            return 0
+        result = await self.collection.delete_many({"parent_id": {"$in": list(parent_ids)}})
+        return int(getattr(result, "deleted_count", 0) or 0)
+
+    async def get_placements_by_source(self, source: str) -> dict[str, dict]:
+        """parent_id -> posicion guardada (parent_index, page_span, doc_id), sin `content`."""
+        cursor = self.collection.find(
+            {"source": source},
+            {"_id": 0, "parent_id": 1, "parent_index": 1, "page_span": 1, "doc_id": 1},
+        )
+        docs = await cursor.to_list(length=None)
+        return {doc["parent_id"]: doc for doc in docs}
+
+    async def set_doc_id_by_source(self, source: str, doc_id: str) -> int:
+        """Re-etiqueta con `doc_id` los parents de `source` que conservan uno anterior."""
+        result = await self.collection.update_many(
+            {"source": source, "doc_id": {"$ne": doc_id}},
+            {"$set": {"doc_id": doc_id}},
+        )
+        return int(getattr(result, "modified_count", 0) or 0)
+
+    async def restore_placements(self, placements: dict[str, dict]) -> int:
+        """Devuelve parents a una posicion leida con `get_placements_by_source`
+        (rollback de una ingesta que fallo a mitad)."""
+        if not placements:
+            return 0
+        operations = [
+            UpdateOne(
+                {"parent_id": parent_id},
+                {"$set": {key: placement[key] for key in ("parent_index", "page_span", "doc_id") if key in placement}},
+            )
+            for parent_id, placement in placements.items()
+        ]
+        result = await self.collection.bulk_write(operations, ordered=False)
+        return int(getattr(result, "modified_count", 0) or 0)
+
     async def count_by_doc_id(self, doc_id: str) -> int:
         return int(await self.collection.count_documents({"doc_id": doc_id}))
 
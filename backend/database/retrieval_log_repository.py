@@ -1,22 +1,20 @@
 from __future__ import annotations
 
 import asyncio
+import collections
 import logging
+import time
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from langchain_core.documents import Document
 
+from config import settings
+
 from .mongodb import MongodbClient, get_mongodb_client
 
 logger = logging.getLogger(__name__)
 
-# Strong references for fire-and-forget background tasks. Without this, Python
-# 3.11+ may garbage-collect a pending Task before its coroutine finishes,
-# silently losing the Mongo write. Pattern from CPython asyncio docs.
-_BG_TASKS: set[asyncio.Task] = set()
-
-
 def schedule_log_retrieval(
     *,
     conversation_id: str,
@@ -24,31 +22,22 @@ def schedule_log_retrieval(
     docs: List[Document],
     latency_ms: float,
     gating_reason: Optional[str] = None,
-) -> Optional[asyncio.Task]:
-    """Fire-and-forget log_retrieval that holds a strong task reference.
+) -> bool:
+    """Encola un retrieval log en el writer por lotes (no bloquea ni crea tasks).
 
     Use this from any caller that does not await the result (chat handlers,
-    retrieval tool). Returns the Task or None if no running event loop.
+    retrieval tool). Returns False if the log was dropped (full buffer or no
+    running event loop): the metric will be missing, the request unaffected.
     """
-    try:
-        loop = asyncio.get_running_loop()
-    except RuntimeError:
-        # No running loop — nothing to schedule against. Caller should treat
-        # this as a no-op (the metric will be missing, not crash the request).
-        logger.debug("schedule_log_retrieval: no running event loop, skipping")
-        return None
-
-    coro = RetrievalLogRepository().log_retrieval(
+    document = RetrievalLogRepository.build_log_document(
         conversation_id=conversation_id,
         query=query,
         docs=docs,
         latency_ms=latency_ms,
         gating_reason=gating_reason,
     )
-    task = loop.create_task(coro)
-    _BG_TASKS.add(task)
-    task.add_done_callback(_BG_TASKS.discard)
-    return task
+    return get_retrieval_log_writer().submit(document)
+
 
 _COLLECTION = "retrieval_logs"
 _TTL_SECONDS = 90 * 24 * 3600  # 90 days
@@ -108,6 +97,34 @@ class RetrievalLogRepository:
             logger.error("Error ensuring retrieval_logs indexes: %s", exc)
             raise
 
+    @staticmethod
+    def build_log_document(
+        *,
+        conversation_id: str,
+        query: str,
+        docs: List[Document],
+        latency_ms: float,
+        gating_reason: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        chunks = [
+            {
+                "child_id": doc.metadata.get("child_id"),
+                "parent_id": doc.metadata.get("parent_id"),
+                "source": doc.metadata.get("source"),
+                "score": doc.metadata.get("score"),
+            }
+            for doc in docs
+        ]
+        return {
+            "conversation_id": conversation_id,
+            "query": query[:500],
+            "chunk_count": len(docs),
+            "chunks": chunks,
+            "latency_ms": round(latency_ms, 2),
+            "gating_reason": gating_reason,
+            "logged_at": datetime.now(timezone.utc),
+        }
+
     async def log_retrieval(
         self,
         *,
@@ -118,25 +135,173 @@ class RetrievalLogRepository:
         gating_reason: Optional[str] = None,
     ) -> None:
         try:
-            chunks = [
-                {
-                    "child_id": doc.metadata.get("child_id"),
-                    "parent_id": doc.metadata.get("parent_id"),
-                    "source": doc.metadata.get("source"),
-                    "score": doc.metadata.get("score"),
-                }
-                for doc in docs
-            ]
             await self.collection.insert_one(
-                {
-                    "conversation_id": conversation_id,
-                    "query": query[:500],
-                    "chunk_count": len(docs),
-                    "chunks": chunks,
-                    "latency_ms": round(latency_ms, 2),
-                    "gating_reason": gating_reason,
-                    "logged_at": datetime.now(timezone.utc),
-                }
+                self.build_log_document(
+                    conversation_id=conversation_id,
+                    query=query,
+                    docs=docs,
+                    latency_ms=latency_ms,
+                    gating_reason=gating_reason,
+                )
             )
         except Exception as exc:
             logger.warning("retrieval_log insert failed (non-fatal): %s", exc)
+
+    async def insert_many(self, documents: List[Dict[str, Any]]) -> None:
+        # ordered=False: un documento inválido no corta el resto del lote.
+        await self.collection.insert_many(documents, ordered=False)
+
+
+class RetrievalLogWriter:
+    """Buffer acotado en proceso que persiste retrieval logs con `insert_many`.
+
+    Un único flusher por event loop vacía el buffer cada `flush_interval_s`
+    o en cuanto se acumulan `batch_size` documentos, así que nunca hay más
+    de un insert en vuelo. Con el buffer lleno (Mongo lento o caído) los
+    logs nuevos se descartan y se cuentan en `dropped`: son métricas, no
+    deben frenar ni acumular memoria en el camino del chat.
+    """
+
+    # Ventana para la tasa de escritura reportada en `stats()`.
+    _RATE_WINDOW_S = 60.0
+
+    def __init__(
+        self,
+        *,
+        batch_size: int = 100,
+        flush_interval_s: float = 1.0,
+        max_buffer: int = 5000,
+        repository_factory: Optional[Callable[[], RetrievalLogRepository]] = None,
+    ) -> None:
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval_s = max(0.01, float(flush_interval_s))
+        self.max_buffer = max(self.batch_size, int(max_buffer))
+        self._repository_factory = repository_factory or RetrievalLogRepository
+        self._repository: Optional[RetrievalLogRepository] = None
+        self._buffer: List[Dict[str, Any]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._recent: "collections.deque[tuple[float, int]]" = collections.deque()
+        self._stats = {"enqueued": 0, "written": 0, "dropped": 0, "failed": 0, "batches": 0}
+        self._last_flush_ms: Optional[float] = None
+
+    def submit(self, document: Dict[str, Any]) -> bool:
+        """Encola un documento. False si se descartó (buffer lleno o sin loop)."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.debug("RetrievalLogWriter: no running event loop, skipping")
+            return False
+        if len(self._buffer) >= self.max_buffer:
+            self._stats["dropped"] += 1
+            if self._stats["dropped"] == 1 or self._stats["dropped"] % 1000 == 0:
+                logger.warning(
+                    "retrieval_logs buffer full (%d); dropped=%d",
+                    self.max_buffer,
+                    self._stats["dropped"],
+                )
+            return False
+        self._buffer.append(document)
+        self._stats["enqueued"] += 1
+        self._ensure_flusher(loop)
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def _ensure_flusher(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._closing = False
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run(self._wakeup))
+
+    async def _run(self, wakeup: asyncio.Event) -> None:
+        while True:
+            timed_out = False
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=self.flush_interval_s)
+            except asyncio.TimeoutError:
+                timed_out = True
+            wakeup.clear()
+            # Despertado por tamaño: solo lotes completos; el resto espera al intervalo.
+            await self.flush(full_batches_only=not (timed_out or self._closing))
+            if self._closing:
+                return
+
+    async def flush(self, *, full_batches_only: bool = False) -> int:
+        """Escribe lo pendiente en lotes de `batch_size`. Devuelve los escritos."""
+        written = 0
+        while self._buffer and (not full_batches_only or len(self._buffer) >= self.batch_size):
+            batch = self._buffer[: self.batch_size]
+            del self._buffer[: self.batch_size]
+            written += await self._write(batch)
+        return written
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> int:
+        started = time.perf_counter()
+        try:
+            if self._repository is None:
+                self._repository = self._repository_factory()
+            await self._repository.insert_many(batch)
+        except Exception as exc:
+            self._stats["failed"] += len(batch)
+            logger.warning("retrieval_log insert_many failed (non-fatal) | docs=%d | err=%s", len(batch), exc)
+            return 0
+        now = time.monotonic()
+        self._last_flush_ms = (time.perf_counter() - started) * 1000.0
+        self._stats["written"] += len(batch)
+        self._stats["batches"] += 1
+        self._recent.append((now, len(batch)))
+        while self._recent and self._recent[0][0] < now - self._RATE_WINDOW_S:
+            self._recent.popleft()
+        return len(batch)
+
+    async def aclose(self, timeout_s: float = 5.0) -> None:
+        """Vacía el buffer y detiene el flusher (shutdown de la app)."""
+        task = self._task
+        if task is None or task.done():
+            await self.flush()
+            return
+        self._closing = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(task, timeout=timeout_s)
+        except asyncio.TimeoutError:
+            logger.warning("RetrievalLogWriter: flush on shutdown timed out; pending=%d", len(self._buffer))
+        except Exception as exc:
+            logger.warning("RetrievalLogWriter: flusher failed on shutdown: %s", exc)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        recent = sum(count for at, count in self._recent if at >= now - self._RATE_WINDOW_S)
+        return {
+            **self._stats,
+            "buffered": len(self._buffer),
+            "max_buffer": self.max_buffer,
+            "batch_size": self.batch_size,
+            "writes_per_second_60s": round(recent / self._RATE_WINDOW_S, 3),
+            "last_flush_ms": round(self._last_flush_ms, 2) if self._last_flush_ms is not None else None,
+        }
+
+
+_WRITER: Optional[RetrievalLogWriter] = None
+
+
+def get_retrieval_log_writer() -> RetrievalLogWriter:
+    global _WRITER
+    if _WRITER is None:
+        _WRITER = RetrievalLogWriter(
+            batch_size=int(getattr(settings, "retrieval_log_batch_size", 100)),
+            flush_interval_s=float(getattr(settings, "retrieval_log_flush_interval_seconds", 1.0)),
+            max_buffer=int(getattr(settings, "retrieval_log_max_buffer", 5000)),
+        )
+    return _WRITER
+
+
+async def close_retrieval_log_writer() -> None:
+    """Vacía los retrieval logs pendientes; llamar antes de cerrar Mongo."""
+    if _WRITER is not None:
+        await _WRITER.aclose()
@@ -7,6 +7,8 @@
 #                            Default WORKERS=1 para coherencia de métricas
 #                            in-memory (MetricsCollector). Subir a 2-4 si
 #                            tu carga lo justifica (>30 chats/min sostenido).
+# PROCESS_TYPE=ingestion-worker → worker de la cola de ingesta de PDFs
+#                            (python -m rag.ingestion.worker), sin servidor HTTP.
 # =============================================================================
 
 set -e
@@ -22,6 +24,11 @@ echo "  Environment: ${ENVIRONMENT:-development}"
 echo "  Host: $HOST | Port: $PORT"
 echo "========================================"
 
+if [ "$PROCESS_TYPE" = "ingestion-worker" ]; then
+    echo "📄 Iniciando worker de ingesta (concurrency=${INGESTION_WORKER_CONCURRENCY:-1})..."
+    exec python -m rag.ingestion.worker
+fi
+
 if [ "$ENVIRONMENT" = "production" ]; then
     echo "🚀 Iniciando en modo PRODUCCIÓN con $WORKERS workers..."
     # Access log custom: omitimos query string para no persistir credenciales
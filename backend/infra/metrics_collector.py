@@ -111,6 +111,7 @@ class MetricsCollector:
         self._rate_limit_hits = 0
         self._rag_chats_total = 0  # chats que invocaron search_documents
         self._gating_reasons: Counter[str] = Counter()
+        self._semantic_cache: Counter[str] = Counter()
         self._startup_time = time.time()
 
     def record_chat(self, sample: ChatSample) -> None:
@@ -136,6 +137,11 @@ class MetricsCollector:
         with self._lock:
             self._rate_limit_hits += 1
 
+    def record_semantic_cache(self, outcome: str) -> None:
+        """outcome: hit | miss | ineligible | store."""
+        with self._lock:
+            self._semantic_cache[outcome] += 1
+
     def reset(self) -> None:
         """Reinicia counters + samples. Útil en tests."""
         with self._lock:
@@ -150,6 +156,7 @@ class MetricsCollector:
             self._rate_limit_hits = 0
             self._rag_chats_total = 0
             self._gating_reasons.clear()
+            self._semantic_cache.clear()
             self._startup_time = time.time()
 
     def _prune_expired(self, now: float) -> None:
@@ -172,6 +179,7 @@ class MetricsCollector:
             rate_limit_hits = self._rate_limit_hits
             rag_chats_total = self._rag_chats_total
             gating_dist = dict(self._gating_reasons)
+            semantic = dict(self._semantic_cache)
             uptime = now - self._startup_time
 
         # Latencias por etapa (rolling window)
@@ -199,6 +207,16 @@ class MetricsCollector:
                 "error_rate": round(errors / len(window_samples), 4) if window_samples else 0.0,
             }
 
+        # Caché semántica cross-conversación: hit-rate sobre lookups elegibles
+        semantic_lookups = semantic.get("hit", 0) + semantic.get("miss", 0)
+        semantic_block = {
+            "hits": semantic.get("hit", 0),
+            "misses": semantic.get("miss", 0),
+            "ineligible": semantic.get("ineligible", 0),
+            "stores": semantic.get("store", 0),
+            "hit_rate": round(semantic.get("hit", 0) / semantic_lookups, 4) if semantic_lookups else 0.0,
+        }
+
         # RAG usage rate
         rag_usage_rate = round(rag_chats_total / chats_total, 4) if chats_total else 0.0
 
@@ -239,6 +257,7 @@ class MetricsCollector:
             "latency_ms": latency,
             "throughput": throughput,
             "gating_reasons": gating_dist,
+            "semantic_cache": semantic_block,
         }
 
 
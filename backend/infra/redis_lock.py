@@ -27,11 +27,18 @@ class RedisAdvisoryLock:
     TTL_SECONDS = 15
     POLL_INTERVAL = 0.05  # 50 ms between acquire retries
 
-    def __init__(self, redis_client, key: str, acquire_timeout: float = 10.0) -> None:
+    def __init__(
+        self,
+        redis_client,
+        key: str,
+        acquire_timeout: float = 10.0,
+        ttl_seconds: int | None = None,
+    ) -> None:
         self._client = redis_client
         self._key = key
         self._token = str(uuid.uuid4())
         self._acquire_timeout = acquire_timeout
+        self._ttl_seconds = int(ttl_seconds) if ttl_seconds else self.TTL_SECONDS
         self._acquired = False
 
     async def acquire(self) -> bool:
@@ -42,7 +49,7 @@ class RedisAdvisoryLock:
                 self._key,
                 self._token,
                 nx=True,
-                ex=self.TTL_SECONDS,
+                ex=self._ttl_seconds,
             )
             if ok:
                 self._acquired = True
@@ -54,6 +61,18 @@ class RedisAdvisoryLock:
         logger.warning("RedisAdvisoryLock acquire timeout | key=%s", self._key)
         return False
 
+    async def try_acquire(self) -> bool:
+        """Single SET NX attempt; contention is an expected outcome, not logged."""
+        ok = await asyncio.to_thread(
+            self._client.set,
+            self._key,
+            self._token,
+            nx=True,
+            ex=self._ttl_seconds,
+        )
+        self._acquired = bool(ok)
+        return self._acquired
+
     async def release(self) -> None:
         if not self._acquired:
             return
@@ -13,15 +13,32 @@ Why:
   Both look the same in the gaps tab. Centroid distance is a cheap,
   deterministic, no-LLM heuristic to separate them.
 
-Caching:
-  The centroid is a function of the corpus state. We cache it in Redis
-  keyed by the corpus version (bumped on every ingest/delete). Lazy-compute
-  on first miss after a version bump; reused across all subsequent requests
-  in that version window.
+Maintenance:
+  The centroid is derived from running statistics (float64 vector sum +
+  count) kept in the cache, never from a query-path scan:
+    - `rag:corpus_centroid:stats` holds the corpus-wide sum and count.
+    - `rag:corpus_centroid:src:<source>` holds each source's contribution,
+      so deleting or re-ingesting a PDF subtracts exactly what it added.
+      The stats list the sources they include; a contribution key for an
+      unlisted source is a leftover and is ignored, so reset/rebuild delete
+      exactly the listed keys instead of SCANning the keyspace.
+  `HierarchicalIngestionService` updates both after every ingest/delete
+  (`record_source_vectors` / `forget_source`), serialized across workers by
+  a Redis advisory lock. Vectors are L2-normalized before summing because
+  the Qdrant collection uses COSINE distance and stores them normalized —
+  the incremental sum matches what a scroll would return.
+
+  A full Qdrant scroll (`rebuild_centroid_stats`) is only a repair
+  operation: run it explicitly (`python -m scripts.rebuild_corpus_centroid`)
+  or let `get_centroid` schedule it in the background when the stats are
+  missing (fresh deploy, Redis flushed, lock contention). The rebuild is
+  single-flight per process and across workers, and it discards its result
+  if an ingest/delete landed while it was scanning.
 
 Cost:
-  - First miss after corpus change: O(N) Qdrant scroll + mean computation,
-    seconds-to-minutes depending on corpus size. Happens once per ingest.
+  - Ingest/delete: O(chunks of that PDF) additions + 2 cache round trips.
+  - First query after a corpus version bump: a few cache reads + 1 division,
+    once per worker (concurrent queries share it via `aget_or_compute`).
   - Per-query cost: 1 dot product (1536 dims) — microseconds. Effectively free.
 """
 from __future__ import annotations
@@ -32,13 +49,14 @@ import io
 import logging
 import threading
 from collections import OrderedDict
-from typing import Optional
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
 
 import numpy as np
 
 from cache.manager import cache
 from config import settings
-from rag.corpus_state import get_corpus_cache_version
+from infra.redis_lock import RedisAdvisoryLock
+from rag.corpus_state import aget_corpus_cache_version
 
 logger = logging.getLogger(__name__)
 
@@ -53,10 +71,24 @@ _OUT_OF_SCOPE_THRESHOLD: float = float(
 # How many vectors to pull per Qdrant scroll page.
 _SCROLL_BATCH_SIZE: int = 256
 
-# Cache TTL upper-bound (also invalidated by corpus version bumps).
-_CENTROID_CACHE_TTL_S: int = 24 * 3600
-
-# In-process cache so concurrent first-callers don't all hit Qdrant.
+# Running statistics. ttl=0: they must outlive any TTL — losing them only
+# costs a background rebuild, but expiring them on a timer would force one.
+_STATS_KEY: str = "rag:corpus_centroid:stats"
+_SOURCE_KEY_PREFIX: str = "rag:corpus_centroid:src:"
+# Bumped by every stats mutation (even skipped ones) so a rebuild that was
+# scanning concurrently knows its snapshot is stale.
+_REVISION_KEY: str = "rag:corpus_centroid:rev"
+# Centroid derived from the stats, per corpus version + stats revision.
+_CENTROID_KEY_PREFIX: str = "rag:corpus_centroid:vec:"
+_CENTROID_TTL_S: int = 3600
+_UPDATE_LOCK_KEY: str = "rag:corpus_centroid:lock"
+_REBUILD_LOCK_KEY: str = "rag:corpus_centroid:rebuild_lock"
+_UPDATE_LOCK_TIMEOUT_S: float = 10.0
+# Upper bound for a full scroll of a large corpus; the lock auto-expires if
+# the worker dies mid-rebuild.
+_REBUILD_LOCK_TTL_S: int = 600
+
+# In-process cache so the per-query path is a dict lookup.
 # threading.Lock (not asyncio.Lock) — asyncio.Lock is bound to whichever
 # event loop first touches it; a module-level instance would break under
 # multi-worker setups or test runners that spin up their own loops. The
@@ -69,6 +101,12 @@ _centroid_cache_lock: threading.Lock = threading.Lock()
 _CENTROID_CACHE_MAX_ENTRIES: int = 4
 _centroid_cache: "OrderedDict[str, Optional[np.ndarray]]" = OrderedDict()
 
+# Serializes read-modify-write of the stats inside one process; the Redis
+# advisory lock does the same across workers.
+_stats_update_lock: threading.Lock = threading.Lock()
+# Single-flight rebuild within this process (one task per event loop).
+_rebuild_task: Optional["asyncio.Task[Optional[np.ndarray]]"] = None
+
 
 def _cache_put(version: str, value: Optional[np.ndarray]) -> None:
     with _centroid_cache_lock:
@@ -80,7 +118,7 @@ def _cache_put(version: str, value: Optional[np.ndarray]) -> None:
 
 def _cache_get(version: str) -> tuple[bool, Optional[np.ndarray]]:
     """Return (hit, value). Hit means the version key exists (value may be None
-    for previously-failed compute, which we still want to short-circuit on)."""
+    for an empty corpus, which we still want to short-circuit on)."""
     with _centroid_cache_lock:
         if version in _centroid_cache:
             _centroid_cache.move_to_end(version)
@@ -94,7 +132,7 @@ def clear_inprocess_cache() -> None:
         _centroid_cache.clear()
 
 
-def _serialize_centroid(arr: np.ndarray) -> str:
+def _serialize_vector(arr: np.ndarray) -> str:
     """Safe wire form: base64-encoded .npy bytes. NO pickle (RCE risk).
 
     Returned as a string so it survives the cache layer's JSON serializer.
@@ -104,8 +142,8 @@ def _serialize_centroid(arr: np.ndarray) -> str:
     return base64.b64encode(buf.getvalue()).decode("ascii")
 
 
-def _deserialize_centroid(blob: object) -> Optional[np.ndarray]:
-    """Inverse of _serialize_centroid. Rejects pickle payloads by construction."""
+def _deserialize_vector(blob: object) -> Optional[np.ndarray]:
+    """Inverse of _serialize_vector. Rejects pickle payloads by construction."""
     try:
         if isinstance(blob, str):
             raw = base64.b64decode(blob.encode("ascii"))
@@ -119,8 +157,29 @@ def _deserialize_centroid(blob: object) -> Optional[np.ndarray]:
         return None
 
 
-def _cache_key(corpus_version: str) -> str:
-    return f"rag:corpus_centroid:v{corpus_version}"
+def _source_key(source: str) -> str:
+    return f"{_SOURCE_KEY_PREFIX}{source}"
+
+
+def _tracked_sources(raw: object) -> Optional[set]:
+    """Sources included in the stored stats (None if the entry predates tracking)."""
+    sources = raw.get("sources") if isinstance(raw, dict) else None
+    if not isinstance(sources, list):
+        return None
+    return {str(s) for s in sources}
+
+
+def _stats_payload(totals: "_Accumulator", sources: Iterable[str]) -> Dict[str, Any]:
+    payload = totals.to_cache()
+    payload["sources"] = sorted(sources)
+    return payload
+
+
+def _drop_source_keys(raw_stats: object, keep: Iterable[str] = ()) -> None:
+    """Delete the contribution keys listed in `raw_stats` that are not in `keep`."""
+    stale = (_tracked_sources(raw_stats) or set()) - set(keep)
+    for source in stale:
+        cache.delete(_source_key(source))
 
 
 def _l2_normalize(vec: np.ndarray) -> np.ndarray:
@@ -131,14 +190,303 @@ def _l2_normalize(vec: np.ndarray) -> np.ndarray:
     return vec / norm
 
 
+# ─── Running statistics ──────────────────────────────────────────────────────
+
+class _Accumulator:
+    """float64 running sum + count of L2-normalized vectors.
+
+    Welford-style is overkill for a plain mean; a float64 sum is numerically
+    stable enough and keeps memory at a fixed ~12KB regardless of corpus size.
+    """
+
+    __slots__ = ("sum", "count")
+
+    def __init__(self, sum_vec: Optional[np.ndarray] = None, count: int = 0) -> None:
+        self.sum = sum_vec
+        self.count = int(count)
+
+    @property
+    def dim(self) -> Optional[int]:
+        return None if self.sum is None else int(self.sum.shape[0])
+
+    def add_vectors(self, vectors: Iterable[Any]) -> bool:
+        """Add raw vectors. Returns False on a dimension mismatch (corrupt state)."""
+        for vec in vectors:
+            if vec is None:
+                continue
+            arr = np.asarray(vec, dtype=np.float64).reshape(-1)
+            if arr.size == 0:
+                continue
+            if self.sum is None:
+                self.sum = np.zeros(arr.shape[0], dtype=np.float64)
+            elif arr.shape[0] != self.sum.shape[0]:
+                logger.warning(
+                    "centroid: inconsistent vector dims (expected=%d got=%d)",
+                    self.sum.shape[0], arr.shape[0],
+                )
+                return False
+            norm = float(np.linalg.norm(arr))
+            self.sum += arr / norm if norm > 0.0 else arr
+            self.count += 1
+        return True
+
+    def merge(self, other: "_Accumulator", sign: int = 1) -> bool:
+        if other.sum is None or other.count == 0:
+            return True
+        if self.sum is None:
+            self.sum = np.zeros_like(other.sum)
+        elif self.sum.shape != other.sum.shape:
+            return False
+        self.sum += sign * other.sum
+        self.count += sign * other.count
+        if self.count < 0:
+            return False
+        if self.count == 0:
+            # Everything was removed: drop float residue so the next ingest
+            # starts from an exact zero.
+            self.sum, self.count = None, 0
+        return True
+
+    def centroid(self) -> Optional[np.ndarray]:
+        if self.sum is None or self.count <= 0:
+            return None
+        return _l2_normalize((self.sum / float(self.count)).astype(np.float32))
+
+    def to_cache(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": _serialize_vector(self.sum) if self.sum is not None else None,
+        }
+
+    @classmethod
+    def from_cache(cls, raw: object) -> Optional["_Accumulator"]:
+        if not isinstance(raw, dict):
+            return None
+        try:
+            count = int(raw.get("count") or 0)
+        except (TypeError, ValueError):
+            return None
+        blob = raw.get("sum")
+        if blob is None:
+            return cls() if count == 0 else None
+        sum_vec = _deserialize_vector(blob)
+        if not isinstance(sum_vec, np.ndarray) or sum_vec.ndim != 1:
+            return None
+        return cls(sum_vec.astype(np.float64), count)
+
+
+def _redis_client():
+    try:
+        if getattr(cache, "backend_type", None) == "RedisCache":
+            return cache.backend.client
+    except Exception:
+        pass
+    return None
+
+
+async def _with_update_lock(fn: Callable[[], Any]) -> Tuple[bool, Any]:
+    """Run `fn` (sync, in a thread) holding the in-process + cross-worker lock.
+
+    Returns (ran, result). `ran` is False if the Redis lock could not be
+    acquired; callers must then treat the stats as unreliable.
+    """
+    def _locked() -> Any:
+        with _stats_update_lock:
+            return fn()
+
+    client = _redis_client()
+    if client is None:
+        return True, await asyncio.to_thread(_locked)
+    lock = RedisAdvisoryLock(client, _UPDATE_LOCK_KEY, acquire_timeout=_UPDATE_LOCK_TIMEOUT_S)
+    if not await lock.acquire():
+        return False, None
+    try:
+        return True, await asyncio.to_thread(_locked)
+    finally:
+        await lock.release()
+
+
+async def _mutate_stats(
+    source: str,
+    apply: Callable[[Optional[_Accumulator]], Optional[_Accumulator]],
+) -> None:
+    """Replace `source`'s contribution with `apply(old_contribution)`.
+
+    `apply` returns the new contribution (None = remove the source). If the
+    corpus stats don't exist yet they are left alone: the pending rebuild
+    will account for this source from Qdrant.
+    """
+    try:
+        await asyncio.to_thread(cache.increment, _REVISION_KEY, 1, 0)
+
+        def _update() -> None:
+            key = _source_key(source)
+            stored = cache.get_many([_STATS_KEY, key])
+            if _STATS_KEY not in stored:
+                return
+            totals = _Accumulator.from_cache(stored[_STATS_KEY])
+            sources = _tracked_sources(stored[_STATS_KEY])
+            if totals is None or sources is None:
+                raise ValueError("stored centroid stats are malformed")
+            has_previous = source in sources and key in stored
+            previous = _Accumulator.from_cache(stored[key]) if has_previous else None
+            if has_previous and previous is None:
+                raise ValueError("stored centroid stats are malformed")
+
+            current = apply(previous)
+            if previous is not None and not totals.merge(previous, sign=-1):
+                raise ValueError("source contribution dims differ from corpus stats")
+            if current is not None and not totals.merge(current):
+                raise ValueError("new vectors dims differ from corpus stats")
+
+            if current is None or current.count == 0:
+                sources.discard(source)
+                cache.delete(key)
+            else:
+                sources.add(source)
+                cache.set(key, current.to_cache(), ttl=0)
+            cache.set(_STATS_KEY, _stats_payload(totals, sources), ttl=0)
+            # Second bump: a centroid derived mid-update is keyed by the
+            # first one and is never read again.
+            cache.increment(_REVISION_KEY, 1, 0)
+
+        ran, _ = await _with_update_lock(_update)
+        if not ran:
+            raise TimeoutError("centroid stats lock not acquired")
+    except Exception as exc:
+        # Unknown state beats wrong state: drop the stats so the next query
+        # schedules a repair rebuild instead of trusting a skewed sum.
+        logger.warning(
+            "centroid stats update failed for source=%s; scheduling rebuild: %s",
+            source, exc,
+        )
+        invalidate_centroid_stats()
+
+
+async def record_source_vectors(
+    source: str,
+    vectors: Iterable[Any],
+    *,
+    replace: bool = True,
+    removed: Iterable[Any] = (),
+) -> None:
+    """Account for freshly ingested vectors of `source` in the running stats.
+
+    `replace=True` (full re-ingest) means the source's previous vectors
+    were deleted first, so its old contribution is swapped out; otherwise
+    the new vectors are added on top of it and the `removed` ones (chunks
+    dropped by an incremental re-ingest) are subtracted.
+    """
+    fresh = _Accumulator()
+    gone = _Accumulator()
+    if not fresh.add_vectors(vectors) or not gone.add_vectors(removed):
+        invalidate_centroid_stats()
+        return
+
+    def _apply(previous: Optional[_Accumulator]) -> Optional[_Accumulator]:
+        if replace:
+            return fresh
+        if previous is None:
+            if gone.count:
+                raise ValueError("removed vectors for a source without tracked contribution")
+            return fresh
+        combined = _Accumulator(previous.sum.copy() if previous.sum is not None else None, previous.count)
+        if not combined.merge(fresh):
+            raise ValueError("new vectors dims differ from source contribution")
+        if not combined.merge(gone, sign=-1):
+            raise ValueError("removed vectors exceed source contribution")
+        return combined
+
+    await _mutate_stats(source, _apply)
+
+
+async def forget_source(source: str) -> None:
+    """Subtract a deleted source's contribution from the running stats."""
+    await _mutate_stats(source, lambda previous: None)
+
+
+def invalidate_centroid_stats() -> None:
+    """Drop the running stats after a partial store/delete failure.
+
+    The next query then schedules a repair rebuild instead of trusting sums
+    that no longer match what Qdrant holds.
+    """
+    cache.delete(_STATS_KEY)
+    try:
+        cache.increment(_REVISION_KEY, 1, 0)
+    except Exception as exc:
+        logger.debug("centroid revision bump failed (non-fatal): %s", exc)
+    clear_inprocess_cache()
+
+
+async def reset_centroid_stats() -> None:
+    """Mark the corpus as empty (e.g. after dropping the whole collection)."""
+    try:
+        await asyncio.to_thread(cache.increment, _REVISION_KEY, 1, 0)
+
+        def _reset() -> None:
+            _drop_source_keys(cache.get(_STATS_KEY))
+            cache.set(_STATS_KEY, _stats_payload(_Accumulator(), ()), ttl=0)
+            cache.increment(_REVISION_KEY, 1, 0)
+
+        ran, _ = await _with_update_lock(_reset)
+        if not ran:
+            raise TimeoutError("centroid stats lock not acquired")
+    except Exception as exc:
+        logger.warning("centroid stats reset failed; scheduling rebuild: %s", exc)
+        invalidate_centroid_stats()
+        return
+    clear_inprocess_cache()
+
+
+# ─── Full scan (repair) ──────────────────────────────────────────────────────
+
+def _scan_corpus(vector_store) -> Optional[Tuple[_Accumulator, Dict[str, _Accumulator]]]:
+    """Scroll every vector in Qdrant. Returns (totals, per-source) or None.
+
+    None means the scan is unusable: no client, or inconsistent dims.
+    Points without a `source` payload count toward the totals only — they
+    can't be deleted by source either, so no per-source entry is needed.
+    """
+    client = getattr(vector_store, "client", None)
+    collection = getattr(vector_store, "collection_name", None)
+    if client is None or not collection:
+        return None
+
+    totals = _Accumulator()
+    per_source: Dict[str, _Accumulator] = {}
+    next_offset = None
+
+    while True:
+        points, next_offset = client.scroll(
+            collection_name=collection,
+            limit=_SCROLL_BATCH_SIZE,
+            offset=next_offset,
+            with_payload=["source"],
+            with_vectors=True,
+        )
+        for p in points:
+            vec = getattr(p, "vector", None)
+            if vec is None:
+                continue
+            if not totals.add_vectors([vec]):
+                return None
+            payload = getattr(p, "payload", None)
+            source = payload.get("source") if isinstance(payload, dict) else None
+            if source:
+                per_source.setdefault(str(source), _Accumulator()).add_vectors([vec])
+        if next_offset is None or not points:
+            break
+
+    return totals, per_source
+
+
 async def compute_centroid(vector_store) -> Optional[np.ndarray]:
     """Pull every vector out of Qdrant and return its L2-normalized mean.
 
-    Streaming accumulator (running sum + count) rather than materializing
-    all vectors — at 1536 dims × float32, a 100k-doc corpus would otherwise
-    pin ~600MB resident. Welford-style is overkill for plain mean; a
-    float64 running sum + integer count is numerically stable enough and
-    keeps memory at a fixed ~12KB.
+    Repair/diagnostic path only — queries read the running stats. Streaming
+    accumulator rather than materializing all vectors: at 1536 dims ×
+    float32, a 100k-doc corpus would otherwise pin ~600MB resident.
 
     Returns None if:
       - The corpus is empty (nothing to compare against).
@@ -146,98 +494,119 @@ async def compute_centroid(vector_store) -> Optional[np.ndarray]:
         out-of-scope check rather than block the user).
       - Vector dims are inconsistent across the corpus (corrupted state).
     """
-    def _scroll_and_accumulate() -> Optional[np.ndarray]:
-        client = getattr(vector_store, "client", None)
-        collection = getattr(vector_store, "collection_name", None)
-        if client is None or not collection:
-            return None
-
-        sum_vec: Optional[np.ndarray] = None
-        count: int = 0
-        expected_dim: Optional[int] = None
-        next_offset = None
-
-        while True:
-            points, next_offset = client.scroll(
-                collection_name=collection,
-                limit=_SCROLL_BATCH_SIZE,
-                offset=next_offset,
-                with_payload=False,
-                with_vectors=True,
-            )
-            for p in points:
-                vec = getattr(p, "vector", None)
-                if vec is None:
-                    continue
-                arr = np.asarray(vec, dtype=np.float64)
-                if arr.size == 0:
-                    continue
-                if expected_dim is None:
-                    expected_dim = arr.shape[0]
-                    sum_vec = np.zeros(expected_dim, dtype=np.float64)
-                elif arr.shape[0] != expected_dim:
-                    logger.warning(
-                        "centroid: inconsistent vector dims (expected=%d got=%d)",
-                        expected_dim, arr.shape[0],
-                    )
-                    return None
-                sum_vec += arr
-                count += 1
-            if next_offset is None or not points:
-                break
-
-        if count == 0 or sum_vec is None:
-            return None
-        mean = sum_vec / float(count)
-        return _l2_normalize(mean.astype(np.float32))
-
     try:
-        return await asyncio.to_thread(_scroll_and_accumulate)
+        scanned = await asyncio.to_thread(_scan_corpus, vector_store)
     except Exception as exc:
         logger.warning("centroid scroll failed: %s", exc, exc_info=True)
         return None
+    return scanned[0].centroid() if scanned is not None else None
 
 
-async def get_centroid(vector_store) -> Optional[np.ndarray]:
-    """Return cached or freshly-computed centroid for the current corpus version.
+async def rebuild_centroid_stats(vector_store) -> Optional[np.ndarray]:
+    """Explicit repair: rescan Qdrant and overwrite the running stats.
+
+    Single-flight across workers (Redis advisory lock): a worker that finds
+    a rebuild already running returns None instead of scanning again. The
+    result is persisted only if no ingest/delete happened during the scan.
+    """
+    client = _redis_client()
+    rebuild_lock = None
+    if client is not None:
+        rebuild_lock = RedisAdvisoryLock(
+            client, _REBUILD_LOCK_KEY, acquire_timeout=0.1, ttl_seconds=_REBUILD_LOCK_TTL_S,
+        )
+        if not await rebuild_lock.acquire():
+            logger.info("centroid rebuild already running in another worker; skipping")
+            return None
+    try:
+        revision = await asyncio.to_thread(cache.get, _REVISION_KEY)
+        try:
+            scanned = await asyncio.to_thread(_scan_corpus, vector_store)
+        except Exception as exc:
+            logger.warning("centroid scroll failed: %s", exc, exc_info=True)
+            return None
+        if scanned is None:
+            return None
+        totals, per_source = scanned
+
+        def _persist() -> bool:
+            if cache.get(_REVISION_KEY) != revision:
+                return False
+            _drop_source_keys(cache.get(_STATS_KEY), keep=per_source)
+            cache.set_many({_source_key(s): acc.to_cache() for s, acc in per_source.items()}, ttl=0)
+            cache.set(_STATS_KEY, _stats_payload(totals, per_source), ttl=0)
+            cache.increment(_REVISION_KEY, 1, 0)
+            return True
+
+        ran, persisted = await _with_update_lock(_persist)
+        if ran and persisted:
+            logger.info(
+                "centroid stats rebuilt | vectors=%d sources=%d", totals.count, len(per_source),
+            )
+            clear_inprocess_cache()
+        else:
+            logger.info("centroid rebuild discarded: corpus changed during the scan")
+        return totals.centroid()
+    finally:
+        if rebuild_lock is not None:
+            await rebuild_lock.release()
+
+
+def _schedule_rebuild(vector_store) -> None:
+    """Start a background rebuild unless one is already running here."""
+    global _rebuild_task
+    loop = asyncio.get_running_loop()
+    task = _rebuild_task
+    if task is not None and not task.done() and task.get_loop() is loop:
+        return
+    _rebuild_task = loop.create_task(rebuild_centroid_stats(vector_store))
 
-    Cache lookup order: in-process LRU → Redis → recompute. Concurrent
-    callers within one process serialize via threading.Lock; across
-    workers, Redis amortizes the cost so the second worker reads what the
-    first computed.
+
+async def get_centroid(vector_store) -> Optional[np.ndarray]:
+    """Return the centroid for the current corpus version.
+
+    Lookup order: in-process LRU → derived centroid in the cache (per
+    version) → running stats. Never scans Qdrant on the query path: if the
+    stats are missing, a single-flight background rebuild is scheduled and
+    this call fails open (None). Deriving it goes through
+    `cache.aget_or_compute`, so the burst of queries that follows a version
+    bump does one stats read per worker instead of one per query.
     """
-    version = get_corpus_cache_version()
+    version = await aget_corpus_cache_version()
 
-    # Fast path: in-process LRU
+    # Fast path: in-process LRU (cleared on every local stats change)
     hit, value = _cache_get(version)
     if hit:
         return value
 
-    # Try Redis (base64-encoded npy, JSON-safe; no pickle)
-    key = _cache_key(version)
+    async def _derive() -> Optional[Dict[str, Any]]:
+        raw = await cache.aget(_STATS_KEY)
+        totals = _Accumulator.from_cache(raw) if raw is not None else None
+        if totals is None:
+            try:
+                _schedule_rebuild(vector_store)
+            except Exception as exc:
+                logger.debug("centroid rebuild scheduling failed (non-fatal): %s", exc)
+            return None  # not cached: retried once the rebuild lands
+        centroid = totals.centroid()
+        return {"centroid": _serialize_vector(centroid) if centroid is not None else None}
+
     try:
-        cached_blob = cache.get(key)
-        if cached_blob is not None:
-            arr = _deserialize_centroid(cached_blob)
-            if isinstance(arr, np.ndarray):
-                _cache_put(version, arr)
-                return arr
+        # The stats revision is part of the key: any mutation, reset, rebuild
+        # or invalidation bumps it, so a derived entry never outlives its stats.
+        revision = await cache.aget(_REVISION_KEY)
+        derived = await cache.aget_or_compute(
+            f"{_CENTROID_KEY_PREFIX}{version}:{revision or 0}", _derive, ttl=_CENTROID_TTL_S,
+        )
     except Exception as exc:
-        logger.debug("centroid Redis read failed (non-fatal): %s", exc)
+        logger.debug("centroid stats read failed (non-fatal): %s", exc)
+        return None
+    if not isinstance(derived, dict):
+        return None
 
-    # Compute fresh. Note: across multiple workers, several may race here
-    # on first miss. We accept that — Redis write is idempotent (same
-    # centroid for same version) and the scroll dominates the cost only
-    # once per ingest in practice.
-    centroid = await compute_centroid(vector_store)
+    blob = derived.get("centroid")
+    centroid = _deserialize_vector(blob) if blob is not None else None
     _cache_put(version, centroid)
-
-    if centroid is not None:
-        try:
-            cache.set(key, _serialize_centroid(centroid), ttl=_CENTROID_CACHE_TTL_S)
-        except Exception as exc:
-            logger.debug("centroid Redis write failed (non-fatal): %s", exc)
-
     return centroid
 
 
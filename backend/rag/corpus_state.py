@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import Optional
+import time
+import uuid
+from typing import Iterable, Optional
 
 from fastapi import BackgroundTasks
 
@@ -11,19 +13,41 @@ logger = get_logger(__name__)
 
 CORPUS_VERSION_CACHE_KEY = "meta:rag:corpus_version"
 DEFAULT_CORPUS_VERSION = "0"
+# Época de `rag:ts:*`: un token aleatorio nuevo en cada escritura de
+# `rag:ts:<doc_id>`. Una entrada de `rag:retrieval:` sellada con la época
+# vigente no necesita revalidar sus timestamps por documento (ver
+# RAGRetriever._aget_cached_result). No es un contador: si Redis desaloja la
+# clave, un INCR reiniciaría en 1 y volvería a validar sellos viejos; un
+# token nunca se repite, y sin clave se revalida siempre.
+DOC_TS_EPOCH_KEY = "rag:ts:epoch"
+
+# Leída en cada consulta RAG; se sirve desde L1 y cada bump se propaga por
+# pub/sub al resto de workers (cache/l1.py).
+cache.register_hot_keys(CORPUS_VERSION_CACHE_KEY)
+
+
+def _normalize_corpus_version(current) -> str:
+    if current is None:
+        return DEFAULT_CORPUS_VERSION
+    if isinstance(current, bool):
+        return str(int(current))
+    if isinstance(current, (int, float)):
+        return str(int(current))
+    normalized = str(current).strip()
+    return normalized or DEFAULT_CORPUS_VERSION
 
 
 def get_corpus_cache_version() -> str:
     try:
-        current = cache.get(CORPUS_VERSION_CACHE_KEY)
-        if current is None:
-            return DEFAULT_CORPUS_VERSION
-        if isinstance(current, bool):
-            return str(int(current))
-        if isinstance(current, (int, float)):
-            return str(int(current))
-        normalized = str(current).strip()
-        return normalized or DEFAULT_CORPUS_VERSION
+        return _normalize_corpus_version(cache.get(CORPUS_VERSION_CACHE_KEY))
+    except Exception:
+        return DEFAULT_CORPUS_VERSION
+
+
+async def aget_corpus_cache_version() -> str:
+    """Igual que `get_corpus_cache_version`, sin bloquear el event loop."""
+    try:
+        return _normalize_corpus_version(await cache.aget(CORPUS_VERSION_CACHE_KEY))
     except Exception:
         return DEFAULT_CORPUS_VERSION
 
@@ -45,6 +69,18 @@ def bump_corpus_cache_version() -> str:
         return get_corpus_cache_version()
 
 
+async def amark_documents_updated(doc_ids: Iterable[str]) -> None:
+    """Sella `rag:ts:<doc_id>` (invalida las entradas de retrieval que los citan) y sube la época."""
+    doc_ids = [doc_id for doc_id in doc_ids if doc_id]
+    if not doc_ids:
+        return
+    now = str(time.time())
+    # Primero los timestamps, luego la época: quien lea la época nueva ya ve
+    # los timestamps nuevos.
+    await cache.aset_many({f"rag:ts:{doc_id}": now for doc_id in doc_ids})
+    await cache.aset(DOC_TS_EPOCH_KEY, uuid.uuid4().hex, 0)
+
+
 def refresh_rag_corpus_state(
     rag_retriever=None,
     background_tasks: Optional[BackgroundTasks] = None,
@@ -56,6 +92,13 @@ def refresh_rag_corpus_state(
     if rag_retriever is not None and hasattr(rag_retriever, "invalidate_rag_cache"):
         rag_retriever.invalidate_rag_cache()
 
+    # Cross-turn tool results are keyed by corpus version already; bumping the
+    # namespace generation (O(1), cache/namespaces.py) just frees them sooner.
+    try:
+        cache.invalidate_prefix("retrieval_tool:")
+    except Exception as exc:
+        logger.debug("retrieval_tool cache invalidation skipped: %s", exc)
+
     # Drop the in-process centroid cache so the next query recomputes
     # against the updated corpus. Redis entry is keyed by version and
     # naturally expires; this just dumps the worker-local fast-path map.
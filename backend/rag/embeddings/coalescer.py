@@ -0,0 +1,113 @@
+"""Coalescing de peticiones de embedding para los entry points async.
+
+Dos comportamientos sobre una función batch síncrona `embed_batch(texts)`:
+
+- Single-flight: textos idénticos (normalizados) en vuelo comparten un
+  único future; N conversaciones que hacen la misma pregunta a la vez
+  generan una sola llamada al proveedor.
+- Micro-batching: textos distintos que llegan dentro de `window_ms` se
+  agrupan en una sola llamada batch (hasta `max_batch` textos; al llenarse
+  el lote se despacha sin esperar la ventana).
+
+La función batch corre en un thread (`asyncio.to_thread`) para no bloquear
+el event loop. Un fallo del batch se propaga a todos sus waiters; la
+cancelación de un waiter no cancela el future compartido.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Callable, Dict, List, Optional
+
+from infra.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class EmbeddingCoalescer:
+    """Agrupa embeddings de un mismo event loop en lotes con single-flight."""
+
+    def __init__(
+        self,
+        embed_batch: Callable[[List[str]], List[List[float]]],
+        *,
+        window_ms: float = 5.0,
+        max_batch: int = 32,
+    ) -> None:
+        self._embed_batch = embed_batch
+        self.window_s = max(0.0, float(window_ms)) / 1000.0
+        self.max_batch = max(1, int(max_batch))
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._pending: List[str] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+        self.batches_sent = 0
+        self.texts_requested = 0
+        self.texts_coalesced = 0
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return (text or "").strip().lower()
+
+    async def embed(self, text: str) -> List[float]:
+        key = self._key(text)
+        self.texts_requested += 1
+        future = self._inflight.get(key)
+        if future is not None:
+            self.texts_coalesced += 1
+            return await asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[key] = future
+        self._pending.append(text)
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window_s, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        self.batches_sent += 1
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[str]) -> None:
+        keys = [self._key(text) for text in batch]
+        try:
+            vectors = await asyncio.to_thread(self._embed_batch, batch)
+            if len(vectors) != len(batch):
+                raise RuntimeError(
+                    f"embed_batch devolvió {len(vectors)} vectores para {len(batch)} textos"
+                )
+        except BaseException as exc:
+            for key in keys:
+                future = self._inflight.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(exc)
+                    # Evita "exception was never retrieved" si todos los waiters se cancelaron.
+                    future.exception()
+            if not isinstance(exc, Exception):
+                raise
+            logger.debug("Embedding batch failed | size=%d err=%s", len(batch), exc)
+            return
+
+        for key, vector in zip(keys, vectors):
+            future = self._inflight.pop(key, None)
+            if future is not None and not future.done():
+                future.set_result(vector)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches_sent": self.batches_sent,
+            "texts_requested": self.texts_requested,
+            "texts_coalesced": self.texts_coalesced,
+            "pending": len(self._pending),
+            "inflight": len(self._inflight),
+        }
@@ -5,7 +5,9 @@ import time
 from infra.logging_utils import get_logger
 from config import settings
 from cache.manager import cache
+from cache.vector_codec import to_cache_vector
 from infra.hashing import hash_for_cache_key
+from rag.embeddings.coalescer import EmbeddingCoalescer
 
 # Usar embeddings remotos de OpenAI para reducir uso de memoria
 try:
@@ -64,11 +66,27 @@ class EmbeddingManager:
         self._openai = OpenAIEmbeddings(model=openai_model)
 
         self._batch_size = getattr(settings, "embedding_batch_size", 32)
+        self._coalescer: Optional[EmbeddingCoalescer] = None
+        self._coalescer_loop: Optional[asyncio.AbstractEventLoop] = None
 
     @staticmethod
     def _hash_text(text: str) -> str:
         return hash_for_cache_key((text or "").strip().lower())
 
+    @staticmethod
+    def _to_cache_value(embedding: List[float]):
+        """Vector numpy en el dtype configurado: RedisCache lo guarda con el codec binario."""
+        return to_cache_vector(embedding, getattr(settings, "embedding_cache_dtype", "float32"))
+
+    @staticmethod
+    def _from_cache_value(cached, vector_dim: int) -> Optional[List[float]]:
+        """Acepta entradas binarias (ndarray) y JSON heredadas (list) con la dimensión esperada."""
+        if isinstance(cached, np.ndarray):
+            cached = cached.tolist()
+        if isinstance(cached, list) and len(cached) == vector_dim:
+            return cached
+        return None
+
     def _embed_query_with_retry(self, query: str) -> List[float]:
         @retry(
             stop=stop_after_attempt(3),
@@ -153,19 +171,19 @@ class EmbeddingManager:
         results: List[Optional[List[float]]] = [None] * len(filtered_texts)
         miss_indices: List[int] = []
 
-        for i, t in enumerate(filtered_texts):
-            key = f"emb:doc:{self.model_name}:{self._hash_text(t)}"
-            try:
-                cached = cache.get(key)
-                if cached is not None:
-                    # FIX 1: Validar que el embedding cacheado tenga dimensión correcta
-                    if isinstance(cached, list) and len(cached) == vector_dim:
-                        results[i] = cached
-                    else:
-                        miss_indices.append(i)
-                else:
-                    miss_indices.append(i)
-            except Exception:
+        keys = [f"emb:doc:{self.model_name}:{self._hash_text(t)}" for t in filtered_texts]
+        try:
+            # Un solo round trip (MGET) para todo el lote en vez de un GET por texto.
+            cached_by_key = cache.get_many(keys)
+        except Exception:
+            cached_by_key = {}
+
+        for i, key in enumerate(keys):
+            # FIX 1: Validar que el embedding cacheado tenga dimensión correcta
+            cached = self._from_cache_value(cached_by_key.get(key), vector_dim)
+            if cached is not None:
+                results[i] = cached
+            else:
                 miss_indices.append(i)
 
         hit_count = len(texts) - len(miss_indices)
@@ -212,6 +230,7 @@ class EmbeddingManager:
                     index_to_embedding[idx] = emb
 
             # Ensamblar resultados
+            to_cache: dict[str, np.ndarray] = {}
             for i in miss_indices:
                 emb = index_to_embedding.get(i)
 
@@ -225,9 +244,11 @@ class EmbeddingManager:
                 results[i] = emb
 
                 # Guardar en cache solo embeddings válidos
+                to_cache[keys[i]] = self._to_cache_value(emb)
+
+            if to_cache:
                 try:
-                    key = f"emb:doc:{self.model_name}:{self._hash_text(filtered_texts[i])}"
-                    cache.set(key, emb, cache.ttl)
+                    cache.set_many(to_cache, cache.ttl)
                 except Exception:
                     pass
 
@@ -282,8 +303,10 @@ class EmbeddingManager:
 
         key = f"emb:query:{self.model_name}:{self._hash_text(query)}"
 
+        vector_dim = getattr(settings, "default_embedding_dimension", 1536)
+
         try:
-            cached = cache.get(key)
+            cached = self._from_cache_value(cache.get(key), vector_dim)
             if cached is not None:
                 self.logger.debug("Cache HIT embedding consulta")
                 return cached
@@ -292,8 +315,6 @@ class EmbeddingManager:
 
         self.logger.debug(f"Cache MISS embedding consulta — generando: {query}")
 
-        vector_dim = getattr(settings, "default_embedding_dimension", 1536)
-
         try:
             embedding = self._embed_query_with_retry(query)
             if isinstance(embedding, np.ndarray):
@@ -306,7 +327,7 @@ class EmbeddingManager:
                 )
 
             try:
-                cache.set(key, embedding, cache.ttl)
+                cache.set(key, self._to_cache_value(embedding), cache.ttl)
             except Exception:
                 pass
 
@@ -320,6 +341,85 @@ class EmbeddingManager:
             self.logger.warning(f"Error al generar embedding para consulta: {type(e).__name__}: {e}")
             raise EmbeddingError(f"Fallo generando embedding de query: {e}") from e
 
+    # ----------------------------------------------------------------------
+    #   EMBED QUERY BATCH — backend del coalescer async
+    # ----------------------------------------------------------------------
+    def _embed_query_batch(self, queries: List[str]) -> List[List[float]]:
+        """Embeddings de varias consultas: un MGET de caché + un `embed_documents`.
+
+        Mismas claves `emb:query:` que `embed_query`, de modo que ambos caminos
+        comparten caché.
+        """
+        vector_dim = getattr(settings, "default_embedding_dimension", 1536)
+        if getattr(settings, "mock_mode", False):
+            time.sleep(0.01)
+            self.logger.info("MOCK EMBEDDING GENERATED (Costo $0) | batch=%d", len(queries))
+            return [[0.0] * vector_dim for _ in queries]
+
+        keys = [f"emb:query:{self.model_name}:{self._hash_text(q)}" for q in queries]
+        try:
+            cached_by_key = cache.get_many(keys)
+        except Exception:
+            cached_by_key = {}
+
+        results: List[Optional[List[float]]] = [None] * len(queries)
+        miss_indices: List[int] = []
+        for i, key in enumerate(keys):
+            cached = self._from_cache_value(cached_by_key.get(key), vector_dim)
+            if cached is not None:
+                results[i] = cached
+            else:
+                miss_indices.append(i)
+
+        if miss_indices:
+            try:
+                embeddings = self._embed_batch_with_retry([queries[i] for i in miss_indices])
+            except Exception as e:
+                self.logger.warning(f"Error al generar embeddings de consultas: {type(e).__name__}: {e}")
+                raise EmbeddingError(f"Fallo generando embeddings de query: {e}") from e
+
+            to_cache: dict[str, np.ndarray] = {}
+            for i, emb in zip(miss_indices, embeddings):
+                if isinstance(emb, np.ndarray):
+                    emb = emb.tolist()
+                if not emb or not isinstance(emb, list) or len(emb) != vector_dim:
+                    raise EmbeddingError(
+                        f"OpenAI devolvió embedding de query con dimensión incorrecta: "
+                        f"esperado={vector_dim}, got={len(emb) if isinstance(emb, list) else type(emb).__name__}"
+                    )
+                results[i] = emb
+                to_cache[keys[i]] = self._to_cache_value(emb)
+            try:
+                cache.set_many(to_cache, cache.ttl)
+            except Exception:
+                pass
+
+        return results  # type: ignore[return-value]
+
+    def _get_coalescer(self) -> EmbeddingCoalescer:
+        # Los futures pertenecen a un event loop: un coalescer por loop.
+        loop = asyncio.get_running_loop()
+        coalescer = getattr(self, "_coalescer", None)
+        if coalescer is None or getattr(self, "_coalescer_loop", None) is not loop:
+            coalescer = EmbeddingCoalescer(
+                lambda queries: self._embed_query_batch(queries),
+                window_ms=getattr(settings, "embedding_coalesce_window_ms", 5.0),
+                max_batch=getattr(settings, "embedding_coalesce_max_batch", 32),
+            )
+            self._coalescer = coalescer
+            self._coalescer_loop = loop
+        return coalescer
+
+    async def aembed_query(self, query: str) -> List[float]:
+        """Versión async de `embed_query` con single-flight y micro-batching.
+
+        Consultas idénticas en vuelo comparten una llamada; consultas distintas
+        dentro de `embedding_coalesce_window_ms` viajan en un solo batch.
+        """
+        if not getattr(settings, "enable_embedding_coalescing", True):
+            return await asyncio.to_thread(self.embed_query, query)
+        return await self._get_coalescer().embed(query)
+
     # ----------------------------------------------------------------------
     #   EMBED DOCUMENTS ASYNC — Para no bloquear workers en ingesta
     # ----------------------------------------------------------------------
@@ -347,6 +447,4 @@ class EmbeddingManager:
                 f"Texto demasiado corto para generar embedding (len={len(cleaned)}, mínimo=3)."
             )
 
-        # embed_query es síncrono (llama a OpenAI SDK); usar to_thread
-        # para no bloquear el event loop de FastAPI/Uvicorn.
-        return await asyncio.to_thread(self.embed_query, cleaned)
\ No newline at end of file
+        return await self.aembed_query(cleaned)
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""Pool de procesos para el parseo y chunking de PDFs.
+
+`pymupdf4llm.to_markdown` y la clasificación de bloques son CPU-bound y
+sostienen el GIL: ejecutados con `asyncio.to_thread` dentro de la API
+compiten con el event loop que sirve el chat. Este módulo mantiene un
+`ProcessPoolExecutor` (contexto `spawn`, sin heredar sockets ni clientes del
+proceso padre) y expone funciones top-level, picklables, que el
+`HierarchicalChunker` despacha al pool:
+
+- `scan_pdf`: número de páginas y niveles de header del documento completo.
+- `parse_page_range`: markdown y bloques crudos de un shard de páginas.
+- `chunk_raw_pages`: agrupación en parents/children del documento ensamblado.
+- `chunk_window`: agrupación de una ventana del modo streaming; el parent
+  abierto y los contadores viajan de ida y vuelta en un `StreamState`.
+
+Con `INGESTION_PROCESS_POOL_WORKERS=0` no se crea pool y el chunker sigue
+trabajando en el proceso actual.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from .hierarchical_chunker import HierarchicalChunker, ParentChunks, RawPage, StreamState
+from .models import HierarchicalChunkingResult
+
+logger = logging.getLogger(__name__)
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+# Chunker reutilizado dentro de cada proceso del pool (tiktoken y, si aplica,
+# el modelo semántico se cargan una sola vez por proceso y configuración).
+_worker_chunkers: dict[tuple, HierarchicalChunker] = {}
+
+
+def get_chunking_pool(max_workers: int | None = None) -> ProcessPoolExecutor | None:
+    """Pool compartido del proceso; None si está deshabilitado (0 workers)."""
+    global _pool
+    if max_workers is None:
+        from config import settings
+
+        max_workers = int(getattr(settings, "ingestion_process_pool_workers", 2))
+    if max_workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info("Pool de chunking iniciado (workers=%d)", max_workers)
+        return _pool
+
+
+def shutdown_chunking_pool(wait: bool = True) -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+        logger.info("Pool de chunking detenido.")
+
+
+def _worker_chunker(config: dict[str, Any]) -> HierarchicalChunker:
+    key = tuple(sorted(config.items()))
+    chunker = _worker_chunkers.get(key)
+    if chunker is None:
+        chunker = HierarchicalChunker(**config)
+        _worker_chunkers[key] = chunker
+    return chunker
+
+
+def scan_pdf(path: str) -> tuple[int, Any]:
+    import pymupdf
+    import pymupdf4llm
+
+    with pymupdf.open(path) as doc:
+        page_count = doc.page_count
+        hdr_info = pymupdf4llm.IdentifyHeaders(doc) if page_count else None
+    return page_count, hdr_info
+
+
+def parse_page_range(config: dict[str, Any], path: str, pages: list[int], hdr_info: Any) -> list[RawPage]:
+    chunker = _worker_chunker(config)
+    documents = chunker._load_pages_with_pymupdf4llm(Path(path), pages=pages, hdr_info=hdr_info)
+    return [chunker._page_raw_blocks(document) for document in documents]
+
+
+def chunk_raw_pages(
+    config: dict[str, Any],
+    raw_pages: list[RawPage],
+    path: str,
+    doc_id: str,
+    page_count: int,
+) -> HierarchicalChunkingResult:
+    return _worker_chunker(config).chunk_raw_pages(
+        raw_pages,
+        pdf_path=Path(path),
+        doc_id=doc_id,
+        page_count=page_count,
+    )
+
+
+def chunk_window(
+    config: dict[str, Any],
+    raw_pages: list[RawPage],
+    path: str,
+    doc_id: str,
+    state: StreamState,
+    final: bool,
+) -> tuple[list[ParentChunks], StreamState]:
+    items = _worker_chunker(config).chunk_window(
+        raw_pages,
+        pdf_path=Path(path),
+        doc_id=doc_id,
+        state=state,
+        final=final,
+    )
+    return items, state
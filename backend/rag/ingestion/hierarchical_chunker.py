@@ -2,12 +2,19 @@ from __future__ import annotations
 
 import asyncio
 import inspect
+import itertools
 import logging
+import queue
 import re
+import threading
+import time
 import uuid
-from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import Executor
+from contextlib import aclosing
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Awaitable, Callable, Iterable, Sequence
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Iterator, Sequence
 
 import tiktoken
 from langchain_core.documents import Document
@@ -37,7 +44,33 @@ class StructuralBlock:
     contains_date_like: bool
 
 
+@dataclass
+class StreamState:
+    """Estado del chunking en streaming que cruza de una ventana a la siguiente.
+
+    Es picklable para viajar con cada ventana al pool de procesos: numeracion
+    de bloques, seccion vigente, el parent aun abierto (con los embeddings de
+    sus bloques) y los contadores de los ids estables.
+    """
+
+    block_order: int = 0
+    section_title: str | None = None
+    open_group: list[StructuralBlock] = field(default_factory=list)
+    open_tokens: int = 0
+    embeddings: dict[int, tuple[Any, float]] = field(default_factory=dict)
+    parent_index: int = 0
+    parent_occurrences: dict[str, int] = field(default_factory=dict)
+    page_count: int = 0
+
+
 PageLoader = Callable[[Path], Sequence[Document] | Awaitable[Sequence[Document]]]
+# Bloques de una pagina antes de numerarlos y asignarles seccion:
+# (block_type, content, token_count, contains_numeric, contains_date_like).
+RawBlock = tuple[str, str, int, bool, bool]
+RawPage = tuple[int, list[RawBlock]]
+ParentChunks = tuple[ParentDocument, list[ChildChunk]]
+
+_STREAM_END = object()
 
 
 class HierarchicalChunker:
@@ -47,6 +80,8 @@ class HierarchicalChunker:
         re.IGNORECASE,
     )
 
+    _STREAM_PREFETCH_WINDOWS = 2
+
     def __init__(
         self,
         *,
@@ -60,6 +95,8 @@ class HierarchicalChunker:
         child_overlap_tokens: int | None = None,
         page_loader: PageLoader | None = None,
         encoding_name: str = "cl100k_base",
+        executor: Executor | None = None,
+        shard_pages: int = 64,
     ) -> None:
         self.parent_target_tokens = parent_target_tokens
         self.parent_max_tokens = parent_max_tokens
@@ -82,6 +119,12 @@ class HierarchicalChunker:
             parent_overlap_tokens = int(getattr(_s, "rag_parent_overlap_tokens", 120))
         self.parent_overlap_tokens = max(0, parent_overlap_tokens)
         self.page_loader = page_loader
+        self.encoding_name = encoding_name
+        # Con un ProcessPoolExecutor (rag/ingestion/chunking_pool.py) el parseo
+        # y el chunking salen del proceso de la API; los PDFs grandes se parsean
+        # en shards de `shard_pages` paginas en paralelo.
+        self.executor = executor
+        self.shard_pages = max(1, int(shard_pages))
         try:
             self.encoding = tiktoken.get_encoding(encoding_name)
         except Exception:
@@ -94,13 +137,54 @@ class HierarchicalChunker:
         self._semantic_model = None
         self._semantic_model_failed = False
         self._semantic_threshold: float = 0.5
+        self._semantic_batch_size: int = 64
 
     async def chunk_pdf(self, pdf_path: Path, *, doc_id: str) -> HierarchicalChunkingResult:
-        pages = await self._load_pages(pdf_path)
-        if not pages:
+        started = time.perf_counter()
+        if self.executor is not None and self.page_loader is None:
+            result, shards = await self._chunk_pdf_in_pool(pdf_path, doc_id=doc_id)
+        else:
+            pages = await self._load_pages(pdf_path)
+            result = self.chunk_raw_pages(
+                [self._page_raw_blocks(page) for page in pages],
+                pdf_path=pdf_path,
+                doc_id=doc_id,
+                page_count=len(pages),
+            )
+            shards = 1
+
+        elapsed = time.perf_counter() - started
+        pages_per_second = result.page_count / elapsed if elapsed > 0 else 0.0
+        result.metadata.update(
+            {
+                "chunking_seconds": round(elapsed, 3),
+                "pages_per_second": round(pages_per_second, 2),
+                "shards": shards,
+            }
+        )
+        logger.info(
+            "Chunking %s | pages=%d shards=%d | %.2fs (%.1f pages/s)",
+            pdf_path.name,
+            result.page_count,
+            shards,
+            elapsed,
+            pages_per_second,
+        )
+        return result
+
+    def chunk_raw_pages(
+        self,
+        raw_pages: Sequence[RawPage],
+        *,
+        pdf_path: Path,
+        doc_id: str,
+        page_count: int,
+    ) -> HierarchicalChunkingResult:
+        """Agrupa los bloques ya extraidos de cada pagina en parents y children."""
+        if not raw_pages:
             return HierarchicalChunkingResult.empty(pdf_path=pdf_path, doc_id=doc_id)
 
-        structural_blocks = self._extract_structural_blocks(pages)
+        structural_blocks = self._assemble_blocks(raw_pages)
         if not structural_blocks:
             return HierarchicalChunkingResult.empty(pdf_path=pdf_path, doc_id=doc_id)
 
@@ -114,7 +198,7 @@ class HierarchicalChunker:
             doc_id=doc_id,
             source=pdf_path.name,
             file_path=str(pdf_path.resolve()),
-            page_count=len(pages),
+            page_count=page_count,
             parents=parents,
             children=children,
             metadata={
@@ -122,6 +206,292 @@ class HierarchicalChunker:
             },
         )
 
+    async def _chunk_pdf_in_pool(self, pdf_path: Path, *, doc_id: str) -> tuple[HierarchicalChunkingResult, int]:
+        from rag.ingestion import chunking_pool
+
+        loop = asyncio.get_running_loop()
+        config = self.pool_config()
+        path = str(pdf_path)
+        # Los niveles de header se calculan una vez sobre todo el documento,
+        # igual que en el parseo completo: cada shard produce el mismo markdown.
+        page_count, hdr_info = await loop.run_in_executor(self.executor, chunking_pool.scan_pdf, path)
+        shards = [
+            list(range(start, min(start + self.shard_pages, page_count)))
+            for start in range(0, page_count, self.shard_pages)
+        ]
+        parsed = await asyncio.gather(
+            *(
+                loop.run_in_executor(self.executor, chunking_pool.parse_page_range, config, path, pages, hdr_info)
+                for pages in shards
+            )
+        )
+        raw_pages = [page for shard in parsed for page in shard]
+        result = await loop.run_in_executor(
+            self.executor, chunking_pool.chunk_raw_pages, config, raw_pages, path, doc_id, len(raw_pages)
+        )
+        return result, max(1, len(shards))
+
+    def pool_config(self) -> dict[str, Any]:
+        """Parametros para reconstruir este chunker dentro de un proceso del pool."""
+        return {
+            "parent_target_tokens": self.parent_target_tokens,
+            "parent_max_tokens": self.parent_max_tokens,
+            "parent_min_tokens": self.parent_min_tokens,
+            "parent_overlap_tokens": self.parent_overlap_tokens,
+            "child_target_tokens": self.child_target_tokens,
+            "child_max_tokens": self.child_max_tokens,
+            "child_min_tokens": self.child_min_tokens,
+            "child_overlap_tokens": self.child_overlap_tokens,
+            "encoding_name": self.encoding_name,
+        }
+
+    async def stream_pdf(
+        self,
+        pdf_path: Path,
+        *,
+        doc_id: str,
+        metadata: dict[str, Any] | None = None,
+        max_pending: int = 8,
+    ) -> AsyncIterator[ParentChunks]:
+        """Modo streaming: emite cada parent con sus children apenas se cierra.
+
+        El PDF se parsea por ventanas de `shard_pages` paginas; en memoria
+        solo viven la ventana actual, el parent en construccion y los parents
+        aun no consumidos. Produce los mismos parents/children que
+        `chunk_pdf`. `metadata` se completa con `page_count` y las metricas de
+        throughput al terminar.
+
+        Con `executor` cada ventana se parsea y se agrupa en el pool
+        (`chunking_pool.chunk_window`, con el parent abierto viajando en un
+        `StreamState`), asi que la agrupacion, tiktoken y el encode semantico
+        tampoco corren en el proceso que llama. Sin pool el pipeline corre en
+        un hilo, con a lo sumo `max_pending` parents sin consumir.
+        """
+        started = time.perf_counter()
+        stats = metadata if metadata is not None else {}
+        if self.executor is not None and self.page_loader is None:
+            stream = self._stream_pdf_in_pool(pdf_path, doc_id=doc_id, stats=stats)
+        else:
+            stream = self._stream_pdf_in_thread(pdf_path, doc_id=doc_id, stats=stats, max_pending=max_pending)
+        async with aclosing(stream) as items:
+            async for item in items:
+                yield item
+
+        elapsed = time.perf_counter() - started
+        pages_per_second = stats.get("page_count", 0) / elapsed if elapsed > 0 else 0.0
+        stats.update({"chunking_seconds": round(elapsed, 3), "pages_per_second": round(pages_per_second, 2)})
+        logger.info(
+            "Chunking streaming %s | pages=%d parents=%d | %.2fs (%.1f pages/s)",
+            pdf_path.name,
+            stats.get("page_count", 0),
+            stats.get("parent_count", 0),
+            elapsed,
+            pages_per_second,
+        )
+
+    async def _stream_pdf_in_pool(
+        self,
+        pdf_path: Path,
+        *,
+        doc_id: str,
+        stats: dict[str, Any],
+    ) -> AsyncIterator[ParentChunks]:
+        from rag.ingestion import chunking_pool
+
+        loop = asyncio.get_running_loop()
+        config = self.pool_config()
+        path = str(pdf_path)
+        stats.update({"page_count": 0, "parent_count": 0})
+        page_count, hdr_info = await loop.run_in_executor(self.executor, chunking_pool.scan_pdf, path)
+        windows = (
+            list(range(start, min(start + self.shard_pages, page_count)))
+            for start in range(0, page_count, self.shard_pages)
+        )
+        # El parseo de las ventanas siguientes se adelanta (acotado a
+        # _STREAM_PREFETCH_WINDOWS) mientras se agrupa la actual; la agrupacion
+        # es secuencial porque cada ventana continua el parent de la anterior.
+        parsing: deque[asyncio.Future] = deque()
+
+        def _prefetch() -> None:
+            while len(parsing) < self._STREAM_PREFETCH_WINDOWS:
+                window = next(windows, None)
+                if window is None:
+                    return
+                parsing.append(
+                    loop.run_in_executor(self.executor, chunking_pool.parse_page_range, config, path, window, hdr_info)
+                )
+
+        state = StreamState()
+        try:
+            _prefetch()
+            while parsing:
+                raw_pages = await parsing.popleft()
+                _prefetch()
+                items, state = await loop.run_in_executor(
+                    self.executor,
+                    chunking_pool.chunk_window,
+                    config,
+                    raw_pages,
+                    path,
+                    doc_id,
+                    state,
+                    not parsing,
+                )
+                del raw_pages
+                stats["page_count"] = state.page_count
+                for item in items:
+                    stats["parent_count"] += 1
+                    yield item
+        finally:
+            for future in parsing:
+                future.cancel()
+
+    async def _stream_pdf_in_thread(
+        self,
+        pdf_path: Path,
+        *,
+        doc_id: str,
+        stats: dict[str, Any],
+        max_pending: int,
+    ) -> AsyncIterator[ParentChunks]:
+        pages = await self._load_pages(pdf_path) if self.page_loader is not None else None
+        items: queue.Queue = queue.Queue(maxsize=max(1, max_pending))
+        stop = threading.Event()
+
+        def _put(item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    items.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def _produce() -> None:
+            try:
+                for item in self.iter_chunks(pdf_path, doc_id=doc_id, pages=pages, metadata=stats):
+                    if not _put(item):
+                        return
+            except Exception as exc:
+                _put(exc)
+                return
+            _put(_STREAM_END)
+
+        producer = asyncio.ensure_future(asyncio.to_thread(_produce))
+        try:
+            while True:
+                item = await asyncio.to_thread(items.get)
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            try:
+                items.put_nowait(_STREAM_END)
+            except queue.Full:
+                pass
+            await asyncio.gather(producer, return_exceptions=True)
+
+    def chunk_window(
+        self,
+        raw_pages: Sequence[RawPage],
+        *,
+        pdf_path: Path,
+        doc_id: str,
+        state: StreamState,
+        final: bool,
+    ) -> list[ParentChunks]:
+        """Agrupa una ventana de paginas a continuacion de `state`.
+
+        Devuelve los parents que la ventana cierra y deja el que sigue abierto
+        en `state` para la proxima; con `final` lo cierra tambien.
+        """
+        blocks = list(self._iter_blocks(raw_pages, state))
+        state.page_count += len(raw_pages)
+        semantic_model = self._get_or_load_semantic_model()
+        if semantic_model is not None:
+            state.embeddings.update(self._encode_semantic_blocks(semantic_model, blocks))
+        parent_groups = self._iter_parent_groups(blocks, state.embeddings, state=state, final=final)
+        return list(self._iter_hierarchy(parent_groups=parent_groups, pdf_path=pdf_path, doc_id=doc_id, state=state))
+
+    def iter_chunks(
+        self,
+        pdf_path: Path,
+        *,
+        doc_id: str,
+        pages: Sequence[Document] | None = None,
+        metadata: dict[str, Any] | None = None,
+    ) -> Iterator[ParentChunks]:
+        """Pipeline sincrono y perezoso detras de `stream_pdf`."""
+        stats = metadata if metadata is not None else {}
+        stats.update({"page_count": 0, "parent_count": 0})
+        raw_pages = (
+            (self._page_raw_blocks(page) for page in pages)
+            if pages is not None
+            else self._iter_pdf_raw_pages(pdf_path)
+        )
+
+        def _counted_pages() -> Iterator[RawPage]:
+            for raw_page in raw_pages:
+                stats["page_count"] += 1
+                yield raw_page
+
+        semantic_model = self._get_or_load_semantic_model()
+        semantic_embeddings: dict[int, tuple[Any, float]] = {}
+
+        def _blocks() -> Iterator[StructuralBlock]:
+            blocks = self._iter_blocks(_counted_pages())
+            if semantic_model is None:
+                yield from blocks
+                return
+            # Se codifica por lotes a medida que llegan los bloques; cada
+            # frontera compara contra bloques ya codificados.
+            while window := list(itertools.islice(blocks, self._semantic_batch_size)):
+                semantic_embeddings.update(self._encode_semantic_blocks(semantic_model, window))
+                yield from window
+
+        parent_groups = self._iter_parent_groups(_blocks(), semantic_embeddings)
+        for item in self._iter_hierarchy(parent_groups=parent_groups, pdf_path=pdf_path, doc_id=doc_id):
+            stats["parent_count"] += 1
+            yield item
+
+    def _iter_pdf_raw_pages(self, pdf_path: Path) -> Iterator[RawPage]:
+        from rag.ingestion import chunking_pool
+
+        path = str(pdf_path)
+        if self.executor is None:
+            page_count, hdr_info = chunking_pool.scan_pdf(path)
+        else:
+            page_count, hdr_info = self.executor.submit(chunking_pool.scan_pdf, path).result()
+        windows = (
+            list(range(start, min(start + self.shard_pages, page_count)))
+            for start in range(0, page_count, self.shard_pages)
+        )
+
+        if self.executor is None:
+            for window in windows:
+                documents = self._load_pages_with_pymupdf4llm(pdf_path, pages=window, hdr_info=hdr_info)
+                for document in documents:
+                    yield self._page_raw_blocks(document)
+            return
+
+        # Con pool se adelanta el parseo de las ventanas siguientes mientras se
+        # agrupa la actual (acotado a _STREAM_PREFETCH_WINDOWS en vuelo).
+        config = self.pool_config()
+        pending: deque = deque()
+        try:
+            for window in windows:
+                pending.append(self.executor.submit(chunking_pool.parse_page_range, config, path, window, hdr_info))
+                if len(pending) >= self._STREAM_PREFETCH_WINDOWS:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
     async def _load_pages(self, pdf_path: Path) -> list[Document]:
         if self.page_loader is not None:
             loaded = self.page_loader(pdf_path)
@@ -133,7 +503,12 @@ class HierarchicalChunker:
 
         return await asyncio.to_thread(self._load_pages_with_pymupdf4llm, pdf_path)
 
-    def _load_pages_with_pymupdf4llm(self, pdf_path: Path) -> list[Document]:
+    def _load_pages_with_pymupdf4llm(
+        self,
+        pdf_path: Path,
+        pages: list[int] | None = None,
+        hdr_info: Any = None,
+    ) -> list[Document]:
         try:
             import pymupdf4llm
         except ImportError as exc:
@@ -141,15 +516,16 @@ class HierarchicalChunker:
                 "pymupdf4llm is required for hierarchical chunking."
             ) from exc
 
-        page_chunks = pymupdf4llm.to_markdown(str(pdf_path), page_chunks=True)
+        page_chunks = pymupdf4llm.to_markdown(str(pdf_path), pages=pages, hdr_info=hdr_info, page_chunks=True)
         documents: list[Document] = []
         for index, page_chunk in enumerate(page_chunks or []):
             metadata = dict(page_chunk.get("metadata") or {})
-            raw_page_number = metadata.get("page_number", index + 1)
+            fallback_page_number = (pages[index] if pages and index < len(pages) else index) + 1
+            raw_page_number = metadata.get("page_number", fallback_page_number)
             try:
                 page_number = int(raw_page_number)
             except (TypeError, ValueError):
-                page_number = index + 1
+                page_number = fallback_page_number
 
             metadata.update(
                 {
@@ -168,37 +544,50 @@ class HierarchicalChunker:
         return documents
 
     def _extract_structural_blocks(self, pages: Sequence[Document]) -> list[StructuralBlock]:
-        structural_blocks: list[StructuralBlock] = []
-        block_order = 0
-        current_section_title: str | None = None
-
-        for page in pages:
-            page_number = self._safe_page_number(page)
-            page_blocks = self._split_page_into_blocks(page.page_content or "")
-            for block_type, block_text in page_blocks:
-                content = (block_text or "").strip()
-                if not content:
-                    continue
+        return self._assemble_blocks([self._page_raw_blocks(page) for page in pages])
+
+    def _page_raw_blocks(self, page: Document) -> RawPage:
+        """Parte CPU-bound por pagina (clasificacion de lineas y tokens); no depende de otras paginas."""
+        raw_blocks: list[RawBlock] = []
+        for block_type, block_text in self._split_page_into_blocks(page.page_content or ""):
+            content = (block_text or "").strip()
+            if not content:
+                continue
+            raw_blocks.append(
+                (
+                    block_type,
+                    content,
+                    self._count_tokens(content),
+                    self._contains_numeric(content),
+                    self._contains_date_like(content),
+                )
+            )
+        return self._safe_page_number(page), raw_blocks
 
+    def _assemble_blocks(self, raw_pages: Iterable[RawPage]) -> list[StructuralBlock]:
+        return list(self._iter_blocks(raw_pages))
+
+    def _iter_blocks(self, raw_pages: Iterable[RawPage], state: StreamState | None = None) -> Iterator[StructuralBlock]:
+        """Numera los bloques y arrastra el titulo de seccion entre paginas, en orden."""
+        state = state if state is not None else StreamState()
+
+        for page_number, raw_blocks in raw_pages:
+            for block_type, content, token_count, contains_numeric, contains_date_like in raw_blocks:
                 if block_type == "header":
-                    current_section_title = self._normalize_header(content)
-
-                structural_blocks.append(
-                    StructuralBlock(
-                        content=content,
-                        page_number=page_number,
-                        order=block_order,
-                        block_type=block_type,
-                        section_title=current_section_title,
-                        token_count=self._count_tokens(content),
-                        contains_table=(block_type == "table"),
-                        contains_numeric=self._contains_numeric(content),
-                        contains_date_like=self._contains_date_like(content),
-                    )
-                )
-                block_order += 1
+                    state.section_title = self._normalize_header(content)
 
-        return structural_blocks
+                yield StructuralBlock(
+                    content=content,
+                    page_number=page_number,
+                    order=state.block_order,
+                    block_type=block_type,
+                    section_title=state.section_title,
+                    token_count=token_count,
+                    contains_table=(block_type == "table"),
+                    contains_numeric=contains_numeric,
+                    contains_date_like=contains_date_like,
+                )
+                state.block_order += 1
 
     def _split_page_into_blocks(self, text: str) -> list[tuple[str, str]]:
         lines = text.splitlines()
@@ -257,6 +646,7 @@ class HierarchicalChunker:
                 model_name = getattr(_s, "semantic_chunk_model", "all-MiniLM-L6-v2")
                 self._semantic_model = SentenceTransformer(model_name)
                 self._semantic_threshold = float(getattr(_s, "semantic_chunk_threshold", 0.5))
+                self._semantic_batch_size = max(1, int(getattr(_s, "semantic_chunk_batch_size", 64)))
                 logger.info("Semantic chunking model loaded: %s (threshold=%.2f)", model_name, self._semantic_threshold)
             except Exception as exc:
                 logger.warning("Semantic chunking model load failed (%s); disabling semantic chunking", exc)
@@ -264,15 +654,47 @@ class HierarchicalChunker:
                 return None
         return self._semantic_model
 
-    def _is_semantic_topic_shift(self, model, block_a: StructuralBlock, block_b: StructuralBlock) -> bool:
+    def _encode_semantic_blocks(self, model, blocks: Sequence[StructuralBlock]) -> dict[int, tuple[Any, float]]:
+        """Embeddings y normas de los bloques candidatos, indexados por `order`.
+
+        Cada bloque se codifica una sola vez, en llamadas por lotes; las
+        decisiones de frontera reutilizan estos vectores. Los headers nunca
+        participan en la comparación, así que no se codifican.
+        """
+        candidates = [block for block in blocks if block.block_type != "header"]
+        if not candidates:
+            return {}
+        try:
+            import numpy as np
+            embs = model.encode(
+                [block.content[:500] for block in candidates],
+                batch_size=self._semantic_batch_size,
+                show_progress_bar=False,
+            )
+            return {
+                block.order: (embs[index], float(np.linalg.norm(embs[index])))
+                for index, block in enumerate(candidates)
+            }
+        except Exception as exc:
+            logger.warning("Semantic chunking encode failed (%s); skipping semantic boundaries", exc)
+            return {}
+
+    def _is_semantic_topic_shift(
+        self,
+        embeddings: dict[int, tuple[Any, float]],
+        block_a: StructuralBlock,
+        block_b: StructuralBlock,
+    ) -> bool:
+        encoded_a = embeddings.get(block_a.order)
+        encoded_b = embeddings.get(block_b.order)
+        if encoded_a is None or encoded_b is None:
+            return False
         try:
             import numpy as np
-            embs = model.encode([block_a.content[:500], block_b.content[:500]], show_progress_bar=False)
-            norm_a = float(np.linalg.norm(embs[0]))
-            norm_b = float(np.linalg.norm(embs[1]))
+            (emb_a, norm_a), (emb_b, norm_b) = encoded_a, encoded_b
             if norm_a < 1e-8 or norm_b < 1e-8:
                 return False
-            cos_sim = float(np.dot(embs[0], embs[1]) / (norm_a * norm_b))
+            cos_sim = float(np.dot(emb_a, emb_b) / (norm_a * norm_b))
             return cos_sim < self._semantic_threshold
         except Exception:
             return False
@@ -309,20 +731,43 @@ class HierarchicalChunker:
         return (carry, tokens)
 
     def _group_blocks_into_parents(self, blocks: Sequence[StructuralBlock]) -> list[list[StructuralBlock]]:
-        groups: list[list[StructuralBlock]] = []
-        current_group: list[StructuralBlock] = []
-        current_tokens = 0
         semantic_model = self._get_or_load_semantic_model()
+        semantic_embeddings = (
+            self._encode_semantic_blocks(semantic_model, blocks) if semantic_model is not None else {}
+        )
+        return list(self._iter_parent_groups(blocks, semantic_embeddings))
 
-        def _flush_with_overlap() -> None:
+    def _iter_parent_groups(
+        self,
+        blocks: Iterable[StructuralBlock],
+        semantic_embeddings: dict[int, tuple[Any, float]],
+        *,
+        state: StreamState | None = None,
+        final: bool = True,
+    ) -> Iterator[list[StructuralBlock]]:
+        """Emite cada grupo de parent en cuanto se cierra.
+
+        `semantic_embeddings` debe contener los bloques no-header antes de que
+        lleguen aqui; los de grupos cerrados se descartan para no acumularlos.
+        Parte del grupo abierto en `state`; sin `final` el ultimo grupo queda
+        abierto en `state` en vez de emitirse.
+        """
+        state = state if state is not None else StreamState()
+        current_group: list[StructuralBlock] = list(state.open_group)
+        current_tokens = state.open_tokens
+
+        def _close_with_overlap() -> list[StructuralBlock]:
             nonlocal current_group, current_tokens
-            if not current_group:
-                return
             closed = current_group
-            groups.append(closed)
             carry, carry_tokens = self._carry_overlap_blocks(closed)
+            if semantic_embeddings:
+                carried = {block.order for block in carry}
+                for block in closed:
+                    if block.order not in carried:
+                        semantic_embeddings.pop(block.order, None)
             current_group = list(carry)
             current_tokens = carry_tokens
+            return closed
 
         for block in blocks:
             block_tokens = max(1, block.token_count)
@@ -333,7 +778,7 @@ class HierarchicalChunker:
             )
 
             if starts_new_section:
-                _flush_with_overlap()
+                yield _close_with_overlap()
 
             should_flush = (
                 current_group
@@ -341,13 +786,13 @@ class HierarchicalChunker:
                 and current_tokens + block_tokens > self.parent_max_tokens
             )
             if should_flush:
-                _flush_with_overlap()
+                yield _close_with_overlap()
 
             # Semantic topic-shift split (only when group has minimum content)
             if (
                 not should_flush
                 and not starts_new_section
-                and semantic_model is not None
+                and semantic_embeddings
                 and current_group
                 and current_tokens >= self.parent_min_tokens // 2
                 and block.block_type not in {"header"}
@@ -355,19 +800,21 @@ class HierarchicalChunker:
                 last_content = next(
                     (b for b in reversed(current_group) if b.block_type not in {"header"}), None
                 )
-                if last_content is not None and self._is_semantic_topic_shift(semantic_model, last_content, block):
-                    _flush_with_overlap()
+                if last_content is not None and self._is_semantic_topic_shift(semantic_embeddings, last_content, block):
+                    yield _close_with_overlap()
 
             current_group.append(block)
             current_tokens += block_tokens
 
             if current_tokens >= self.parent_target_tokens and block.block_type == "header":
-                _flush_with_overlap()
+                yield _close_with_overlap()
 
+        if not final:
+            state.open_group, state.open_tokens = current_group, current_tokens
+            return
+        state.open_group, state.open_tokens = [], 0
         if current_group:
-            groups.append(current_group)
-
-        return groups
+            yield current_group
 
     # Heuristic entity-name detection — generic, no domain bias.
     # Matches a short bullet/numbered line followed by attribute markers
@@ -431,21 +878,40 @@ class HierarchicalChunker:
     ) -> tuple[list[ParentDocument], list[ChildChunk]]:
         parents: list[ParentDocument] = []
         children: list[ChildChunk] = []
+        for parent, parent_children in self._iter_hierarchy(
+            parent_groups=parent_groups,
+            pdf_path=pdf_path,
+            doc_id=doc_id,
+        ):
+            parents.append(parent)
+            children.extend(parent_children)
+        return parents, children
 
-        for parent_index, group in enumerate(parent_groups):
+    def _iter_hierarchy(
+        self,
+        *,
+        parent_groups: Iterable[Sequence[StructuralBlock]],
+        pdf_path: Path,
+        doc_id: str,
+        state: StreamState | None = None,
+    ) -> Iterator[ParentChunks]:
+        # Ids estables entre versiones del mismo PDF: dependen de la fuente y
+        # del contenido (no del doc_id ni de la posicion), asi la re-ingesta
+        # incremental reconoce los chunks que no cambiaron.
+        state = state if state is not None else StreamState()
+
+        for group in parent_groups:
             parent = self._build_parent_document(
                 group=group,
                 pdf_path=pdf_path,
                 doc_id=doc_id,
-                parent_index=parent_index,
+                parent_index=state.parent_index,
+                occurrences=state.parent_occurrences,
             )
+            state.parent_index += 1
             parent_children = self._build_children_for_parent(parent=parent, blocks=group)
             parent = parent.model_copy(update={"child_count": len(parent_children)})
-
-            parents.append(parent)
-            children.extend(parent_children)
-
-        return parents, children
+            yield parent, parent_children
 
     def _build_parent_document(
         self,
@@ -454,6 +920,7 @@ class HierarchicalChunker:
         pdf_path: Path,
         doc_id: str,
         parent_index: int,
+        occurrences: dict[str, int],
     ) -> ParentDocument:
         joined = "\n\n".join(block.content for block in group).strip()
         content = self._inject_entity_headings(joined)
@@ -462,9 +929,11 @@ class HierarchicalChunker:
         section_title = next((block.section_title for block in group if block.section_title), None)
         block_types = list(dict.fromkeys(block.block_type for block in group))
         content_hash = hash_content_for_dedup(content)
+        occurrence = occurrences.get(content_hash, 0)
+        occurrences[content_hash] = occurrence + 1
         parent_id = self._build_stable_id(
             prefix="parent",
-            parts=(doc_id, str(parent_index), content_hash),
+            parts=(pdf_path.name, content_hash, str(occurrence)),
         )
 
         return ParentDocument(
@@ -498,14 +967,17 @@ class HierarchicalChunker:
     ) -> list[ChildChunk]:
         child_groups = self._group_blocks_into_children(blocks)
         children: list[ChildChunk] = []
+        occurrences: dict[str, int] = {}
         for child_index, group in enumerate(child_groups):
             content = "\n\n".join(block.content for block in group).strip()
             start_page = min(block.page_number for block in group)
             end_page = max(block.page_number for block in group)
             child_hash = hash_content_for_dedup(content)
+            occurrence = occurrences.get(child_hash, 0)
+            occurrences[child_hash] = occurrence + 1
             child_id = self._build_stable_id(
                 prefix="child",
-                parts=(parent.parent_id, str(child_index), child_hash),
+                parts=(parent.parent_id, child_hash, str(occurrence)),
             )
             children.append(
                 ChildChunk(
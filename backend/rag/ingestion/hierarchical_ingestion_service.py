@@ -3,19 +3,106 @@ from __future__ import annotations
 import asyncio
 import hashlib
 import logging
-import time
+from contextlib import aclosing
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import Any, AsyncIterator
 
 import aiofiles
 from langchain_core.documents import Document
 
-from cache.manager import cache
-from rag.ingestion.models import ChildChunk
+from rag.corpus_centroid import forget_source, invalidate_centroid_stats, record_source_vectors
+from rag.corpus_state import amark_documents_updated
+from rag.ingestion.models import ChildChunk, ParentDocument
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class _StoredSource:
+    """Ids (y ubicacion) ya guardados para una fuente; sin contenido."""
+
+    parents: dict[str, dict[str, Any]] = field(default_factory=dict)
+    points: dict[str, dict[str, Any]] = field(default_factory=dict)
+    lexical_ids: set[str] = field(default_factory=set)
+
+    @property
+    def previous_doc_ids(self) -> list[str]:
+        doc_ids = {doc.get("doc_id") for doc in self.parents.values()}
+        doc_ids |= {payload.get("doc_id") for payload in self.points.values()}
+        return sorted(doc_id for doc_id in doc_ids if doc_id)
+
+
+@dataclass
+class _ReingestionPlan:
+    """Escrituras necesarias para llevar un lote de la fuente a su nueva version."""
+
+    parents_to_upsert: list[ParentDocument]
+    children_to_embed: list[ChildChunk]
+    moved_payloads: dict[str, dict[str, Any]]
+    lexical_children: list[ChildChunk]
+    unchanged_children: int = 0
+
+    @classmethod
+    def full(cls, parents: list[ParentDocument], children: list[ChildChunk]) -> "_ReingestionPlan":
+        return cls(
+            parents_to_upsert=list(parents),
+            children_to_embed=list(children),
+            moved_payloads={},
+            lexical_children=list(children),
+        )
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(
+            self.parents_to_upsert
+            or self.children_to_embed
+            or self.moved_payloads
+            or self.lexical_children
+        )
+
+
+@dataclass
+class _WrittenRows:
+    """Lo que una re-ingesta ya escribio: ids nuevos y la posicion previa de
+    los existentes que modifico. Permite revertir una ingesta que falla a
+    mitad del streaming, cuando sus primeros lotes ya son buscables."""
+
+    parent_ids: set[str] = field(default_factory=set)
+    point_ids: set[str] = field(default_factory=set)
+    lexical_ids: set[str] = field(default_factory=set)
+    parent_placements: dict[str, dict[str, Any]] = field(default_factory=dict)
+    point_payloads: dict[str, dict[str, Any]] = field(default_factory=dict)
+    lexical_placements: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    def record(self, plan: _ReingestionPlan, stored: _StoredSource) -> None:
+        for parent in plan.parents_to_upsert:
+            placement = stored.parents.get(parent.parent_id)
+            if placement is None:
+                self.parent_ids.add(parent.parent_id)
+            else:
+                self.parent_placements.setdefault(parent.parent_id, placement)
+        self.point_ids.update(child.child_id for child in plan.children_to_embed)
+        for child_id in plan.moved_payloads:
+            payload = stored.points[child_id]
+            self.point_payloads.setdefault(
+                child_id,
+                {
+                    "page_number": payload.get("page_start"),
+                    "page_start": payload.get("page_start"),
+                    "page_end": payload.get("page_end"),
+                },
+            )
+        for child in plan.lexical_children:
+            if child.child_id not in stored.lexical_ids:
+                self.lexical_ids.add(child.child_id)
+            elif (payload := stored.points.get(child.child_id)) is not None:
+                self.lexical_placements.setdefault(
+                    child.child_id,
+                    {key: payload.get(key) for key in ("doc_id", "page_start", "page_end")},
+                )
+
+
 class HierarchicalIngestionService:
     def __init__(
         self,
@@ -25,12 +112,17 @@ class HierarchicalIngestionService:
         embedding_manager,
         vector_store,
         lexical_repository=None,
+        stream_batch_children: int = 0,
     ) -> None:
         self.chunker = chunker
         self.parent_repository = parent_repository
         self.embedding_manager = embedding_manager
         self.vector_store = vector_store
         self.lexical_repository = lexical_repository
+        # > 0 y con un chunker que soporte `stream_pdf`: el PDF se chunkea en
+        # streaming y se embebe/persiste en lotes de ~N children, con memoria
+        # acotada. 0 = se materializa el resultado completo (un solo lote).
+        self.stream_batch_children = max(0, int(stream_batch_children or 0))
 
     async def ingest_single_pdf(self, pdf_path: Path, force_update: bool = False) -> dict[str, Any]:
         if not pdf_path.exists() or not pdf_path.is_file():
@@ -66,7 +158,7 @@ class HierarchicalIngestionService:
             "doc_id": doc_id,
             "chunks_original": child_count,
             "chunks_unique": child_count,
-            "chunks_added": child_count,
+            "chunks_added": int(result.get("children_embedded", child_count) or 0),
             "parent_count": int(result.get("parent_count", 0) or 0),
             "child_count": child_count,
         }
@@ -96,70 +188,139 @@ class HierarchicalIngestionService:
         doc_id: str | None = None,
     ) -> dict[str, Any]:
         resolved_doc_id = doc_id or await self._build_doc_id(pdf_path)
-        result = await self.chunker.chunk_pdf(pdf_path, doc_id=resolved_doc_id)
-        if not result.parents or not result.children:
-            raise RuntimeError("Hierarchical chunking produced no parents or children")
+        source = pdf_path.name
 
         index_tasks = [self.parent_repository.ensure_indexes()]
         if self.lexical_repository is not None:
             index_tasks.append(self.lexical_repository.ensure_indexes())
         await asyncio.gather(*index_tasks)
+        stored = await self._read_stored_source(source) if replace_existing else None
 
-        if replace_existing:
-            delete_tasks: list = [
-                self.parent_repository.delete_by_source(result.source),
-                self.vector_store.delete_documents(filter={"source": result.source}),
-            ]
+        chunk_metadata: dict[str, Any] = {}
+        written = _WrittenRows() if stored is not None else None
+        seen_parent_ids: set[str] = set()
+        seen_child_ids: set[str] = set()
+        totals = dict.fromkeys(("parents", "children", "embedded", "moved", "unchanged"), 0)
+        has_changes = False
+        # El centroide se actualiza lote a lote; el ultimo lote se registra
+        # junto con los vectores eliminados al final.
+        pending_vectors: list = []
+
+        # Primero se escribe lo nuevo y luego se borra lo obsoleto: durante la
+        # re-ingesta el retrieval ve a lo sumo chunks de ambas versiones,
+        # nunca un documento vacio.
+        try:
+            async with aclosing(self._iter_chunk_batches(pdf_path, resolved_doc_id, chunk_metadata)) as batches:
+                async for parents, children in batches:
+                    plan = (
+                        self._plan_batch(parents, children, stored)
+                        if stored is not None
+                        else _ReingestionPlan.full(parents, children)
+                    )
+                    if written is not None:
+                        # Antes de escribir: un lote que falla a medias tambien se revierte.
+                        written.record(plan, stored)
+                    embeddings = await self._store_batch(plan)
+                    if pending_vectors:
+                        await record_source_vectors(source, pending_vectors, replace=False)
+                    pending_vectors = embeddings
+
+                    # Solo importan los ids ya guardados (para detectar obsoletos);
+                    # asi la memoria no crece con el tamaño del PDF nuevo.
+                    if stored is not None:
+                        seen_parent_ids.update(
+                            parent.parent_id for parent in parents if parent.parent_id in stored.parents
+                        )
+                        seen_child_ids.update(
+                            child.child_id
+                            for child in children
+                            if child.child_id in stored.points or child.child_id in stored.lexical_ids
+                        )
+                    totals["parents"] += len(parents)
+                    totals["children"] += len(children)
+                    totals["embedded"] += len(plan.children_to_embed)
+                    totals["moved"] += len(plan.moved_payloads)
+                    totals["unchanged"] += plan.unchanged_children
+                    has_changes = has_changes or plan.has_changes
+        except BaseException:
+            # Vectores ya escritos que el centroide aun no contabiliza.
+            if pending_vectors:
+                invalidate_centroid_stats()
+            # Los lotes ya escritos son buscables: se deshacen para que la
+            # fuente vuelva a su version anterior en vez de quedar mezclada.
+            if written is not None:
+                await self._rollback_written(source, written, [resolved_doc_id, *stored.previous_doc_ids])
+            raise
+
+        if not totals["parents"] or not totals["children"]:
+            raise RuntimeError("Hierarchical chunking produced no parents or children")
+
+        stale_parent_ids: list[str] = []
+        stale_child_ids: list[str] = []
+        if stored is not None:
+            stale_parent_ids = sorted(set(stored.parents) - seen_parent_ids)
+            stale_child_ids = sorted((set(stored.points) | stored.lexical_ids) - seen_child_ids)
+
+        removed_vectors: list | None = []
+        if stale_child_ids:
+            try:
+                removed_vectors = await self.vector_store.get_vectors(stale_child_ids)
+            except Exception as exc:
+                logger.warning("No se pudieron leer los vectores a eliminar de %s: %s", source, exc)
+                removed_vectors = None
+
+        delete_tasks: dict[str, Any] = {}
+        if stale_parent_ids:
+            delete_tasks["parent_repository"] = self.parent_repository.delete_by_parent_ids(stale_parent_ids)
+        if stale_child_ids:
+            delete_tasks["vector_store"] = self.vector_store.delete_by_ids(stale_child_ids)
             if self.lexical_repository is not None:
-                delete_tasks.append(self.lexical_repository.delete_by_source(result.source))
-            _delete_store_names = ["parent_repository", "vector_store"] + (
-                ["lexical_repository"] if self.lexical_repository is not None else []
-            )
-            delete_results = await asyncio.gather(*delete_tasks, return_exceptions=True)
-            delete_errors = [(i, r) for i, r in enumerate(delete_results) if isinstance(r, BaseException)]
-            if delete_errors:
-                for i, err in delete_errors:
-                    logger.error("Delete failed for %s during replace: %s", _delete_store_names[i], err)
-                failed = [_delete_store_names[i] for i, _ in delete_errors]
-                raise RuntimeError(f"Delete failed for {failed}; aborting ingestion to avoid inconsistent state")
+                delete_tasks["lexical_repository"] = self.lexical_repository.delete_by_child_ids(stale_child_ids)
+        await self._gather_stores(delete_tasks, action="Delete")
 
-        child_documents = [self._child_to_langchain_document(child) for child in result.children]
+        # Los chunks sin cambios conservan el doc_id de la version anterior;
+        # se re-etiquetan para que toda la fuente quede bajo el hash del
+        # archivo vigente. Sin esto, volver a subir una version previa (A ->
+        # B -> A) encontraba parents con el doc_id de A y se omitia como
+        # duplicado mientras el corpus servia B.
+        if stored is not None and any(doc_id != resolved_doc_id for doc_id in stored.previous_doc_ids):
+            await self._relabel_source(source, resolved_doc_id)
 
-        async def _embed_and_store() -> None:
-            embeddings = await self.embedding_manager.embed_documents_async(
-                [child.content for child in result.children]
-            )
-            await self.vector_store.add_documents(child_documents, embeddings=embeddings)
+        # Incremental centroid: fold only the added/removed vectors into the
+        # running sums instead of rescanning the collection on the next query.
+        if removed_vectors is None:
+            invalidate_centroid_stats()
+        elif pending_vectors or removed_vectors:
+            await record_source_vectors(source, pending_vectors, replace=False, removed=removed_vectors)
 
-        store_tasks: list = [
-            self.parent_repository.upsert_documents(result.parents),
-            _embed_and_store(),
-        ]
-        if self.lexical_repository is not None:
-            store_tasks.append(self.lexical_repository.upsert_children(result.children))
-        _store_names = ["parent_repository", "vector_store"] + (
-            ["lexical_repository"] if self.lexical_repository is not None else []
-        )
-        store_results = await asyncio.gather(*store_tasks, return_exceptions=True)
-        store_errors = [(i, r) for i, r in enumerate(store_results) if isinstance(r, BaseException)]
-        if store_errors:
-            for i, err in store_errors:
-                logger.error("Store failed for %s: %s", _store_names[i], err)
-            failed = [_store_names[i] for i, _ in store_errors]
-            raise RuntimeError(f"Store failed for {failed}")
-
-        # Bump doc timestamp so retrieval cache for this doc_id is invalidated
-        try:
-            cache.set(f"rag:ts:{resolved_doc_id}", str(time.time()))
-        except Exception as e:
-            logger.warning("Cache invalidation failed after ingest | doc_id=%s | err=%s", resolved_doc_id, e)
+        # Bump doc timestamps so retrieval cache entries citing any version of
+        # this source are invalidated
+        if has_changes or stale_parent_ids or stale_child_ids:
+            previous_doc_ids = stored.previous_doc_ids if stored is not None else []
+            try:
+                await amark_documents_updated([resolved_doc_id, *previous_doc_ids])
+            except Exception as e:
+                logger.warning("Cache invalidation failed after ingest | doc_id=%s | err=%s", resolved_doc_id, e)
 
+        logger.info(
+            "Ingesta %s | source=%s | children: embebidos=%d movidos=%d sin_cambios=%d eliminados=%d",
+            "incremental" if replace_existing else "aditiva",
+            source,
+            totals["embedded"],
+            totals["moved"],
+            totals["unchanged"],
+            len(stale_child_ids),
+        )
         return {
             "doc_id": resolved_doc_id,
-            "source": result.source,
-            "page_count": result.page_count,
-            "parent_count": len(result.parents),
-            "child_count": len(result.children),
+            "source": source,
+            "page_count": int(chunk_metadata.get("page_count", 0) or 0),
+            "parent_count": totals["parents"],
+            "child_count": totals["children"],
+            "children_embedded": totals["embedded"],
+            "children_unchanged": totals["unchanged"],
+            "children_deleted": len(stale_child_ids),
+            "parents_deleted": len(stale_parent_ids),
             "mongo_collection": getattr(self.parent_repository, "collection_name", None),
             "qdrant_collection": getattr(self.vector_store, "collection_name", None),
             "lexical_collection": getattr(self.lexical_repository, "documents_collection_name", None)
@@ -167,6 +328,181 @@ class HierarchicalIngestionService:
             else None,
         }
 
+    async def _iter_chunk_batches(
+        self,
+        pdf_path: Path,
+        doc_id: str,
+        chunk_metadata: dict[str, Any],
+    ) -> AsyncIterator[tuple[list[ParentDocument], list[ChildChunk]]]:
+        """Lotes (parents, children) a persistir, en orden de documento."""
+        stream_pdf = getattr(self.chunker, "stream_pdf", None)
+        if not self.stream_batch_children or stream_pdf is None:
+            result = await self.chunker.chunk_pdf(pdf_path, doc_id=doc_id)
+            chunk_metadata["page_count"] = result.page_count
+            if not result.parents or not result.children:
+                raise RuntimeError("Hierarchical chunking produced no parents or children")
+            yield list(result.parents), list(result.children)
+            return
+
+        parents: list[ParentDocument] = []
+        children: list[ChildChunk] = []
+        async with aclosing(stream_pdf(pdf_path, doc_id=doc_id, metadata=chunk_metadata)) as stream:
+            async for parent, parent_children in stream:
+                parents.append(parent)
+                children.extend(parent_children)
+                if len(children) >= self.stream_batch_children:
+                    yield parents, children
+                    parents, children = [], []
+        if parents:
+            yield parents, children
+
+    async def _store_batch(self, plan: _ReingestionPlan) -> list:
+        """Persiste un lote en los tres stores; devuelve los embeddings nuevos."""
+        stored_embeddings: list = []
+
+        async def _embed_and_store() -> None:
+            embeddings = await self.embedding_manager.embed_documents_async(
+                [child.content for child in plan.children_to_embed]
+            )
+            await self.vector_store.add_documents(
+                [self._child_to_langchain_document(child) for child in plan.children_to_embed],
+                embeddings=embeddings,
+            )
+            stored_embeddings.extend(embeddings)
+
+        store_tasks: dict[str, Any] = {}
+        if plan.parents_to_upsert:
+            store_tasks["parent_repository"] = self.parent_repository.upsert_documents(plan.parents_to_upsert)
+        if plan.children_to_embed:
+            store_tasks["vector_store"] = _embed_and_store()
+        if plan.moved_payloads:
+            store_tasks["vector_store_payloads"] = self.vector_store.update_payloads(plan.moved_payloads)
+        if self.lexical_repository is not None and plan.lexical_children:
+            store_tasks["lexical_repository"] = self.lexical_repository.upsert_children(plan.lexical_children)
+        await self._gather_stores(store_tasks, action="Store")
+        return stored_embeddings
+
+    async def _rollback_written(self, source: str, written: _WrittenRows, doc_ids: list[str]) -> None:
+        tasks: dict[str, Any] = {}
+        if written.parent_ids:
+            tasks["parent_repository"] = self.parent_repository.delete_by_parent_ids(sorted(written.parent_ids))
+        if written.parent_placements:
+            tasks["parent_placements"] = self.parent_repository.restore_placements(written.parent_placements)
+        if written.point_ids:
+            tasks["vector_store"] = self.vector_store.delete_by_ids(sorted(written.point_ids))
+        if written.point_payloads:
+            tasks["vector_store_payloads"] = self.vector_store.update_payloads(written.point_payloads)
+        if self.lexical_repository is not None:
+            if written.lexical_ids:
+                tasks["lexical_repository"] = self.lexical_repository.delete_by_child_ids(sorted(written.lexical_ids))
+            if written.lexical_placements:
+                tasks["lexical_placements"] = self.lexical_repository.restore_child_placements(
+                    written.lexical_placements
+                )
+        if not tasks:
+            return
+        try:
+            await self._gather_stores(tasks, action="Rollback")
+            # El retrieval pudo cachear resultados con los chunks parciales.
+            await amark_documents_updated(doc_ids)
+        except Exception as exc:
+            logger.error("No se pudo revertir la ingesta parcial de %s: %s", source, exc, exc_info=True)
+            return
+        logger.warning(
+            "Ingesta de %s revertida | parents=%d children=%d restaurados=%d",
+            source,
+            len(written.parent_ids),
+            len(written.point_ids | written.lexical_ids),
+            len(written.parent_placements) + len(written.point_payloads) + len(written.lexical_placements),
+        )
+
+    async def _relabel_source(self, source: str, doc_id: str) -> None:
+        relabel_tasks: dict[str, Any] = {
+            "parent_repository": self.parent_repository.set_doc_id_by_source(source, doc_id),
+            "vector_store": self.vector_store.set_doc_id_by_source(source, doc_id),
+        }
+        if self.lexical_repository is not None:
+            relabel_tasks["lexical_repository"] = self.lexical_repository.set_doc_id_by_source(source, doc_id)
+        await self._gather_stores(relabel_tasks, action="Relabel")
+
+    async def _read_stored_source(self, source: str) -> _StoredSource:
+        reads: dict[str, Any] = {
+            "parent_repository": self.parent_repository.get_placements_by_source(source),
+            "vector_store": self.vector_store.get_payloads_by_source(source, ["page_start", "page_end", "doc_id"]),
+        }
+        if self.lexical_repository is not None:
+            reads["lexical_repository"] = self.lexical_repository.get_child_ids_by_source(source)
+        stored = await self._gather_stores(reads, action="Read")
+        return _StoredSource(
+            parents=stored["parent_repository"],
+            points=stored["vector_store"],
+            lexical_ids=set(stored.get("lexical_repository", set())),
+        )
+
+    def _plan_batch(
+        self,
+        parents: list[ParentDocument],
+        children: list[ChildChunk],
+        stored: _StoredSource,
+    ) -> _ReingestionPlan:
+        """Compara un lote del chunker con lo guardado para la fuente.
+
+        Los ids de parents/children son estables por contenido (ver
+        HierarchicalChunker), asi que un id ya guardado es un chunk sin
+        cambios de texto: no se re-embebe. Si solo cambio su pagina se
+        actualiza la metadata; los ids guardados que ya no salen en ningun
+        lote se borran al final de la ingesta.
+        """
+        parents_to_upsert = [
+            parent
+            for parent in parents
+            if (placement := stored.parents.get(parent.parent_id)) is None
+            or placement.get("parent_index") != parent.parent_index
+            or placement.get("page_span") != parent.page_span.model_dump()
+        ]
+        children_to_embed = [child for child in children if child.child_id not in stored.points]
+        moved_payloads = {
+            child.child_id: {
+                "page_number": child.page_start,
+                "page_start": child.page_start,
+                "page_end": child.page_end,
+            }
+            for child in children
+            if child.child_id in stored.points
+            and (
+                stored.points[child.child_id].get("page_start"),
+                stored.points[child.child_id].get("page_end"),
+            )
+            != (child.page_start, child.page_end)
+        }
+        rewritten = {child.child_id for child in children_to_embed} | set(moved_payloads)
+        lexical_children = [
+            child
+            for child in children
+            if child.child_id in rewritten or child.child_id not in stored.lexical_ids
+        ] if self.lexical_repository is not None else []
+        return _ReingestionPlan(
+            parents_to_upsert=parents_to_upsert,
+            children_to_embed=children_to_embed,
+            moved_payloads=moved_payloads,
+            lexical_children=lexical_children,
+            unchanged_children=len(children) - len(rewritten),
+        )
+
+    @staticmethod
+    async def _gather_stores(tasks: dict[str, Any], *, action: str) -> dict[str, Any]:
+        if not tasks:
+            return {}
+        names = list(tasks)
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        errors = [(name, r) for name, r in zip(names, results) if isinstance(r, BaseException)]
+        if errors:
+            for name, err in errors:
+                logger.error("%s failed for %s: %s", action, name, err)
+            invalidate_centroid_stats()
+            raise RuntimeError(f"{action} failed for {[name for name, _ in errors]}")
+        return dict(zip(names, results))
+
     async def delete_by_source(self, source: str) -> None:
         doc_ids = await self.parent_repository.get_doc_ids_by_source(source)
         tasks: list = [
@@ -179,12 +515,14 @@ class HierarchicalIngestionService:
         errors = [r for r in results if isinstance(r, BaseException)]
         if errors:
             logger.error("delete_by_source: %d store(s) failed: %s", len(errors), errors)
+            invalidate_centroid_stats()
             raise RuntimeError(f"delete_by_source partial failure: {errors}")
-        for doc_id in doc_ids:
+        await forget_source(source)
+        if doc_ids:
             try:
-                cache.set(f"rag:ts:{doc_id}", str(time.time()))
+                await amark_documents_updated(doc_ids)
             except Exception as e:
-                logger.warning("Cache invalidation failed after delete | doc_id=%s | err=%s", doc_id, e)
+                logger.warning("Cache invalidation failed after delete | doc_ids=%s | err=%s", doc_ids, e)
 
     async def _build_doc_id(self, pdf_path: Path) -> str:
         sha256 = hashlib.sha256()
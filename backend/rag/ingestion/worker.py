@@ -0,0 +1,369 @@
+"""Worker de ingesta: consume la cola durable `ingestion_jobs`.
+
+Corre como proceso aparte (`python -m rag.ingestion.worker`, ver
+`entrypoint.sh` con `PROCESS_TYPE=ingestion-worker`) para que el chunking y
+los embeddings de un PDF no compitan por el event loop ni la CPU con el
+chat. Con `INGESTION_WORKER_MODE=embedded` la API arranca este mismo worker
+dentro de su lifespan (despliegues de un solo contenedor).
+
+`concurrency` slots reclaman jobs en paralelo; cada job tiene un lease que
+se renueva mientras se procesa, así que un worker caído no pierde el job:
+otro lo retoma al vencer el lease.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionWorker:
+    """Procesa jobs de `IngestionJobRepository` con `concurrency` slots."""
+
+    def __init__(
+        self,
+        *,
+        job_repository,
+        rag_ingestor,
+        status_repository=None,
+        on_ingested: Optional[Callable[[], Any]] = None,
+        concurrency: int = 1,
+        lease_seconds: float = 120.0,
+        poll_interval_s: float = 2.0,
+        retry_base_delay_s: float = 10.0,
+        retry_max_delay_s: float = 300.0,
+        worker_id: Optional[str] = None,
+    ) -> None:
+        self.job_repository = job_repository
+        self.rag_ingestor = rag_ingestor
+        self.status_repository = status_repository
+        self.on_ingested = on_ingested
+        self.concurrency = max(1, int(concurrency))
+        self.lease_seconds = max(1.0, float(lease_seconds))
+        self.poll_interval_s = max(0.01, float(poll_interval_s))
+        self.retry_base_delay_s = max(0.0, float(retry_base_delay_s))
+        self.retry_max_delay_s = max(self.retry_base_delay_s, float(retry_max_delay_s))
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+        self._running = 0
+        self._stats = {"claimed": 0, "ready": 0, "retried": 0, "failed": 0, "lease_lost": 0}
+
+    def notify(self) -> None:
+        """Despierta a los slots ociosos (p. ej. tras un upload en modo embedded)."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self) -> asyncio.Task:
+        """Lanza `run()` como tarea del loop actual (modo embedded)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def run(self) -> None:
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        logger.info("Worker de ingesta %s iniciado | concurrency=%d", self.worker_id, self.concurrency)
+        await asyncio.gather(*(self._slot() for _ in range(self.concurrency)))
+        logger.info("Worker de ingesta %s detenido", self.worker_id)
+
+    async def stop(self, timeout_s: float = 30.0) -> None:
+        """Deja de reclamar jobs y espera a los que están en curso.
+
+        Si no terminan a tiempo se cancelan; su lease vencerá y otro worker
+        los retomará.
+        """
+        self._stopping = True
+        self.notify()
+        task = self._task
+        if task is None or task.done():
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout=timeout_s)
+        except asyncio.TimeoutError:
+            logger.warning("Worker de ingesta: jobs en curso cancelados en el shutdown (running=%d)", self._running)
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def _slot(self) -> None:
+        while not self._stopping:
+            try:
+                processed = await self.run_once()
+            except Exception as exc:
+                logger.error("Worker de ingesta: error consultando la cola: %s", exc, exc_info=True)
+                processed = False
+            if processed or self._stopping:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def run_once(self) -> bool:
+        """Reclama y procesa un job. False si la cola no tenía nada disponible."""
+        await self._fail_expired()
+        job = await self.job_repository.claim(worker_id=self.worker_id, lease_seconds=self.lease_seconds)
+        if job is None:
+            return False
+        self._stats["claimed"] += 1
+        self._running += 1
+        try:
+            await self._process(job)
+        finally:
+            self._running -= 1
+        return True
+
+    async def _process(self, job: dict[str, Any]) -> None:
+        filename = job["filename"]
+        if self.status_repository is not None:
+            await self.status_repository.mark_processing(filename)
+
+        keeper = asyncio.create_task(self._keep_lease(job["job_id"]))
+        try:
+            ingest_result = await self.rag_ingestor.ingest_single_pdf(Path(job["file_path"]))
+            ingest_status = str(ingest_result.get("status", "error")).lower()
+            if ingest_status not in ("success", "skipped"):
+                raise RuntimeError(str(ingest_result.get("error") or "La ingesta del PDF fallo"))
+        except Exception as exc:
+            await self._handle_failure(job, exc)
+            return
+        finally:
+            keeper.cancel()
+
+        if ingest_status == "skipped":
+            logger.info("PDF con contenido duplicado; ya existe en vector store: %s", filename)
+        summary = {
+            "status": ingest_status,
+            "doc_id": ingest_result.get("doc_id"),
+            "parent_count": int(ingest_result.get("parent_count", 0) or 0),
+            "child_count": int(ingest_result.get("child_count", 0) or 0),
+        }
+        if self.status_repository is not None:
+            await self.status_repository.mark_ready(
+                filename=filename,
+                doc_id=summary["doc_id"],
+                parent_count=summary["parent_count"],
+                child_count=summary["child_count"],
+            )
+        if not await self.job_repository.mark_ready(job["job_id"], worker_id=self.worker_id, result=summary):
+            self._stats["lease_lost"] += 1
+            logger.warning("Job de ingesta %s terminó tras perder su lease (%s)", job["job_id"], filename)
+        self._stats["ready"] += 1
+        if ingest_status == "success" and self.on_ingested is not None:
+            try:
+                self.on_ingested()
+            except Exception as exc:
+                logger.warning("No se pudo refrescar el estado del corpus tras ingerir %s: %s", filename, exc)
+
+    async def _handle_failure(self, job: dict[str, Any], exc: Exception) -> None:
+        filename = job["filename"]
+        # Un PDF que ya no existe no va a aparecer reintentando.
+        retry_delay = None if isinstance(exc, FileNotFoundError) else self._retry_delay(job)
+        status = await self.job_repository.mark_failed(
+            job,
+            worker_id=self.worker_id,
+            error=str(exc),
+            retry_delay_seconds=retry_delay,
+        )
+        if status == "queued":
+            self._stats["retried"] += 1
+            logger.warning(
+                "Ingesta fallo para %s (intento %s/%s); reintento en %.0fs: %s",
+                filename,
+                job.get("attempts"),
+                job.get("max_attempts"),
+                retry_delay,
+                exc,
+            )
+            if self.status_repository is not None:
+                await self.status_repository.mark_queued(
+                    filename=filename,
+                    file_path=job["file_path"],
+                    size=job.get("size"),
+                )
+            return
+        self._stats["failed"] += 1
+        logger.error("Ingesta fallo para %s: %s", filename, exc, exc_info=True)
+        if self.status_repository is not None:
+            await self.status_repository.mark_failed(filename=filename, error=str(exc))
+
+    def _retry_delay(self, job: dict[str, Any]) -> float:
+        attempts = max(1, int(job.get("attempts", 1) or 1))
+        return min(self.retry_max_delay_s, self.retry_base_delay_s * (2 ** (attempts - 1)))
+
+    async def _keep_lease(self, job_id: str) -> None:
+        interval = self.lease_seconds / 3.0
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                owned = await self.job_repository.extend_lease(
+                    job_id, worker_id=self.worker_id, lease_seconds=self.lease_seconds
+                )
+            except Exception as exc:
+                logger.warning("No se pudo renovar el lease del job %s: %s", job_id, exc)
+                continue
+            if not owned:
+                logger.warning("Job de ingesta %s ya no pertenece a este worker", job_id)
+                return
+
+    async def _fail_expired(self) -> None:
+        for job in await self.job_repository.fail_expired():
+            self._stats["failed"] += 1
+            logger.error("Job de ingesta %s agotó sus intentos con el lease vencido", job.get("job_id"))
+            if self.status_repository is not None and job.get("filename"):
+                await self.status_repository.mark_failed(
+                    filename=job["filename"],
+                    error="El worker no termino la ingesta antes de vencer el lease",
+                )
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self._stats,
+            "worker_id": self.worker_id,
+            "concurrency": self.concurrency,
+            "running": self._running,
+        }
+
+
+def build_ingestion_worker(s, *, job_repository, rag_ingestor, status_repository=None, on_ingested=None) -> IngestionWorker:
+    return IngestionWorker(
+        job_repository=job_repository,
+        rag_ingestor=rag_ingestor,
+        status_repository=status_repository,
+        on_ingested=on_ingested,
+        concurrency=int(getattr(s, "ingestion_worker_concurrency", 1)),
+        lease_seconds=float(getattr(s, "ingestion_job_lease_seconds", 120.0)),
+        poll_interval_s=float(getattr(s, "ingestion_worker_poll_interval_seconds", 2.0)),
+        retry_base_delay_s=float(getattr(s, "ingestion_job_retry_delay_seconds", 10.0)),
+    )
+
+
+def build_rag_ingestor(s, *, parent_repository, embedding_manager, vector_store, lexical_repository=None):
+    """Servicio de ingesta jerárquica que usan la API y el worker standalone.
+
+    El chunker usa el pool de procesos compartido y la ingesta va en
+    streaming: con pool, cada ventana de páginas se parsea y agrupa fuera del
+    proceso que llama.
+    """
+    from rag.ingestion.chunking_pool import get_chunking_pool
+    from rag.ingestion.hierarchical_chunker import HierarchicalChunker
+    from rag.ingestion.hierarchical_ingestion_service import HierarchicalIngestionService
+
+    return HierarchicalIngestionService(
+        chunker=HierarchicalChunker(executor=get_chunking_pool(), shard_pages=s.ingestion_shard_pages),
+        parent_repository=parent_repository,
+        embedding_manager=embedding_manager,
+        vector_store=vector_store,
+        lexical_repository=lexical_repository,
+        stream_batch_children=s.ingestion_stream_batch_children,
+    )
+
+
+def _refresh_shared_corpus_state() -> None:
+    # Fuera de la API no hay retriever en memoria: basta con el bump de la
+    # versión del corpus y de los namespaces en Redis, que ven todos los workers.
+    from cache.manager import cache
+    from rag.corpus_state import refresh_rag_corpus_state
+    from rag.retrieval.retrieval_types import RETRIEVAL_CACHE_PREFIX
+
+    refresh_rag_corpus_state()
+    cache.invalidate_prefix(RETRIEVAL_CACHE_PREFIX)
+
+
+async def _run_standalone() -> None:
+    import signal
+
+    from config import settings
+    from database import DocumentIngestionStatusRepository, RAGChildLexicalRepository, RAGParentDocumentRepository
+    from database.ingestion_job_repository import IngestionJobRepository
+    from database.mongodb import get_mongodb_client
+    from rag.embeddings.embedding_manager import EmbeddingManager
+    from rag.ingestion.chunking_pool import shutdown_chunking_pool
+    from rag.vector_store.vector_store import VectorStore
+
+    s = settings
+    mongodb_client = get_mongodb_client()
+    embedding_manager = EmbeddingManager(model_name=s.embedding_model)
+    vector_store = VectorStore(
+        embedding_function=embedding_manager,
+        distance_strategy=s.distance_strategy,
+        cache_enabled=s.enable_cache,
+        cache_ttl=s.cache_ttl,
+        batch_size=s.batch_size,
+        collection_name=s.rag_child_collection_name,
+    )
+    job_repository = IngestionJobRepository(mongodb_client)
+    status_repository = DocumentIngestionStatusRepository(mongodb_client)
+    await job_repository.ensure_indexes()
+    await status_repository.ensure_indexes()
+    rag_ingestor = build_rag_ingestor(
+        s,
+        parent_repository=RAGParentDocumentRepository(
+            mongodb_client=mongodb_client,
+            collection_name=s.rag_parent_collection_name,
+        ),
+        embedding_manager=embedding_manager,
+        vector_store=vector_store,
+        lexical_repository=RAGChildLexicalRepository(
+            mongodb_client=mongodb_client,
+            documents_collection_name=s.rag_child_lexical_collection_name,
+            postings_collection_name=s.rag_child_lexical_postings_collection_name,
+        ),
+    )
+    worker = build_ingestion_worker(
+        s,
+        job_repository=job_repository,
+        rag_ingestor=rag_ingestor,
+        status_repository=status_repository,
+        on_ingested=_refresh_shared_corpus_state,
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, lambda: asyncio.ensure_future(worker.stop()))
+        except NotImplementedError:
+            pass
+
+    try:
+        await worker.start()
+    finally:
+        shutdown_chunking_pool()
+        for resource in (vector_store, embedding_manager, mongodb_client):
+            close = getattr(resource, "close", None)
+            if close is None:
+                continue
+            try:
+                await close()
+            except Exception as exc:
+                logger.warning("Error cerrando %s: %s", type(resource).__name__, exc)
+        from cache.manager import cache
+        await cache.aclose()
+
+
+def main() -> None:
+    from dotenv import load_dotenv
+
+    env_path = Path(__file__).resolve().parents[2] / ".env"
+    if env_path.exists():
+        load_dotenv(env_path)
+
+    from infra.logging_utils import setup_logging
+
+    setup_logging()
+    asyncio.run(_run_standalone())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 from .hierarchical_retriever import HierarchicalRetriever
+from .lexical_index import InMemoryLexicalIndex
 from .retriever import RAGRetriever, RetrievalBackendUnavailableError
 
 __all__ = [
     "HierarchicalRetriever",
+    "InMemoryLexicalIndex",
     "RAGRetriever",
     "RetrievalBackendUnavailableError",
 ]
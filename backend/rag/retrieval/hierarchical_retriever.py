@@ -147,7 +147,7 @@ class HierarchicalRetriever(RAGRetriever):
         use_mmr: bool = False,
     ) -> list[Document]:
         normalized_query = self._normalize_query(query)
-        cache_lookup = self._get_cached_result(
+        cache_lookup = await self._aget_cached_result(
             query=normalized_query,
             k=k,
             filter_criteria=filter_criteria,
@@ -167,7 +167,7 @@ class HierarchicalRetriever(RAGRetriever):
         documents = []
         for item in trace.get("documents", []):
             documents.append(Document(page_content=item["page_content"], metadata=item["metadata"]))
-        self._store_cached_result(
+        await self._astore_cached_result(
             query=normalized_query,
             k=k,
             filter_criteria=filter_criteria,
@@ -183,22 +183,16 @@ class HierarchicalRetriever(RAGRetriever):
 
         The hypothetical paragraph is cached by query hash to avoid paying the LLM
         call on every repeated query (TTL 24h — hypothetical text is stable enough).
+        `aget_or_compute` makes concurrent misses for the same query share one
+        LLM call (across workers too) and refreshes hot entries before they expire.
         """
         from cache.manager import cache as _cache
         from infra.hashing import hash_for_cache_key
 
         hyde_model = getattr(settings, "hyde_model_name", None) or getattr(settings, "base_model_name", "gpt-4o-mini")
         cache_key = f"hyde:hyp:{hyde_model}:{hash_for_cache_key((query or '').strip().lower())}"
-        hyp_text: str | None = None
-        try:
-            cached = _cache.get(cache_key)
-            if isinstance(cached, str) and cached.strip():
-                hyp_text = cached
-        except Exception as exc:
-            logger.debug("HyDE cache get failed, regenerating: %s", exc)
-            hyp_text = None
 
-        if hyp_text is None:
+        async def _generate() -> str | None:
             try:
                 from langchain_openai import ChatOpenAI
                 hyde_max_tokens = int(getattr(settings, "hyde_max_tokens", 150))
@@ -206,16 +200,19 @@ class HierarchicalRetriever(RAGRetriever):
                 response = await llm.ainvoke(
                     f"Escribe un párrafo breve y factual que responda directamente: {query}"
                 )
-                hyp_text = response.content if hasattr(response, "content") else str(response)
-                if not hyp_text or not hyp_text.strip():
-                    return None
-                try:
-                    _cache.set(cache_key, hyp_text, ttl=86400)
-                except Exception:
-                    pass
             except Exception as exc:
                 logger.warning("HyDE LLM call failed (%s); using original query embedding", exc)
                 return None
+            text = response.content if hasattr(response, "content") else str(response)
+            return text if text and text.strip() else None
+
+        try:
+            hyp_text = await _cache.aget_or_compute(cache_key, _generate, ttl=86400)
+        except Exception as exc:
+            logger.debug("HyDE cache failed, regenerating: %s", exc)
+            hyp_text = await _generate()
+        if not isinstance(hyp_text, str) or not hyp_text.strip():
+            return None
 
         try:
             return await self._embed_query_async(hyp_text)
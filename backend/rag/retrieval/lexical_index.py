@@ -0,0 +1,410 @@
+"""In-process inverted index for the BM25 lexical leg of hybrid retrieval.
+
+`RAGChildLexicalRepository.search` pays a `count_documents`, a postings
+`find` (up to 50k rows), a Python BM25 loop and a second `find` for the
+child documents on every query. This module keeps a compact copy of the
+postings collection in worker memory and scores queries without touching
+Mongo; only the top-k child documents are fetched, with one `$in` find.
+
+Layout:
+  - Children are interned to dense int32 ids. Per-child fields live in
+    parallel arrays (token_count as float32, doc_id/parent_id/source as
+    object arrays for filter masks). Child content is not kept in memory.
+  - Each term maps to a pair of numpy arrays: child ids (int32) and term
+    frequencies (float32). Scoring a query is one vectorized scatter-add
+    per query term.
+
+Freshness:
+  The index is tagged with the corpus version from `rag.corpus_state`.
+  Ingest/delete bumps that version; the next query on every worker sees a
+  mismatch and starts a background rebuild (single-flight per worker).
+  Queries never wait for it: they keep using the previous snapshot, or the
+  repository's Mongo search when there is none yet, and the new snapshot
+  is swapped in when the build completes. A failed build is logged and
+  that version is not rebuilt again until a cooldown expires (exponential
+  backoff per consecutive failure), so a slow or failing Mongo does not
+  get a full postings scan on every query.
+
+Scoring is the same BM25 variant as the repository (same idf, length
+normalisation and repeated-query-term boost) so both paths rank alike.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from collections import Counter, defaultdict
+from typing import Any, Optional
+
+import numpy as np
+
+from database.rag_child_lexical_repository import LexicalSearchHit, RAGChildLexicalRepository
+from rag.corpus_state import aget_corpus_cache_version
+
+logger = logging.getLogger(__name__)
+
+_FILTER_FIELDS = ("doc_id", "parent_id", "source", "child_id")
+_SNAPSHOT_PROJECTION = {"_id": 0, "token_count": 1, **{key: 1 for key in _FILTER_FIELDS}}
+
+
+class _IndexSnapshot:
+    """Immutable, fully-built index for one corpus version."""
+
+    __slots__ = (
+        "version",
+        "child_ids",
+        "doc_lengths",
+        "avg_doc_length",
+        "fields",
+        "postings",
+        "built_at",
+    )
+
+    def __init__(
+        self,
+        *,
+        version: str,
+        child_ids: list[str],
+        doc_lengths: np.ndarray,
+        avg_doc_length: float,
+        fields: dict[str, np.ndarray],
+        postings: dict[str, tuple[np.ndarray, np.ndarray]],
+    ) -> None:
+        self.version = version
+        self.child_ids = child_ids
+        self.doc_lengths = doc_lengths
+        self.avg_doc_length = avg_doc_length
+        self.fields = fields
+        self.postings = postings
+        self.built_at = time.time()
+
+    @property
+    def size(self) -> int:
+        return len(self.child_ids)
+
+    def filter_mask(self, filter_criteria: dict) -> Optional[np.ndarray]:
+        mask: Optional[np.ndarray] = None
+        for key in _FILTER_FIELDS:
+            value = filter_criteria.get(key)
+            if value is None:
+                continue
+            field_mask = self.fields[key] == value
+            mask = field_mask if mask is None else (mask & field_mask)
+        return mask
+
+
+class InMemoryLexicalIndex:
+    """Drop-in replacement for `RAGChildLexicalRepository.search`.
+
+    Wraps the repository: writes (upsert/delete/clear) keep going to Mongo
+    through the repository, and any attribute not defined here is delegated
+    to it, so callers that inspect collection names keep working.
+    """
+
+    def __init__(
+        self,
+        repository: RAGChildLexicalRepository,
+        *,
+        retry_base_seconds: float = 5.0,
+        retry_max_seconds: float = 300.0,
+    ) -> None:
+        self.repository = repository
+        self.retry_base_seconds = max(0.0, float(retry_base_seconds))
+        self.retry_max_seconds = max(self.retry_base_seconds, float(retry_max_seconds))
+        self._snapshot: Optional[_IndexSnapshot] = None
+        self._build_task: Optional[asyncio.Task] = None
+        self._build_version: Optional[str] = None
+        # Last failed build: its version, consecutive failures and when a
+        # new attempt for that version is allowed (time.monotonic()).
+        self._failed_version: Optional[str] = None
+        self._failures = 0
+        self._retry_at = 0.0
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes not found on the instance/class.
+        repository = self.__dict__.get("repository")
+        if repository is None:
+            raise AttributeError(name)
+        return getattr(repository, name)
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._snapshot.version if self._snapshot is not None else None
+
+    def stats(self) -> dict[str, Any]:
+        snapshot = self._snapshot
+        failures = {"build_failures": self._failures}
+        if snapshot is None:
+            return {"ready": False, "version": None, "children": 0, "terms": 0, **failures}
+        return {
+            "ready": True,
+            "version": snapshot.version,
+            "children": snapshot.size,
+            "terms": len(snapshot.postings),
+            "built_at": snapshot.built_at,
+            **failures,
+        }
+
+    def invalidate(self) -> None:
+        """Drop the current snapshot; the next query rebuilds it."""
+        self._snapshot = None
+
+    async def ensure_fresh(self) -> Optional[_IndexSnapshot]:
+        """Return the snapshot to query with, never waiting for a build.
+
+        When the corpus version moved, a background build for the new
+        version is started (concurrent callers share it) and the previous
+        snapshot keeps serving until it is swapped in. Returns None only
+        before the first build has completed.
+        """
+        version = await aget_corpus_cache_version()
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != version:
+            self._schedule_build(version)
+        return snapshot
+
+    async def refresh(self) -> Optional[_IndexSnapshot]:
+        """Build (or join the build of) the current version and wait for it.
+
+        Returns None when that build failed (or is still cooling down).
+        """
+        version = await aget_corpus_cache_version()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        return await asyncio.shield(self._schedule_build(version))
+
+    def _schedule_build(self, version: str) -> asyncio.Task:
+        task = self._build_task
+        if task is not None and self._build_version == version:
+            if not task.done():
+                return task
+            # The last build of this version failed: wait out the backoff
+            # instead of rescanning the postings on every query.
+            if self._failed_version == version and time.monotonic() < self._retry_at:
+                return task
+        self._build_version = version
+        task = asyncio.ensure_future(self._run_build(version))
+        self._build_task = task
+        return task
+
+    async def _run_build(self, version: str) -> Optional[_IndexSnapshot]:
+        """Build `version` and swap it in; failures are recorded, not raised."""
+        try:
+            snapshot = await self._build(version)
+        except Exception as exc:
+            self._failures = self._failures + 1 if self._failed_version == version else 1
+            self._failed_version = version
+            delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (self._failures - 1))
+            self._retry_at = time.monotonic() + delay
+            logger.warning(
+                "Lexical index build failed (version=%s, attempt=%d, retry in %.0fs): %s",
+                version,
+                self._failures,
+                delay,
+                exc,
+                exc_info=exc,
+            )
+            return None
+        self._failed_version, self._failures = None, 0
+        # A build for an older version may finish after a newer one started;
+        # never replace a snapshot with an older one.
+        if self._build_version == version or self._snapshot is None:
+            self._snapshot = snapshot
+        return snapshot
+
+    async def search(
+        self,
+        query: str,
+        *,
+        limit: int,
+        filter_criteria: dict | None = None,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ) -> list[LexicalSearchHit]:
+        tokens = RAGChildLexicalRepository.tokenize(query)
+        if not tokens:
+            return []
+
+        snapshot = await self.ensure_fresh()
+        if snapshot is None:
+            return await self.repository.search(
+                query,
+                limit=limit,
+                filter_criteria=filter_criteria,
+                k1=k1,
+                b=b,
+            )
+        ranked = self._search_snapshot(
+            snapshot,
+            tokens,
+            limit=limit,
+            filter_criteria=dict(filter_criteria or {}),
+            k1=k1,
+            b=b,
+        )
+        return await self._load_hits(ranked)
+
+    async def _load_hits(self, ranked: list[tuple[str, float]]) -> list[LexicalSearchHit]:
+        """Fetch the top-k child documents and return them in rank order.
+
+        Children deleted after the snapshot was built are skipped.
+        """
+        if not ranked:
+            return []
+        child_ids = [child_id for child_id, _ in ranked]
+        docs = await self.repository.documents_collection.find(
+            {"child_id": {"$in": child_ids}},
+            {"_id": 0},
+        ).to_list(length=len(child_ids))
+        child_map = {str(doc["child_id"]): doc for doc in docs}
+
+        results: list[LexicalSearchHit] = []
+        for child_id, score in ranked:
+            doc = child_map.get(child_id)
+            if doc is None:
+                continue
+            results.append(
+                LexicalSearchHit(
+                    child_id=child_id,
+                    parent_id=str(doc["parent_id"]),
+                    doc_id=str(doc["doc_id"]),
+                    score=score,
+                    content=str(doc["content"]),
+                    source=str(doc["source"]),
+                    file_path=str(doc["file_path"]),
+                    page_start=int(doc["page_start"]),
+                    page_end=int(doc["page_end"]),
+                    section_title=doc.get("section_title"),
+                    contains_table=bool(doc.get("contains_table", False)),
+                    contains_numeric=bool(doc.get("contains_numeric", False)),
+                    contains_date_like=bool(doc.get("contains_date_like", False)),
+                    token_count=int(doc.get("token_count", 0) or 0),
+                )
+            )
+        return results
+
+    @staticmethod
+    def _search_snapshot(
+        snapshot: _IndexSnapshot,
+        tokens: list[str],
+        *,
+        limit: int,
+        filter_criteria: dict,
+        k1: float,
+        b: float,
+    ) -> list[tuple[str, float]]:
+        """Top-k `(child_id, score)` pairs, best first."""
+        if snapshot.size == 0:
+            return []
+
+        mask = snapshot.filter_mask(filter_criteria)
+        total_docs = int(mask.sum()) if mask is not None else snapshot.size
+        if total_docs == 0:
+            return []
+
+        scores = np.zeros(snapshot.size, dtype=np.float64)
+        touched = np.zeros(snapshot.size, dtype=bool)
+        avg_doc_length = max(snapshot.avg_doc_length, 1.0)
+        query_term_frequency = Counter(tokens)
+
+        for term, query_tf in query_term_frequency.items():
+            posting = snapshot.postings.get(term)
+            if posting is None:
+                continue
+            child_index, tf = posting
+            if mask is not None:
+                selected = mask[child_index]
+                child_index = child_index[selected]
+                tf = tf[selected]
+            df = int(child_index.size)
+            if df == 0:
+                continue
+            idf = math.log(1 + ((total_docs - df + 0.5) / (df + 0.5)))
+            doc_length = snapshot.doc_lengths[child_index]
+            denominator = np.maximum(tf + k1 * (1 - b + b * (doc_length / avg_doc_length)), 1e-9)
+            query_boost = 1 + 0.2 * max(0, query_tf - 1)
+            np.add.at(scores, child_index, idf * ((tf * (k1 + 1)) / denominator) * query_boost)
+            touched[child_index] = True
+
+        candidates = np.flatnonzero(touched)
+        if candidates.size == 0:
+            return []
+
+        top_n = min(max(1, int(limit)), candidates.size)
+        candidate_scores = scores[candidates]
+        if top_n < candidates.size:
+            partition = np.argpartition(-candidate_scores, top_n - 1)[:top_n]
+            candidates = candidates[partition]
+            candidate_scores = candidate_scores[partition]
+        order = np.argsort(-candidate_scores, kind="stable")
+
+        return [
+            (snapshot.child_ids[int(candidates[position])], float(candidate_scores[position]))
+            for position in order
+        ]
+
+    async def _build(self, version: str) -> _IndexSnapshot:
+        started_at = time.perf_counter()
+        repository = self.repository
+
+        child_ids: list[str] = []
+        lengths: list[float] = []
+        raw_length_total = 0.0
+        field_values: dict[str, list[Any]] = {key: [] for key in _FILTER_FIELDS}
+
+        async for doc in repository.documents_collection.find({}, _SNAPSHOT_PROJECTION):
+            child_id = str(doc["child_id"])
+            token_count = int(doc.get("token_count", 0) or 0)
+            child_ids.append(child_id)
+            lengths.append(float(max(1, token_count)))
+            raw_length_total += token_count
+            field_values["doc_id"].append(str(doc["doc_id"]))
+            field_values["parent_id"].append(str(doc["parent_id"]))
+            field_values["source"].append(str(doc["source"]))
+            field_values["child_id"].append(child_id)
+
+        positions = {child_id: index for index, child_id in enumerate(child_ids)}
+        term_children: dict[str, list[int]] = defaultdict(list)
+        term_frequencies: dict[str, list[float]] = defaultdict(list)
+        orphan_postings = 0
+
+        projection = {"_id": 0, "term": 1, "child_id": 1, "tf": 1}
+        async for posting in repository.postings_collection.find({}, projection):
+            position = positions.get(str(posting["child_id"]))
+            if position is None:
+                orphan_postings += 1
+                continue
+            term = str(posting["term"])
+            term_children[term].append(position)
+            term_frequencies[term].append(float(max(0, int(posting.get("tf", 0) or 0))))
+
+        postings = {
+            term: (
+                np.asarray(term_children[term], dtype=np.int32),
+                np.asarray(term_frequencies[term], dtype=np.float32),
+            )
+            for term in term_children
+        }
+        fields = {key: np.asarray(values, dtype=object) for key, values in field_values.items()}
+
+        snapshot = _IndexSnapshot(
+            version=version,
+            child_ids=child_ids,
+            doc_lengths=np.asarray(lengths, dtype=np.float32),
+            # Same as the repository's $avg over raw token_count.
+            avg_doc_length=(raw_length_total / len(child_ids)) if child_ids else 1.0,
+            fields=fields,
+            postings=postings,
+        )
+        logger.info(
+            "Lexical index built | version=%s children=%d terms=%d orphan_postings=%d elapsed_ms=%.1f",
+            version,
+            snapshot.size,
+            len(postings),
+            orphan_postings,
+            (time.perf_counter() - started_at) * 1000,
+        )
+        return snapshot
+
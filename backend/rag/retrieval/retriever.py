@@ -17,6 +17,7 @@ from chat.turn_context import get_request_context
 
 from ..vector_store.vector_store import VectorStore, VectorStoreUnavailableError
 from ..corpus_centroid import get_centroid, is_out_of_scope
+from ..corpus_state import DOC_TS_EPOCH_KEY
 from .gating import CheapGateDecision, cheap_gate
 from .metrics import measure_time, PerformanceMetrics, _METRICS_LOG_INTERVAL
 from .sanitize import sanitize_doc_content, sanitize_metadata_field
@@ -182,33 +183,21 @@ class RAGRetriever:
                 continue
         return documents
 
-    def _get_cached_result(
+    def _cached_payload_to_result(
         self,
-        query: str,
-        k: int,
-        filter_criteria: Optional[Dict[str, Any]],
-        use_semantic_ranking: bool,
-        use_mmr: bool,
+        payload: Any,
+        current_timestamps: Optional[Dict[str, Any]],
     ) -> Optional[CachedRetrievalResult]:
-        if not self._cache_is_enabled():
-            return None
-
-        cache_key = self._build_retrieval_cache_key(
-            query=query,
-            k=k,
-            filter_criteria=filter_criteria,
-            use_semantic_ranking=use_semantic_ranking,
-            use_mmr=use_mmr,
-        )
-        payload = cache.get(cache_key)
-        if not isinstance(payload, dict):
-            return None
+        """Valida un payload cacheado contra los `rag:ts:*` actuales y lo materializa.
 
+        `current_timestamps=None` indica que la huella de la entrada ya
+        coincide con la época vigente y no hay que comparar por documento.
+        """
         # Granular invalidation: if any contributing doc was re-ingested, miss
         doc_timestamps = payload.get("doc_timestamps")
-        if doc_timestamps:
+        if doc_timestamps and current_timestamps is not None:
             for doc_id, stored_ts in doc_timestamps.items():
-                current_ts = cache.get(f"rag:ts:{doc_id}")
+                current_ts = current_timestamps.get(f"rag:ts:{doc_id}")
                 if current_ts != stored_ts:
                     logger.debug(
                         "Cache miss (doc updated): doc_id=%s stored_ts=%s current_ts=%s",
@@ -231,6 +220,119 @@ class RAGRetriever:
             kind=kind,
         )
 
+    @staticmethod
+    def _doc_ts_epoch(value: Any) -> Optional[str]:
+        if value is None or value == "":
+            return None
+        return str(value)
+
+    def _needs_timestamp_check(self, payload: Dict[str, Any], epoch: Optional[str]) -> bool:
+        """True si la entrada cita documentos y se guardó antes de la última escritura de `rag:ts:*`.
+
+        Sin época en caché (nunca escrita o desalojada) no hay con qué
+        comparar: siempre se revalida.
+        """
+        if not payload.get("doc_timestamps"):
+            return False
+        return epoch is None or self._doc_ts_epoch(payload.get("ts_epoch")) != epoch
+
+    def _get_cached_result(
+        self,
+        query: str,
+        k: int,
+        filter_criteria: Optional[Dict[str, Any]],
+        use_semantic_ranking: bool,
+        use_mmr: bool,
+    ) -> Optional[CachedRetrievalResult]:
+        if not self._cache_is_enabled():
+            return None
+
+        cache_key = self._build_retrieval_cache_key(
+            query=query,
+            k=k,
+            filter_criteria=filter_criteria,
+            use_semantic_ranking=use_semantic_ranking,
+            use_mmr=use_mmr,
+        )
+        found = cache.get_many([cache_key, DOC_TS_EPOCH_KEY])
+        payload = found.get(cache_key)
+        if not isinstance(payload, dict):
+            return None
+        epoch = self._doc_ts_epoch(found.get(DOC_TS_EPOCH_KEY))
+        if not self._needs_timestamp_check(payload, epoch):
+            return self._cached_payload_to_result(payload, None)
+
+        doc_timestamps = payload["doc_timestamps"]
+        current_timestamps = cache.get_many([f"rag:ts:{doc_id}" for doc_id in doc_timestamps])
+        result = self._cached_payload_to_result(payload, current_timestamps)
+        if result is not None and epoch is not None:
+            # Sigue vigente: se re-sella con la época actual para que el
+            # próximo hit vuelva a costar una sola lectura.
+            cache.set(cache_key, {**payload, "ts_epoch": epoch})
+        return result
+
+    async def _aget_cached_result(
+        self,
+        query: str,
+        k: int,
+        filter_criteria: Optional[Dict[str, Any]],
+        use_semantic_ranking: bool,
+        use_mmr: bool,
+    ) -> Optional[CachedRetrievalResult]:
+        """Versión async de `_get_cached_result` (redis.asyncio, sin hilos).
+
+        Un hit cuesta un MGET (entrada + época de `rag:ts:*`); solo si algún
+        documento se re-ingirió después de guardar la entrada se leen sus
+        timestamps en un segundo MGET.
+        """
+        if not self._cache_is_enabled():
+            return None
+
+        cache_key = self._build_retrieval_cache_key(
+            query=query,
+            k=k,
+            filter_criteria=filter_criteria,
+            use_semantic_ranking=use_semantic_ranking,
+            use_mmr=use_mmr,
+        )
+        found = await cache.aget_many([cache_key, DOC_TS_EPOCH_KEY])
+        payload = found.get(cache_key)
+        if not isinstance(payload, dict):
+            return None
+        epoch = self._doc_ts_epoch(found.get(DOC_TS_EPOCH_KEY))
+        if not self._needs_timestamp_check(payload, epoch):
+            return self._cached_payload_to_result(payload, None)
+
+        doc_timestamps = payload["doc_timestamps"]
+        current_timestamps = await cache.aget_many([f"rag:ts:{doc_id}" for doc_id in doc_timestamps])
+        result = self._cached_payload_to_result(payload, current_timestamps)
+        if result is not None and epoch is not None:
+            await cache.aset(cache_key, {**payload, "ts_epoch": epoch})
+        return result
+
+    def _build_cached_payload(
+        self,
+        documents: List[Document],
+        reason: str,
+        doc_ids: List[str],
+        current_timestamps: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        if not documents:
+            return {"kind": "no_context", "reason": reason}
+        return {
+            "kind": "documents",
+            "reason": reason,
+            "documents": self._serialize_documents(documents),
+            "doc_ids": doc_ids,
+            "doc_timestamps": {doc_id: current_timestamps.get(f"rag:ts:{doc_id}") for doc_id in doc_ids},
+            # Huella de dependencias: época de `rag:ts:*` leída junto a los timestamps.
+            "ts_epoch": self._doc_ts_epoch(current_timestamps.get(DOC_TS_EPOCH_KEY)),
+        }
+
+    @staticmethod
+    def _cached_doc_ids(documents: List[Document]) -> List[str]:
+        return list({doc.metadata.get("doc_id") for doc in documents if doc.metadata.get("doc_id")})
+
     def _store_cached_result(
         self,
         query: str,
@@ -253,21 +355,38 @@ class RAGRetriever:
         )
 
         # Collect doc_ids and their current timestamps for granular invalidation
-        doc_ids = list({doc.metadata.get("doc_id") for doc in documents if doc.metadata.get("doc_id")})
-        doc_timestamps = {doc_id: cache.get(f"rag:ts:{doc_id}") for doc_id in doc_ids}
-
-        if documents:
-            payload = {
-                "kind": "documents",
-                "reason": reason,
-                "documents": self._serialize_documents(documents),
-                "doc_ids": doc_ids,
-                "doc_timestamps": doc_timestamps,
-            }
-        else:
-            payload = {"kind": "no_context", "reason": reason}
+        doc_ids = self._cached_doc_ids(documents)
+        current_timestamps = (
+            cache.get_many([f"rag:ts:{doc_id}" for doc_id in doc_ids] + [DOC_TS_EPOCH_KEY]) if doc_ids else {}
+        )
+        cache.set(cache_key, self._build_cached_payload(documents, reason, doc_ids, current_timestamps))
+
+    async def _astore_cached_result(
+        self,
+        query: str,
+        k: int,
+        filter_criteria: Optional[Dict[str, Any]],
+        documents: List[Document],
+        reason: str,
+        use_semantic_ranking: bool,
+        use_mmr: bool,
+    ) -> None:
+        """Versión async de `_store_cached_result`."""
+        if not self._cache_is_enabled():
+            return
 
-        cache.set(cache_key, payload)
+        cache_key = self._build_retrieval_cache_key(
+            query=query,
+            k=k,
+            filter_criteria=filter_criteria,
+            use_semantic_ranking=use_semantic_ranking,
+            use_mmr=use_mmr,
+        )
+        doc_ids = self._cached_doc_ids(documents)
+        current_timestamps = (
+            await cache.aget_many([f"rag:ts:{doc_id}" for doc_id in doc_ids] + [DOC_TS_EPOCH_KEY]) if doc_ids else {}
+        )
+        await cache.aset(cache_key, self._build_cached_payload(documents, reason, doc_ids, current_timestamps))
 
     def invalidate_rag_cache(self) -> None:
         try:
@@ -296,7 +415,11 @@ class RAGRetriever:
         try:
             if not self.embedding_manager:
                 return None
-            embedding = await asyncio.to_thread(self.embedding_manager.embed_query, text)
+            aembed_query = getattr(self.embedding_manager, "aembed_query", None)
+            if asyncio.iscoroutinefunction(aembed_query):
+                embedding = await aembed_query(text)
+            else:
+                embedding = await asyncio.to_thread(self.embedding_manager.embed_query, text)
             return self._clean_vector(embedding)
         except Exception as exc:
             logger.warning("[RAG][EMBEDDING] embed_query failed: %s", exc, exc_info=True)
@@ -453,7 +576,7 @@ class RAGRetriever:
             return []
 
         cache_lookup_start = time.perf_counter()
-        cached_result = self._get_cached_result(
+        cached_result = await self._aget_cached_result(
             query=normalized_query,
             k=k,
             filter_criteria=filter_criteria,
@@ -549,7 +672,7 @@ class RAGRetriever:
                 self._last_gating_reason = "no_candidates"
                 logger.info("[RAG][POST] rerank_mmr ran=no mode=%s q='%s'", rerank_mode, safe_query)
                 logger.info("[RAG][POST] acceptance=rejected reason=no_candidates docs=0 q='%s'", safe_query)
-                self._store_cached_result(
+                await self._astore_cached_result(
                     query=normalized_query,
                     k=k,
                     filter_criteria=filter_criteria,
@@ -598,7 +721,7 @@ class RAGRetriever:
             )
 
             cache_store_start = time.perf_counter()
-            self._store_cached_result(
+            await self._astore_cached_result(
                 query=normalized_query,
                 k=k,
                 filter_criteria=filter_criteria,
@@ -678,6 +801,49 @@ class RAGRetriever:
             logger.error("Error retrieve_with_trace: %s", exc, exc_info=True)
             return {"query": query, "k": k, "retrieved": [], "context": None, "timings": {}, "error": str(exc)}
 
+    def _stack_document_vectors(self, docs: List[Document]) -> Tuple[List[int], Optional[np.ndarray]]:
+        """Collect the usable `metadata["vector"]` of `docs` into one L2-normalized matrix.
+
+        Returns the positions (in `docs`) that contributed a row and the
+        (n, dim) float32 matrix. Vectors with the wrong dimension or zero
+        norm are skipped, same acceptance rules as `_clean_vector`.
+        """
+        dimension = int(getattr(settings, "default_embedding_dimension", 1536))
+        positions: List[int] = []
+        rows: List[Any] = []
+        for idx, doc in enumerate(docs):
+            embedding = doc.metadata.get("vector")
+            if embedding is None:
+                continue
+            if isinstance(embedding, np.ndarray):
+                embedding = embedding.reshape(-1)
+            try:
+                if len(embedding) != dimension:
+                    continue
+            except TypeError:
+                continue
+            positions.append(idx)
+            rows.append(embedding)
+
+        if not rows:
+            return [], None
+
+        # A single conversion of the list-of-lists is far cheaper than one
+        # np.array() per document (Qdrant returns plain Python lists).
+        try:
+            matrix = np.asarray(rows, dtype=np.float32)
+        except (TypeError, ValueError):
+            return [], None
+        norms = np.linalg.norm(matrix, axis=1)
+        valid = norms > 0
+        if not bool(valid.all()):
+            positions = [position for position, keep in zip(positions, valid) if keep]
+            matrix = matrix[valid]
+            norms = norms[valid]
+        if not positions:
+            return [], None
+        return positions, matrix / norms[:, None]
+
     async def _semantic_reranking(
         self,
         docs: List[Document],
@@ -691,20 +857,18 @@ class RAGRetriever:
                 logger.debug("[RERANK] query_embedding not provided; returning docs unchanged")
                 return docs
 
-            scored_docs = []
-            for doc in docs:
-                doc_embedding = doc.metadata.get("vector")
-                semantic_score = 0.0
-                if doc_embedding is not None:
-                    doc_vec = self._clean_vector(doc_embedding)
-                    if doc_vec is not None:
-                        semantic_score = float(np.dot(query_vec, doc_vec))
+            semantic_scores = np.zeros(len(docs), dtype=np.float64)
+            positions, matrix = self._stack_document_vectors(docs)
+            if matrix is not None:
+                semantic_scores[positions] = matrix @ np.asarray(query_vec, dtype=np.float32)
 
+            scored_docs = []
+            for idx, doc in enumerate(docs):
                 length_score = min(len(doc.page_content.split()) / 100, 1.0)
                 content_type_score = self._get_content_type_score(doc.metadata.get("chunk_type", "text"))
 
                 final_score = (
-                    semantic_score * 0.75
+                    float(semantic_scores[idx]) * 0.75
                     + length_score * 0.15
                     + content_type_score * 0.10
                 )
@@ -734,42 +898,34 @@ class RAGRetriever:
                 logger.debug("[MMR] query_embedding not provided; returning top-k without MMR")
                 return docs[:k]
 
-            candidate_indices = []
-            doc_embeddings: Dict[int, np.ndarray] = {}
-
-            for idx, doc in enumerate(docs):
-                embedding = doc.metadata.get("vector")
-                if embedding is None:
-                    continue
-                cleaned = self._clean_vector(embedding)
-                if cleaned is None:
-                    continue
-                doc_embeddings[idx] = cleaned
-                candidate_indices.append(idx)
+            candidate_indices, matrix = self._stack_document_vectors(docs)
+            if matrix is None:
+                return docs[:k]
 
-            if not candidate_indices:
+            picks = min(k, len(docs))
+            if picks > len(candidate_indices):
+                # Not enough docs carry vectors to fill k diverse picks; keep the
+                # retrieval order (the previous per-pair loop fell back here too).
                 return docs[:k]
 
-            selected_indices: List[int] = []
-            remaining = candidate_indices.copy()
-
-            for _ in range(min(k, len(docs))):
-                mmr_scores = []
-                for idx in remaining:
-                    relevance = float(np.dot(query_vec, doc_embeddings[idx]))
-                    if selected_indices:
-                        selected_embeddings = [doc_embeddings[selected_idx] for selected_idx in selected_indices]
-                        similarities = [float(np.dot(doc_embeddings[idx], selected)) for selected in selected_embeddings]
-                        diversity = 1 - max(similarities)
-                    else:
-                        diversity = 1.0
-                    mmr_scores.append((idx, lambda_mult * relevance + (1 - lambda_mult) * diversity))
-
-                best_idx = max(mmr_scores, key=lambda item: item[1])[0]
-                selected_indices.append(best_idx)
-                remaining.remove(best_idx)
-
-            return [docs[idx] for idx in selected_indices]
+            # One (n,) relevance vector and one running max-similarity vector:
+            # each pick costs a single matrix-vector product instead of
+            # re-scoring every candidate against every selected doc.
+            relevance = matrix @ np.asarray(query_vec, dtype=np.float32)
+            max_similarity = np.full(len(candidate_indices), -np.inf, dtype=np.float32)
+            available = np.ones(len(candidate_indices), dtype=bool)
+            selected: List[int] = []
+
+            for step in range(picks):
+                diversity = 1.0 if step == 0 else 1.0 - max_similarity
+                scores = lambda_mult * relevance + (1 - lambda_mult) * diversity
+                scores = np.where(available, scores, -np.inf)
+                best = int(np.argmax(scores))
+                selected.append(best)
+                available[best] = False
+                np.maximum(max_similarity, matrix @ matrix[best], out=max_similarity)
+
+            return [docs[candidate_indices[best]] for best in selected]
         except Exception as exc:
             logger.warning("MMR failed; returning top-k fallback: %s", exc, exc_info=True)
             return docs[:k]
@@ -20,6 +20,9 @@ from qdrant_client.http.models import (
     FilterSelector,
     HnswConfigDiff,
     OptimizersConfigDiff,
+    PointIdsList,
+    SetPayload,
+    SetPayloadOperation,
 )
 
 from config import settings
@@ -574,6 +577,103 @@ class VectorStore:
             logger.error("Error eliminando documentos: %s", e, exc_info=True)
             raise
 
+    async def delete_by_ids(self, point_ids: List[str]) -> None:
+        """Elimina puntos puntuales (re-ingesta incremental: chunks que ya no existen)."""
+        if not point_ids:
+            return
+        try:
+            self._require_connection()
+            await asyncio.to_thread(
+                self.client.delete,
+                collection_name=self.collection_name,
+                points_selector=PointIdsList(points=list(point_ids)),
+                wait=True,
+            )
+            await self._invalidate_cache()
+        except Exception as e:
+            self.is_available = False
+            logger.error("Error eliminando puntos por id: %s", e, exc_info=True)
+            raise
+
+    async def get_payloads_by_source(self, source: str, fields: List[str]) -> Dict[str, Dict[str, Any]]:
+        """point_id -> payload (solo `fields`, sin vectores) de todos los puntos de `source`."""
+        self._require_connection()
+        qfilter = QFilter(must=[FieldCondition(key="source", match=MatchValue(value=source))])
+        payloads: Dict[str, Dict[str, Any]] = {}
+        next_offset = None
+        while True:
+            points, next_offset = await asyncio.to_thread(
+                self.client.scroll,
+                collection_name=self.collection_name,
+                scroll_filter=qfilter,
+                limit=self.batch_size,
+                offset=next_offset,
+                with_payload=list(fields),
+                with_vectors=False,
+            )
+            for point in points:
+                payloads[str(point.id)] = dict(point.payload or {})
+            if next_offset is None or not points:
+                return payloads
+
+    async def get_vectors(self, point_ids: List[str]) -> List[List[float]]:
+        """Vectores guardados de `point_ids` (los que existan)."""
+        if not point_ids:
+            return []
+        self._require_connection()
+        points = await asyncio.to_thread(
+            self.client.retrieve,
+            collection_name=self.collection_name,
+            ids=list(point_ids),
+            with_payload=False,
+            with_vectors=True,
+        )
+        vectors = [self._normalize_qdrant_vector(getattr(point, "vector", None)) for point in points]
+        return [vector for vector in vectors if vector is not None]
+
+    async def update_payloads(self, payloads: Dict[str, Dict[str, Any]]) -> None:
+        """Actualiza metadata de puntos existentes sin re-embeber (una sola llamada batch)."""
+        if not payloads:
+            return
+        try:
+            self._require_connection()
+            operations = [
+                SetPayloadOperation(set_payload=SetPayload(payload=payload, points=[point_id]))
+                for point_id, payload in payloads.items()
+            ]
+            await asyncio.to_thread(
+                self.client.batch_update_points,
+                collection_name=self.collection_name,
+                update_operations=operations,
+                wait=True,
+            )
+            await self._invalidate_cache()
+        except Exception as e:
+            self.is_available = False
+            logger.error("Error actualizando payloads en Qdrant: %s", e, exc_info=True)
+            raise
+
+    async def set_doc_id_by_source(self, source: str, doc_id: str) -> None:
+        """Re-etiqueta con `doc_id` los puntos de `source` (set_payload por filtro, sin re-embeber)."""
+        try:
+            self._require_connection()
+            qfilter = QFilter(
+                must=[FieldCondition(key="source", match=MatchValue(value=source))],
+                must_not=[FieldCondition(key="doc_id", match=MatchValue(value=doc_id))],
+            )
+            await asyncio.to_thread(
+                self.client.set_payload,
+                collection_name=self.collection_name,
+                payload={"doc_id": doc_id},
+                points=FilterSelector(filter=qfilter),
+                wait=True,
+            )
+            await self._invalidate_cache()
+        except Exception as e:
+            self.is_available = False
+            logger.error("Error re-etiquetando doc_id en Qdrant: %s", e, exc_info=True)
+            raise
+
     async def delete_by_pdf_hash(self, pdf_hash: str) -> None:
         await self.delete_documents({"pdf_hash": pdf_hash})
 
@@ -607,7 +707,7 @@ class VectorStore:
                 return
             if hasattr(settings, "enable_cache") and not getattr(settings, "enable_cache", True):
                 return
-            cache.invalidate_prefix("vs:")
+            await cache.ainvalidate_prefix("vs:")
             logger.debug("Cache invalidada: prefix 'vs:'")
         except Exception as e:
             logger.error("Error invalidando caché: %s", e, exc_info=True)
@@ -0,0 +1,226 @@
+"""Benchmark: event-loop lag and thread-pool occupancy of the async cache API.
+
+Simulates N concurrent SSE streams, each doing a burst of cache reads (one
+GET + one MGET, like the response/retrieval/tool caches) every `--tick-ms`,
+and compares:
+
+  - thread: `CacheManager` without `async_backend` → sync redis-py through
+    `asyncio.to_thread` (the previous behaviour).
+  - async:  `CacheManager` with `AsyncRedisCache` (redis.asyncio, pooled).
+
+Reports the p50/p99/max lag of a 10 ms heartbeat task (how late the event
+loop runs it), p50/p99 cache-call latency, and the default executor's peak
+busy workers / queued jobs.
+
+Without `--redis-url`, both backends use in-process fakes with the same
+simulated round-trip time (`--rtt-ms`): blocking `time.sleep` for the sync
+client, `asyncio.sleep` for the async one. With `--redis-url`, both talk to
+that Redis (keys under `bench:loop:` are deleted afterwards).
+
+Usage (from backend/):
+    python -m scripts.bench_cache_event_loop
+    python -m scripts.bench_cache_event_loop --streams 200 --redis-url redis://localhost:6379/15
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+from cache.async_redis_backend import AsyncRedisCache  # noqa: E402
+from cache.manager import CacheManager  # noqa: E402
+from cache.redis_backend import RedisCache  # noqa: E402
+
+_KEY_PREFIX = "bench:loop:"
+
+
+class _Occupancy:
+    """Counts executor workers currently running a cache call."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.busy = 0
+        self.peak_busy = 0
+
+    def wrap(self, fn):
+        def _wrapped(*args, **kwargs):
+            with self._lock:
+                self.busy += 1
+                self.peak_busy = max(self.peak_busy, self.busy)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.busy -= 1
+
+        return _wrapped
+
+
+class _SlowSyncClient:
+    def __init__(self, rtt_s: float) -> None:
+        self.rtt_s = rtt_s
+        self.store: dict = {}
+
+    def get(self, key):
+        time.sleep(self.rtt_s)
+        return self.store.get(key)
+
+    def mget(self, keys):
+        time.sleep(self.rtt_s)
+        return [self.store.get(key) for key in keys]
+
+    def set(self, name, value, ex=None):
+        time.sleep(self.rtt_s)
+        self.store[name] = value
+
+
+class _SlowAsyncClient:
+    def __init__(self, rtt_s: float, store: dict) -> None:
+        self.rtt_s = rtt_s
+        self.store = store
+
+    async def get(self, key):
+        await asyncio.sleep(self.rtt_s)
+        return self.store.get(key)
+
+    async def mget(self, keys):
+        await asyncio.sleep(self.rtt_s)
+        return [self.store.get(key) for key in keys]
+
+
+def _manager(mode: str, args, occupancy: _Occupancy) -> CacheManager:
+    manager = CacheManager.__new__(CacheManager)
+    manager.ttl = 300
+    manager.max_size = 1000
+    manager.is_degraded = False
+    manager.backend_type = "RedisCache"
+    if args.redis_url:
+        import redis  # type: ignore
+
+        manager.backend = RedisCache(client=redis.Redis.from_url(args.redis_url))
+        manager.async_backend = (
+            AsyncRedisCache(args.redis_url, max_connections=args.max_connections) if mode == "async" else None
+        )
+    else:
+        sync_client = _SlowSyncClient(args.rtt_ms / 1000.0)
+        manager.backend = RedisCache(client=sync_client)
+        manager.async_backend = (
+            AsyncRedisCache(client=_SlowAsyncClient(args.rtt_ms / 1000.0, sync_client.store))
+            if mode == "async"
+            else None
+        )
+    manager.get = occupancy.wrap(manager.get)
+    manager.get_many = occupancy.wrap(manager.get_many)
+    return manager
+
+
+async def _heartbeat(stop: asyncio.Event, lags: list[float], interval_s: float = 0.01) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval_s)
+        lags.append((time.perf_counter() - started - interval_s) * 1000.0)
+
+
+async def _stream(
+    manager: CacheManager, stream_id: int, ticks: int, tick_s: float, latencies: list[float]
+) -> None:
+    keys = [f"{_KEY_PREFIX}ts:{stream_id}:{i}" for i in range(4)]
+    for _ in range(ticks):
+        started = time.perf_counter()
+        await manager.aget(f"{_KEY_PREFIX}resp:{stream_id}")
+        await manager.aget_many(keys)
+        latencies.append((time.perf_counter() - started) * 1000.0)
+        await asyncio.sleep(tick_s)
+
+
+async def _run(mode: str, args) -> dict:
+    loop = asyncio.get_running_loop()
+    workers = min(32, (os.cpu_count() or 1) + 4)  # asyncio's default executor size
+    executor = ThreadPoolExecutor(max_workers=workers)
+    loop.set_default_executor(executor)
+    occupancy = _Occupancy()
+    manager = _manager(mode, args, occupancy)
+
+    stop = asyncio.Event()
+    lags: list[float] = []
+    latencies: list[float] = []
+    peak_queued = 0
+
+    async def _sample_queue() -> None:
+        nonlocal peak_queued
+        while not stop.is_set():
+            peak_queued = max(peak_queued, executor._work_queue.qsize())
+            await asyncio.sleep(0.005)
+
+    heartbeat = asyncio.create_task(_heartbeat(stop, lags))
+    sampler = asyncio.create_task(_sample_queue())
+    started = time.perf_counter()
+    await asyncio.gather(*(_stream(manager, i, args.ticks, args.tick_ms / 1000.0, latencies) for i in range(args.streams)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await asyncio.gather(heartbeat, sampler)
+    if manager.async_backend is not None:
+        await manager.async_backend.aclose()
+    executor.shutdown(wait=True)
+
+    return {
+        "mode": mode,
+        "elapsed_s": elapsed,
+        "lag_p50": float(np.percentile(lags, 50)) if lags else 0.0,
+        "lag_p99": float(np.percentile(lags, 99)) if lags else 0.0,
+        "lag_max": float(max(lags)) if lags else 0.0,
+        "call_p50": float(np.percentile(latencies, 50)),
+        "call_p99": float(np.percentile(latencies, 99)),
+        "peak_busy": occupancy.peak_busy,
+        "workers": workers,
+        "peak_queued": peak_queued,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--tick-ms", type=float, default=20.0, help="pause between a stream's cache bursts")
+    parser.add_argument("--rtt-ms", type=float, default=1.0)
+    parser.add_argument("--redis-url", default=None)
+    parser.add_argument("--max-connections", type=int, default=200)
+    args = parser.parse_args()
+
+    results = [asyncio.run(_run(mode, args)) for mode in ("thread", "async")]
+    if args.redis_url:
+        import redis  # type: ignore
+
+        client = redis.Redis.from_url(args.redis_url)
+        for key in client.scan_iter(match=f"{_KEY_PREFIX}*"):
+            client.unlink(key)
+
+    print(
+        f"streams={args.streams} ticks={args.ticks} tick={args.tick_ms}ms "
+        f"{'redis=' + args.redis_url if args.redis_url else f'simulated rtt={args.rtt_ms}ms'}"
+    )
+    print(
+        f"{'mode':>6} {'total_s':>8} {'lag_p50':>8} {'lag_p99':>8} {'lag_max':>8} "
+        f"{'call_p50':>9} {'call_p99':>9} {'busy/workers':>13} {'queued':>7}"
+    )
+    for r in results:
+        print(
+            f"{r['mode']:>6} {r['elapsed_s']:>8.2f} {r['lag_p50']:>7.1f}ms {r['lag_p99']:>7.1f}ms "
+            f"{r['lag_max']:>7.1f}ms {r['call_p50']:>8.1f}ms {r['call_p99']:>8.1f}ms "
+            f"{r['peak_busy']:>6}/{r['workers']:<6} {r['peak_queued']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Micro-benchmark: cached embedding size and per-hit decode time, JSON vs binary codec.
+
+Encodes synthetic 1536-dim embeddings the way `EmbeddingManager` writes them
+through `RedisCache` (legacy `JSON:` list vs the `VEC1` float32/float16
+codec) and reports payload bytes plus the decode cost of one cache hit
+(`RedisCache._decode` + `EmbeddingManager._from_cache_value`).
+
+With `--redis-url`, it also writes `--keys` entries per format to that Redis
+and reports `MEMORY USAGE` per key (the keys are deleted afterwards).
+
+Usage (from backend/):
+    python -m scripts.bench_embedding_codec
+    python -m scripts.bench_embedding_codec --dim 1536 --repeat 2000 --redis-url redis://localhost:6379/15
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+from cache.redis_backend import RedisCache  # noqa: E402
+from cache.vector_codec import encode_vector, to_cache_vector  # noqa: E402
+from rag.embeddings.embedding_manager import EmbeddingManager  # noqa: E402
+
+
+class _NullClient:
+    """Stand-in client: the decode path never talks to Redis on valid payloads."""
+
+    def unlink(self, key):  # pragma: no cover - only on corrupt payloads
+        pass
+
+
+def _payloads(embedding: list[float]) -> dict[str, bytes]:
+    return {
+        "json": b"JSON:" + json.dumps(embedding).encode("utf-8"),
+        "float32": encode_vector(to_cache_vector(embedding, "float32")),
+        "float16": encode_vector(to_cache_vector(embedding, "float16")),
+    }
+
+
+def _decode_us(backend: RedisCache, raw: bytes, dim: int, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        EmbeddingManager._from_cache_value(backend._decode("k", raw), dim)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return float(np.median(samples))
+
+
+def _redis_memory(url: str, payloads: dict[str, bytes], keys: int) -> dict[str, float]:
+    import redis  # type: ignore
+
+    client = redis.Redis.from_url(url)
+    usage: dict[str, float] = {}
+    for name, raw in payloads.items():
+        names = [f"bench:emb:{name}:{i}" for i in range(keys)]
+        pipe = client.pipeline(transaction=False)
+        for key in names:
+            pipe.set(key, raw)
+        pipe.execute()
+        usage[name] = float(np.mean([client.memory_usage(key) or 0 for key in names]))
+        client.delete(*names)
+    return usage
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--redis-url", default=None)
+    parser.add_argument("--keys", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    vector = rng.standard_normal(args.dim).astype(np.float32)
+    embedding = (vector / np.linalg.norm(vector)).tolist()
+    payloads = _payloads(embedding)
+    backend = RedisCache(client=_NullClient())
+    memory = _redis_memory(args.redis_url, payloads, args.keys) if args.redis_url else {}
+
+    print(f"{'format':>8} {'bytes':>8} {'vs_json':>8} {'decode_us':>10} {'redis_mem':>10}")
+    json_bytes = len(payloads["json"])
+    for name, raw in payloads.items():
+        decode_us = _decode_us(backend, raw, args.dim, args.repeat)
+        redis_mem = f"{memory[name]:.0f}" if name in memory else "n/a"
+        print(f"{name:>8} {len(raw):>8} {len(raw) / json_bytes:>7.2f}x {decode_us:>10.1f} {redis_mem:>10}")
+
+
+if __name__ == "__main__":
+    main()
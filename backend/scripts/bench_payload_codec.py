@@ -0,0 +1,75 @@
+"""Micro-benchmark: size and encode/decode time of cached retrieval payloads per codec.
+
+Builds a retrieval-cache-shaped payload (documents with page content and
+metadata) and reports, for each `PayloadCodec` configuration, the stored
+bytes plus the median encode and decode cost of one cache write/hit.
+
+Usage (from backend/):
+    python -m scripts.bench_payload_codec
+    python -m scripts.bench_payload_codec --docs 20 --chars 1500 --repeat 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+from cache.redis_backend import PayloadCodec, decode_payload  # noqa: E402
+
+
+def _payload(docs: int, chars: int) -> dict:
+    rng = np.random.default_rng(7)
+    words = ["matrícula", "ciclo", "reglamento", "créditos", "plazo", "alumno", "pago", "sede"]
+    return {
+        "docs": [
+            {
+                "page_content": " ".join(rng.choice(words, size=chars // 8)),
+                "metadata": {"source": f"doc_{i}.pdf", "page": i, "score": float(rng.random())},
+            }
+            for i in range(docs)
+        ]
+    }
+
+
+def _median_us(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return float(np.median(samples))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=10)
+    parser.add_argument("--chars", type=int, default=1200)
+    parser.add_argument("--repeat", type=int, default=300)
+    parser.add_argument("--threshold", type=int, default=8192)
+    args = parser.parse_args()
+
+    value = _payload(args.docs, args.chars)
+    codecs = {
+        "json": PayloadCodec(json_codec="json"),
+        "orjson": PayloadCodec(json_codec="orjson"),
+        "orjson+zlib": PayloadCodec(json_codec="orjson", compress_threshold=args.threshold),
+    }
+
+    print(f"{'codec':>12} {'bytes':>8} {'encode_us':>10} {'decode_us':>10}")
+    for name, codec in codecs.items():
+        raw, _ = codec.encode("rag:retrieval:bench", value)
+        encode_us = _median_us(lambda: codec.encode("rag:retrieval:bench", value), args.repeat)
+        decode_us = _median_us(lambda: decode_payload(raw), args.repeat)
+        print(f"{name:>12} {len(raw):>8} {encode_us:>10.1f} {decode_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Micro-benchmark: vectorized MMR / semantic reranking vs the per-pair loops.
+
+Runs `RAGRetriever._apply_mmr` and `RAGRetriever._semantic_reranking` on
+synthetic 1536-dim candidates and compares them with the previous pure-Python
+implementations (kept here as the baseline). Also checks both produce the same
+ordering.
+
+Usage (from backend/):
+    python -m scripts.bench_rerank_mmr
+    python -m scripts.bench_rerank_mmr --sizes 50 100 200 --k 10 --vector-format ndarray
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+from langchain_core.documents import Document  # noqa: E402
+
+from rag.retrieval.retriever import RAGRetriever  # noqa: E402
+
+_DIM = 1536
+
+
+def _loop_mmr(retriever: RAGRetriever, docs, k, query_vec, lambda_mult):
+    embeddings = {}
+    for idx, doc in enumerate(docs):
+        cleaned = retriever._clean_vector(doc.metadata.get("vector"))
+        if cleaned is not None:
+            embeddings[idx] = cleaned
+    selected: list[int] = []
+    remaining = list(embeddings)
+    for _ in range(min(k, len(docs))):
+        scores = []
+        for idx in remaining:
+            relevance = float(np.dot(query_vec, embeddings[idx]))
+            if selected:
+                diversity = 1 - max(float(np.dot(embeddings[idx], embeddings[s])) for s in selected)
+            else:
+                diversity = 1.0
+            scores.append((idx, lambda_mult * relevance + (1 - lambda_mult) * diversity))
+        best = max(scores, key=lambda item: item[1])[0]
+        selected.append(best)
+        remaining.remove(best)
+    return [docs[idx] for idx in selected]
+
+
+def _loop_semantic(retriever: RAGRetriever, docs, query_vec):
+    scored = []
+    for doc in docs:
+        semantic = 0.0
+        cleaned = retriever._clean_vector(doc.metadata.get("vector"))
+        if cleaned is not None:
+            semantic = float(np.dot(query_vec, cleaned))
+        length_score = min(len(doc.page_content.split()) / 100, 1.0)
+        type_score = retriever._get_content_type_score(doc.metadata.get("chunk_type", "text"))
+        scored.append((doc, semantic * 0.75 + length_score * 0.15 + type_score * 0.10))
+    return [doc for doc, _ in sorted(scored, key=lambda item: item[1], reverse=True)]
+
+
+def _build_docs(rng: np.random.Generator, n: int, vector_format: str) -> list[Document]:
+    matrix = rng.standard_normal((n, _DIM)).astype(np.float32)
+    return [
+        Document(
+            page_content=f"doc {i} " + "palabra " * int(rng.integers(1, 150)),
+            metadata={
+                "chunk_type": "text",
+                "vector": matrix[i].tolist() if vector_format == "list" else matrix[i],
+            },
+        )
+        for i in range(n)
+    ]
+
+
+def _time_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return float(np.median(samples))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--lambda-mult", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument(
+        "--vector-format",
+        choices=["list", "ndarray"],
+        default="list",
+        help="list = Qdrant payload shape (includes conversion cost); ndarray = scoring cost only",
+    )
+    args = parser.parse_args()
+
+    retriever = RAGRetriever(vector_store=MagicMock(), embedding_manager=SimpleNamespace(), cache_enabled=False)
+    rng = np.random.default_rng(7)
+    loop = asyncio.new_event_loop()
+
+    print(f"{'n':>5} {'stage':>9} {'loop_ms':>9} {'vector_ms':>10} {'speedup':>8} {'same_order':>11}")
+    for n in args.sizes:
+        docs = _build_docs(rng, n, args.vector_format)
+        query = rng.standard_normal(_DIM).astype(np.float32)
+        query /= np.linalg.norm(query)
+
+        mmr_old = _loop_mmr(retriever, docs, args.k, query, args.lambda_mult)
+        mmr_new = loop.run_until_complete(retriever._apply_mmr(docs, args.k, query, args.lambda_mult))
+        old_ms = _time_ms(lambda: _loop_mmr(retriever, docs, args.k, query, args.lambda_mult), args.repeat)
+        new_ms = _time_ms(
+            lambda: loop.run_until_complete(retriever._apply_mmr(docs, args.k, query, args.lambda_mult)),
+            args.repeat,
+        )
+        same = [id(d) for d in mmr_old] == [id(d) for d in mmr_new]
+        print(f"{n:>5} {'mmr':>9} {old_ms:>9.2f} {new_ms:>10.2f} {old_ms / new_ms:>7.1f}x {str(same):>11}")
+
+        sem_old = _loop_semantic(retriever, docs, query)
+        sem_new = loop.run_until_complete(retriever._semantic_reranking(docs, query))
+        old_ms = _time_ms(lambda: _loop_semantic(retriever, docs, query), args.repeat)
+        new_ms = _time_ms(lambda: loop.run_until_complete(retriever._semantic_reranking(docs, query)), args.repeat)
+        same = [id(d) for d in sem_old] == [id(d) for d in sem_new]
+        print(f"{n:>5} {'semantic':>9} {old_ms:>9.2f} {new_ms:>10.2f} {old_ms / new_ms:>7.1f}x {str(same):>11}")
+
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
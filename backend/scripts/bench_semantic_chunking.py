@@ -0,0 +1,199 @@
+"""Micro-benchmark: batched semantic boundary detection vs per-pair encoding.
+
+Groups a synthetic document of several hundred structural blocks with
+`HierarchicalChunker._group_blocks_into_parents` using a small encoder built
+locally with numpy (hashed token embeddings, two self-attention layers and
+masked mean pooling; no downloads, length-sorted batches like a
+SentenceTransformer). The baseline is the previous implementation, kept
+here, which encoded the two blocks of every candidate boundary in their own
+`encode` call. Also checks both produce the same parent boundaries.
+
+Usage (from backend/):
+    python -m scripts.bench_semantic_chunking
+    python -m scripts.bench_semantic_chunking --sizes 200 500 1000 --dim 384
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+from rag.ingestion.hierarchical_chunker import HierarchicalChunker, StructuralBlock  # noqa: E402
+
+_TOPICS = [
+    "plan tarifa precio mensual descuento pago factura cuota",
+    "horario atencion oficina sede direccion telefono correo",
+    "garantia devolucion reclamo cambio producto plazo",
+    "curso modulo docente certificado clase evaluacion nota",
+    "envio entrega courier seguimiento paquete despacho",
+]
+
+
+class _TinyEncoder:
+    """Encoder local tipo MiniLM en numpy: embeddings de tokens hasheados, capas
+    de self-attention + FFN y mean pooling con máscara. Como SentenceTransformer,
+    ordena por longitud y procesa en lotes con padding."""
+
+    def __init__(self, dim: int = 128, layers: int = 2, vocab: int = 4096, seed: int = 7) -> None:
+        rng = np.random.default_rng(seed)
+        scale = 1 / np.sqrt(dim)
+        self.vocab = vocab
+        self.table = rng.standard_normal((vocab, dim)).astype(np.float32)
+        self.layers = [
+            tuple((rng.standard_normal((dim, dim)) * scale).astype(np.float32) for _ in range(5))
+            for _ in range(layers)
+        ]
+        self.calls = 0
+        self.texts = 0
+
+    def _forward(self, ids: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        hidden = self.table[ids]
+        bias = np.where(mask[:, None, :] > 0, 0.0, -1e9).astype(np.float32)
+        for wq, wk, wv, w1, w2 in self.layers:
+            scores = (hidden @ wq) @ np.swapaxes(hidden @ wk, 1, 2) / np.sqrt(hidden.shape[-1]) + bias
+            scores = np.exp(scores - scores.max(axis=-1, keepdims=True))
+            attention = scores / scores.sum(axis=-1, keepdims=True)
+            hidden = hidden + attention @ (hidden @ wv)
+            hidden = hidden + np.tanh(hidden @ w1) @ w2
+        weights = mask[:, :, None]
+        return (hidden * weights).sum(axis=1) / weights.sum(axis=1)
+
+    def encode(self, texts, batch_size: int = 32, show_progress_bar: bool = False):
+        self.calls += 1
+        self.texts += len(texts)
+        tokenized = [
+            [zlib.crc32(token.encode()) % self.vocab for token in text.lower().split()] or [0] for text in texts
+        ]
+        order = sorted(range(len(tokenized)), key=lambda index: -len(tokenized[index]))
+        output = np.zeros((len(texts), self.table.shape[1]), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            rows = order[start:start + batch_size]
+            width = max(len(tokenized[row]) for row in rows)
+            ids = np.zeros((len(rows), width), dtype=np.int64)
+            mask = np.zeros((len(rows), width), dtype=np.float32)
+            for position, row in enumerate(rows):
+                ids[position, : len(tokenized[row])] = tokenized[row]
+                mask[position, : len(tokenized[row])] = 1.0
+            output[rows] = self._forward(ids, mask)
+        return output
+
+
+class _BenchChunker(HierarchicalChunker):
+    def __init__(self, model, threshold: float) -> None:
+        super().__init__(
+            parent_target_tokens=300,
+            parent_max_tokens=400,
+            parent_min_tokens=200,
+            parent_overlap_tokens=0,
+            child_overlap_tokens=0,
+        )
+        self._semantic_model = model
+        self._semantic_threshold = threshold
+
+    def _get_or_load_semantic_model(self):
+        return self._semantic_model
+
+
+class _PairwiseChunker(_BenchChunker):
+    """Implementación anterior: un `encode` de dos bloques por frontera candidata."""
+
+    def _encode_semantic_blocks(self, model, blocks):
+        return {block.order: None for block in blocks if block.block_type != "header"}
+
+    def _is_semantic_topic_shift(self, embeddings, block_a, block_b) -> bool:
+        try:
+            embs = self._semantic_model.encode([block_a.content[:500], block_b.content[:500]], show_progress_bar=False)
+            norm_a = float(np.linalg.norm(embs[0]))
+            norm_b = float(np.linalg.norm(embs[1]))
+            if norm_a < 1e-8 or norm_b < 1e-8:
+                return False
+            cos_sim = float(np.dot(embs[0], embs[1]) / (norm_a * norm_b))
+            return cos_sim < self._semantic_threshold
+        except Exception:
+            return False
+
+
+def _build_blocks(rng: np.random.Generator, n: int) -> list[StructuralBlock]:
+    blocks = []
+    topic = 0
+    for order in range(n):
+        if rng.random() < 0.08:
+            topic = int(rng.integers(len(_TOPICS)))
+        words = _TOPICS[topic].split()
+        content = " ".join(rng.choice(words, size=int(rng.integers(25, 60))))
+        blocks.append(
+            StructuralBlock(
+                content=content,
+                page_number=order // 10 + 1,
+                order=order,
+                block_type="paragraph",
+                section_title=None,
+                token_count=len(content.split()),
+                contains_table=False,
+                contains_numeric=False,
+                contains_date_like=False,
+            )
+        )
+    return blocks
+
+
+def _boundaries(groups) -> list[int]:
+    return [group[0].order for group in groups]
+
+
+def _time_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return float(np.median(samples))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 500, 1000])
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    model = _TinyEncoder(dim=args.dim)
+    batched = _BenchChunker(model, args.threshold)
+    pairwise = _PairwiseChunker(model, args.threshold)
+
+    print(
+        f"{'blocks':>7} {'pair_calls':>11} {'pair_texts':>11} {'batch_calls':>12} {'batch_texts':>12} "
+        f"{'pair_ms':>9} {'batch_ms':>9} {'speedup':>8} {'parents':>8} {'same':>5}"
+    )
+    for n in args.sizes:
+        blocks = _build_blocks(rng, n)
+
+        model.calls = model.texts = 0
+        old_groups = pairwise._group_blocks_into_parents(blocks)
+        pair_calls, pair_texts = model.calls, model.texts
+        model.calls = model.texts = 0
+        new_groups = batched._group_blocks_into_parents(blocks)
+        batch_calls, batch_texts = model.calls, model.texts
+
+        old_ms = _time_ms(lambda: pairwise._group_blocks_into_parents(blocks), args.repeat)
+        new_ms = _time_ms(lambda: batched._group_blocks_into_parents(blocks), args.repeat)
+        same = _boundaries(old_groups) == _boundaries(new_groups)
+        print(
+            f"{n:>7} {pair_calls:>11} {pair_texts:>11} {batch_calls:>12} {batch_texts:>12} {old_ms:>9.1f} {new_ms:>9.1f} "
+            f"{old_ms / new_ms:>7.1f}x {len(new_groups):>8} {str(same):>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Repair: rebuild the corpus centroid running stats from a full Qdrant scroll.
+
+Normal operation never needs this — ingest/delete keep the stats current.
+Run it after restoring Qdrant from a backup, flushing Redis, or whenever the
+out-of-scope check looks off. Single-flight across workers: if another
+process is already rebuilding, this exits without scanning.
+
+Usage (from backend/):
+    python -m scripts.rebuild_corpus_centroid
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from config import settings  # noqa: E402
+from rag.corpus_centroid import rebuild_centroid_stats  # noqa: E402
+from rag.corpus_state import bump_corpus_cache_version  # noqa: E402
+from rag.embeddings.embedding_manager import EmbeddingManager  # noqa: E402
+from rag.vector_store.vector_store import VectorStore  # noqa: E402
+
+
+async def main() -> None:
+    vector_store = VectorStore(
+        embedding_function=EmbeddingManager(model_name=settings.embedding_model),
+        distance_strategy=settings.distance_strategy,
+        cache_enabled=False,
+        cache_ttl=settings.cache_ttl,
+        batch_size=settings.batch_size,
+        collection_name=settings.rag_child_collection_name,
+    )
+    centroid = await rebuild_centroid_stats(vector_store)
+    if centroid is None:
+        print("Centroid not rebuilt (empty corpus, Qdrant unavailable, or a rebuild is already running).")
+        return
+    # Workers cache the centroid per corpus version; bump it so they re-read.
+    version = bump_corpus_cache_version()
+    print(f"Centroid stats rebuilt | dim={centroid.shape[0]} | corpus_version={version}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
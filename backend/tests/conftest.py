@@ -66,6 +66,9 @@ def _install_qdrant_stubs() -> None:
     qdrant_models_module.HnswConfigDiff = type("HnswConfigDiff", (_ModelBase,), {})
     qdrant_models_module.OptimizersConfigDiff = type("OptimizersConfigDiff", (_ModelBase,), {})
     qdrant_models_module.NearestQuery = type("NearestQuery", (_ModelBase,), {})
+    qdrant_models_module.PointIdsList = type("PointIdsList", (_ModelBase,), {})
+    qdrant_models_module.SetPayload = type("SetPayload", (_ModelBase,), {})
+    qdrant_models_module.SetPayloadOperation = type("SetPayloadOperation", (_ModelBase,), {})
 
     sys.modules["qdrant_client"] = qdrant_module
     sys.modules["qdrant_client.http"] = qdrant_http_module
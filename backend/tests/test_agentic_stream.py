@@ -0,0 +1,256 @@
+"""End-to-end tests for the agentic ReAct loop in chat.handlers.agentic.stream_with_tools."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessageChunk, HumanMessage, SystemMessage, ToolMessage
+
+import chat.handlers.agentic as agentic_mod
+from core.tools import ToolDefinition, ToolResult, registry
+from core.tools.retrieval_tool import SEARCH_SCHEMA, SEARCH_TOOL_NAME
+
+
+pytestmark = pytest.mark.anyio
+
+
+class _FakeLocks:
+    async def acquire(self, conversation_id):
+        return object(), True
+
+    async def release(self, conversation_id, lock, acquired):
+        return None
+
+
+class _FakeDB:
+    def __init__(self):
+        self.messages = []
+
+    async def add_message(self, conversation_id, role, content, source=None):
+        self.messages.append((role, content))
+
+    async def add_turn(self, conversation_id, user_content, assistant_content, source=None):
+        self.messages.append(("user", user_content))
+        if assistant_content:
+            self.messages.append(("assistant", assistant_content))
+
+
+class _FakeMemory:
+    def __init__(self, history=None):
+        self.history = list(history or [])
+        self.reads = 0
+
+    async def get_history(self, session_id):
+        self.reads += 1
+        return list(self.history)
+
+
+class _FakeBot:
+    def __init__(self, *, replies, memory=None):
+        self.memory = memory or _FakeMemory()
+        self.chain_manager = SimpleNamespace(tools=[SimpleNamespace(name=SEARCH_TOOL_NAME)])
+        self._replies = list(replies)
+        self.model_calls = []
+        self.added = []
+
+    async def aprepare_messages(self, bot_input):
+        await self.memory.get_history(bot_input["conversation_id"])
+        return [SystemMessage(content="sistema"), HumanMessage(content=bot_input["input"])]
+
+    async def astream_messages(self, messages, tool_choice=None):
+        self.model_calls.append({"messages": list(messages), "tool_choice": tool_choice})
+        for chunk in self._replies.pop(0):
+            yield chunk
+
+    async def astream_messages_no_tools(self, messages):
+        self.model_calls.append({"messages": list(messages), "tool_choice": "none"})
+        yield AIMessageChunk(content="final")
+
+    async def add_to_memory(self, human, ai, conversation_id):
+        self.added.append((human, ai))
+
+
+def _tool_call_chunk(query: str) -> AIMessageChunk:
+    return AIMessageChunk(
+        content="",
+        tool_call_chunks=[{"name": SEARCH_TOOL_NAME, "args": f'{{"query": "{query}"}}', "id": "call_1", "index": 0}],
+    )
+
+
+@pytest.fixture(autouse=True)
+def _no_phantom_gap_logging(monkeypatch):
+    import chat.grounding
+
+    monkeypatch.setattr(chat.grounding, "maybe_log_phantom_gap", lambda **kwargs: None)
+
+
+@pytest.fixture
+def search_calls():
+    calls = []
+
+    async def _handler(args, ctx):
+        calls.append({"args": dict(args), "prior": list((ctx.extra or {}).get("prior_user_msgs") or [])})
+        return ToolResult(content=f"contexto para {args['query']}")
+
+    registry.unregister(SEARCH_TOOL_NAME)
+    registry.register(
+        ToolDefinition(name=SEARCH_TOOL_NAME, schema=SEARCH_SCHEMA, mode="continuation", handler=_handler)
+    )
+    yield calls
+    registry.unregister(SEARCH_TOOL_NAME)
+
+
+async def _run(bot, text="cual es el precio del plan premium"):
+    events = []
+    async for event in agentic_mod.stream_with_tools(
+        bot=bot,
+        db=_FakeDB(),
+        locks=_FakeLocks(),
+        input_text=text,
+        conversation_id="conv-1",
+    ):
+        events.append(event)
+    return events
+
+
+async def test_forced_search_runs_locally_and_skips_tool_selection_call(search_calls, monkeypatch):
+    monkeypatch.setattr(agentic_mod.settings, "agentic_forced_search_fast_path", True, raising=False)
+    bot = _FakeBot(replies=[[AIMessageChunk(content="El plan premium cuesta 10 soles al mes.")]])
+
+    events = await _run(bot)
+
+    assert [call["args"]["query"] for call in search_calls] == ["cual es el precio del plan premium"]
+    assert len(bot.model_calls) == 1
+    first = bot.model_calls[0]
+    assert first["tool_choice"] is None
+    assert isinstance(first["messages"][-1], ToolMessage)
+    assert first["messages"][-1].content == "contexto para cual es el precio del plan premium"
+    assert "".join(e.text for e in events if e.kind == "text") == "El plan premium cuesta 10 soles al mes."
+
+
+async def test_fast_path_disabled_keeps_forced_tool_choice(search_calls, monkeypatch):
+    monkeypatch.setattr(agentic_mod.settings, "agentic_forced_search_fast_path", False, raising=False)
+    bot = _FakeBot(
+        replies=[
+            [_tool_call_chunk("precio plan premium")],
+            [AIMessageChunk(content="Cuesta 10 soles.")],
+        ]
+    )
+
+    await _run(bot)
+
+    assert len(bot.model_calls) == 2
+    assert bot.model_calls[0]["tool_choice"]["function"]["name"] == SEARCH_TOOL_NAME
+    assert [call["args"]["query"] for call in search_calls] == ["precio plan premium"]
+
+
+async def test_greeting_does_not_trigger_fast_path(search_calls, monkeypatch):
+    monkeypatch.setattr(agentic_mod.settings, "agentic_forced_search_fast_path", True, raising=False)
+    bot = _FakeBot(replies=[[AIMessageChunk(content="Hola, en que te ayudo?")]])
+
+    await _run(bot, text="hola")
+
+    assert search_calls == []
+    assert len(bot.model_calls) == 1 and bot.model_calls[0]["tool_choice"] is None
+
+
+async def test_fast_path_counts_toward_iteration_cap(search_calls, monkeypatch):
+    monkeypatch.setattr(agentic_mod.settings, "agentic_forced_search_fast_path", True, raising=False)
+    bot = _FakeBot(replies=[[_tool_call_chunk(f"q{i}")] for i in range(agentic_mod.MAX_TOOL_ITERS)])
+
+    events = await _run(bot)
+
+    assert len(search_calls) == agentic_mod.MAX_TOOL_ITERS
+    assert bot.model_calls[-1]["tool_choice"] == "none"
+    assert "".join(e.text for e in events if e.kind == "text") == "final"
+
+
+def _real_bot(memory, replies):
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+    from core.bot import Bot
+
+    class _ChainManager:
+        tools = [SimpleNamespace(name=SEARCH_TOOL_NAME)]
+        message_chain = ChatPromptTemplate.from_messages(
+            [("system", "{context}"), MessagesPlaceholder("history"), ("human", "{input}")]
+        )
+        runnable_chain = message_chain
+
+        def override_chain(self, chain):
+            self.runnable_chain = chain
+
+    bot = Bot.__new__(Bot)
+    bot.settings = SimpleNamespace(enable_agentic_rag=True, mock_mode=False)
+    bot.logger = agentic_mod.logger
+    bot._memory = memory
+    bot.rag_retriever = None
+    bot.chain_manager = _ChainManager()
+    bot._build_pipeline()
+    fake = _FakeBot(replies=replies, memory=memory)
+    bot.astream_messages = fake.astream_messages
+    bot.astream_messages_no_tools = fake.astream_messages_no_tools
+    bot.add_to_memory = fake.add_to_memory
+    return bot, fake
+
+
+async def test_agentic_turn_reads_history_from_memory_once(search_calls, monkeypatch):
+    monkeypatch.setattr(agentic_mod.settings, "agentic_forced_search_fast_path", False, raising=False)
+    memory = _FakeMemory(
+        history=[
+            {"role": "human", "content": "quiero informacion del plan premium"},
+            {"role": "ai", "content": "Claro, que deseas saber?"},
+        ]
+    )
+    bot, fake = _real_bot(
+        memory,
+        replies=[[_tool_call_chunk("y cuanto")], [AIMessageChunk(content="Cuesta 10 soles.")]],
+    )
+
+    await _run(bot, text="y cuanto cuesta")
+
+    assert memory.reads == 1
+    # Both consumers saw the same snapshot: the prompt history and the query expansion.
+    rendered = fake.model_calls[0]["messages"]
+    assert [m.content for m in rendered[1:3]] == ["quiero informacion del plan premium", "Claro, que deseas saber?"]
+    assert search_calls[0]["prior"] == ["quiero informacion del plan premium"]
+
+
+async def test_history_snapshot_is_per_turn(search_calls, monkeypatch):
+    monkeypatch.setattr(agentic_mod.settings, "agentic_forced_search_fast_path", True, raising=False)
+    memory = _FakeMemory()
+    bot, _ = _real_bot(
+        memory,
+        replies=[[AIMessageChunk(content="uno")], [AIMessageChunk(content="dos")]],
+    )
+
+    await _run(bot)
+    await _run(bot)
+
+    assert memory.reads == 2
+
+
+async def test_token_accounting_encodes_each_message_once(search_calls, monkeypatch):
+    import chat.debug
+
+    monkeypatch.setattr(agentic_mod.settings, "agentic_forced_search_fast_path", False, raising=False)
+    encoded: list[str] = []
+    monkeypatch.setattr(chat.debug, "get_token_count", lambda text: encoded.append(text) or len(text.split()))
+    history = []
+    for i in range(10):
+        history.append({"role": "human", "content": f"pregunta numero {i}"})
+        history.append({"role": "ai", "content": f"respuesta numero {i}"})
+    bot, fake = _real_bot(
+        _FakeMemory(history=history),
+        replies=[[_tool_call_chunk("q0")], [_tool_call_chunk("q1")], [_tool_call_chunk("q2")]],
+    )
+
+    await _run(bot)
+
+    # 3 model iterations + forced final over system + 20 history + input + 3 tool rounds.
+    final_messages = fake.model_calls[-1]["messages"]
+    assert len(final_messages) == 1 + 20 + 1 + 2 * 3
+    assert sum(1 for text in encoded if text.startswith("pregunta numero 0")) == 1
+    # One encode per message content, one per tool call, one for the response text.
+    tool_call_encodes = 3
+    assert len(encoded) == len(final_messages) + tool_call_encodes + 1
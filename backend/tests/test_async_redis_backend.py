@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+
+import numpy as np
+import pytest
+
+import cache.manager as manager_mod
+from cache.async_redis_backend import AsyncRedisCache
+from cache.memory_backend import InMemoryCache
+from cache.redis_backend import RedisCache
+from cache.vector_codec import to_cache_vector
+from tests.test_cache_batch import _FakeRedis, _manager_with
+
+
+pytestmark = pytest.mark.anyio
+
+
+class _FakeAsyncPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def set(self, name, value, ex=None):
+        self.commands.append((name, value))
+
+    async def execute(self):
+        self.client.round_trips += 1
+        for name, value in self.commands:
+            self.client.store[name] = value
+        return [True] * len(self.commands)
+
+
+class _FakeAsyncRedis:
+    """redis.asyncio.Redis mínimo sobre el mismo dict que `_FakeRedis`."""
+
+    def __init__(self, store=None):
+        self.store: dict = store if store is not None else {}
+        self.round_trips = 0
+        self.unlinked: list = []
+
+    async def get(self, key):
+        self.round_trips += 1
+        return self.store.get(key)
+
+    async def mget(self, keys):
+        self.round_trips += 1
+        return [self.store.get(key) for key in keys]
+
+    async def set(self, name, value, ex=None):
+        self.round_trips += 1
+        self.store[name] = value
+
+    def pipeline(self, transaction=True):
+        assert transaction is False
+        return _FakeAsyncPipeline(self)
+
+    async def unlink(self, *keys):
+        self.round_trips += 1
+        self.unlinked.append(list(keys))
+        for key in keys:
+            self.store.pop(key, None)
+
+    async def scan_iter(self, match=None):
+        prefix = match.rstrip("*")
+        for key in list(self.store):
+            if key.startswith(prefix):
+                yield key
+
+    async def setnx(self, key, value):
+        self.store.setdefault(key, str(value).encode())
+
+    async def incrby(self, key, delta):
+        value = int(self.store[key]) + int(delta)
+        self.store[key] = str(value).encode()
+        return value
+
+
+@pytest.fixture
+def no_threads(monkeypatch):
+    async def _forbidden(*args, **kwargs):
+        raise AssertionError("async cache path must not hop to a thread")
+
+    monkeypatch.setattr(manager_mod.asyncio, "to_thread", _forbidden)
+
+
+def _async_manager(client):
+    manager = _manager_with(RedisCache(client=_FakeRedis()))
+    manager.async_backend = AsyncRedisCache(client=client)
+    return manager
+
+
+async def test_async_api_uses_native_backend_without_threads(no_threads):
+    client = _FakeAsyncRedis()
+    manager = _async_manager(client)
+
+    await manager.aset("resp:k", "hola", ttl=30)
+    await manager.aset_many({"a": 1, "b": {"x": 2}})
+
+    assert await manager.aget("resp:k") == "hola"
+    assert await manager.aget_many(["a", "b", "a", "missing"]) == {"a": 1, "b": {"x": 2}}
+    assert await manager.aincrement("meta:v") == 1
+
+
+async def test_async_and_sync_backends_share_the_wire_format():
+    sync_client = _FakeRedis()
+    async_backend = AsyncRedisCache(client=_FakeAsyncRedis(store=sync_client.store))
+    sync_backend = RedisCache(client=sync_client)
+    vector = to_cache_vector(np.arange(8, dtype=np.float32))
+
+    await async_backend.set("emb:query:m:x", vector, ttl=60)
+    sync_backend.set("rag:ts:doc_1", "1.5", ttl=0)
+
+    assert np.array_equal(sync_backend.get("emb:query:m:x"), vector)
+    assert await async_backend.get("rag:ts:doc_1") == "1.5"
+
+
+async def test_corrupt_entry_is_dropped_as_miss():
+    client = _FakeAsyncRedis(store={"legacy": b"PKL:xxx", "vec": b"VEC1broken"})
+    backend = AsyncRedisCache(client=client)
+
+    assert await backend.get_many(["legacy", "vec"]) == {}
+    assert client.store == {}
+
+
+async def test_set_many_and_prefix_invalidation_batch_round_trips():
+    client = _FakeAsyncRedis()
+    backend = AsyncRedisCache(client=client)
+
+    await backend.set_many({f"rag:retrieval:{i}": i for i in range(20)}, ttl=10)
+    assert client.round_trips == 1
+
+    client.store["other"] = b"JSON:1"
+    await backend.invalidate_prefix("rag:retrieval:")
+    assert list(client.store) == ["other"]
+    assert client.unlinked == [[f"rag:retrieval:{i}" for i in range(20)]]
+
+
+async def test_backend_errors_degrade_to_miss():
+    class _Down(_FakeAsyncRedis):
+        async def get(self, key):
+            raise ConnectionError("redis down")
+
+    manager = _async_manager(_Down())
+
+    assert await manager.aget("k") is None
+    assert manager.is_degraded is True
+
+
+async def test_in_memory_fallback_runs_inline(no_threads):
+    manager = _manager_with(InMemoryCache(max_size=10))
+    manager.async_backend = None
+
+    await manager.aset("k", "v")
+    assert await manager.aget("k") == "v"
+
+
+def test_one_client_per_event_loop():
+    created = []
+
+    def _factory():
+        created.append(_FakeAsyncRedis())
+        return created[-1]
+
+    backend = AsyncRedisCache(client_factory=_factory)
+
+    async def _touch():
+        await backend.set("k", 1, ttl=0)
+        await backend.get("k")
+
+    asyncio.run(_touch())
+    asyncio.run(_touch())
+
+    assert len(created) == 2
+    assert all(client.round_trips == 2 for client in created)
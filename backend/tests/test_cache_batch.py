@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from cache.manager import CacheManager
+from cache.memory_backend import InMemoryCache
+from cache.redis_backend import RedisCache
+
+
+pytestmark = pytest.mark.anyio
+
+
+class _FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def set(self, name, value, ex=None):
+        self.commands.append((name, value, ex))
+
+    def execute(self):
+        self.client.round_trips += 1
+        for name, value, _ in self.commands:
+            self.client.store[name] = value
+        return [True] * len(self.commands)
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.store: dict[str, bytes] = {}
+        self.round_trips = 0
+        self.deleted: list[str] = []
+
+    def get(self, key):
+        self.round_trips += 1
+        return self.store.get(key)
+
+    def mget(self, keys):
+        self.round_trips += 1
+        return [self.store.get(key) for key in keys]
+
+    def set(self, name, value, ex=None):
+        self.round_trips += 1
+        self.store[name] = value
+
+    def pipeline(self, transaction=True):
+        assert transaction is False
+        return _FakePipeline(self)
+
+    def unlink(self, key):
+        self.deleted.append(key)
+        self.store.pop(key, None)
+
+
+def _manager_with(backend) -> CacheManager:
+    manager = CacheManager.__new__(CacheManager)
+    manager.ttl = 60
+    manager.max_size = 100
+    manager.is_degraded = False
+    manager.backend_type = type(backend).__name__
+    manager.backend = backend
+    return manager
+
+
+def test_redis_get_many_uses_single_mget_and_returns_hits_only():
+    client = _FakeRedis()
+    backend = RedisCache(client=client)
+    backend.set_many({"a": [1, 2], "b": {"x": 1}}, ttl=30)
+    client.store["legacy"] = b"PKL:xxx"
+    client.round_trips = 0
+
+    values = backend.get_many(["a", "b", "missing", "legacy"])
+
+    assert values == {"a": [1, 2], "b": {"x": 1}}
+    assert client.round_trips == 1
+    assert client.deleted == ["legacy"]
+
+
+def test_redis_set_many_pipelines_writes_in_one_round_trip():
+    client = _FakeRedis()
+    backend = RedisCache(client=client)
+
+    backend.set_many({f"k{i}": i for i in range(32)}, ttl=10)
+
+    assert client.round_trips == 1
+    assert backend.get("k31") == 31
+
+
+def test_in_memory_get_many_and_set_many():
+    backend = InMemoryCache(max_size=10)
+    backend.set_many({"a": 1, "b": 2}, ttl=60)
+
+    assert backend.get_many(["a", "b", "c"]) == {"a": 1, "b": 2}
+
+
+async def test_cache_manager_batch_api_dedupes_and_degrades_on_errors():
+    backend = InMemoryCache(max_size=10)
+    manager = _manager_with(backend)
+    await manager.aset_many({"a": 1, "b": 2})
+
+    assert await manager.aget_many(["a", "a", "b", None]) == {"a": 1, "b": 2}
+
+    broken = SimpleNamespace(get_many=lambda keys: (_ for _ in ()).throw(RuntimeError("down")))
+    manager.backend = broken
+    assert manager.get_many(["a"]) == {}
+    assert manager.is_degraded is True
+
+
+def test_embed_documents_batch_costs_one_read_and_one_write(monkeypatch):
+    import rag.embeddings.embedding_manager as em_mod
+
+    client = _FakeRedis()
+    manager = _manager_with(RedisCache(client=client))
+    monkeypatch.setattr(em_mod, "cache", manager)
+    monkeypatch.setattr(
+        em_mod,
+        "settings",
+        SimpleNamespace(mock_mode=False, default_embedding_dimension=4, embedding_batch_size=64),
+    )
+
+    embedder = em_mod.EmbeddingManager.__new__(em_mod.EmbeddingManager)
+    embedder.model_name = "openai:test"
+    embedder.logger = em_mod.get_logger("test")
+    embedder._batch_size = 64
+    embedder._embed_batch_with_retry = lambda texts: [[0.1, 0.2, 0.3, 0.4] for _ in texts]
+
+    texts = [f"texto numero {i}" for i in range(32)]
+    first = embedder.embed_documents(texts)
+    assert len(first) == 32
+    # MGET of namespace generations (cache/namespaces.py, once per refresh window)
+    # + MGET (all misses) + pipelined SET.
+    assert client.round_trips == 3
+
+    client.round_trips = 0
+    embedder._embed_batch_with_retry = lambda texts: pytest.fail("should be served from cache")
+    second = embedder.embed_documents(texts)
+    # Cached as float32 bytes (cache.vector_codec), so values round-trip at float32 precision.
+    assert np.allclose(second, first, rtol=1e-6)
+    assert client.round_trips == 1
+
+
+def _retrieval_cache(retriever, monkeypatch):
+    import rag.retrieval.retriever as retriever_mod
+
+    manager = _manager_with(InMemoryCache(max_size=100))
+    manager.l1 = None
+    monkeypatch.setattr(retriever_mod, "cache", manager)
+    retriever.cache_enabled = True
+    retriever_mod.settings.enable_cache = True
+    key = retriever._build_retrieval_cache_key(
+        query="q", k=4, filter_criteria=None, use_semantic_ranking=False, use_mmr=False,
+    )
+    return manager, key
+
+
+def _count_reads(manager, monkeypatch):
+    reads = []
+    original_aget_many = manager.aget_many
+
+    async def _aget_many(keys):
+        reads.append(list(keys))
+        return await original_aget_many(keys)
+
+    monkeypatch.setattr(manager, "aget_many", _aget_many)
+    return reads
+
+
+async def _lookup(retriever):
+    return await retriever._aget_cached_result(
+        query="q", k=4, filter_criteria=None, use_semantic_ranking=False, use_mmr=False,
+    )
+
+
+def test_cached_retrieval_validation_reads_all_doc_timestamps_at_once(retriever, monkeypatch):
+    manager, key = _retrieval_cache(retriever, monkeypatch)
+    doc_ids = [f"doc_{i}" for i in range(10)]
+    manager.set_many({f"rag:ts:{doc_id}": "1.0" for doc_id in doc_ids})
+    # Entrada previa a la huella `ts_epoch`: se valida documento a documento.
+    manager.set(key, {"kind": "no_context", "reason": "x", "doc_timestamps": {d: "1.0" for d in doc_ids}})
+
+    reads = []
+    original_get_many = manager.get_many
+    monkeypatch.setattr(manager, "get_many", lambda keys: reads.append(list(keys)) or original_get_many(keys))
+
+    hit = retriever._get_cached_result(
+        query="q", k=4, filter_criteria=None, use_semantic_ranking=False, use_mmr=False,
+    )
+
+    assert hit is not None
+    assert len(reads) == 2 and len(reads[1]) == 10
+    # Sin época en caché no se re-sella: la próxima lectura vuelve a validar.
+    assert "ts_epoch" not in manager.get(key)
+
+
+async def test_cached_retrieval_hit_with_current_epoch_costs_one_read(retriever, monkeypatch):
+    from rag.corpus_state import DOC_TS_EPOCH_KEY
+
+    manager, key = _retrieval_cache(retriever, monkeypatch)
+    doc_ids = [f"doc_{i}" for i in range(10)]
+    manager.set_many({f"rag:ts:{doc_id}": "1.0" for doc_id in doc_ids})
+    manager.set(DOC_TS_EPOCH_KEY, "epoch-1", 0)
+    docs = [Document(page_content=f"texto {d}", metadata={"doc_id": d}) for d in doc_ids]
+    await retriever._astore_cached_result(
+        query="q", k=4, filter_criteria=None, documents=docs, reason="accepted",
+        use_semantic_ranking=False, use_mmr=False,
+    )
+    reads = _count_reads(manager, monkeypatch)
+
+    hit = await _lookup(retriever)
+
+    assert hit is not None and len(hit.documents) == 10
+    assert reads == [[key, DOC_TS_EPOCH_KEY]]
+
+
+async def test_reingested_document_misses_and_untouched_entries_are_resealed(retriever, monkeypatch):
+    from rag.corpus_state import DOC_TS_EPOCH_KEY, amark_documents_updated
+
+    manager, key = _retrieval_cache(retriever, monkeypatch)
+    manager.set_many({"rag:ts:doc_a": "1.0", "rag:ts:doc_b": "1.0"})
+    docs = [Document(page_content="a", metadata={"doc_id": "doc_a"})]
+    await retriever._astore_cached_result(
+        query="q", k=4, filter_criteria=None, documents=docs, reason="accepted",
+        use_semantic_ranking=False, use_mmr=False,
+    )
+    monkeypatch.setattr("rag.corpus_state.cache", manager)
+
+    # Otro documento cambió: la época sube, la entrada sigue válida y se re-sella.
+    await amark_documents_updated(["doc_b"])
+    assert await _lookup(retriever) is not None
+    assert manager.get(key)["ts_epoch"] == manager.get(DOC_TS_EPOCH_KEY) is not None
+    reads = _count_reads(manager, monkeypatch)
+    assert await _lookup(retriever) is not None
+    assert len(reads) == 1
+
+    # El documento citado cambió: miss.
+    await amark_documents_updated(["doc_a"])
+    assert await _lookup(retriever) is None
+
+
+async def test_evicted_epoch_never_revalidates_an_old_seal(retriever, monkeypatch):
+    from rag.corpus_state import DOC_TS_EPOCH_KEY, amark_documents_updated
+
+    manager, key = _retrieval_cache(retriever, monkeypatch)
+    monkeypatch.setattr("rag.corpus_state.cache", manager)
+    await amark_documents_updated(["doc_a", "doc_b"])
+    docs = [Document(page_content="a", metadata={"doc_id": "doc_a"})]
+    await retriever._astore_cached_result(
+        query="q", k=4, filter_criteria=None, documents=docs, reason="accepted",
+        use_semantic_ranking=False, use_mmr=False,
+    )
+    sealed_epoch = manager.get(key)["ts_epoch"]
+
+    # Redis desaloja la época; sin ella cada hit revalida sus timestamps.
+    manager.delete(DOC_TS_EPOCH_KEY)
+    reads = _count_reads(manager, monkeypatch)
+    assert await _lookup(retriever) is not None
+    assert len(reads) == 2
+
+    # La siguiente escritura crea una época nueva, distinta del sello viejo.
+    await amark_documents_updated(["doc_a"])
+    assert manager.get(DOC_TS_EPOCH_KEY) != sealed_epoch
+    assert await _lookup(retriever) is None
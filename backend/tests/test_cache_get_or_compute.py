@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+import cache.manager as manager_mod
+from cache.memory_backend import InMemoryCache
+from cache.redis_backend import RedisCache
+from tests.test_cache_batch import _FakeRedis, _manager_with
+
+
+pytestmark = pytest.mark.anyio
+
+
+class _LockingRedis(_FakeRedis):
+    """Añade SET NX/EX y el EVAL del release de `RedisAdvisoryLock`."""
+
+    def set(self, name, value, ex=None, nx=False):
+        if nx and name in self.store:
+            return None
+        return super().set(name, value, ex=ex) or True
+
+    def eval(self, script, numkeys, key, token):
+        if self.store.get(key) == token:
+            del self.store[key]
+            return 1
+        return 0
+
+
+def _local_manager():
+    manager = _manager_with(InMemoryCache(max_size=100))
+    manager.l1 = None
+    return manager
+
+
+def _counting(value="valor", delay=0.01):
+    calls = []
+
+    async def _compute():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return value
+
+    return _compute, calls
+
+
+async def test_concurrent_misses_share_one_computation():
+    manager = _local_manager()
+    compute, calls = _counting()
+
+    results = await asyncio.gather(*(manager.aget_or_compute("dashboard:overview", compute, ttl=60) for _ in range(20)))
+
+    assert results == ["valor"] * 20
+    assert len(calls) == 1
+    assert await manager.aget_or_compute("dashboard:overview", compute, ttl=60) == "valor"
+    assert len(calls) == 1
+
+
+async def test_none_and_errors_are_not_cached():
+    manager = _local_manager()
+    outcomes = iter([None, RuntimeError("mongo caido"), "ok"])
+
+    async def _compute():
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert await manager.aget_or_compute("k", _compute, ttl=60) is None
+    with pytest.raises(RuntimeError):
+        await asyncio.gather(manager.aget_or_compute("k", _compute, ttl=60), manager.aget_or_compute("k", _compute, ttl=60))
+    assert await manager.aget_or_compute("k", _compute, ttl=60) == "ok"
+
+
+async def test_entry_close_to_expiry_is_refreshed_in_background(monkeypatch):
+    manager = _local_manager()
+    compute, calls = _counting(value="nuevo")
+    manager.set("hyde:hyp:m:q", {"__goc__": 1, "v": "viejo", "d": 0.5, "x": time.time() + 1}, ttl=60)
+    monkeypatch.setattr(manager_mod.random, "random", lambda: 0.01)  # -ln(0.01)*0.5 ≈ 2.3s > 1s left
+
+    served = await manager.aget_or_compute("hyde:hyp:m:q", compute, ttl=60)
+    await asyncio.gather(*manager._goc_background)
+
+    assert served == "viejo"
+    assert len(calls) == 1
+    assert manager.get("hyde:hyp:m:q")["v"] == "nuevo"
+
+
+async def test_fresh_entry_is_not_refreshed(monkeypatch):
+    manager = _local_manager()
+    compute, calls = _counting()
+    manager.set("k", {"__goc__": 1, "v": "actual", "d": 0.01, "x": time.time() + 3600}, ttl=60)
+    monkeypatch.setattr(manager_mod.random, "random", lambda: 0.01)
+
+    assert await manager.aget_or_compute("k", compute, ttl=60) == "actual"
+    assert calls == []
+
+
+async def test_legacy_unwrapped_value_is_recomputed():
+    manager = _local_manager()
+    manager.set("dashboard:leads", {"total": 1}, ttl=60)
+    compute, calls = _counting(value={"total": 2})
+
+    assert await manager.aget_or_compute("dashboard:leads", compute, ttl=60) == {"total": 2}
+    assert len(calls) == 1
+
+
+async def test_worker_without_the_lock_waits_for_the_other_workers_value():
+    client = _LockingRedis()
+    manager = _manager_with(RedisCache(client=client))
+    manager.l1 = None
+    client.store["lock:compute:dashboard:peak_hours"] = "otro-worker"
+    compute, calls = _counting()
+
+    async def _other_worker_finishes():
+        await asyncio.sleep(0.1)
+        manager.set("dashboard:peak_hours", {"__goc__": 1, "v": "del otro", "d": 0.1, "x": time.time() + 60}, ttl=60)
+
+    result, _ = await asyncio.gather(
+        manager.aget_or_compute("dashboard:peak_hours", compute, ttl=60, wait_timeout=2.0),
+        _other_worker_finishes(),
+    )
+
+    assert result == "del otro"
+    assert calls == []
+
+
+async def test_lock_holder_computes_and_releases():
+    client = _LockingRedis()
+    manager = _manager_with(RedisCache(client=client))
+    manager.l1 = None
+    compute, calls = _counting()
+
+    assert await manager.aget_or_compute("dashboard:overview", compute, ttl=60) == "valor"
+    assert len(calls) == 1
+    assert "lock:compute:dashboard:overview" not in client.store
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import queue
+import time
+
+import pytest
+
+from cache.l1 import INVALIDATION_CHANNEL, L1Tier
+from cache.memory_backend import InMemoryCache
+from cache.redis_backend import RedisCache
+from tests.test_cache_batch import _FakeRedis, _manager_with
+
+
+class _Broker:
+    """Canal pub/sub en memoria compartido por varios `_BusRedis`."""
+
+    def __init__(self):
+        self.subscribers: list = []
+
+    def publish(self, channel, message):
+        for subscriber in self.subscribers:
+            subscriber.put({"type": "message", "channel": channel, "data": message.encode("utf-8")})
+        return len(self.subscribers)
+
+
+class _FakePubSub:
+    def __init__(self, broker):
+        self.broker = broker
+        self.inbox: "queue.Queue" = queue.Queue()
+
+    def subscribe(self, channel):
+        assert channel == INVALIDATION_CHANNEL
+        self.broker.subscribers.append(self.inbox)
+
+    def get_message(self, timeout=0.0):
+        try:
+            return self.inbox.get(timeout=min(timeout, 0.05))
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.subscribers.remove(self.inbox)
+
+
+class _BusRedis(_FakeRedis):
+    def __init__(self, store, broker):
+        super().__init__()
+        self.store = store
+        self.broker = broker
+        self.gets = 0
+
+    def get(self, key):
+        self.gets += 1
+        return super().get(key)
+
+    def publish(self, channel, message):
+        return self.broker.publish(channel, message)
+
+    def pubsub(self, ignore_subscribe_messages=True):
+        return _FakePubSub(self.broker)
+
+
+def _redis_worker(store, broker):
+    client = _BusRedis(store, broker)
+    manager = _manager_with(RedisCache(client=client))
+    manager.l1 = L1Tier(requires_bus=True)
+    manager.register_hot_keys("bot:config")
+    return manager, client
+
+
+def _wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def workers():
+    store, broker = {}, _Broker()
+    pair = [_redis_worker(store, broker) for _ in range(2)]
+    for manager, _ in pair:
+        manager.start_l1_bus()
+    assert _wait_until(lambda: all(manager.l1.serving for manager, _ in pair))
+    yield pair
+    for manager, _ in pair:
+        manager.stop_l1_bus()
+
+
+def test_hot_key_is_read_from_memory_in_steady_state(workers):
+    (writer, _), (reader, reader_client) = workers
+    writer.set("bot:config", {"temperature": 0.2}, ttl=0)
+
+    values = [reader.get("bot:config") for _ in range(5)]
+
+    assert values == [{"temperature": 0.2}] * 5
+    assert reader_client.gets == 1
+    assert reader.l1.stats()["hits"] == 4
+
+
+def test_write_in_one_worker_invalidates_the_others(workers):
+    (writer, _), (reader, reader_client) = workers
+    writer.set("bot:config", {"temperature": 0.2}, ttl=0)
+    assert reader.get("bot:config") == {"temperature": 0.2}
+
+    writer.set("bot:config", {"temperature": 0.9}, ttl=0)
+
+    assert _wait_until(lambda: reader.l1.stats()["invalidations_received"] == 2)
+    assert reader.get("bot:config") == {"temperature": 0.9}
+    assert reader_client.gets == 2
+
+
+def test_write_from_a_process_without_subscriber_invalidates_the_others(workers):
+    from rag.corpus_state import CORPUS_VERSION_CACHE_KEY
+
+    (_, _), (reader, reader_client) = workers
+    reader.register_hot_keys(CORPUS_VERSION_CACHE_KEY)
+    # Como el worker de ingesta standalone: escribe en Redis sin start_l1_bus().
+    ingest_worker, _ = _redis_worker(reader_client.store, reader_client.broker)
+    ingest_worker.register_hot_keys(CORPUS_VERSION_CACHE_KEY)
+    assert reader.get(CORPUS_VERSION_CACHE_KEY) is None
+    assert reader.get(CORPUS_VERSION_CACHE_KEY) is None
+    gets = reader_client.gets
+
+    ingest_worker.increment(CORPUS_VERSION_CACHE_KEY)
+
+    assert _wait_until(lambda: reader.l1.stats()["invalidations_received"] == 1)
+    assert reader.get(CORPUS_VERSION_CACHE_KEY) == 1
+    assert reader_client.gets == gets + 1
+
+
+def test_unregistered_keys_and_a_down_bus_bypass_l1():
+    manager, client = _redis_worker({}, _Broker())
+    manager.set("bot:config", {"a": 1}, ttl=0)
+    manager.set("otra:clave", 1, ttl=0)
+
+    manager.get("bot:config")
+    manager.get("bot:config")
+    manager.get("otra:clave")
+
+    assert client.gets == 3
+    assert manager.l1.stats()["entries"] == 0
+
+
+def test_invalidation_during_inflight_read_is_not_overwritten():
+    l1 = L1Tier(requires_bus=False)
+    l1.register("meta:rag:corpus_version")
+    epoch = l1.epoch
+
+    l1.publish(["meta:rag:corpus_version"])
+    l1.remember("meta:rag:corpus_version", 3, epoch)
+
+    assert l1.lookup("meta:rag:corpus_version") == (False, None)
+
+
+@pytest.mark.anyio
+async def test_async_reads_share_the_tier_with_a_local_backend():
+    backend = InMemoryCache(max_size=10)
+    manager = _manager_with(backend)
+    manager.l1 = L1Tier(requires_bus=False)
+    manager.register_hot_keys("meta:rag:corpus_version")
+
+    manager.increment("meta:rag:corpus_version")
+    assert await manager.aget("meta:rag:corpus_version") == 1
+    backend.set("meta:rag:corpus_version", 99, ttl=0)  # bypasses CacheManager
+
+    assert await manager.aget("meta:rag:corpus_version") == 1
+    await manager.aincrement("meta:rag:corpus_version")
+    assert manager.get("meta:rag:corpus_version") == 100
+
+
+def test_malformed_message_clears_the_tier():
+    l1 = L1Tier(requires_bus=False)
+    l1.register("bot:config")
+    l1.remember("bot:config", {"a": 1}, l1.epoch)
+
+    l1._handle_message({"type": "message", "data": b"not json"})
+
+    assert l1.stats()["entries"] == 0
+    assert l1.stats()["serving"] is True
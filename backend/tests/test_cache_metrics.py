@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from cache.memory_backend import InMemoryCache
+from cache.metrics import CacheMetrics, _Histogram
+from cache.redis_backend import RedisCache
+from cache.vector_codec import to_cache_vector
+from tests.test_cache_batch import _FakeRedis, _manager_with
+
+
+def _instrumented(backend):
+    manager = _manager_with(backend)
+    manager.l1 = None
+    manager.attach_metrics(CacheMetrics())
+    return manager
+
+
+def test_keys_are_grouped_by_longest_matching_prefix():
+    metrics = CacheMetrics()
+
+    assert metrics.family_of("emb:query:openai:abc") == "emb:query"
+    assert metrics.family_of("rag:retrieval:g2:abc") == "rag:retrieval"
+    assert metrics.family_of("rag:algo") == "rag:other"
+    assert metrics.family_of("resp:sem:idx:x") == "response:semantic"
+    assert metrics.family_of("resp:v=1:conv:cfg:in") == "response"
+    assert metrics.family_of("retrieval_tool:v2:x") == "retrieval_tool:v2"
+    assert metrics.family_of("bot:config") == "bot:config"
+    assert metrics.family_of("desconocida") == "other"
+
+
+def test_hits_misses_and_serialized_sizes_per_family():
+    manager = _instrumented(RedisCache(client=_FakeRedis()))
+    manager.set("emb:query:m:a", to_cache_vector(np.ones(1536)), ttl=60)
+    manager.set("bot:config", {"temperature": 0.2}, ttl=0)
+
+    manager.get("emb:query:m:a")
+    manager.get_many(["emb:query:m:a", "emb:query:m:b", "bot:config"])
+
+    families = manager.metrics_snapshot()["families"]
+    emb, bot = families["emb:query"], families["bot:config"]
+    assert (emb["hits"], emb["misses"], emb["sets"]) == (2, 1, 1)
+    assert emb["hit_rate"] == round(2 / 3, 4)
+    assert emb["payload_bytes"]["max"] == 9 + 1536 * 4
+    assert emb["get_latency_ms"]["count"] == 2
+    assert bot["hits"] == 1 and bot["payload_bytes"]["buckets"]["le_256"] == 1
+
+
+def test_fallback_evictions_are_attributed_to_the_evicted_family():
+    manager = _instrumented(InMemoryCache(max_size=2))
+    manager.set("vs:search:1", [1], ttl=60)
+    manager.set("vs:search:2", [2], ttl=60)
+
+    manager.set("emb:doc:m:x", [3], ttl=60)
+
+    families = manager.metrics_snapshot()["families"]
+    assert families["vs"]["evictions"] == 1
+    assert families["emb:doc"]["evictions"] == 0
+    assert manager.metrics_snapshot()["memory_cache"]["evictions"] == 1
+
+
+@pytest.mark.anyio
+async def test_async_fallback_path_is_counted_once():
+    manager = _instrumented(InMemoryCache(max_size=10))
+
+    await manager.aset("rag:retrieval:q", {"docs": []})
+    await manager.aget("rag:retrieval:q")
+    await manager.aget_many(["rag:retrieval:q", "rag:retrieval:z"])
+
+    stats = manager.metrics_snapshot()["families"]["rag:retrieval"]
+    assert (stats["hits"], stats["misses"], stats["sets"]) == (2, 1, 1)
+
+
+def test_histogram_quantiles_report_bucket_upper_bounds():
+    histogram = _Histogram((1.0, 10.0, 100.0))
+    for value in (0.5, 0.7, 5.0, 50.0, 500.0):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+
+    assert snapshot["buckets"] == {"le_1": 2, "le_10": 1, "le_100": 1, "inf": 1}
+    assert snapshot["p50"] == 10.0
+    assert snapshot["p95"] == 500.0
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import pytest
+
+from cache.async_redis_backend import AsyncRedisCache
+from cache.memory_backend import InMemoryCache
+from cache.namespaces import NamespaceGenerations, generation_key
+from cache.redis_backend import RedisCache
+from tests.test_async_redis_backend import _FakeAsyncRedis
+from tests.test_cache_batch import _FakeRedis, _manager_with
+
+
+class _CountingRedis(_FakeRedis):
+    def setnx(self, key, value):
+        self.store.setdefault(key, str(value).encode())
+
+    def incrby(self, key, delta):
+        value = int(self.store[key]) + int(delta)
+        self.store[key] = str(value).encode()
+        return value
+
+
+def _manager(backend, refresh_seconds: float = 60.0):
+    manager = _manager_with(backend)
+    manager._namespaces = NamespaceGenerations(refresh_seconds=refresh_seconds)
+    return manager
+
+
+def test_physical_key_is_unchanged_until_first_bump():
+    state = NamespaceGenerations()
+
+    assert state.physical_key("rag:retrieval:abc") == "rag:retrieval:abc"
+    state.set_generation("rag:retrieval:", 3)
+    assert state.physical_key("rag:retrieval:abc") == "rag:retrieval:g3:abc"
+    assert state.physical_key("rag:ts:doc-1") == "rag:ts:doc-1"
+
+
+def test_failed_refresh_keeps_known_generations():
+    state = NamespaceGenerations()
+    state.load({generation_key("vs:"): b"2"})
+
+    state.load(None)
+
+    assert state.generation("vs:") == 2
+
+
+def test_versioned_prefix_is_invalidated_without_touching_entries():
+    backend = InMemoryCache(max_size=100)
+    manager = _manager(backend)
+    manager.set("rag:retrieval:q1", {"docs": []})
+    manager.set("rag:ts:doc-1", 123.0)
+
+    manager.invalidate_prefix("rag:retrieval:")
+    manager.invalidate_prefix("rag:ts:")
+
+    assert manager.get("rag:retrieval:q1") is None
+    assert manager.get_many(["rag:retrieval:q1"]) == {}
+    # The old entry is still physically present; its TTL reaps it.
+    assert backend.get("rag:retrieval:q1") == {"docs": []}
+    assert manager.get("rag:ts:doc-1") is None
+
+    manager.set("rag:retrieval:q1", {"docs": ["nuevo"]})
+    assert manager.get_many(["rag:retrieval:q1"]) == {"rag:retrieval:q1": {"docs": ["nuevo"]}}
+
+
+def test_redis_bump_is_one_command_and_never_scans():
+    client = _CountingRedis()
+    manager = _manager(RedisCache(client=client))
+
+    manager.set("vs:search:abc", [1, 2], ttl=0)
+    manager.invalidate_prefix("vs:")
+    manager.set("vs:search:abc", [3], ttl=0)
+
+    assert not hasattr(client, "scan_iter")
+    assert client.store[generation_key("vs:")] == b"1"
+    assert "vs:g1:search:abc" in client.store
+    assert manager.get("vs:search:abc") == [3]
+
+
+def test_bump_in_another_worker_is_seen_after_refresh():
+    shared = InMemoryCache(max_size=100)
+    writer = _manager(shared, refresh_seconds=0.0)
+    reader = _manager(shared, refresh_seconds=0.0)
+    writer.set("emb:query:m:abc", [0.1])
+    assert reader.get("emb:query:m:abc") == [0.1]
+
+    writer.invalidate_prefix("emb:")
+
+    assert reader.get("emb:query:m:abc") is None
+
+
+def test_versioned_keys_always_get_a_ttl():
+    manager = _manager(InMemoryCache(max_size=100))
+
+    assert manager._effective_ttl("retrieval_tool:v2:x", 0) == manager.ttl
+    assert manager._effective_ttl("meta:rag:corpus_version", 0) == 0
+
+
+@pytest.mark.anyio
+async def test_async_bump_and_lookup_use_native_backend():
+    client = _FakeAsyncRedis()
+    manager = _manager(InMemoryCache(max_size=100))
+    manager.async_backend = AsyncRedisCache(client=client)
+
+    await manager.aset("rag:retrieval:q", {"hit": True})
+    await manager.ainvalidate_prefix("rag:retrieval:")
+    await manager.aset("rag:retrieval:q", {"hit": "nuevo"})
+
+    assert await manager.aget("rag:retrieval:q") == {"hit": "nuevo"}
+    assert "rag:retrieval:g1:q" in client.store
+    assert client.unlinked == []
@@ -1,11 +1,15 @@
 """Unit tests for rag.corpus_centroid — out-of-scope detection."""
 from __future__ import annotations
 
+import threading
 from unittest.mock import MagicMock
 
 import numpy as np
 import pytest
 
+import rag.corpus_centroid as centroid_mod
+from cache.manager import CacheManager
+from cache.memory_backend import InMemoryCache
 from rag.corpus_centroid import _l2_normalize, is_out_of_scope, compute_centroid
 
 
@@ -69,8 +73,9 @@ def test_is_out_of_scope_respects_custom_threshold():
 # ─── compute_centroid ────────────────────────────────────────────────────────
 
 class _FakeQdrantPoint:
-    def __init__(self, vec):
+    def __init__(self, vec, payload=None):
         self.vector = vec
+        self.payload = payload
 
 
 class _FakeQdrantClient:
@@ -84,7 +89,7 @@ class _FakeQdrantClient:
             return [], None
         page = self.pages[self.calls]
         self.calls += 1
-        points = [_FakeQdrantPoint(v) for v in page]
+        points = [v if isinstance(v, _FakeQdrantPoint) else _FakeQdrantPoint(v) for v in page]
         next_offset = self.calls if self.calls < len(self.pages) else None
         return points, next_offset
 
@@ -138,3 +143,142 @@ async def test_compute_centroid_handles_missing_client():
     vs.client = None
     vs.collection_name = "anything"
     assert await compute_centroid(vs) is None
+
+
+# ─── incremental running stats ───────────────────────────────────────────────
+
+@pytest.fixture
+def stats_cache(monkeypatch):
+    fresh = CacheManager.__new__(CacheManager)
+    fresh.ttl = 300
+    fresh.max_size = 1000
+    fresh.is_degraded = True
+    fresh.backend_type = "InMemoryCache"
+    fresh.backend = InMemoryCache(max_size=1000)
+    version = {"value": "1"}
+    monkeypatch.setattr(centroid_mod, "cache", fresh)
+    async def _version():
+        return version["value"]
+
+    monkeypatch.setattr(centroid_mod, "aget_corpus_cache_version", _version)
+    monkeypatch.setattr(centroid_mod, "_rebuild_task", None)
+    centroid_mod.clear_inprocess_cache()
+    yield version
+    centroid_mod.clear_inprocess_cache()
+
+
+def _points(source, vectors):
+    return [_FakeQdrantPoint(v, {"source": source}) for v in vectors]
+
+
+_DOC_A = [[1.0, 0.0, 0.0], [0.0, 2.0, 0.0]]
+_DOC_B = [[0.0, 0.0, 3.0], [1.0, 1.0, 0.0], [0.0, 1.0, 1.0]]
+
+
+@pytest.mark.asyncio
+async def test_incremental_stats_match_full_scan_without_scrolling(stats_cache):
+    vs = _fake_vector_store([_points("a.pdf", _DOC_A) + _points("b.pdf", _DOC_B)])
+    await centroid_mod.reset_centroid_stats()
+
+    await centroid_mod.record_source_vectors("a.pdf", _DOC_A)
+    await centroid_mod.record_source_vectors("b.pdf", _DOC_B)
+    incremental = await centroid_mod.get_centroid(vs)
+
+    assert vs.client.calls == 0
+    assert np.allclose(incremental, await compute_centroid(vs), atol=1e-6)
+
+
+@pytest.mark.asyncio
+async def test_delete_and_reingest_update_running_sums(stats_cache):
+    await centroid_mod.reset_centroid_stats()
+    await centroid_mod.record_source_vectors("a.pdf", _DOC_A)
+    await centroid_mod.record_source_vectors("b.pdf", _DOC_B)
+
+    await centroid_mod.forget_source("a.pdf")
+    await centroid_mod.record_source_vectors("b.pdf", _DOC_B[:1])
+
+    stats = centroid_mod._Accumulator.from_cache(centroid_mod.cache.get(centroid_mod._STATS_KEY))
+    assert stats.count == 1
+    assert np.allclose(stats.centroid(), [0.0, 0.0, 1.0])
+
+    await centroid_mod.forget_source("b.pdf")
+    emptied = centroid_mod._Accumulator.from_cache(centroid_mod.cache.get(centroid_mod._STATS_KEY))
+    assert emptied.count == 0 and emptied.centroid() is None
+
+
+@pytest.mark.asyncio
+async def test_incremental_reingest_swaps_only_changed_vectors(stats_cache):
+    vs = _fake_vector_store([_points("a.pdf", [_DOC_A[0], [0.0, 0.0, 5.0]])])
+    await centroid_mod.reset_centroid_stats()
+    await centroid_mod.record_source_vectors("a.pdf", _DOC_A)
+
+    await centroid_mod.record_source_vectors("a.pdf", [[0.0, 0.0, 5.0]], replace=False, removed=_DOC_A[1:])
+
+    stats = centroid_mod._Accumulator.from_cache(centroid_mod.cache.get(centroid_mod._STATS_KEY))
+    assert stats.count == 2
+    assert np.allclose(stats.centroid(), await compute_centroid(vs), atol=1e-6)
+
+
+@pytest.mark.asyncio
+async def test_missing_stats_schedule_a_single_background_rebuild(stats_cache):
+    vs = _fake_vector_store([_points("a.pdf", _DOC_A)])
+    scan_may_finish = threading.Event()
+    original_scroll = vs.client.scroll
+
+    def _slow_scroll(**kwargs):
+        scan_may_finish.wait(timeout=5)
+        return original_scroll(**kwargs)
+
+    vs.client.scroll = _slow_scroll
+    results = [await centroid_mod.get_centroid(vs) for _ in range(3)]
+    scan_may_finish.set()
+    await centroid_mod._rebuild_task
+
+    assert results == [None, None, None]
+    assert vs.client.calls == 1
+    rebuilt = await centroid_mod.get_centroid(vs)
+    assert np.allclose(rebuilt, _l2_normalize(np.array([0.5, 0.5, 0.0], dtype=np.float32)))
+    # The rebuild also restored per-source contributions, so deletes stay exact.
+    await centroid_mod.forget_source("a.pdf")
+    stats = centroid_mod._Accumulator.from_cache(centroid_mod.cache.get(centroid_mod._STATS_KEY))
+    assert stats.count == 0
+
+
+@pytest.mark.asyncio
+async def test_rebuild_is_discarded_when_corpus_changes_during_scan(stats_cache):
+    vs = _fake_vector_store([_points("a.pdf", _DOC_A)])
+    original_scroll = vs.client.scroll
+
+    def _scroll_while_ingesting(**kwargs):
+        centroid_mod.cache.increment(centroid_mod._REVISION_KEY, 1, 0)
+        return original_scroll(**kwargs)
+
+    vs.client.scroll = _scroll_while_ingesting
+    await centroid_mod.rebuild_centroid_stats(vs)
+
+    assert centroid_mod.cache.get(centroid_mod._STATS_KEY) is None
+
+
+@pytest.mark.asyncio
+async def test_dimension_mismatch_drops_stats_for_repair(stats_cache):
+    await centroid_mod.reset_centroid_stats()
+    await centroid_mod.record_source_vectors("a.pdf", _DOC_A)
+
+    await centroid_mod.record_source_vectors("c.pdf", [[1.0, 0.0]])
+
+    assert centroid_mod.cache.get(centroid_mod._STATS_KEY) is None
+
+
+@pytest.mark.asyncio
+async def test_leftover_source_contribution_is_ignored_after_reset(stats_cache):
+    await centroid_mod.reset_centroid_stats()
+    await centroid_mod.record_source_vectors("a.pdf", _DOC_A)
+    centroid_mod.invalidate_centroid_stats()
+    await centroid_mod.reset_centroid_stats()
+
+    # The src key of a.pdf survived the invalidation, but the new stats don't list it.
+    await centroid_mod.record_source_vectors("a.pdf", _DOC_A[:1])
+
+    stats = centroid_mod.cache.get(centroid_mod._STATS_KEY)
+    assert stats["sources"] == ["a.pdf"]
+    assert centroid_mod._Accumulator.from_cache(stats).count == 1
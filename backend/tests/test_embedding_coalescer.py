@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import rag.embeddings.embedding_manager as em_mod
+from rag.embeddings.coalescer import EmbeddingCoalescer
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def embedder(monkeypatch):
+    monkeypatch.setattr(
+        em_mod,
+        "settings",
+        SimpleNamespace(
+            mock_mode=True,
+            default_embedding_dimension=4,
+            enable_embedding_coalescing=True,
+            embedding_coalesce_window_ms=5.0,
+            embedding_coalesce_max_batch=32,
+        ),
+    )
+    manager = em_mod.EmbeddingManager.__new__(em_mod.EmbeddingManager)
+    manager.model_name = "openai:test"
+    manager.logger = em_mod.get_logger("test")
+    manager._batch_size = 32
+
+    calls: list[list[str]] = []
+    original = manager._embed_query_batch
+
+    def _recording_batch(queries):
+        calls.append(list(queries))
+        return original(queries)
+
+    manager._embed_query_batch = _recording_batch
+    manager.calls = calls
+    return manager
+
+
+async def test_identical_inflight_queries_share_one_call(embedder):
+    results = await asyncio.gather(*(embedder.embed_text("¿Cuál es el horario?") for _ in range(10)))
+
+    assert embedder.calls == [["¿Cuál es el horario?"]]
+    assert all(vec == [0.0] * 4 for vec in results)
+    assert embedder._coalescer.stats()["texts_coalesced"] == 9
+
+
+async def test_distinct_queries_within_window_are_micro_batched(embedder):
+    queries = [f"pregunta distinta {i}" for i in range(5)]
+
+    results = await asyncio.gather(*(embedder.aembed_query(q) for q in queries))
+
+    assert len(embedder.calls) == 1
+    assert sorted(embedder.calls[0]) == sorted(queries)
+    assert len(results) == 5
+
+
+async def test_full_batch_is_dispatched_without_waiting(embedder):
+    em_mod.settings.embedding_coalesce_max_batch = 2
+    em_mod.settings.embedding_coalesce_window_ms = 10_000
+
+    await asyncio.wait_for(
+        asyncio.gather(*(embedder.aembed_query(f"q numero {i}") for i in range(4))),
+        timeout=2,
+    )
+
+    assert [len(batch) for batch in embedder.calls] == [2, 2]
+
+
+async def test_coalescing_can_be_disabled(embedder, monkeypatch):
+    em_mod.settings.enable_embedding_coalescing = False
+    monkeypatch.setattr(embedder, "embed_query", lambda q: [1.0, 0.0, 0.0, 0.0])
+
+    assert await embedder.aembed_query("hola que tal") == [1.0, 0.0, 0.0, 0.0]
+    assert embedder.calls == []
+
+
+async def test_batch_failure_reaches_every_waiter_and_is_not_cached():
+    attempts = []
+
+    def _flaky(texts):
+        attempts.append(list(texts))
+        if len(attempts) == 1:
+            raise RuntimeError("provider down")
+        return [[float(len(t))] for t in texts]
+
+    coalescer = EmbeddingCoalescer(_flaky, window_ms=1)
+    results = await asyncio.gather(coalescer.embed("a"), coalescer.embed("b"), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert await coalescer.embed("abc") == [3.0]
+    assert coalescer.stats()["inflight"] == 0
+
+
+async def test_cancelled_waiter_does_not_cancel_shared_request():
+    release = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def _slow(texts):
+        asyncio.run_coroutine_threadsafe(release.wait(), loop).result(timeout=2)
+        return [[1.0] for _ in texts]
+
+    coalescer = EmbeddingCoalescer(_slow, window_ms=0)
+    first = asyncio.create_task(coalescer.embed("same"))
+    second = asyncio.create_task(coalescer.embed("same"))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    release.set()
+
+    assert await second == [1.0]
+    with pytest.raises(asyncio.CancelledError):
+        await first
@@ -5,7 +5,7 @@ from pathlib import Path
 import pytest
 from langchain_core.documents import Document
 
-from rag.ingestion.hierarchical_chunker import HierarchicalChunker
+from rag.ingestion.hierarchical_chunker import HierarchicalChunker, StructuralBlock
 
 
 pytestmark = pytest.mark.anyio
@@ -85,3 +85,125 @@ async def test_hierarchical_chunker_flushes_on_new_section_headers_even_before_p
     assert "SECCION UNO" in result.parents[0].content
     assert "SECCION DOS" not in result.parents[0].content
     assert "SECCION DOS" in result.parents[1].content
+
+
+def _write_multi_page_pdf(path: Path, page_count: int) -> None:
+    pymupdf = pytest.importorskip("pymupdf")
+    pytest.importorskip("pymupdf4llm")
+    doc = pymupdf.open()
+    for index in range(page_count):
+        page = doc.new_page()
+        if index % 3 == 0:
+            page.insert_text((72, 72), f"Capitulo {index // 3 + 1}", fontsize=20)
+        text = f"Parrafo de la pagina {index + 1} con el plan {index} a S/ {index * 10}.00 desde 12/03/2024."
+        for line in range(12):
+            page.insert_text((72, 110 + line * 14), f"{text} Linea {line}.", fontsize=10)
+    doc.save(str(path))
+    doc.close()
+
+
+async def test_process_pool_sharded_chunking_matches_in_process_output(tmp_path):
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+
+    pdf_path = tmp_path / "manual.pdf"
+    _write_multi_page_pdf(pdf_path, page_count=9)
+    options = dict(parent_overlap_tokens=0, child_overlap_tokens=0)
+
+    expected = await HierarchicalChunker(**options).chunk_pdf(pdf_path, doc_id="doc-1")
+    with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn")) as pool:
+        result = await HierarchicalChunker(executor=pool, shard_pages=2, **options).chunk_pdf(pdf_path, doc_id="doc-1")
+
+    assert result.metadata["shards"] == 5 and expected.metadata["shards"] == 1
+    assert result.page_count == expected.page_count == 9
+    assert [parent.model_dump() for parent in result.parents] == [parent.model_dump() for parent in expected.parents]
+    assert [child.model_dump() for child in result.children] == [child.model_dump() for child in expected.children]
+    assert result.metadata["pages_per_second"] > 0
+
+
+class _TopicEncoder:
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        import numpy as np
+
+        self.calls.append(list(texts))
+        return np.array([[1.0, 0.0] if text.startswith("precio") else [0.0, 1.0] for text in texts], dtype=np.float32)
+
+
+def _paragraph(order: int, content: str) -> StructuralBlock:
+    return StructuralBlock(
+        content=content,
+        page_number=1,
+        order=order,
+        block_type="paragraph",
+        section_title=None,
+        token_count=10,
+        contains_table=False,
+        contains_numeric=False,
+        contains_date_like=False,
+    )
+
+
+async def test_semantic_boundaries_reuse_one_batched_encode_per_document():
+    model = _TopicEncoder()
+    chunker = HierarchicalChunker(
+        parent_target_tokens=1000,
+        parent_max_tokens=1000,
+        parent_min_tokens=40,
+        parent_overlap_tokens=0,
+        child_overlap_tokens=0,
+    )
+    chunker._get_or_load_semantic_model = lambda: model
+    topics = ["precio"] * 5 + ["horario"] * 5 + ["precio"] * 5
+    blocks = [_paragraph(order, f"{topic} bloque {order}") for order, topic in enumerate(topics)]
+
+    groups = chunker._group_blocks_into_parents(blocks)
+
+    assert [group[0].order for group in groups] == [0, 5, 10]
+    assert model.calls == [[block.content for block in blocks]]
+
+
+async def test_stream_pdf_yields_the_same_parents_and_children_as_chunk_pdf(tmp_path):
+    pdf_path = tmp_path / "manual.pdf"
+    _write_multi_page_pdf(pdf_path, page_count=7)
+    chunker = HierarchicalChunker(parent_overlap_tokens=0, child_overlap_tokens=0, shard_pages=2)
+
+    expected = await chunker.chunk_pdf(pdf_path, doc_id="doc-1")
+    metadata: dict = {}
+    streamed = [item async for item in chunker.stream_pdf(pdf_path, doc_id="doc-1", metadata=metadata, max_pending=1)]
+
+    assert [parent.model_dump() for parent, _ in streamed] == [parent.model_dump() for parent in expected.parents]
+    assert [child.model_dump() for _, children in streamed for child in children] == [
+        child.model_dump() for child in expected.children
+    ]
+    assert metadata["page_count"] == 7 and metadata["parent_count"] == len(expected.parents)
+
+
+async def test_stream_pdf_groups_each_window_in_the_process_pool(tmp_path):
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+
+    pdf_path = tmp_path / "manual.pdf"
+    _write_multi_page_pdf(pdf_path, page_count=9)
+    options = dict(parent_overlap_tokens=120, child_overlap_tokens=40, shard_pages=2)
+
+    expected = await HierarchicalChunker(**options).chunk_pdf(pdf_path, doc_id="doc-1")
+    with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn")) as pool:
+        chunker = HierarchicalChunker(executor=pool, **options)
+
+        def _not_in_caller(*args, **kwargs):
+            raise AssertionError("grouping must run in the pool")
+
+        chunker.iter_chunks = _not_in_caller
+        chunker._iter_parent_groups = _not_in_caller
+        metadata: dict = {}
+        streamed = [item async for item in chunker.stream_pdf(pdf_path, doc_id="doc-1", metadata=metadata)]
+
+    assert len(expected.parents) > 1
+    assert [parent.model_dump() for parent, _ in streamed] == [parent.model_dump() for parent in expected.parents]
+    assert [child.model_dump() for _, children in streamed for child in children] == [
+        child.model_dump() for child in expected.children
+    ]
+    assert metadata["page_count"] == 9 and metadata["parent_count"] == len(expected.parents)
@@ -4,7 +4,10 @@ from pathlib import Path
 from uuid import uuid4
 
 import pytest
+from langchain_core.documents import Document
 
+import rag.ingestion.hierarchical_ingestion_service as ingestion_mod
+from rag.ingestion.hierarchical_chunker import HierarchicalChunker
 from rag.ingestion.hierarchical_ingestion_service import HierarchicalIngestionService
 from rag.ingestion.models import ChildChunk, HierarchicalChunkingResult, PageSpan, ParentDocument
 
@@ -65,14 +68,13 @@ class _FakeParentRepository:
         self.deleted_sources = []
         self.upserted = []
         self.ensure_calls = 0
-        self.doc_counts: dict[str, int] = {}
+        self.deleted_parent_ids: list[str] = []
 
     async def ensure_indexes(self):
         self.ensure_calls += 1
 
     async def delete_by_doc_id(self, doc_id: str):
         self.deleted_doc_ids.append(doc_id)
-        self.doc_counts.pop(doc_id, None)
         return 0
 
     async def delete_by_source(self, source: str):
@@ -81,12 +83,42 @@ class _FakeParentRepository:
 
     async def upsert_documents(self, parents):
         self.upserted.extend(parents)
-        for parent in parents:
-            self.doc_counts[parent.doc_id] = self.doc_counts.get(parent.doc_id, 0) + 1
         return len(parents)
 
+    def _live(self) -> dict[str, ParentDocument]:
+        return {parent.parent_id: parent for parent in self.upserted if parent.parent_id not in self.deleted_parent_ids}
+
     async def count_by_doc_id(self, doc_id: str):
-        return self.doc_counts.get(doc_id, 0)
+        return sum(1 for parent in self._live().values() if parent.doc_id == doc_id)
+
+    async def set_doc_id_by_source(self, source: str, doc_id: str):
+        for parent in self._live().values():
+            if parent.source == source:
+                parent.doc_id = doc_id
+
+    async def restore_placements(self, placements):
+        live = self._live()
+        for parent_id, placement in placements.items():
+            parent = live[parent_id]
+            parent.parent_index = placement["parent_index"]
+            parent.page_span = PageSpan(**placement["page_span"])
+            parent.doc_id = placement["doc_id"]
+
+    async def get_placements_by_source(self, source: str):
+        return {
+            parent.parent_id: {
+                "parent_id": parent.parent_id,
+                "parent_index": parent.parent_index,
+                "page_span": parent.page_span.model_dump(),
+                "doc_id": parent.doc_id,
+            }
+            for parent in self.upserted
+            if parent.source == source and parent.parent_id not in self.deleted_parent_ids
+        }
+
+    async def delete_by_parent_ids(self, parent_ids):
+        self.deleted_parent_ids.extend(parent_ids)
+        return len(parent_ids)
 
 
 class _FakeEmbeddingManager:
@@ -103,12 +135,42 @@ class _FakeVectorStore:
         self.collection_name = "rag_child_chunks"
         self.deleted_filters = []
         self.add_calls = []
+        self.points: dict[str, tuple[dict, list]] = {}
+        self.payload_updates = []
+        self.deleted_ids: list[str] = []
 
     async def delete_documents(self, filter=None):
         self.deleted_filters.append(filter)
 
     async def add_documents(self, documents, embeddings=None):
         self.add_calls.append((documents, embeddings))
+        for document, embedding in zip(documents, embeddings):
+            self.points[document.metadata["point_id"]] = (dict(document.metadata), embedding)
+
+    async def get_payloads_by_source(self, source, fields):
+        return {
+            point_id: {field: metadata.get(field) for field in fields}
+            for point_id, (metadata, _) in self.points.items()
+            if metadata["source"] == source
+        }
+
+    async def get_vectors(self, point_ids):
+        return [self.points[point_id][1] for point_id in point_ids if point_id in self.points]
+
+    async def update_payloads(self, payloads):
+        self.payload_updates.append(payloads)
+        for point_id, payload in payloads.items():
+            self.points[point_id][0].update(payload)
+
+    async def delete_by_ids(self, point_ids):
+        self.deleted_ids.extend(point_ids)
+        for point_id in point_ids:
+            self.points.pop(point_id, None)
+
+    async def set_doc_id_by_source(self, source, doc_id):
+        for metadata, _ in self.points.values():
+            if metadata["source"] == source:
+                metadata["doc_id"] = doc_id
 
 
 class _FakeLexicalRepository:
@@ -117,6 +179,7 @@ class _FakeLexicalRepository:
         self.deleted_doc_ids = []
         self.deleted_sources = []
         self.upserted = []
+        self.deleted_child_ids: list[str] = []
         self.ensure_calls = 0
 
     async def ensure_indexes(self):
@@ -134,6 +197,23 @@ class _FakeLexicalRepository:
         self.upserted.extend(children)
         return len(children)
 
+    async def get_child_ids_by_source(self, source: str):
+        return {child.child_id for child in self.upserted if child.source == source} - set(self.deleted_child_ids)
+
+    async def delete_by_child_ids(self, child_ids):
+        self.deleted_child_ids.extend(child_ids)
+        return len(child_ids)
+
+    async def set_doc_id_by_source(self, source: str, doc_id: str):
+        for child in self.upserted:
+            if child.source == source:
+                child.doc_id = doc_id
+
+    async def restore_child_placements(self, placements):
+        for child in self.upserted:
+            if child.child_id in placements:
+                child.doc_id = placements[child.child_id]["doc_id"]
+
 
 def _make_local_tmp_dir() -> Path:
     base_dir = Path(__file__).resolve().parent / "_tmp_hier"
@@ -170,9 +250,8 @@ async def test_hierarchical_ingestion_service_persists_parents_and_children():
         assert len(parent_repo.upserted) == 1
         assert len(lexical_repo.upserted) == 1
         assert embedding_manager.calls == [["Child content"]]
-        assert vector_store.deleted_filters == [{"source": pdf_path.name}]
-        assert parent_repo.deleted_sources == [pdf_path.name]
-        assert lexical_repo.deleted_sources == [pdf_path.name]
+        assert vector_store.deleted_ids == [] and parent_repo.deleted_parent_ids == []
+        assert result["children_embedded"] == 1
         assert len(vector_store.add_calls) == 1
         stored_documents, stored_embeddings = vector_store.add_calls[0]
         assert stored_embeddings == [[0.1, 0.2]]
@@ -223,3 +302,411 @@ async def test_hierarchical_ingestion_service_skips_duplicate_pdf_when_force_upd
             tmp_dir.rmdir()
         except OSError:
             pass
+
+
+@pytest.mark.asyncio
+async def test_ingest_and_delete_update_centroid_stats_incrementally(monkeypatch):
+    tmp_dir = _make_local_tmp_dir()
+    pdf_path = tmp_dir / "centroid.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4 centroid")
+    recorded = []
+    forgotten = []
+
+    async def _record(source, vectors, *, replace=True, removed=()):
+        recorded.append((source, list(vectors), replace))
+
+    async def _forget(source):
+        forgotten.append(source)
+
+    monkeypatch.setattr(ingestion_mod, "record_source_vectors", _record)
+    monkeypatch.setattr(ingestion_mod, "forget_source", _forget)
+
+    class _ParentRepoWithSources(_FakeParentRepository):
+        async def get_doc_ids_by_source(self, source):
+            return []
+
+    try:
+        service = HierarchicalIngestionService(
+            chunker=_FakeChunker(),
+            parent_repository=_ParentRepoWithSources(),
+            embedding_manager=_FakeEmbeddingManager(),
+            vector_store=_FakeVectorStore(),
+        )
+
+        await service.ingest_pdf(pdf_path, replace_existing=True)
+        await service.delete_by_source(pdf_path.name)
+
+        assert recorded == [("centroid.pdf", [[0.1, 0.2]], False)]
+        assert forgotten == ["centroid.pdf"]
+    finally:
+        if pdf_path.exists():
+            try:
+                pdf_path.unlink()
+            except PermissionError:
+                pass
+        try:
+            tmp_dir.rmdir()
+        except OSError:
+            pass
+
+
+class _VersionedChunker:
+    """Devuelve children con ids estables por contenido, como HierarchicalChunker."""
+
+    def __init__(self):
+        self.children: list[tuple[str, int]] = []
+
+    async def chunk_pdf(self, pdf_path: Path, *, doc_id: str):
+        parent = ParentDocument(
+            parent_id="parent_1",
+            doc_id=doc_id,
+            content="Parent content",
+            page_span=PageSpan(start_page=1, end_page=3),
+            source=pdf_path.name,
+            file_path=str(pdf_path),
+            parent_index=0,
+        )
+        children = [
+            ChildChunk(
+                child_id=f"child_{content}",
+                parent_id="parent_1",
+                doc_id=doc_id,
+                content=content,
+                page_span=PageSpan(start_page=page, end_page=page),
+                source=pdf_path.name,
+                file_path=str(pdf_path),
+                child_index=index,
+                parent_index=0,
+            )
+            for index, (content, page) in enumerate(self.children)
+        ]
+        return HierarchicalChunkingResult(
+            doc_id=doc_id,
+            source=pdf_path.name,
+            file_path=str(pdf_path),
+            page_count=3,
+            parents=[parent],
+            children=children,
+        )
+
+
+@pytest.mark.asyncio
+async def test_reingest_only_embeds_changed_children_and_deletes_removed_ones(monkeypatch):
+    tmp_dir = _make_local_tmp_dir()
+    pdf_path = tmp_dir / "reglamento.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4 v1")
+    recorded = []
+
+    async def _record(source, vectors, *, replace=True, removed=()):
+        recorded.append((list(vectors), list(removed)))
+
+    monkeypatch.setattr(ingestion_mod, "record_source_vectors", _record)
+
+    try:
+        chunker = _VersionedChunker()
+        parent_repo = _FakeParentRepository()
+        embedding_manager = _FakeEmbeddingManager()
+        vector_store = _FakeVectorStore()
+        lexical_repo = _FakeLexicalRepository()
+        service = HierarchicalIngestionService(
+            chunker=chunker,
+            parent_repository=parent_repo,
+            embedding_manager=embedding_manager,
+            vector_store=vector_store,
+            lexical_repository=lexical_repo,
+        )
+        chunker.children = [("a", 1), ("b", 2), ("c", 3)]
+        await service.ingest_pdf(pdf_path)
+
+        # v2: "b" cambia de texto, "c" se mueve de pagina, "a" queda igual.
+        pdf_path.write_bytes(b"%PDF-1.4 v2")
+        chunker.children = [("a", 1), ("b2", 2), ("c", 2)]
+        lexical_before = len(lexical_repo.upserted)
+        result = await service.ingest_pdf(pdf_path)
+
+        assert embedding_manager.calls == [["a", "b", "c"], ["b2"]]
+        assert vector_store.payload_updates == [{"child_c": {"page_number": 2, "page_start": 2, "page_end": 2}}]
+        assert vector_store.deleted_ids == ["child_b"] and lexical_repo.deleted_child_ids == ["child_b"]
+        assert sorted(child.child_id for child in lexical_repo.upserted[lexical_before:]) == ["child_b2", "child_c"]
+        assert parent_repo.deleted_parent_ids == [] and len(parent_repo.upserted) == 1
+        assert recorded[-1] == ([[0.1, 0.2]], [[0.1, 0.2]])
+        assert (result["children_embedded"], result["children_unchanged"], result["children_deleted"]) == (1, 1, 1)
+
+        # v3 identica: nada que escribir ni embeber.
+        result = await service.ingest_pdf(pdf_path)
+        assert len(embedding_manager.calls) == 2 and result["children_embedded"] == 0
+    finally:
+        if pdf_path.exists():
+            try:
+                pdf_path.unlink()
+            except PermissionError:
+                pass
+        try:
+            tmp_dir.rmdir()
+        except OSError:
+            pass
+
+
+@pytest.mark.asyncio
+async def test_reuploading_a_previous_version_restores_it(monkeypatch):
+    async def _noop(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(ingestion_mod, "record_source_vectors", _noop)
+    monkeypatch.setattr(ingestion_mod, "amark_documents_updated", _noop)
+    tmp_dir = _make_local_tmp_dir()
+    pdf_path = tmp_dir / "tarifas.pdf"
+
+    try:
+        chunker = _VersionedChunker()
+        parent_repo = _FakeParentRepository()
+        vector_store = _FakeVectorStore()
+        lexical_repo = _FakeLexicalRepository()
+        service = HierarchicalIngestionService(
+            chunker=chunker,
+            parent_repository=parent_repo,
+            embedding_manager=_FakeEmbeddingManager(),
+            vector_store=vector_store,
+            lexical_repository=lexical_repo,
+        )
+
+        def _stored_doc_ids():
+            return (
+                {parent.doc_id for parent in parent_repo._live().values()}
+                | {metadata["doc_id"] for metadata, _ in vector_store.points.values()}
+                | {child.doc_id for child in lexical_repo.upserted if child.child_id not in lexical_repo.deleted_child_ids}
+            )
+
+        pdf_path.write_bytes(b"%PDF-1.4 A")
+        chunker.children = [("a", 1), ("precio 10", 2)]
+        version_a = await service.ingest_single_pdf(pdf_path)
+
+        pdf_path.write_bytes(b"%PDF-1.4 B")
+        chunker.children = [("a", 1), ("precio 12", 2)]
+        version_b = await service.ingest_single_pdf(pdf_path)
+        # Los chunks sin cambios ("a") pasan al doc_id de B.
+        assert _stored_doc_ids() == {version_b["doc_id"]}
+
+        pdf_path.write_bytes(b"%PDF-1.4 A")
+        chunker.children = [("a", 1), ("precio 10", 2)]
+        reverted = await service.ingest_single_pdf(pdf_path)
+
+        assert reverted["status"] == "success" and reverted["doc_id"] == version_a["doc_id"]
+        assert sorted(vector_store.points) == ["child_a", "child_precio 10"]
+        assert _stored_doc_ids() == {version_a["doc_id"]}
+        assert (await service.ingest_single_pdf(pdf_path))["status"] == "skipped"
+    finally:
+        if pdf_path.exists():
+            pdf_path.unlink()
+        tmp_dir.rmdir()
+
+
+class _SyntheticPdfChunker(HierarchicalChunker):
+    """Chunker real sobre paginas generadas al vuelo (sin pymupdf)."""
+
+    def __init__(self, page_count: int):
+        super().__init__(shard_pages=8, parent_overlap_tokens=0, child_overlap_tokens=0)
+        self.page_count = page_count
+
+    @staticmethod
+    def _page(number: int) -> Document:
+        header = f"# Capitulo {number // 4 + 1}\n\n" if number % 4 == 1 else ""
+        paragraphs = (
+            " ".join(f"pagina{number} parrafo{paragraph} palabra{word}" for word in range(20))
+            for paragraph in range(8)
+        )
+        return Document(page_content=header + "\n\n".join(paragraphs), metadata={"page_number": number})
+
+    def _iter_pdf_raw_pages(self, pdf_path: Path):
+        for number in range(1, self.page_count + 1):
+            yield self._page_raw_blocks(self._page(number))
+
+    async def _load_pages(self, pdf_path: Path):
+        return [self._page(number) for number in range(1, self.page_count + 1)]
+
+
+class _CountingParentRepository:
+    collection_name = "rag_parent_documents"
+
+    async def ensure_indexes(self):
+        return None
+
+    async def get_placements_by_source(self, source):
+        return {}
+
+    async def upsert_documents(self, parents):
+        return len(parents)
+
+
+class _CountingEmbeddingManager:
+    def __init__(self):
+        self.batch_sizes: list[int] = []
+
+    async def embed_documents_async(self, texts):
+        self.batch_sizes.append(len(texts))
+        return [[0.1, 0.2] for _ in texts]
+
+
+class _CountingVectorStore:
+    collection_name = "rag_child_chunks"
+
+    async def get_payloads_by_source(self, source, fields):
+        return {}
+
+    async def add_documents(self, documents, embeddings=None):
+        return None
+
+
+async def _peak_ingest_memory(page_count: int, stream_batch_children: int) -> tuple[int, dict, list[int]]:
+    import tracemalloc
+
+    embedding_manager = _CountingEmbeddingManager()
+    service = HierarchicalIngestionService(
+        chunker=_SyntheticPdfChunker(page_count),
+        parent_repository=_CountingParentRepository(),
+        embedding_manager=embedding_manager,
+        vector_store=_CountingVectorStore(),
+        stream_batch_children=stream_batch_children,
+    )
+    tmp_dir = _make_local_tmp_dir()
+    pdf_path = tmp_dir / "grande.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4 grande")
+    tracemalloc.start()
+    try:
+        result = await service.ingest_pdf(pdf_path, doc_id="doc_grande")
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        pdf_path.unlink()
+        tmp_dir.rmdir()
+    return peak, result, embedding_manager.batch_sizes
+
+
+@pytest.mark.asyncio
+async def test_streaming_ingestion_peak_memory_stays_flat_as_page_count_grows(monkeypatch):
+    async def _noop(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(ingestion_mod, "record_source_vectors", _noop)
+    monkeypatch.setattr(ingestion_mod, "amark_documents_updated", _noop)
+    await _peak_ingest_memory(10, stream_batch_children=16)
+
+    small_peak, small, _ = await _peak_ingest_memory(50, stream_batch_children=16)
+    large_peak, large, batch_sizes = await _peak_ingest_memory(200, stream_batch_children=16)
+    materialized_peak, materialized, _ = await _peak_ingest_memory(200, stream_batch_children=0)
+
+    assert (small["page_count"], large["page_count"]) == (50, 200)
+    assert large["child_count"] == materialized["child_count"] == sum(batch_sizes)
+    assert len(batch_sizes) > 1 and max(batch_sizes) < 16 + 8
+    assert large_peak < small_peak * 1.3
+    assert materialized_peak > large_peak * 3
+
+
+class _FailingStreamChunker(_SyntheticPdfChunker):
+    """El parseo falla tras `fail_after` paginas, con lotes ya persistidos."""
+
+    fail_after: int | None = None
+
+    def _iter_pdf_raw_pages(self, pdf_path: Path):
+        for index, page in enumerate(super()._iter_pdf_raw_pages(pdf_path)):
+            if self.fail_after is not None and index == self.fail_after:
+                raise RuntimeError("pagina corrupta")
+            yield page
+
+
+@pytest.mark.asyncio
+async def test_mid_stream_failure_rolls_back_to_the_previous_version(monkeypatch):
+    async def _noop(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(ingestion_mod, "record_source_vectors", _noop)
+    monkeypatch.setattr(ingestion_mod, "amark_documents_updated", _noop)
+    tmp_dir = _make_local_tmp_dir()
+    pdf_path = tmp_dir / "manual.pdf"
+
+    chunker = _FailingStreamChunker(page_count=12)
+    parent_repo = _FakeParentRepository()
+    vector_store = _FakeVectorStore()
+    lexical_repo = _FakeLexicalRepository()
+    service = HierarchicalIngestionService(
+        chunker=chunker,
+        parent_repository=parent_repo,
+        embedding_manager=_FakeEmbeddingManager(),
+        vector_store=vector_store,
+        lexical_repository=lexical_repo,
+        stream_batch_children=16,
+    )
+
+    def _state():
+        lexical_live = {
+            child.child_id: child.doc_id
+            for child in lexical_repo.upserted
+            if child.child_id not in lexical_repo.deleted_child_ids
+        }
+        return (
+            {pid: (p.doc_id, p.parent_index, p.page_span) for pid, p in parent_repo._live().items()},
+            {pid: (meta["doc_id"], meta["page_start"], meta["page_end"]) for pid, (meta, _) in vector_store.points.items()},
+            lexical_live,
+        )
+
+    try:
+        pdf_path.write_bytes(b"%PDF-1.4 v1")
+        await service.ingest_pdf(pdf_path)
+        before = _state()
+        adds_before = len(vector_store.add_calls)
+
+        pdf_path.write_bytes(b"%PDF-1.4 v2")
+        chunker.page_count, chunker.fail_after = 40, 30
+        with pytest.raises(RuntimeError, match="pagina corrupta"):
+            await service.ingest_pdf(pdf_path)
+
+        # Hubo lotes buscables antes del fallo; tras el rollback no queda ninguno.
+        assert len(vector_store.add_calls) > adds_before
+        assert _state() == before
+    finally:
+        if pdf_path.exists():
+            pdf_path.unlink()
+        tmp_dir.rmdir()
+
+
+@pytest.mark.asyncio
+async def test_service_built_for_the_api_streams_through_the_process_pool(monkeypatch, tmp_path):
+    pymupdf = pytest.importorskip("pymupdf")
+    pytest.importorskip("pymupdf4llm")
+    from config import settings
+    from rag.ingestion.chunking_pool import shutdown_chunking_pool
+    from rag.ingestion.worker import build_rag_ingestor
+
+    async def _noop(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(ingestion_mod, "record_source_vectors", _noop)
+    monkeypatch.setattr(ingestion_mod, "amark_documents_updated", _noop)
+    pdf_path = tmp_path / "manual.pdf"
+    doc = pymupdf.open()
+    for index in range(6):
+        doc.new_page().insert_text((72, 72), f"Capitulo {index + 1}: plan {index} a S/ {index * 10}.00", fontsize=12)
+    doc.save(str(pdf_path))
+    doc.close()
+
+    # Igual que `_init_mongodb`: settings por defecto y el pool compartido.
+    service = build_rag_ingestor(
+        settings,
+        parent_repository=_CountingParentRepository(),
+        embedding_manager=_CountingEmbeddingManager(),
+        vector_store=_CountingVectorStore(),
+    )
+    try:
+        async def _materialized(*args, **kwargs):
+            raise AssertionError("the API must not materialize the whole document")
+
+        monkeypatch.setattr(service.chunker, "chunk_pdf", _materialized)
+        assert service.chunker.executor is not None
+        assert service.stream_batch_children == settings.ingestion_stream_batch_children > 0
+
+        result = await service.ingest_pdf(pdf_path, doc_id="doc_api")
+    finally:
+        shutdown_chunking_pool()
+
+    assert result["page_count"] == 6
+    assert result["child_count"] > 0
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from database.ingestion_job_repository import IngestionJobRepository
+from rag.ingestion.worker import IngestionWorker
+
+
+pytestmark = pytest.mark.anyio
+
+
+class _FakeJobs:
+    """Cola en memoria con la semántica de `IngestionJobRepository`."""
+
+    def __init__(self, jobs):
+        self.jobs = {job["job_id"]: {"attempts": 0, "max_attempts": 3, "status": "queued", **job} for job in jobs}
+        self.retry_delays: list[float | None] = []
+
+    async def claim(self, *, worker_id, lease_seconds):
+        for job in self.jobs.values():
+            if job["status"] == "queued":
+                job.update(status="processing", worker_id=worker_id)
+                job["attempts"] += 1
+                return dict(job)
+        return None
+
+    async def extend_lease(self, job_id, *, worker_id, lease_seconds):
+        return self.jobs[job_id]["worker_id"] == worker_id
+
+    async def mark_ready(self, job_id, *, worker_id, result):
+        self.jobs[job_id].update(status="ready", result=result)
+        return True
+
+    async def mark_failed(self, job, *, worker_id, error, retry_delay_seconds=None):
+        self.retry_delays.append(retry_delay_seconds)
+        stored = self.jobs[job["job_id"]]
+        status = "queued" if retry_delay_seconds is not None and job["attempts"] < job["max_attempts"] else "failed"
+        stored.update(status=status, error=error)
+        return status
+
+    async def fail_expired(self):
+        return []
+
+
+class _FakeStatus:
+    def __init__(self):
+        self.events: list[tuple[str, str]] = []
+
+    async def mark_processing(self, filename):
+        self.events.append(("processing", filename))
+
+    async def mark_ready(self, *, filename, **_):
+        self.events.append(("ready", filename))
+
+    async def mark_queued(self, *, filename, **_):
+        self.events.append(("queued", filename))
+
+    async def mark_failed(self, *, filename, error):
+        self.events.append(("failed", filename))
+
+
+class _FakeIngestor:
+    def __init__(self, outcomes=None, gate: asyncio.Event | None = None):
+        self.outcomes = list(outcomes or [])
+        self.gate = gate
+        self.active = 0
+        self.max_active = 0
+
+    async def ingest_single_pdf(self, pdf_path: Path):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            if self.gate is not None:
+                await self.gate.wait()
+            outcome = self.outcomes.pop(0) if self.outcomes else {"status": "success", "doc_id": pdf_path.stem}
+            if isinstance(outcome, Exception):
+                raise outcome
+            return {"parent_count": 1, "child_count": 3, **outcome}
+        finally:
+            self.active -= 1
+
+
+def _job(name: str) -> dict:
+    return {"job_id": name, "filename": f"{name}.pdf", "file_path": f"/pdfs/{name}.pdf"}
+
+
+def _worker(jobs, ingestor, **kwargs) -> IngestionWorker:
+    kwargs.setdefault("poll_interval_s", 0.01)
+    return IngestionWorker(job_repository=jobs, rag_ingestor=ingestor, worker_id="w1", **kwargs)
+
+
+async def test_successful_job_updates_status_and_refreshes_corpus():
+    jobs, status = _FakeJobs([_job("a")]), _FakeStatus()
+    refreshed = []
+    worker = _worker(jobs, _FakeIngestor(), status_repository=status, on_ingested=lambda: refreshed.append(1))
+
+    assert await worker.run_once() is True
+    assert await worker.run_once() is False
+
+    assert jobs.jobs["a"]["status"] == "ready"
+    assert jobs.jobs["a"]["result"] == {"status": "success", "doc_id": "a", "parent_count": 1, "child_count": 3}
+    assert status.events == [("processing", "a.pdf"), ("ready", "a.pdf")]
+    assert refreshed == [1]
+
+
+async def test_duplicate_pdf_is_ready_without_refreshing_corpus():
+    jobs = _FakeJobs([_job("a")])
+    refreshed = []
+    worker = _worker(jobs, _FakeIngestor([{"status": "skipped"}]), on_ingested=lambda: refreshed.append(1))
+
+    await worker.run_once()
+
+    assert jobs.jobs["a"]["status"] == "ready" and refreshed == []
+
+
+async def test_failures_are_retried_with_backoff_until_max_attempts():
+    jobs, status = _FakeJobs([_job("a")]), _FakeStatus()
+    ingestor = _FakeIngestor([RuntimeError("qdrant caido")] * 3)
+    worker = _worker(jobs, ingestor, status_repository=status, retry_base_delay_s=10.0)
+
+    for _ in range(3):
+        await worker.run_once()
+
+    assert jobs.retry_delays == [10.0, 20.0, 40.0]
+    assert jobs.jobs["a"]["status"] == "failed"
+    assert [event for event, _ in status.events if event != "processing"] == ["queued", "queued", "failed"]
+    assert worker.stats()["retried"] == 2 and worker.stats()["failed"] == 1
+
+
+async def test_missing_file_fails_without_retry():
+    jobs = _FakeJobs([_job("a")])
+    worker = _worker(jobs, _FakeIngestor([FileNotFoundError("/pdfs/a.pdf")]))
+
+    await worker.run_once()
+
+    assert jobs.retry_delays == [None] and jobs.jobs["a"]["status"] == "failed"
+
+
+async def test_slots_process_jobs_concurrently_and_stop_drains_them():
+    gate = asyncio.Event()
+    jobs = _FakeJobs([_job(name) for name in "abc"])
+    ingestor = _FakeIngestor(gate=gate)
+    worker = _worker(jobs, ingestor, concurrency=2)
+
+    worker.start()
+    await asyncio.sleep(0.05)
+    assert ingestor.max_active == 2 and worker.stats()["running"] == 2
+
+    gate.set()
+    await asyncio.sleep(0.05)
+    await worker.stop(timeout_s=1.0)
+
+    assert {job["status"] for job in jobs.jobs.values()} == {"ready"}
+    assert worker.stats()["running"] == 0
+
+
+class _FakeCollection:
+    def __init__(self):
+        self.updates: list[tuple[dict, dict]] = []
+
+    async def update_one(self, query, update):
+        self.updates.append((query, update))
+
+        class _Result:
+            matched_count = 1
+
+        return _Result()
+
+
+class _FakeMongo:
+    def __init__(self, collection):
+        self.db = {"ingestion_jobs": collection}
+
+
+async def test_repository_requeues_until_the_last_attempt():
+    collection = _FakeCollection()
+    repository = IngestionJobRepository(_FakeMongo(collection))
+    job = {"job_id": "a", "attempts": 1, "max_attempts": 2}
+
+    assert await repository.mark_failed(job, worker_id="w1", error="x", retry_delay_seconds=5) == "queued"
+    assert await repository.mark_failed({**job, "attempts": 2}, worker_id="w1", error="x", retry_delay_seconds=5) == "failed"
+
+    (queued_filter, queued_update), (_, failed_update) = collection.updates
+    assert queued_filter == {"job_id": "a", "worker_id": "w1", "status": "processing"}
+    assert queued_update["$set"]["worker_id"] is None
+    assert failed_update["$set"]["status"] == "failed"
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import rag.retrieval.lexical_index as lexical_index_mod
+from database.rag_child_lexical_repository import RAGChildLexicalRepository
+from rag.ingestion.models import ChildChunk, PageSpan
+from rag.retrieval.lexical_index import InMemoryLexicalIndex
+
+
+pytestmark = pytest.mark.anyio
+
+
+def _matches(doc: dict, query: dict) -> bool:
+    for key, expected in query.items():
+        value = doc.get(key)
+        if isinstance(expected, dict) and "$in" in expected:
+            if value not in expected["$in"]:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+class _FakeCursor:
+    def __init__(self, rows):
+        self._rows = rows
+
+    async def to_list(self, length=None):
+        return list(self._rows if length is None else self._rows[:length])
+
+    def __aiter__(self):
+        self._iter = iter(self._rows)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _FakeCollection:
+    def __init__(self):
+        self.rows: list[dict] = []
+        self.find_calls = 0
+
+    def find(self, query=None, projection=None):
+        del projection
+        self.find_calls += 1
+        return _FakeCursor([dict(row) for row in self.rows if _matches(row, query or {})])
+
+    async def count_documents(self, query):
+        return sum(1 for row in self.rows if _matches(row, query))
+
+    def aggregate(self, pipeline):
+        match = pipeline[0]["$match"]
+        rows = [row for row in self.rows if _matches(row, match)]
+        if not rows:
+            return _FakeCursor([])
+        avg = sum(row["token_count"] for row in rows) / len(rows)
+        return _FakeCursor([{"_id": None, "avg_token_count": avg}])
+
+    async def bulk_write(self, operations, ordered=False):
+        del ordered
+        for op in operations:
+            doc = op._doc
+            key = op._filter
+            self.rows = [row for row in self.rows if not _matches(row, key)]
+            self.rows.append(dict(doc))
+        return SimpleNamespace(upserted_count=len(operations))
+
+
+def _child(child_id: str, content: str, *, doc_id: str = "doc_1", source: str = "a.pdf") -> ChildChunk:
+    return ChildChunk(
+        child_id=child_id,
+        parent_id=f"parent_{child_id}",
+        doc_id=doc_id,
+        content=content,
+        page_span=PageSpan(start_page=1, end_page=1),
+        source=source,
+        file_path=f"/tmp/{source}",
+        child_index=0,
+        parent_index=0,
+        section_title=None,
+        contains_table=False,
+        contains_numeric=False,
+        contains_date_like=False,
+        token_count=len(content.split()),
+        content_hash=f"hash_{child_id}",
+    )
+
+
+async def _build_repository() -> RAGChildLexicalRepository:
+    db = {"docs": _FakeCollection(), "postings": _FakeCollection()}
+    mongodb_client = SimpleNamespace(db=db)
+    repository = RAGChildLexicalRepository(
+        mongodb_client,
+        documents_collection_name="docs",
+        postings_collection_name="postings",
+    )
+    await repository.upsert_children(
+        [
+            _child("c1", "error 500 timeout en el servidor principal"),
+            _child("c2", "timeout timeout de red y reintentos del cliente"),
+            _child("c3", "configuracion del servidor de correo", doc_id="doc_2", source="b.pdf"),
+            _child("c4", "manual de usuario sin coincidencias relevantes aqui", doc_id="doc_2", source="b.pdf"),
+        ]
+    )
+    return repository
+
+
+@pytest.fixture
+def corpus_version(monkeypatch):
+    state = {"version": "1"}
+
+    async def _version():
+        return state["version"]
+
+    monkeypatch.setattr(lexical_index_mod, "aget_corpus_cache_version", _version)
+    return state
+
+
+@pytest.mark.parametrize(
+    "query,filter_criteria",
+    [
+        ("timeout del servidor", None),
+        ("error 500 timeout timeout", None),
+        ("servidor", {"source": "b.pdf"}),
+        ("servidor timeout", {"doc_id": "doc_1"}),
+    ],
+)
+async def test_in_memory_index_matches_mongo_bm25(corpus_version, query, filter_criteria):
+    repository = await _build_repository()
+    index = InMemoryLexicalIndex(repository)
+    # The repository caches the corpus-wide avg length from its first call;
+    # warm it unfiltered so both paths normalise against the same average.
+    await repository.search("servidor", limit=1)
+    await index.refresh()
+
+    expected = await repository.search(query, limit=10, filter_criteria=filter_criteria)
+    actual = await index.search(query, limit=10, filter_criteria=filter_criteria)
+
+    assert [hit.child_id for hit in actual] == [hit.child_id for hit in expected]
+    for got, want in zip(actual, expected):
+        assert got.score == pytest.approx(want.score, rel=1e-5)
+        assert got.content == want.content
+        assert got.parent_id == want.parent_id
+
+
+async def test_in_memory_index_only_fetches_top_k_documents(corpus_version):
+    repository = await _build_repository()
+    index = InMemoryLexicalIndex(repository)
+
+    await index.refresh()
+    docs_calls = repository.documents_collection.find_calls
+    postings_calls = repository.postings_collection.find_calls
+    hits = await index.search("servidor", limit=1)
+
+    assert len(hits) == 1
+    assert hits[0].content
+    assert repository.postings_collection.find_calls == postings_calls
+    assert repository.documents_collection.find_calls == docs_calls + 1
+    assert index.stats()["children"] == 4
+
+
+async def test_in_memory_index_cold_start_uses_repository_and_builds_in_background(corpus_version):
+    repository = await _build_repository()
+    index = InMemoryLexicalIndex(repository)
+
+    hits = await index.search("timeout", limit=2)
+
+    assert [hit.child_id for hit in hits] == [hit.child_id for hit in await repository.search("timeout", limit=2)]
+    await index._build_task
+    assert index.version == "1"
+
+
+async def test_in_memory_index_serves_previous_snapshot_while_rebuilding(corpus_version, monkeypatch):
+    repository = await _build_repository()
+    index = InMemoryLexicalIndex(repository)
+    await index.refresh()
+
+    await repository.upsert_children([_child("c5", "facturacion electronica mensual")])
+    release = asyncio.Event()
+    real_build = index._build
+
+    async def _slow_build(version):
+        await release.wait()
+        return await real_build(version)
+
+    monkeypatch.setattr(index, "_build", _slow_build)
+    corpus_version["version"] = "2"
+
+    # The bump does not block queries: the v1 snapshot keeps answering.
+    assert await asyncio.wait_for(index.search("facturacion", limit=3), timeout=1) == []
+    assert [hit.child_id for hit in await index.search("servidor", limit=3)]
+    assert index.version == "1"
+
+    release.set()
+    await index._build_task
+    hits = await index.search("facturacion", limit=3)
+
+    assert [hit.child_id for hit in hits] == ["c5"]
+    assert index.version == "2"
+
+
+async def test_in_memory_index_falls_back_to_repository_when_build_fails(corpus_version, monkeypatch):
+    repository = await _build_repository()
+    index = InMemoryLexicalIndex(repository)
+
+    async def _broken_build(version):
+        raise RuntimeError("mongo down")
+
+    monkeypatch.setattr(index, "_build", _broken_build)
+    hits = await index.search("timeout", limit=2)
+
+    assert [hit.child_id for hit in hits] == [hit.child_id for hit in await repository.search("timeout", limit=2)]
+    assert index.stats()["ready"] is False
+
+
+async def test_in_memory_index_backs_off_after_a_failed_build(corpus_version, monkeypatch):
+    repository = await _build_repository()
+    index = InMemoryLexicalIndex(repository, retry_base_seconds=0.3)
+    real_build = index._build
+    builds = []
+
+    async def _flaky_build(version):
+        builds.append(version)
+        if len(builds) == 1:
+            raise RuntimeError("mongo down")
+        return await real_build(version)
+
+    monkeypatch.setattr(index, "_build", _flaky_build)
+    await index.search("timeout", limit=2)
+    await asyncio.sleep(0)
+
+    # While cooling down, queries use the repository and never rebuild.
+    for _ in range(5):
+        assert await index.search("timeout", limit=2)
+    assert builds == ["1"]
+    assert index.stats()["build_failures"] == 1
+
+    await asyncio.sleep(0.35)
+    await asyncio.gather(*(index.search("timeout", limit=2) for _ in range(5)))
+    await index._build_task
+
+    assert builds == ["1", "1"]
+    assert index.version == "1"
+    assert index.stats()["build_failures"] == 0
+
+
+async def test_in_memory_index_delegates_repository_attributes(corpus_version):
+    repository = await _build_repository()
+    index = InMemoryLexicalIndex(repository)
+
+    assert index.documents_collection_name == "docs"
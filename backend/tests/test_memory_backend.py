@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import numpy as np
+
+from cache.memory_backend import InMemoryCache
+
+
+def test_get_refreshes_recency_so_hot_keys_survive_eviction():
+    cache = InMemoryCache(max_size=3)
+    for key in ("a", "b", "c"):
+        cache.set(key, key, ttl=60)
+
+    assert cache.get("a") == "a"
+    cache.set("d", "d", ttl=60)
+
+    assert cache.get("a") == "a"
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_evicts_least_recently_used_first():
+    vector = np.zeros(1024, dtype=np.float32)  # 4 KB
+    cache = InMemoryCache(max_size=100, max_bytes=3 * 4096 + 1000)
+    for i in range(3):
+        cache.set(f"emb:doc:{i}", vector, ttl=60)
+    cache.get("emb:doc:0")
+
+    cache.set("emb:doc:3", vector, ttl=60)
+
+    assert cache.get("emb:doc:1") is None
+    assert cache.get("emb:doc:0") is not None
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_oversized_value_is_skipped_without_flushing_the_cache():
+    cache = InMemoryCache(max_size=100, max_bytes=2048)
+    cache.set("small", "x", ttl=60)
+
+    cache.set("huge", "y" * 10_000, ttl=60)
+
+    assert cache.get("huge") is None
+    assert cache.get("small") == "x"
+
+
+def test_invalidate_prefix_only_touches_its_bucket():
+    cache = InMemoryCache(max_size=100)
+    cache.set("rag:retrieval:a", 1, ttl=60)
+    cache.set("rag:retrieval:b", 2, ttl=60)
+    cache.set("rag:ts:doc", 3, ttl=60)
+    cache.set("vs:search:x", 4, ttl=60)
+
+    cache.invalidate_prefix("rag:retrieval:")
+    cache.invalidate_prefix("vs:sea")
+
+    assert cache.get_many(["rag:retrieval:a", "rag:retrieval:b", "rag:ts:doc", "vs:search:x"]) == {"rag:ts:doc": 3}
+    assert "rag:retrieval:" not in cache._buckets
+    assert cache._prefix_candidates("emb:") == []
+
+
+def test_overwrite_and_delete_keep_byte_accounting_exact():
+    cache = InMemoryCache(max_size=100)
+    cache.set("k", "a" * 100, ttl=60)
+    cache.set("k", "b" * 10, ttl=60)
+    cache.delete("k")
+
+    assert cache.stats()["bytes"] == 0 and cache.stats()["entries"] == 0
+
+
+def test_counters_track_hits_misses_and_expirations():
+    cache = InMemoryCache(max_size=10)
+    cache.set("vivo", 1, ttl=60)
+    cache.set("expirado", 1, ttl=60)
+    cache._store["expirado"]["expires_at"] = 0
+
+    cache.get("vivo")
+    cache.get("expirado")
+    cache.get("ausente")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 2, 1)
+    assert stats["hit_rate"] == round(1 / 3, 4)
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+from database.message_write_behind import MessageWriteBehind
+from database.mongodb import MongodbClient
+
+
+pytestmark = pytest.mark.anyio
+
+
+class _FakeMessages:
+    def __init__(self, failures=None):
+        self.calls: list[list[dict]] = []
+        self.failures = list(failures or [])
+
+    async def insert_many(self, documents, ordered=True):
+        self.calls.append(list(documents))
+        if self.failures:
+            raise self.failures.pop(0)
+
+
+def _client(messages: _FakeMessages, writer: bool = False) -> MongodbClient:
+    client = MongodbClient.__new__(MongodbClient)
+    client.messages = messages
+    client.client = None
+    client._turn_writer = (
+        MessageWriteBehind(client._insert_messages, flush_interval_ms=10) if writer else None
+    )
+    return client
+
+
+async def test_turn_is_persisted_with_one_insert_many_in_order():
+    messages = _FakeMessages()
+    client = _client(messages)
+
+    ids = await client.add_turn("conv-1", "hola", "¡Hola! ¿En qué te ayudo?", "web")
+
+    (docs,) = messages.calls
+    assert [doc["role"] for doc in docs] == ["user", "assistant"]
+    assert [doc["message_id"] for doc in docs] == ids
+    assert docs[1]["timestamp"] > docs[0]["timestamp"]
+    assert {doc["source"] for doc in docs} == {"web"}
+
+
+async def test_turn_without_assistant_text_stores_only_the_user_message():
+    messages = _FakeMessages()
+
+    await _client(messages).add_turn("conv-1", "hola", "", None)
+
+    assert [doc["role"] for doc in messages.calls[0]] == ["user"]
+    assert messages.calls[0][0]["source"] == "embed-default"
+
+
+async def test_retry_after_partial_write_treats_duplicates_as_written(monkeypatch):
+    monkeypatch.setattr(asyncio, "sleep", _no_sleep)
+    duplicate = BulkWriteError({"writeErrors": [{"code": 11000, "index": 0}]})
+    messages = _FakeMessages(failures=[RuntimeError("timeout"), duplicate])
+
+    await _client(messages).add_turn("conv-1", "hola", "respuesta")
+
+    assert len(messages.calls) == 2
+
+
+async def test_write_behind_batches_turns_from_many_conversations():
+    messages = _FakeMessages()
+    client = _client(messages, writer=True)
+
+    await asyncio.gather(*(client.add_turn(f"conv-{i}", "q", "a") for i in range(5)))
+    assert messages.calls == []
+
+    await asyncio.sleep(0.05)
+    assert len(messages.calls) == 1 and len(messages.calls[0]) == 10
+    assert client.message_writer_stats()["written"] == 10
+
+
+async def test_close_flushes_pending_turns():
+    messages = _FakeMessages()
+    client = _client(messages, writer=True)
+    client._turn_writer.flush_interval_s = 60.0
+
+    await client.add_turn("conv-1", "q", "a")
+    await client.close()
+
+    assert len(messages.calls) == 1
+    assert client.message_writer_stats()["pending"] == 0
+
+
+async def test_full_queue_falls_back_to_inline_write():
+    messages = _FakeMessages()
+    client = _client(messages, writer=True)
+    writer = client._turn_writer
+    writer.flush_interval_s = 60.0
+    writer.max_pending_messages = 2
+
+    await client.add_turn("conv-1", "q", "a")
+    await client.add_turn("conv-2", "q", "a")
+
+    assert len(messages.calls) == 1 and messages.calls[0][0]["conversation_id"] == "conv-2"
+    assert writer.stats()["inline_fallbacks"] == 1
+    await writer.aclose()
+    assert [call[0]["conversation_id"] for call in messages.calls] == ["conv-2", "conv-1"]
+
+
+async def test_failed_batch_is_requeued_and_written_on_retry():
+    writes: list[list[dict]] = []
+    failures = [RuntimeError("mongo down")]
+
+    async def _write(batch):
+        if failures:
+            raise failures.pop(0)
+        writes.append(list(batch))
+
+    writer = MessageWriteBehind(_write, flush_interval_ms=5, retry_backoff_ms=5)
+    assert writer.submit([{"conversation_id": "conv-1", "message_id": "m1"}])
+
+    await asyncio.sleep(0.1)
+
+    assert [[doc["message_id"] for doc in batch] for batch in writes] == [["m1"]]
+    stats = writer.stats()
+    assert (stats["retried"], stats["failed"], stats["written"], stats["pending"]) == (1, 0, 1, 0)
+    await writer.aclose()
+
+
+async def test_batch_is_dropped_only_after_bounded_retries():
+    attempts = []
+
+    async def _write(batch):
+        attempts.append(len(batch))
+        raise RuntimeError("mongo down")
+
+    writer = MessageWriteBehind(_write, flush_interval_ms=60_000, max_flush_retries=2, retry_backoff_ms=1)
+    assert writer.submit([{"conversation_id": "conv-1", "message_id": "m1"}])
+
+    await writer.aclose()
+
+    assert len(attempts) == 3
+    stats = writer.stats()
+    assert (stats["retried"], stats["failed"], stats["pending"]) == (2, 1, 0)
+
+
+async def _no_sleep(_seconds):
+    return None
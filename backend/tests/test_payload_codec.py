@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import datetime
+import decimal
+import json
+import uuid
+import zlib
+
+import numpy as np
+import pytest
+
+from cache.metrics import CacheMetrics
+from cache.redis_backend import COMPRESSED_PREFIX, JSON_PREFIX, PayloadCodec, RedisCache, decode_payload
+from tests.test_cache_batch import _FakeRedis, _manager_with
+
+
+def _retrieval_payload(n_docs: int = 8) -> dict:
+    return {
+        "docs": [
+            {
+                "page_content": "La matrícula del ciclo 2025-I cierra el 15 de marzo. " * 20,
+                "metadata": {"source": f"reglamento_{i}.pdf", "page": i, "score": 0.8123},
+            }
+            for i in range(n_docs)
+        ]
+    }
+
+
+@pytest.mark.parametrize("json_codec", ["orjson", "json"])
+def test_roundtrip_matches_stdlib_json_semantics(json_codec):
+    codec = PayloadCodec(json_codec=json_codec)
+    value = {
+        "when": datetime.datetime(2025, 3, 1, 12, 30, tzinfo=datetime.timezone.utc),
+        "day": datetime.date(2025, 3, 1),
+        "price": decimal.Decimal("12.50"),
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        1: "clave entera",
+        "nested": [1, 2.5, None, True],
+    }
+
+    payload, _ = codec.encode("resp:x", value)
+    decoded, corrupt = decode_payload(payload)
+
+    assert not corrupt
+    assert payload.startswith(JSON_PREFIX)
+    assert decoded == {
+        "when": "2025-03-01T12:30:00+00:00",
+        "day": "2025-03-01",
+        "price": 12.5,
+        "id": "12345678-1234-5678-1234-567812345678",
+        "1": "clave entera",
+        "nested": [1, 2.5, None, True],
+    }
+
+
+def test_legacy_stdlib_payloads_are_still_readable():
+    legacy = JSON_PREFIX + json.dumps({"a": [1, 2], "nan": float("nan")}).encode("utf-8")
+
+    decoded, corrupt = decode_payload(legacy)
+
+    assert not corrupt
+    assert decoded["a"] == [1, 2] and decoded["nan"] != decoded["nan"]
+
+
+def test_large_payloads_are_compressed_and_read_back():
+    codec = PayloadCodec(compress_threshold=1024)
+    value = _retrieval_payload()
+
+    payload, raw_size = codec.encode("rag:retrieval:q", value)
+
+    assert payload.startswith(COMPRESSED_PREFIX)
+    assert len(payload) < raw_size / 4
+    assert decode_payload(payload) == (value, False)
+
+
+def test_small_or_incompressible_payloads_stay_uncompressed():
+    codec = PayloadCodec(compress_threshold=1024)
+    noise = np.random.default_rng(0).random(2048).astype(np.float32)
+
+    small, _ = codec.encode("bot:config", {"temperature": 0.2})
+    vector, _ = codec.encode("emb:query:m:q", noise)
+
+    assert small.startswith(JSON_PREFIX)
+    assert not vector.startswith(COMPRESSED_PREFIX)
+
+
+def test_huge_integers_fall_back_to_stdlib_encoder():
+    payload, _ = PayloadCodec(json_codec="orjson").encode("k", {"n": 2**70})
+
+    assert decode_payload(payload) == ({"n": 2**70}, False)
+
+
+def test_damaged_compressed_payload_is_dropped_as_corrupt():
+    client = _FakeRedis()
+    backend = RedisCache(client=client, codec=PayloadCodec(compress_threshold=16))
+    client.store["rag:retrieval:q"] = COMPRESSED_PREFIX + zlib.compress(b"JSON:{")[:-3]
+
+    assert backend.get("rag:retrieval:q") is None
+    assert "rag:retrieval:q" in client.deleted
+
+
+def test_metrics_report_stored_size_and_compression_savings():
+    backend = RedisCache(client=_FakeRedis(), codec=PayloadCodec(compress_threshold=1024))
+    manager = _manager_with(backend)
+    manager.l1 = None
+    manager.attach_metrics(CacheMetrics())
+
+    manager.set("rag:retrieval:q", _retrieval_payload(), ttl=60)
+    manager.set("bot:config", {"temperature": 0.2}, ttl=0)
+
+    families = manager.metrics_snapshot()["families"]
+    retrieval = families["rag:retrieval"]
+    assert retrieval["compressed_payloads"] == 1
+    assert retrieval["compression_saved_bytes"] > retrieval["payload_bytes"]["max"]
+    assert families["bot:config"]["compressed_payloads"] == 0
+    assert manager.get("rag:retrieval:q") == _retrieval_payload()
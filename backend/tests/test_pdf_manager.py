@@ -79,6 +79,9 @@ class _FakeParentRepository:
         self._count += len(parents)
         return len(parents)
 
+    async def get_placements_by_source(self, source: str):
+        return {}
+
 
 class _FakeEmbeddingManager:
     async def embed_documents_async(self, texts):
@@ -102,6 +105,9 @@ class _FakeVectorStore:
     async def add_documents(self, documents, embeddings=None):
         self.add_calls.append((documents, embeddings))
 
+    async def get_payloads_by_source(self, source, fields):
+        return {}
+
 
 def _make_local_tmp_dir() -> Path:
     base_dir = Path(__file__).resolve().parent / "_tmp_pdf_manager"
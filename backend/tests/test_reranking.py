@@ -0,0 +1,128 @@
+"""Vectorized semantic reranking and MMR must order exactly like the per-pair loops."""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from tests.conftest import make_doc
+
+
+pytestmark = pytest.mark.anyio
+
+_DIM = 1536
+
+
+def _unit(rng: np.random.Generator) -> np.ndarray:
+    vec = rng.standard_normal(_DIM).astype(np.float32)
+    return vec / np.linalg.norm(vec)
+
+
+def _reference_mmr(retriever, docs, k, query_vec, lambda_mult):
+    embeddings = {}
+    for idx, doc in enumerate(docs):
+        cleaned = retriever._clean_vector(doc.metadata.get("vector"))
+        if cleaned is not None:
+            embeddings[idx] = cleaned
+    if not embeddings:
+        return docs[:k]
+    selected: list[int] = []
+    remaining = list(embeddings)
+    try:
+        for _ in range(min(k, len(docs))):
+            scores = []
+            for idx in remaining:
+                relevance = float(np.dot(query_vec, embeddings[idx]))
+                if selected:
+                    diversity = 1 - max(float(np.dot(embeddings[idx], embeddings[s])) for s in selected)
+                else:
+                    diversity = 1.0
+                scores.append((idx, lambda_mult * relevance + (1 - lambda_mult) * diversity))
+            best = max(scores, key=lambda item: item[1])[0]
+            selected.append(best)
+            remaining.remove(best)
+    except ValueError:
+        return docs[:k]
+    return [docs[idx] for idx in selected]
+
+
+def _reference_semantic_order(retriever, docs, query_vec):
+    scored = []
+    for doc in docs:
+        semantic = 0.0
+        cleaned = retriever._clean_vector(doc.metadata.get("vector"))
+        if cleaned is not None:
+            semantic = float(np.dot(query_vec, cleaned))
+        length_score = min(len(doc.page_content.split()) / 100, 1.0)
+        type_score = retriever._get_content_type_score(doc.metadata.get("chunk_type", "text"))
+        scored.append((doc, semantic * 0.75 + length_score * 0.15 + type_score * 0.10))
+    return [doc.page_content for doc, _ in sorted(scored, key=lambda item: item[1], reverse=True)]
+
+
+def _make_docs(rng: np.random.Generator, n: int, *, missing_every: int = 0) -> list:
+    docs = []
+    for i in range(n):
+        vector = None if missing_every and i % missing_every == 0 else _unit(rng).tolist()
+        docs.append(
+            make_doc(
+                content=f"doc {i} " + "palabra " * int(rng.integers(1, 150)),
+                chunk_type=["text", "table", "header", "list"][i % 4],
+                vector=vector,
+            )
+        )
+    return docs
+
+
+@pytest.mark.parametrize("n,k,lambda_mult", [(20, 4, 0.5), (50, 8, 0.7), (120, 12, 0.3)])
+async def test_apply_mmr_matches_reference_loop(retriever, n, k, lambda_mult):
+    retriever.embedding_manager = object()
+    rng = np.random.default_rng(n)
+    docs = _make_docs(rng, n, missing_every=7)
+    query_vec = _unit(rng)
+
+    expected = _reference_mmr(retriever, docs, k, query_vec, lambda_mult)
+    actual = await retriever._apply_mmr(docs, k, query_embedding=query_vec, lambda_mult=lambda_mult)
+
+    assert [doc.page_content for doc in actual] == [doc.page_content for doc in expected]
+
+
+async def test_apply_mmr_without_enough_vectors_keeps_retrieval_order(retriever):
+    retriever.embedding_manager = object()
+    rng = np.random.default_rng(3)
+    docs = _make_docs(rng, 4, missing_every=2)
+
+    result = await retriever._apply_mmr(docs, 4, query_embedding=_unit(rng))
+
+    assert result == docs[:4]
+
+
+async def test_apply_mmr_prefers_diverse_documents(retriever):
+    retriever.embedding_manager = object()
+    base = np.zeros(_DIM, dtype=np.float32)
+    base[0] = 1.0
+    near_duplicate = base.copy()
+    near_duplicate[1] = 0.05
+    other = np.zeros(_DIM, dtype=np.float32)
+    other[0], other[2] = 0.6, 0.8
+    docs = [
+        make_doc(content="a", vector=base.tolist()),
+        make_doc(content="a-dup", vector=near_duplicate.tolist()),
+        make_doc(content="b", vector=other.tolist()),
+    ]
+
+    result = await retriever._apply_mmr(docs, 2, query_embedding=base, lambda_mult=0.3)
+
+    assert [doc.page_content for doc in result] == ["a", "b"]
+
+
+@pytest.mark.parametrize("n", [10, 60])
+async def test_semantic_reranking_matches_reference_loop(retriever, n):
+    retriever.embedding_manager = object()
+    rng = np.random.default_rng(100 + n)
+    docs = _make_docs(rng, n, missing_every=5)
+    query_vec = _unit(rng)
+
+    expected = _reference_semantic_order(retriever, docs, query_vec)
+    actual = await retriever._semantic_reranking(docs, query_embedding=query_vec)
+
+    assert [doc.page_content for doc in actual] == expected
+    assert all("score" in doc.metadata for doc in actual)
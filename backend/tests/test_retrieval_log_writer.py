@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from langchain_core.documents import Document
+
+import database.retrieval_log_repository as repo_mod
+from database.retrieval_log_repository import RetrievalLogRepository, RetrievalLogWriter
+
+
+pytestmark = pytest.mark.anyio
+
+
+class _FakeRepository:
+    def __init__(self, gate: asyncio.Event | None = None, fail: bool = False):
+        self.batches: list[list[dict]] = []
+        self.gate = gate
+        self.fail = fail
+
+    async def insert_many(self, documents):
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.fail:
+            raise RuntimeError("mongo caido")
+        self.batches.append(list(documents))
+
+
+def _writer(repository, **kwargs) -> RetrievalLogWriter:
+    kwargs.setdefault("batch_size", 3)
+    kwargs.setdefault("flush_interval_s", 60.0)
+    return RetrievalLogWriter(repository_factory=lambda: repository, **kwargs)
+
+
+def _doc(i: int) -> dict:
+    return {"conversation_id": f"c{i}", "query": "q"}
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def test_full_batches_are_written_with_one_insert_many():
+    repository = _FakeRepository()
+    writer = _writer(repository)
+
+    for i in range(7):
+        assert writer.submit(_doc(i)) is True
+    await _settle()
+
+    assert [len(batch) for batch in repository.batches] == [3, 3]
+    assert writer.stats()["buffered"] == 1
+
+    await writer.aclose()
+    assert [len(batch) for batch in repository.batches] == [3, 3, 1]
+    assert writer.stats()["written"] == 7
+
+
+async def test_partial_batch_is_flushed_after_the_interval():
+    repository = _FakeRepository()
+    writer = _writer(repository, flush_interval_s=0.02)
+
+    writer.submit(_doc(1))
+    await asyncio.sleep(0.08)
+
+    assert repository.batches == [[_doc(1)]]
+    assert writer.stats()["writes_per_second_60s"] > 0
+    await writer.aclose()
+
+
+async def test_full_buffer_drops_new_logs_and_counts_them():
+    gate = asyncio.Event()
+    repository = _FakeRepository(gate=gate)
+    writer = _writer(repository, batch_size=2, max_buffer=4)
+
+    accepted = [writer.submit(_doc(i)) for i in range(2)]
+    await _settle()  # el primer lote queda bloqueado en Mongo
+    accepted += [writer.submit(_doc(i)) for i in range(2, 8)]
+
+    assert accepted.count(False) == 2
+    assert writer.stats()["dropped"] == 2
+
+    gate.set()
+    await writer.aclose()
+    assert writer.stats()["written"] == 6
+
+
+async def test_failed_inserts_are_counted_without_raising():
+    writer = _writer(_FakeRepository(fail=True))
+
+    for i in range(3):
+        writer.submit(_doc(i))
+    await _settle()
+    await writer.aclose()
+
+    stats = writer.stats()
+    assert (stats["failed"], stats["written"], stats["buffered"]) == (3, 0, 0)
+
+
+async def test_schedule_log_retrieval_enqueues_on_the_shared_writer(monkeypatch):
+    repository = _FakeRepository()
+    writer = _writer(repository)
+    monkeypatch.setattr(repo_mod, "_WRITER", writer)
+
+    scheduled = repo_mod.schedule_log_retrieval(
+        conversation_id="c1",
+        query="precio",
+        docs=[Document(page_content="x", metadata={"source": "a.pdf", "score": 0.4})],
+        latency_ms=12.345,
+        gating_reason="low_relevance_score",
+    )
+    await repo_mod.close_retrieval_log_writer()
+
+    assert scheduled is True
+    (logged,) = repository.batches[0]
+    assert logged["chunks"][0]["source"] == "a.pdf"
+    assert logged["latency_ms"] == 12.35 and logged["gating_reason"] == "low_relevance_score"
+
+
+def test_schedule_without_running_loop_is_a_noop(monkeypatch):
+    monkeypatch.setattr(repo_mod, "_WRITER", _writer(_FakeRepository()))
+
+    assert repo_mod.schedule_log_retrieval(conversation_id="c", query="q", docs=[], latency_ms=0.0) is False
+
+
+def test_build_log_document_truncates_long_queries():
+    document = RetrievalLogRepository.build_log_document(
+        conversation_id="c", query="x" * 900, docs=[], latency_ms=1.0,
+    )
+
+    assert len(document["query"]) == 500 and document["chunk_count"] == 0
@@ -150,13 +150,15 @@ class TestRetrieveDocumentsPipeline:
         retriever.cache_enabled = True
         retriever_mod.settings.enable_cache = True
         docs = [Document(page_content="Doc cacheado", metadata={"chunk_type": "text", "score": 0.9})]
-        fake_cache = MagicMock()
-        fake_cache.get.return_value = {
+        cached = {
             "kind": "documents",
             "reason": "accepted",
             "documents": retriever._serialize_documents(docs),
         }
-        fake_cache.set = MagicMock()
+        fake_cache = MagicMock()
+        # Entrada + época de `rag:ts:*` en una sola lectura.
+        fake_cache.aget_many = AsyncMock(side_effect=lambda keys: {keys[0]: cached})
+        fake_cache.aset = AsyncMock()
         fake_cache.invalidate_prefix = MagicMock()
         monkeypatch.setattr(retriever_mod, "cache", fake_cache)
 
@@ -195,8 +197,9 @@ class TestRetrieveDocumentsPipeline:
         retriever.cache_enabled = True
         retriever_mod.settings.enable_cache = True
         fake_cache = MagicMock()
-        fake_cache.get.return_value = None
-        fake_cache.set = MagicMock()
+        fake_cache.aget = AsyncMock(return_value=None)
+        fake_cache.aget_many = AsyncMock(return_value={})
+        fake_cache.aset = AsyncMock()
         fake_cache.invalidate_prefix = MagicMock()
         monkeypatch.setattr(retriever_mod, "cache", fake_cache)
 
@@ -208,7 +211,7 @@ class TestRetrieveDocumentsPipeline:
         result = await retriever.retrieve_documents("consulta sin resultados", k=2)
 
         assert result == []
-        saved_payload = fake_cache.set.call_args.args[1]
+        saved_payload = fake_cache.aset.call_args.args[1]
         assert saved_payload["kind"] == "no_context"
         assert saved_payload["reason"] == "no_candidates"
 
@@ -218,8 +221,9 @@ class TestRetrieveDocumentsPipeline:
         retriever.cache_enabled = True
         retriever_mod.settings.enable_cache = True
         fake_cache = MagicMock()
-        fake_cache.get.return_value = None
-        fake_cache.set = MagicMock()
+        fake_cache.aget = AsyncMock(return_value=None)
+        fake_cache.aget_many = AsyncMock(return_value={})
+        fake_cache.aset = AsyncMock()
         fake_cache.invalidate_prefix = MagicMock()
         monkeypatch.setattr(retriever_mod, "cache", fake_cache)
 
@@ -229,5 +233,5 @@ class TestRetrieveDocumentsPipeline:
         result = await retriever.retrieve_documents("consulta valida", k=2)
 
         assert result == []
-        fake_cache.set.assert_not_called()
+        fake_cache.aset.assert_not_called()
         retriever.vector_store.retrieve.assert_not_called()
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import chat.semantic_cache as semantic_mod
+from cache.manager import CacheManager
+from cache.memory_backend import InMemoryCache
+from chat.semantic_cache import SemanticResponseCache
+
+
+pytestmark = pytest.mark.anyio
+
+_DIM = 8
+_FAQ = "cuales son los horarios de atencion de la oficina"
+
+
+def _shared_cache() -> CacheManager:
+    manager = CacheManager.__new__(CacheManager)
+    manager.ttl = 60
+    manager.max_size = 100
+    manager.is_degraded = False
+    manager.backend_type = "InMemoryCache"
+    manager.backend = InMemoryCache(max_size=100)
+    return manager
+
+
+def _bot(model: str = "gpt-4o-mini"):
+    return SimpleNamespace(chain_manager=SimpleNamespace(settings=SimpleNamespace(base_model_name=model)))
+
+
+def _vec(*head: float) -> np.ndarray:
+    vec = np.zeros(_DIM, dtype=np.float32)
+    vec[: len(head)] = head
+    return vec
+
+
+@pytest.fixture
+def corpus_version(monkeypatch):
+    state = {"version": "1"}
+
+    async def _version():
+        return state["version"]
+
+    monkeypatch.setattr(semantic_mod, "aget_corpus_cache_version", _version)
+    return state
+
+
+def _worker(backend, **kwargs) -> SemanticResponseCache:
+    return SemanticResponseCache(cache_backend=backend, sync_interval_s=0.0, **kwargs)
+
+
+async def test_answer_is_shared_across_workers_and_conversations(corpus_version):
+    backend = _shared_cache()
+    writer, reader = _worker(backend), _worker(backend)
+    bot = _bot()
+
+    assert await writer.store(bot, _FAQ, "De 9 a 18h.", _vec(1.0, 0.0), is_first_turn=True)
+
+    hit = await reader.lookup(bot, "horarios de atencion de la oficina?", _vec(1.0, 0.05), is_first_turn=True)
+    assert hit is not None and hit.answer == "De 9 a 18h."
+    assert hit.matched_question == _FAQ
+
+    assert await reader.lookup(bot, "como cancelo mi suscripcion mensual", _vec(0.0, 1.0), is_first_turn=True) is None
+    stats = reader.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+async def test_never_served_across_bot_configs_or_corpus_versions(corpus_version):
+    backend = _shared_cache()
+    cache = _worker(backend)
+    await cache.store(_bot(), _FAQ, "De 9 a 18h.", _vec(1.0), is_first_turn=True)
+
+    assert await cache.lookup(_bot(model="gpt-4o"), _FAQ, _vec(1.0), is_first_turn=True) is None
+
+    corpus_version["version"] = "2"
+    assert await cache.lookup(_bot(), _FAQ, _vec(1.0), is_first_turn=True) is None
+
+
+async def test_only_first_turn_or_context_free_questions_are_eligible(corpus_version):
+    cache = _worker(_shared_cache())
+    bot = _bot()
+    await cache.store(bot, _FAQ, "De 9 a 18h.", _vec(1.0), is_first_turn=True)
+
+    # Follow-up mid-conversation: depends on history, never served.
+    assert await cache.lookup(bot, "y eso cuanto cuesta", _vec(1.0), is_first_turn=False) is None
+    # Self-contained question mid-conversation: served.
+    assert await cache.lookup(bot, _FAQ, _vec(1.0), is_first_turn=False) is not None
+    # Answers produced after earlier turns are never stored.
+    assert await cache.store(bot, "cual es el precio del plan premium anual", "x", _vec(0.0, 1.0), is_first_turn=False) is False
+    assert cache.stats()["ineligible"] == 1
+
+
+async def test_entries_are_bounded_per_namespace(corpus_version):
+    backend = _shared_cache()
+    writer = _worker(backend, max_entries=2)
+    bot = _bot()
+    for i in range(3):
+        await writer.store(bot, f"pregunta numero {i} sobre el servicio", f"r{i}", _vec(*([0.0] * i + [1.0])), is_first_turn=True)
+
+    reader = _worker(backend, max_entries=2)
+    assert await reader.lookup(bot, "pregunta numero 0 sobre el servicio", _vec(1.0), is_first_turn=True) is None
+    hit = await reader.lookup(bot, "pregunta numero 2 sobre el servicio", _vec(0.0, 0.0, 1.0), is_first_turn=True)
+    assert hit is not None and hit.answer == "r2"
+    assert reader.stats()["local_entries"] == 2
+
+
+async def test_concurrent_stores_never_drop_index_entries(corpus_version):
+    backend = _shared_cache()
+    # Fuerza el camino por hilos (como Redis síncrono) para que los stores se solapen.
+    backend.backend_type = "RedisCache"
+    writers = [_worker(backend) for _ in range(4)]
+    bot = _bot()
+    questions = [f"pregunta concurrente numero {i} sobre el servicio" for i in range(20)]
+
+    await asyncio.gather(
+        *(
+            writers[i % len(writers)].store(bot, question, f"r{i}", _vec(*([0.0] * (i % _DIM) + [1.0])), is_first_turn=True)
+            for i, question in enumerate(questions)
+        )
+    )
+
+    reader = _worker(backend)
+    await reader.lookup(bot, questions[0], _vec(1.0), is_first_turn=True)
+    assert reader.stats()["local_entries"] == len(questions)
+
+
+def test_push_capped_moves_existing_member_and_keeps_the_tail():
+    backend = _shared_cache()
+    for member in ("a", "b", "c", "a", "d"):
+        backend.push_capped("resp:sem:ids:test", member, 3, 60)
+
+    assert backend.get_list("resp:sem:ids:test") == ["c", "a", "d"]
+
+
+async def test_hit_rate_is_reported_by_metrics_collector(corpus_version):
+    from infra.metrics_collector import get_metrics_collector
+
+    collector = get_metrics_collector()
+    collector.reset()
+    cache = _worker(_shared_cache())
+    await cache.store(_bot(), _FAQ, "De 9 a 18h.", _vec(1.0), is_first_turn=True)
+    await cache.lookup(_bot(), _FAQ, _vec(1.0), is_first_turn=True)
+
+    block = collector.snapshot()["semantic_cache"]
+    assert block["hits"] == 1 and block["stores"] == 1 and block["hit_rate"] == 1.0
+    collector.reset()
+
+
+async def test_chat_manager_only_embeds_eligible_turns(monkeypatch):
+    import chat.manager as manager_mod
+
+    embedded: list[str] = []
+
+    async def _embed_text(text):
+        embedded.append(text)
+        return _vec(1.0)
+
+    async def _history(memory, conversation_id):
+        return [{"role": "user", "content": "hola"}, {"role": "assistant", "content": "hola!"}]
+
+    monkeypatch.setattr(manager_mod, "load_turn_history", _history)
+    manager = manager_mod.ChatManager.__new__(manager_mod.ChatManager)
+    manager.bot = SimpleNamespace(
+        memory=None,
+        rag_retriever=SimpleNamespace(embedding_manager=SimpleNamespace(embed_text=_embed_text)),
+    )
+    cache = _worker(_shared_cache())
+
+    assert await manager._semantic_cache_context("conv", "y eso cuanto cuesta", cache) == (False, None)
+    assert embedded == []
+    assert await cache.lookup(_bot(), "y eso cuanto cuesta", None, is_first_turn=False) is None
+    assert cache.stats()["ineligible"] == 1
+
+    is_first_turn, embedding = await manager._semantic_cache_context("conv", _FAQ, cache)
+    assert is_first_turn is False and embedding is not None
+    assert embedded == [_FAQ]
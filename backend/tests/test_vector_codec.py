@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+
+from cache.redis_backend import RedisCache
+from cache.vector_codec import decode_vector, encode_vector, to_cache_vector
+from tests.test_cache_batch import _FakeRedis
+
+
+_DIM = 1536
+
+
+def _embedding(seed: int = 0) -> list[float]:
+    return np.random.default_rng(seed).standard_normal(_DIM).tolist()
+
+
+@pytest.mark.parametrize("dtype,bytes_per_dim,rtol", [("float32", 4, 1e-6), ("float16", 2, 1e-2)])
+def test_vector_round_trip(dtype, bytes_per_dim, rtol):
+    original = _embedding()
+    payload = encode_vector(to_cache_vector(original, dtype))
+
+    decoded = decode_vector(payload)
+
+    assert len(payload) == 9 + _DIM * bytes_per_dim
+    assert decoded.dtype == np.float32 and decoded.shape == (_DIM,)
+    assert np.allclose(decoded, original, rtol=rtol, atol=1e-3)
+
+
+def test_decode_rejects_truncated_or_foreign_payloads():
+    payload = encode_vector(to_cache_vector(_embedding()))
+
+    assert decode_vector(payload[:-4]) is None
+    assert decode_vector(b"JSON:[1,2]") is None
+
+
+def test_redis_cache_writes_binary_and_still_reads_legacy_json():
+    client = _FakeRedis()
+    backend = RedisCache(client=client)
+    vector = to_cache_vector(_embedding(1))
+
+    backend.set("emb:query:m:new", vector, ttl=60)
+    client.store["emb:query:m:old"] = b"JSON:" + json.dumps(_embedding(2)).encode("utf-8")
+
+    assert client.store["emb:query:m:new"].startswith(b"VEC1")
+    assert len(client.store["emb:query:m:new"]) < len(client.store["emb:query:m:old"]) / 4
+    values = backend.get_many(["emb:query:m:new", "emb:query:m:old"])
+    assert np.array_equal(values["emb:query:m:new"], vector)
+    assert values["emb:query:m:old"] == _embedding(2)
+
+
+def test_corrupt_binary_entry_is_dropped_as_miss():
+    client = _FakeRedis()
+    backend = RedisCache(client=client)
+    client.store["emb:doc:m:x"] = b"VEC1broken"
+
+    assert backend.get("emb:doc:m:x") is None
+    assert client.deleted == ["emb:doc:m:x"]